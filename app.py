@@ -8,6 +8,8 @@ import streamlit as st
 from sqlalchemy import text as sa_text
 from core.settings import load_settings
 from core.db import get_engine, init_db
+from core.snapshot_store import start_compaction_worker
+from core.attainment_engine import start_refresh_worker
 from core.rbac import user_roles as fetch_roles_for
 from core.policy import can_view_page, visible_pages_for
 from core.theme_apply import apply_theme_for_degree
@@ -20,8 +22,6 @@ from core.public_config import (
 )
 from core.sidebar_logo import render_logo_for_navigation
 
-# ── Import the schema registry and the auto-discover function ──
-from core.schema_registry import auto_discover, run_all as run_all_installers
 # Import any installers NOT in the 'schemas/' directory
 from screens.faculty.schema import install_all as install_faculty_module_schema
 
@@ -49,13 +49,12 @@ def _screen_path(stem: str) -> Path:
     return p
 
 # init_db() has been removed from this function.
-# This function's only job is to create or retrieve the engine
-# and cache it in session_state.
+# The engine itself is process-wide (core.db registry); session_state only
+# holds a reference for screens that read st.session_state["engine"].
 def _ensure_engine():
     if "engine" not in st.session_state:
         settings = load_settings()
-        engine = get_engine(settings.db.url)
-        st.session_state["engine"] = engine
+        st.session_state["engine"] = get_engine(settings.db.url)
     return st.session_state["engine"]
 
 def _session_user():
@@ -165,43 +164,26 @@ def main():
     # 1. Get or create the engine.
     engine = _ensure_engine()
 
-    # 2. Run database initialization ONCE per session.
+    # 2. Run database initialization. init_db bootstraps once per process
+    #    (not per session) and skips installers recorded in the
+    #    schema_migrations ledger with an unchanged source hash.
     if "db_initialized" not in st.session_state:
-        # Base engine/PRAGMA setup (idempotent)
-        init_db(engine)
-
-        # ── NEW: guarantee tables exist before any page queries
         try:
-            # --- FIXED: CALL AUTO_DISCOVER ---
-            # This dynamically imports all modules in 'schemas/'
-            # and triggers their @register decorators.
-            # Assumes 'schemas' folder is in the same directory as 'app.py'
-            auto_discover("schemas") 
-            # --- END FIX ---
-            
-            # This now runs all installers found by auto_discover
-            run_all_installers(engine)
-            
-            # --- Manual calls for schemas NOT in 'schemas/' ---
-            install_faculty_module_schema(engine)      # module-scoped faculty tables
-            #from schemas.comprehensive_subjects_schema import install_comprehensive_schema
-            #install_comprehensive_schema(engine)
-
-            
-            # --- REMOVED manual calls for schemas that are now auto-discovered ---
-            # install_administrative_positions(engine) # Handled by auto_discover
-            # ensure_outcomes_schema(engine)           # Handled by auto_discover
-            # install_comprehensive_schema(engine)   # Handled by auto_discover
-            # academic_years_schema.install_all(engine) # Handled by auto_discover
-            # degrees_schema.run(engine)                # Handled by auto_discover
-            # subjects_syllabus_schema.install_subjects_offerings_schema(engine) # Handled by auto_discover
-            
+            # auto_discover("schemas") + run_all happen inside init_db;
+            # installers NOT in 'schemas/' are passed explicitly.
+            init_db(engine, extra_installers=[
+                ("faculty_module_schema", install_faculty_module_schema),  # module-scoped faculty tables
+            ])
         except Exception as e:
             st.error("Database schema initialization failed. See details below.")
             with st.expander("Diagnostics"):
                 st.exception(e)
             st.stop()
 
+        # Snapshot retention/compaction runs off the request path (once per process)
+        start_compaction_worker(engine)
+        # Offerings flagged stale by score/rubric/CO writes are recomputed in the background
+        start_refresh_worker(engine)
         st.session_state["db_initialized"] = True
 
     branding_cfg = load_public_branding_config(engine)
@@ -26,8 +26,11 @@ try:
         rule as get_approval_rule,
         requires_reason,
         can_user_approve,
+        role_approver_policies,
     )
 except ImportError:
+    role_approver_policies = None
+
     # Fallback to original policy if enhanced not available
     from core.policy import (
         approver_roles_for as get_approver_roles,
@@ -54,6 +57,8 @@ class ApprovalHandler:
     - Checks user-specific assignments
     - Falls back to role-based when configured
     """
+
+    PAGE_SIZE = 25  # rows per page in show_pending_section
     
     def __init__(
         self,
@@ -91,54 +96,177 @@ class ApprovalHandler:
     
     # ==================== DATA FETCHING ====================
     
-    def get_pending_approvals(self, user_email: Optional[str] = None, user_roles: Optional[set] = None) -> list[dict]:
+    def _pending_filter(self, params: Dict[str, Any]) -> str:
+        """WHERE clause for pending approvals of this object type and context."""
+        params["obj_type"] = self.object_type
+        where = """
+            a.object_type = :obj_type
+            AND a.status IN ('pending', 'under_review')
+        """
+        if self.filter_pattern:
+            params["pattern"] = self.filter_pattern
+            params["degree"] = self.degree_code or ""
+            where += " AND (a.object_id LIKE :pattern OR a.object_id = :degree)"
+        return where
+
+    def _eligibility_filter(self, params: Dict[str, Any], user_email: str, user_roles: set) -> str:
+        """
+        SQL form of approvals_policy.can_user_approve for every row at once.
+
+        A user may act on a row when they are an active assigned approver
+        for its action (in scope), or when role fallback applies to the
+        action (no assignment required, or none in scope and fallback on)
+        and one of their roles is an approver role for it.
+        """
+        prefix = f"{self.object_type}."
+        policies = role_approver_policies(self.engine)
+        known = [k[len(prefix):] for k in policies if k.startswith(prefix)]
+        eligible = [k[len(prefix):] for k, roles in policies.items()
+                    if k.startswith(prefix) and roles & set(user_roles)]
+
+        params["email"] = user_email.lower().strip()
+        params["known_actions"] = json.dumps(known)
+        params["role_actions"] = json.dumps(eligible)
+        # Unknown actions fall back to superadmin only
+        params["is_superadmin"] = 1 if "superadmin" in user_roles else 0
+
+        scope = ""
+        if self.degree_code:
+            params["scope_degree"] = self.degree_code
+            scope += " AND (aa.degree_code IS NULL OR aa.degree_code = :scope_degree)"
+        if self.program_code:
+            params["scope_program"] = self.program_code
+            scope += " AND (aa.program_code IS NULL OR aa.program_code = :scope_program)"
+        if self.branch_code:
+            params["scope_branch"] = self.branch_code
+            scope += " AND (aa.branch_code IS NULL OR aa.branch_code = :scope_branch)"
+
+        assigned = f"""
+            SELECT 1 FROM approver_assignments aa
+            WHERE aa.object_type = a.object_type AND aa.action = a.action
+              AND aa.is_active = 1 {scope}
+        """
+        return f"""
+            AND (
+                (COALESCE(c.require_user_assignment, 1) = 1
+                 AND EXISTS ({assigned} AND LOWER(TRIM(aa.approver_email)) = :email))
+                OR (
+                    (COALESCE(c.require_user_assignment, 1) = 0
+                     OR (COALESCE(c.fallback_to_roles, 1) = 1 AND NOT EXISTS ({assigned})))
+                    AND (a.action IN (SELECT value FROM json_each(:role_actions))
+                         OR (:is_superadmin = 1
+                             AND a.action NOT IN (SELECT value FROM json_each(:known_actions))))
+                )
+            )
+        """
+
+    def _pending_query(
+        self,
+        select: str,
+        user_email: Optional[str],
+        user_roles: Optional[set],
+    ) -> tuple[str, Dict[str, Any]]:
+        params: Dict[str, Any] = {}
+        if not (user_email and user_roles):
+            return f"SELECT {select} FROM approvals a WHERE {self._pending_filter(params)}", params
+
+        sql = f"""
+            SELECT {select}
+            FROM approvals a
+            LEFT JOIN approval_rules_config c
+              ON c.object_type = a.object_type AND c.action = a.action
+            WHERE {self._pending_filter(params)}
+        """
+        sql += self._eligibility_filter(params, user_email, user_roles)
+        return sql, params
+
+    def get_pending_approvals(
+        self,
+        user_email: Optional[str] = None,
+        user_roles: Optional[set] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        decode_payload: bool = False,
+    ) -> list[dict]:
         """
-        Fetch all pending approvals for this object type and context.
+        Fetch pending approvals for this object type and context, newest first.
         
         If user_email and user_roles provided, only returns approvals this user can act on.
+        Eligibility is evaluated in SQL, so limit/offset page over actionable rows.
+        The payload stays a JSON string unless decode_payload is set; use
+        decode_payload(approval) for the rows you actually show.
         """
-        with self.engine.begin() as conn:
-            if self.filter_pattern:
-                rows = conn.execute(sa_text("""
-                    SELECT id, object_type, object_id, action, status, requester, 
-                           requester_email, created_at, payload, reason_note, rule
-                    FROM approvals 
-                    WHERE object_type = :obj_type
-                      AND (object_id LIKE :pattern OR object_id = :degree)
-                      AND status IN ('pending', 'under_review')
-                    ORDER BY created_at DESC
-                """), {
-                    "obj_type": self.object_type,
-                    "pattern": self.filter_pattern,
-                    "degree": self.degree_code or ""
-                }).fetchall()
-            else:
-                rows = conn.execute(sa_text("""
-                    SELECT id, object_type, object_id, action, status, requester,
-                           requester_email, created_at, payload, reason_note, rule
-                    FROM approvals 
-                    WHERE object_type = :obj_type
-                      AND status IN ('pending', 'under_review')
-                    ORDER BY created_at DESC
-                """), {"obj_type": self.object_type}).fetchall()
-        
+        if user_email and user_roles and role_approver_policies is None:
+            return self._get_pending_approvals_legacy(user_email, user_roles, limit, offset, decode_payload)
+
+        sql, params = self._pending_query(
+            """a.id, a.object_type, a.object_id, a.action, a.status, a.requester,
+               a.requester_email, a.created_at, a.payload, a.reason_note, a.rule""",
+            user_email, user_roles,
+        )
+        sql += " ORDER BY a.created_at DESC, a.id DESC"
+        if limit is not None:
+            sql += " LIMIT :limit OFFSET :offset"
+            params.update(limit=int(limit), offset=int(offset))
+
+        with self.engine.connect() as conn:
+            rows = conn.execute(sa_text(sql), params).fetchall()
+
+        results = [dict(r._mapping) for r in rows]
+        if decode_payload:
+            for d in results:
+                d['payload'] = self.decode_payload(d)
+        return results
+
+    def count_pending_approvals(self, user_email: Optional[str] = None, user_roles: Optional[set] = None) -> int:
+        """Number of rows get_pending_approvals would return without a limit."""
+        if user_email and user_roles and role_approver_policies is None:
+            return len(self._get_pending_approvals_legacy(user_email, user_roles))
+        sql, params = self._pending_query("COUNT(*)", user_email, user_roles)
+        with self.engine.connect() as conn:
+            return int(conn.execute(sa_text(sql), params).scalar() or 0)
+
+    @staticmethod
+    def decode_payload(approval: dict) -> dict:
+        """Parse an approval's payload JSON (already-decoded payloads pass through)."""
+        payload = approval.get('payload')
+        if isinstance(payload, dict):
+            return payload
+        try:
+            return json.loads(payload or '{}')
+        except (json.JSONDecodeError, TypeError):
+            return {}
+
+    def _get_pending_approvals_legacy(
+        self,
+        user_email: str,
+        user_roles: set,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        decode_payload: bool = False,
+    ) -> list[dict]:
+        """Per-row eligibility check, used when the enhanced policy is unavailable."""
+        sql, params = self._pending_query(
+            """a.id, a.object_type, a.object_id, a.action, a.status, a.requester,
+               a.requester_email, a.created_at, a.payload, a.reason_note, a.rule""",
+            None, None,
+        )
+        with self.engine.connect() as conn:
+            rows = conn.execute(sa_text(sql + " ORDER BY a.created_at DESC, a.id DESC"), params).fetchall()
+
+        # Eligibility only depends on the action, so check each action once
+        allowed: Dict[str, bool] = {}
         results = []
         for r in rows:
             d = dict(r._mapping)
-            # Parse payload JSON
-            try:
-                d['payload'] = json.loads(d.get('payload') or '{}')
-            except (json.JSONDecodeError, TypeError):
-                d['payload'] = {}
-            
-            # Filter by user permissions if provided
-            if user_email and user_roles:
-                if self._can_user_act_on_approval(d, user_email, user_roles):
-                    results.append(d)
-            else:
+            if d['action'] not in allowed:
+                allowed[d['action']] = self._can_user_act_on_approval(d, user_email, user_roles)
+            if allowed[d['action']]:
+                if decode_payload:
+                    d['payload'] = self.decode_payload(d)
                 results.append(d)
-        
-        return results
+        end = None if limit is None else offset + limit
+        return results[offset:end]
     
     def _can_user_act_on_approval(self, approval: dict, user_email: str, user_roles: set) -> bool:
         """Check if user can act on this specific approval."""
@@ -415,7 +543,17 @@ class ApprovalHandler:
         user_roles: Optional[set] = None,
     ) -> None:
         """Display a section showing pending approvals for this object type."""
-        approvals = self.get_pending_approvals(user_email, user_roles)
+        total = self.count_pending_approvals(user_email, user_roles)
+        page = 1
+        if total > self.PAGE_SIZE:
+            pages = (total + self.PAGE_SIZE - 1) // self.PAGE_SIZE
+            page = int(st.number_input(
+                f"Page (of {pages})", min_value=1, max_value=pages, value=1,
+                key=f"pending_page_{self.object_type}_{self.degree_code or 'all'}"
+            ))
+        approvals = self.get_pending_approvals(
+            user_email, user_roles, limit=self.PAGE_SIZE, offset=(page - 1) * self.PAGE_SIZE
+        ) if total else []
         
         if not approvals:
             if show_empty_message:
@@ -426,6 +564,8 @@ class ApprovalHandler:
             return
         
         st.subheader(title)
+        if total > len(approvals):
+            st.caption(f"Showing {len(approvals)} of {total}")
         
         # Convert to dataframe for display
         df = pd.DataFrame(approvals)
@@ -448,7 +588,7 @@ class ApprovalHandler:
         with st.expander("View Details"):
             for approval in approvals:
                 st.markdown(f"**Approval #{approval['id']}**")
-                st.json(approval)
+                st.json({**approval, "payload": self.decode_payload(approval)})
     
     def show_history_section(
         self,
@@ -202,7 +202,20 @@ def get_role_based_approvers(
     This is used as a fallback when no specific users are assigned.
     """
     key = f"{object_type}.{action}"
-    
+    return set(role_approver_policies(engine).get(key, {"superadmin"}))  # Ultimate fallback
+
+
+def role_approver_policies(engine: Engine) -> Dict[str, Set[str]]:
+    """
+    Approver roles for every known "object_type.action" key: the configs
+    table policy where one is set, otherwise DEFAULT_ROLE_POLICIES.
+    Keys not in the result fall back to {"superadmin"}.
+    """
+    merged = {
+        key: set(policy.get("approver_roles", []))
+        for key, policy in DEFAULT_ROLE_POLICIES.items()
+    }
+
     # Try to get from configs table first
     with engine.begin() as conn:
         table_exists = conn.execute(sa_text(
@@ -219,18 +232,13 @@ def get_role_based_approvers(
             if row and row[0]:
                 try:
                     doc = json.loads(row[0]) or {}
-                    policies = doc.get("policies", {})
-                    policy = policies.get(key, {})
-                    if policy:
-                        return set(policy.get("approver_roles", []))
+                    for key, policy in (doc.get("policies") or {}).items():
+                        if policy:
+                            merged[key] = set(policy.get("approver_roles", []))
                 except json.JSONDecodeError:
                     pass
     
-    # Fall back to defaults
-    if key in DEFAULT_ROLE_POLICIES:
-        return set(DEFAULT_ROLE_POLICIES[key].get("approver_roles", []))
-    
-    return {"superadmin"}  # Ultimate fallback
+    return merged
 
 
 # ============================================================================
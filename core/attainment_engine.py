@@ -0,0 +1,438 @@
+# core/attainment_engine.py
+"""
+CO -> PO/PSO attainment engine
+
+Computes outcome attainment for many offerings at once from the rubric
+criterion scores, the COs the criteria are linked to and the CO-PO/PSO
+correlation matrices. Students, criteria and COs are handled as pandas
+frames and NumPy arrays; the only Python loop is one matrix product per
+offering.
+
+Pipeline (compute_attainment):
+1. inputs: marks_engine.load_marks_inputs (offerings, published
+   assessments, criteria/levels with their linked_cos, scores) and
+   co_matrix.load_offering_cos (COs + correlation matrices), plus
+   indirect CO attainment - ten queries for any number of offerings,
+2. co_attainment(): each student's percentage on a CO is the marks they
+   earned over the marks available on the criteria linked to it; direct
+   attainment is the share of students at or above the CO's
+   threshold_overall_percent (else the offering's pass_threshold_overall).
+   Direct and indirect are blended with the offering's
+   direct_weight_percent / indirect_weight_percent,
+3. outcome_attainment(): per offering, C.T @ A / C.T @ 1 with C the CO x
+   outcome correlation matrix (0-3) and A the CO attainment vector; COs
+   without attainment are left out of both sums,
+4. rollup_programs(): correlation-weighted mean per (degree, program, AY,
+   kind, outcome).
+
+A criterion's COs are its own linked_cos plus those of its levels.
+
+Persistence is incremental: write paths call mark_stale() for the
+offerings whose scores, rubrics, COs or correlations they changed, and
+refresh_attainment() recomputes only those offerings and the program/AY
+groups they belong to. app.py starts start_refresh_worker(), which runs
+refresh_attainment() for the stale offerings every
+REFRESH_INTERVAL_SECONDS off the request path.
+
+Usage:
+    result = compute_attainment(engine, offering_ids)   # nothing stored
+    refresh_attainment(engine)                           # stale offerings
+    refresh_attainment(engine, offering_ids)             # explicit
+    start_refresh_worker(engine)                         # stale offerings, periodically
+    load_program_attainment(engine, "BARCH", ay_label="2025-26")
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text as sa_text
+from sqlalchemy.engine import Engine
+
+from core.co_matrix import load_offering_cos
+from core.marks_engine import DEFAULT_PASS_OVERALL, criterion_fractions, load_marks_inputs
+
+log = logging.getLogger(__name__)
+
+ATTAINMENT_KINDS = ("po", "pso")
+
+CO_COLUMNS = ["offering_id", "co_id", "co_code", "students_assessed", "students_attained",
+              "direct_percent", "indirect_percent", "attainment_percent"]
+OUTCOME_COLUMNS = ["offering_id", "kind", "outcome_code", "attainment_percent", "correlation_weight"]
+PROGRAM_COLUMNS = ["degree_code", "program_code", "ay_label", "kind", "outcome_code",
+                   "attainment_percent", "offerings"]
+
+WRITE_CHUNK = 5000
+REFRESH_INTERVAL_SECONDS = 60
+
+
+def _read(conn, sql: str, params: Dict[str, Any]) -> pd.DataFrame:
+    result = conn.execute(sa_text(sql), params)
+    return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+
+
+def _codes(raw: Any) -> List[str]:
+    if not raw:
+        return []
+    try:
+        codes = json.loads(raw) if isinstance(raw, str) else raw
+    except (TypeError, ValueError):
+        return []
+    return [str(c).strip() for c in codes or [] if str(c).strip()]
+
+
+def criterion_links(criteria: pd.DataFrame, levels: pd.DataFrame) -> pd.DataFrame:
+    """(assessment_id, criterion_key, co_code) for every CO a criterion or its levels link to."""
+    keys = ["assessment_id", "criterion_key"]
+    frames = []
+    for frame in (criteria, levels):
+        if frame.empty or "linked_cos" not in frame.columns:
+            continue
+        links = frame[keys].assign(co_code=frame["linked_cos"].map(_codes)).explode("co_code")
+        frames.append(links.dropna(subset=["co_code"]))
+    if not frames:
+        return pd.DataFrame(columns=keys + ["co_code"])
+    return pd.concat(frames, ignore_index=True).drop_duplicates()
+
+
+# ===================================================================
+# COMPUTATION
+# ===================================================================
+
+def co_attainment(fractions: pd.DataFrame, assessments: pd.DataFrame, links: pd.DataFrame,
+                  cos: pd.DataFrame, offerings: pd.DataFrame,
+                  indirect: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per (offering, CO): students assessed / attained, direct, indirect and
+    blended attainment percent. `cos` has offering_id, co_id, co_code and
+    threshold_overall_percent; `indirect` has co_id and attainment_percent.
+    """
+    if cos.empty:
+        return pd.DataFrame(columns=CO_COLUMNS)
+
+    scored = (fractions
+              .merge(assessments[["assessment_id", "offering_id", "max_marks"]], on="assessment_id")
+              .merge(links, on=["assessment_id", "criterion_key"]))
+    scored["available"] = scored["weight_pct"].to_numpy() / 100.0 * scored["max_marks"].to_numpy(dtype=float)
+    scored["earned"] = scored["available"].to_numpy() * scored["achieved"].to_numpy()
+
+    per_student = (scored.groupby(["offering_id", "co_code", "student_id"], sort=False)
+                   [["earned", "available"]].sum().reset_index())
+    per_student = per_student[per_student["available"] > 0]
+    per_student = per_student.merge(
+        cos[["offering_id", "co_code", "threshold_overall_percent"]], on=["offering_id", "co_code"]
+    )
+    threshold = per_student["threshold_overall_percent"].fillna(
+        per_student["offering_id"].map(offerings.set_index("offering_id")["pass_threshold_overall"])
+    ).fillna(DEFAULT_PASS_OVERALL).to_numpy(dtype=float)
+    percent = per_student["earned"].to_numpy() / per_student["available"].to_numpy() * 100.0
+    per_student["attained"] = percent >= threshold
+
+    counts = (per_student.groupby(["offering_id", "co_code"])["attained"]
+              .agg(students_assessed="size", students_attained="sum").reset_index())
+    result = cos[["offering_id", "co_id", "co_code"]].merge(counts, on=["offering_id", "co_code"], how="left")
+    result[["students_assessed", "students_attained"]] = (
+        result[["students_assessed", "students_attained"]].fillna(0).astype(int)
+    )
+    assessed = result["students_assessed"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result["direct_percent"] = np.where(
+            assessed > 0, result["students_attained"].to_numpy() / assessed * 100.0, np.nan
+        )
+    result["indirect_percent"] = result["co_id"].map(
+        indirect.set_index("co_id")["attainment_percent"] if not indirect.empty else pd.Series(dtype=float)
+    ).astype(float)
+
+    # Blend with the offering weights, over whichever sources exist
+    weights = offerings.set_index("offering_id")[["direct_weight_percent", "indirect_weight_percent"]]
+    weights = weights.reindex(result["offering_id"]).fillna(0.0).to_numpy(dtype=float, copy=True)
+    weights[weights.sum(axis=1) == 0] = 1.0  # 0/0 weights: plain mean
+    values = result[["direct_percent", "indirect_percent"]].to_numpy(dtype=float)
+    present = ~np.isnan(values)
+    weight_sum = (weights * present).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result["attainment_percent"] = np.where(
+            weight_sum > 0, (np.nan_to_num(values) * weights).sum(axis=1) / weight_sum, np.nan
+        )
+    return result[CO_COLUMNS]
+
+
+def outcome_attainment(co_result: pd.DataFrame, matrices: Dict[int, Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Per (offering, kind, outcome): correlation-weighted CO attainment.
+    `matrices` is {offering_id: {kind: CorrelationMatrix}}. Outcomes no
+    attained CO correlates with are omitted.
+    """
+    attainment = co_result.set_index("co_id")["attainment_percent"]
+    frames = []
+    for offering_id, by_kind in matrices.items():
+        for kind in ATTAINMENT_KINDS:
+            matrix = by_kind.get(kind)
+            if matrix is None or not matrix.codes:
+                continue
+            a = attainment.reindex(matrix.co_ids).to_numpy(dtype=float)
+            present = ~np.isnan(a)
+            c = matrix.values.astype(float)
+            weight = c.T @ present
+            with np.errstate(divide="ignore", invalid="ignore"):
+                value = (c.T @ np.nan_to_num(a)) / weight
+            keep = weight > 0
+            if keep.any():
+                frames.append(pd.DataFrame({
+                    "offering_id": offering_id,
+                    "kind": kind,
+                    "outcome_code": np.asarray(matrix.codes, dtype=object)[keep],
+                    "attainment_percent": value[keep],
+                    "correlation_weight": weight[keep],
+                }))
+    if not frames:
+        return pd.DataFrame(columns=OUTCOME_COLUMNS)
+    return pd.concat(frames, ignore_index=True)[OUTCOME_COLUMNS]
+
+
+def rollup_programs(outcomes: pd.DataFrame, offerings: pd.DataFrame) -> pd.DataFrame:
+    """Correlation-weighted mean of offering outcome attainment per (degree, program, AY)."""
+    if outcomes.empty:
+        return pd.DataFrame(columns=PROGRAM_COLUMNS)
+    meta = offerings[["offering_id", "degree_code", "program_code", "ay_label"]].copy()
+    meta["program_code"] = meta["program_code"].fillna("")
+    rows = outcomes.merge(meta, on="offering_id")
+    rows["weighted"] = rows["attainment_percent"].to_numpy(dtype=float) * rows["correlation_weight"].to_numpy(dtype=float)
+    groups = (rows.groupby(["degree_code", "program_code", "ay_label", "kind", "outcome_code"])
+              .agg(weighted=("weighted", "sum"), weight=("correlation_weight", "sum"),
+                   offerings=("offering_id", "nunique"))
+              .reset_index())
+    groups["attainment_percent"] = groups["weighted"] / groups["weight"]
+    return groups[PROGRAM_COLUMNS]
+
+
+def compute_attainment(engine: Engine, offering_ids: Iterable[int],
+                       published_only: bool = True) -> Dict[str, pd.DataFrame]:
+    """
+    CO, outcome and program/AY attainment for the offerings, without
+    storing anything. Returns {"cos", "outcomes", "programs", "offerings"}.
+    """
+    offering_ids = list(dict.fromkeys(int(i) for i in offering_ids))
+    inputs = load_marks_inputs(engine, offering_ids, published_only=published_only)
+    loaded = load_offering_cos(engine, offering_ids,
+                               columns=["id", "co_code", "threshold_overall_percent"])
+    with engine.connect() as conn:
+        indirect = _read(conn, """
+            SELECT co_id, attainment_percent FROM co_indirect_attainment
+            WHERE offering_id IN (SELECT value FROM json_each(:ids))
+        """, {"ids": json.dumps(offering_ids)})
+
+    cos = pd.DataFrame(
+        [{"offering_id": oid, "co_id": co["id"], "co_code": co["co_code"],
+          "threshold_overall_percent": co.get("threshold_overall_percent")}
+         for oid, entry in loaded.items() for co in entry.cos],
+        columns=["offering_id", "co_id", "co_code", "threshold_overall_percent"],
+    )
+    fractions = criterion_fractions(inputs["scores"], inputs["criteria"], inputs["levels"])
+    links = criterion_links(inputs["criteria"], inputs["levels"])
+
+    co_result = co_attainment(fractions, inputs["assessments"], links, cos,
+                              inputs["offerings"], indirect)
+    outcomes = outcome_attainment(co_result, {oid: entry.matrices for oid, entry in loaded.items()})
+    return {
+        "cos": co_result,
+        "outcomes": outcomes,
+        "programs": rollup_programs(outcomes, inputs["offerings"]),
+        "offerings": inputs["offerings"],
+    }
+
+
+# ===================================================================
+# PERSISTENCE
+# ===================================================================
+
+def mark_stale(conn, offering_ids: Iterable[int]) -> None:
+    """Flag offerings for the next refresh_attainment(); call inside the writing transaction."""
+    rows = [{"o": int(i)} for i in dict.fromkeys(offering_ids) if i is not None]
+    if rows:
+        conn.execute(sa_text("""
+            INSERT INTO attainment_stale (offering_id) VALUES (:o)
+            ON CONFLICT(offering_id) DO UPDATE SET
+                version = version + 1, marked_at = CURRENT_TIMESTAMP
+        """), rows)
+
+
+def mark_stale_assessments(conn, assessment_ids: Iterable[int]) -> None:
+    """mark_stale() for the offerings owning these rubric assessments."""
+    ids = json.dumps([int(i) for i in dict.fromkeys(assessment_ids)])
+    offering_ids = conn.execute(sa_text("""
+        SELECT DISTINCT rc.offering_id
+        FROM rubric_assessments ra
+        JOIN rubric_configs rc ON rc.id = ra.rubric_config_id
+        WHERE ra.id IN (SELECT value FROM json_each(:ids))
+    """), {"ids": ids}).scalars().all()
+    mark_stale(conn, offering_ids)
+
+
+def save_indirect_attainment(engine: Engine, offering_id: int, values: Dict[int, float],
+                             respondents: Optional[int] = None) -> int:
+    """Upsert indirect (survey) attainment percent per CO id of an offering."""
+    rows = [{"o": int(offering_id), "c": int(co_id), "p": float(pct), "r": respondents}
+            for co_id, pct in values.items() if pct is not None]
+    with engine.begin() as conn:
+        if rows:
+            conn.execute(sa_text("""
+                INSERT INTO co_indirect_attainment (offering_id, co_id, attainment_percent, respondents)
+                VALUES (:o, :c, :p, :r)
+                ON CONFLICT(offering_id, co_id) DO UPDATE SET
+                    attainment_percent = excluded.attainment_percent,
+                    respondents = excluded.respondents,
+                    updated_at = CURRENT_TIMESTAMP
+            """), rows)
+        mark_stale(conn, [offering_id])
+    return len(rows)
+
+
+def _records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def _write(conn, sql: str, records: List[Dict[str, Any]]) -> None:
+    for start in range(0, len(records), WRITE_CHUNK):
+        conn.execute(sa_text(sql), records[start:start + WRITE_CHUNK])
+
+
+def refresh_attainment(engine: Engine, offering_ids: Optional[Iterable[int]] = None) -> Dict[str, int]:
+    """
+    Recompute and store attainment for the given offerings, or for every
+    offering flagged by mark_stale() when none are given, then rebuild the
+    program/AY rows of the groups they belong to. Flags raised while the
+    refresh ran are kept for the next one.
+    Returns {"offerings", "cos", "outcomes", "groups"}.
+    """
+    with engine.connect() as conn:
+        stale = _read(conn, "SELECT offering_id, version FROM attainment_stale", {})
+    if offering_ids is None:
+        offering_ids = stale["offering_id"].astype(int).tolist()
+    offering_ids = list(dict.fromkeys(int(i) for i in offering_ids))
+    if not offering_ids:
+        return {"offerings": 0, "cos": 0, "outcomes": 0, "groups": 0}
+
+    result = compute_attainment(engine, offering_ids)
+    groups = result["offerings"][["degree_code", "program_code", "ay_label"]].fillna("").drop_duplicates()
+    ids = {"ids": json.dumps(offering_ids)}
+    cleared = _records(stale[stale["offering_id"].isin(offering_ids)].astype(int))
+
+    with engine.begin() as conn:
+        conn.execute(sa_text("DELETE FROM co_attainment WHERE offering_id IN (SELECT value FROM json_each(:ids))"), ids)
+        conn.execute(sa_text("DELETE FROM outcome_attainment WHERE offering_id IN (SELECT value FROM json_each(:ids))"), ids)
+        _write(conn, """
+            INSERT INTO co_attainment (
+                offering_id, co_id, co_code, students_assessed, students_attained,
+                direct_percent, indirect_percent, attainment_percent
+            ) VALUES (
+                :offering_id, :co_id, :co_code, :students_assessed, :students_attained,
+                :direct_percent, :indirect_percent, :attainment_percent
+            )
+        """, _records(result["cos"]))
+        _write(conn, """
+            INSERT INTO outcome_attainment (
+                offering_id, kind, outcome_code, attainment_percent, correlation_weight
+            ) VALUES (
+                :offering_id, :kind, :outcome_code, :attainment_percent, :correlation_weight
+            )
+        """, _records(result["outcomes"]))
+
+        # Program/AY rows are rebuilt from every stored offering of the group
+        group_keys = {"groups": json.dumps(groups.values.tolist())}
+        stored = _read(conn, """
+            SELECT oa.offering_id, oa.kind, oa.outcome_code, oa.attainment_percent, oa.correlation_weight,
+                   o.degree_code, o.program_code, o.ay_label
+            FROM outcome_attainment oa
+            JOIN subject_offerings o ON o.id = oa.offering_id
+            JOIN json_each(:groups) g
+              ON o.degree_code = json_extract(g.value, '$[0]')
+             AND COALESCE(o.program_code, '') = json_extract(g.value, '$[1]')
+             AND o.ay_label = json_extract(g.value, '$[2]')
+        """, group_keys)
+        programs = rollup_programs(stored[OUTCOME_COLUMNS], stored.drop_duplicates("offering_id"))
+        conn.execute(sa_text("""
+            DELETE FROM program_outcome_attainment
+            WHERE EXISTS (
+                SELECT 1 FROM json_each(:groups) g
+                WHERE degree_code = json_extract(g.value, '$[0]')
+                  AND program_code = json_extract(g.value, '$[1]')
+                  AND ay_label = json_extract(g.value, '$[2]')
+            )
+        """), group_keys)
+        _write(conn, """
+            INSERT INTO program_outcome_attainment (
+                degree_code, program_code, ay_label, kind, outcome_code, attainment_percent, offerings
+            ) VALUES (
+                :degree_code, :program_code, :ay_label, :kind, :outcome_code, :attainment_percent, :offerings
+            )
+        """, _records(programs))
+
+        if cleared:
+            conn.execute(sa_text("""
+                DELETE FROM attainment_stale WHERE offering_id = :offering_id AND version = :version
+            """), cleared)
+
+    stats = {
+        "offerings": len(offering_ids),
+        "cos": len(result["cos"]),
+        "outcomes": len(result["outcomes"]),
+        "groups": len(groups),
+    }
+    log.info("attainment refreshed: %s", stats)
+    return stats
+
+
+_WORKERS: Dict[str, threading.Thread] = {}
+_WORKERS_LOCK = threading.Lock()
+
+
+def _refresh_loop(engine: Engine, interval: float) -> None:
+    while True:
+        try:
+            refresh_attainment(engine)
+        except Exception:
+            log.exception("Attainment refresh failed")
+        time.sleep(interval)
+
+
+def start_refresh_worker(engine: Engine, interval: float = REFRESH_INTERVAL_SECONDS) -> None:
+    """Start the periodic stale-attainment refresh thread for this database (once per process)."""
+    key = str(engine.url)
+    with _WORKERS_LOCK:
+        worker = _WORKERS.get(key)
+        if worker is not None and worker.is_alive():
+            return
+        worker = threading.Thread(
+            target=_refresh_loop, args=(engine, interval),
+            name="attainment-refresh", daemon=True
+        )
+        _WORKERS[key] = worker
+        worker.start()
+
+
+def load_program_attainment(engine: Engine, degree_code: str,
+                            program_code: Optional[str] = None,
+                            ay_label: Optional[str] = None) -> pd.DataFrame:
+    """Stored program/AY outcome attainment for a degree (program '' = degree-wide offerings)."""
+    sql = """
+        SELECT degree_code, program_code, ay_label, kind, outcome_code, attainment_percent,
+               offerings, computed_at
+        FROM program_outcome_attainment
+        WHERE degree_code = :d
+    """
+    params: Dict[str, Any] = {"d": degree_code}
+    if program_code is not None:
+        sql += " AND program_code = :p"
+        params["p"] = program_code
+    if ay_label is not None:
+        sql += " AND ay_label = :ay"
+        params["ay"] = ay_label
+    sql += " ORDER BY ay_label, program_code, kind, outcome_code"
+    with engine.connect() as conn:
+        return _read(conn, sql, params)
@@ -0,0 +1,142 @@
+# core/co_matrix.py
+"""
+Batched Course Outcome loader
+
+Loads the COs of one or many offerings together with their PO, PSO and PEO
+correlations in four queries in total (COs + one per correlation table),
+however many offerings and COs are involved.
+
+Each offering comes back as an OfferingCOs with:
+- cos: the CO dicts, each carrying po_correlations / pso_correlations /
+  peo_correlations dicts (the shape the CO screens and exports use),
+- matrices: a dense CorrelationMatrix per kind ("po", "pso", "peo"),
+  CO rows x outcome-code columns, 0 where no correlation is stored.
+
+Usage:
+    data = load_offering_cos(engine, [12, 13, 14])
+    data[12].cos
+    data[12].matrices["po"].values      # numpy array (n_cos, n_pos)
+    data[12].matrices["po"].to_frame()  # DataFrame indexed by co_code
+"""
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text as sa_text
+from sqlalchemy.engine import Engine
+
+CORRELATION_KINDS = ("po", "pso", "peo")
+
+
+def _natural_key(code: str):
+    """PO2 before PO10."""
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", code or "")]
+
+
+@dataclass
+class CorrelationMatrix:
+    """Dense CO x outcome correlation matrix (values 0-3)."""
+    kind: str
+    co_ids: List[int]
+    co_codes: List[str]
+    codes: List[str]
+    values: np.ndarray
+
+    @classmethod
+    def build(cls, kind: str, cos: Sequence[Dict[str, Any]],
+              codes: Optional[Sequence[str]] = None) -> "CorrelationMatrix":
+        key = f"{kind}_correlations"
+        if codes is None:
+            seen = {c for co in cos for c in (co.get(key) or {})}
+            codes = sorted(seen, key=_natural_key)
+        column = {c: j for j, c in enumerate(codes)}
+        values = np.zeros((len(cos), len(codes)), dtype=np.int8)
+        for i, co in enumerate(cos):
+            for code, value in (co.get(key) or {}).items():
+                j = column.get(code)
+                if j is not None:
+                    values[i, j] = value
+        return cls(
+            kind=kind,
+            co_ids=[co["id"] for co in cos],
+            co_codes=[co.get("co_code") for co in cos],
+            codes=list(codes),
+            values=values,
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.values, index=pd.Index(self.co_codes, name="co_code"), columns=self.codes)
+
+
+@dataclass
+class OfferingCOs:
+    offering_id: int
+    cos: List[Dict[str, Any]] = field(default_factory=list)
+    matrices: Dict[str, CorrelationMatrix] = field(default_factory=dict)
+
+
+def load_offering_cos(
+    engine: Engine,
+    offering_ids: Iterable[int],
+    include_correlations: bool = True,
+    columns: Optional[Sequence[str]] = None,
+) -> Dict[int, OfferingCOs]:
+    """
+    COs (ordered by sequence, co_code) and correlations for the offerings.
+    Every requested offering gets an entry, empty if it has no COs.
+    `columns` restricts the subject_cos columns returned (default: all).
+    """
+    ids = list(dict.fromkeys(int(i) for i in offering_ids))
+    result = {oid: OfferingCOs(offering_id=oid) for oid in ids}
+    if not ids:
+        return result
+
+    select = "*"
+    if columns:
+        wanted = list(dict.fromkeys(["id", "offering_id", *columns]))
+        select = ", ".join(wanted)
+
+    with engine.connect() as conn:
+        rows = conn.execute(sa_text(f"""
+            SELECT {select} FROM subject_cos
+            WHERE offering_id IN (SELECT value FROM json_each(:ids))
+            ORDER BY offering_id, sequence, co_code
+        """), {"ids": json.dumps(ids)}).fetchall()
+        cos = [dict(r._mapping) for r in rows]
+
+        by_co: Dict[int, Dict[str, Any]] = {}
+        for co in cos:
+            if include_correlations:
+                for kind in CORRELATION_KINDS:
+                    co[f"{kind}_correlations"] = {}
+            by_co[co["id"]] = co
+            result[co["offering_id"]].cos.append(co)
+
+        if include_correlations and cos:
+            co_ids = json.dumps(list(by_co))
+            for kind in CORRELATION_KINDS:
+                corr_rows = conn.execute(sa_text(f"""
+                    SELECT co_id, {kind}_code, correlation_value
+                    FROM co_{kind}_correlations
+                    WHERE co_id IN (SELECT value FROM json_each(:ids))
+                """), {"ids": co_ids}).fetchall()
+                for co_id, code, value in corr_rows:
+                    by_co[co_id][f"{kind}_correlations"][code] = value
+
+    if include_correlations:
+        for entry in result.values():
+            entry.matrices = {
+                kind: CorrelationMatrix.build(kind, entry.cos) for kind in CORRELATION_KINDS
+            }
+
+    if columns:
+        keep = set(columns) | {f"{k}_correlations" for k in CORRELATION_KINDS}
+        for co in cos:
+            for k in [k for k in co if k not in keep]:
+                del co[k]
+    return result
@@ -0,0 +1,179 @@
+# core/config_snapshot.py
+"""
+Per-process snapshot of the `configs` table
+
+Footer, branding and theme configuration is read on every Streamlit rerun
+(every widget click) before any page logic runs. This module loads each
+namespace once per process and database, keeps the theme merged with its
+defaults per degree, and keeps the generated theme CSS per (degree, mode).
+
+Values handed out are shared between sessions: treat them as read-only.
+
+Write paths invalidate it: core.config_store.save/rollback,
+core.theme_profiles and the screens that write `configs` directly call
+invalidate(namespace). A namespace is also reloaded after MAX_AGE seconds
+so writes from other processes show up eventually.
+
+Usage:
+    footer_config(engine)                     # '*' -> 'default' -> latest
+    get_config(engine, "default", "branding")
+    app_theme(engine, degree)                 # merged with DEFAULT_THEME_CONFIG
+    theme_css(engine, degree, "dark")         # precompiled <style> block
+    invalidate("footer")                      # after a write
+"""
+from __future__ import annotations
+
+import copy
+import json
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text as sa_text
+
+MAX_AGE = 600
+
+_LOCK = threading.RLock()
+# (engine url, namespace) -> (loaded_at, [(degree, config)] newest first)
+_NAMESPACES: Dict[Tuple[str, str], Tuple[float, List[Tuple[str, dict]]]] = {}
+# (engine url, degree) -> merged theme config
+_THEMES: Dict[Tuple[str, Optional[str]], dict] = {}
+# (engine url, degree, mode) -> CSS
+_CSS: Dict[Tuple[str, Optional[str], str], str] = {}
+# Bumped on every invalidation; a load that ran across one is not stored
+_generation = 0
+
+FOOTER_NS = "footer"
+BRANDING_NS = "branding"
+THEME_NS = "app_theme"
+
+
+def _parse(raw: Any) -> dict:
+    if raw is None:
+        return {}
+    if isinstance(raw, (bytes, bytearray)):
+        raw = raw.decode("utf-8", "ignore")
+    try:
+        return json.loads(raw) or {}
+    except Exception:
+        return {}
+
+
+def _rows(engine, namespace: str) -> List[Tuple[str, dict]]:
+    key = (str(engine.url), namespace)
+    with _LOCK:
+        cached = _NAMESPACES.get(key)
+        if cached and time.monotonic() - cached[0] < MAX_AGE:
+            return cached[1]
+        generation = _generation
+
+    with engine.begin() as conn:
+        result = conn.execute(sa_text(
+            "SELECT degree, config_json FROM configs WHERE namespace=:ns ORDER BY updated_at DESC, id DESC"
+        ), {"ns": namespace}).fetchall()
+    rows = [(r[0], _parse(r[1])) for r in result]
+
+    with _LOCK:
+        if generation == _generation:
+            _NAMESPACES[key] = (time.monotonic(), rows)
+            if namespace == THEME_NS:
+                # Themes and CSS derived from an older load are stale
+                _drop_theme(str(engine.url))
+    return rows
+
+
+def _drop_theme(url: Optional[str] = None) -> None:
+    for cache in (_THEMES, _CSS):
+        for key in [k for k in cache if url is None or k[0] == url]:
+            del cache[key]
+
+
+def get_config(engine, degree: str, namespace: str) -> dict:
+    """Config stored for exactly (degree, namespace), or {}."""
+    for row_degree, cfg in _rows(engine, namespace):
+        if row_degree == degree:
+            return cfg
+    return {}
+
+
+def resolve_config(engine, namespace: str, degrees: Iterable[Optional[str]]) -> dict:
+    """First config found for `degrees` in order, else the most recent of the namespace."""
+    rows = _rows(engine, namespace)
+    by_degree = {}
+    for row_degree, cfg in rows:
+        by_degree.setdefault(row_degree, cfg)
+    for degree in degrees:
+        if degree and degree in by_degree:
+            return by_degree[degree]
+    return rows[0][1] if rows else {}
+
+
+def footer_config(engine) -> dict:
+    """The one footer applied everywhere: '*' wins, then 'default', then the latest."""
+    return resolve_config(engine, FOOTER_NS, ("*", "default"))
+
+
+def branding_config(engine) -> dict:
+    return get_config(engine, "default", BRANDING_NS)
+
+
+def app_theme(engine, degree: Optional[str] = None) -> dict:
+    """Theme for degree (else '*', else latest) merged over DEFAULT_THEME_CONFIG."""
+    from core.theme_manager import DEFAULT_THEME_CONFIG, _deep_merge
+
+    url = str(engine.url)
+    db_config = resolve_config(engine, THEME_NS, (degree, "*"))
+    with _LOCK:
+        theme = _THEMES.get((url, degree))
+        if theme is not None:
+            return theme
+        generation = _generation
+
+    theme = _deep_merge(copy.deepcopy(DEFAULT_THEME_CONFIG), copy.deepcopy(db_config))
+    with _LOCK:
+        if generation == _generation:
+            _THEMES[(url, degree)] = theme
+    return theme
+
+
+def theme_css(engine, degree: Optional[str], mode: str) -> str:
+    """The <style> block for a degree's theme in light or dark mode."""
+    from core.theme import build_css
+
+    url = str(engine.url)
+    theme = app_theme(engine, degree)
+    with _LOCK:
+        css = _CSS.get((url, degree, mode))
+        if css is not None:
+            return css
+        generation = _generation
+
+    theme_node = theme.get("theme", {})
+    tokens = theme_node.get("tokens", {})
+    css = build_css(
+        mode,
+        tokens.get(mode, tokens.get("light", {})),  # Fallback to light tokens
+        theme_node.get("background", {}),
+        theme.get("fonts", {}),
+        theme_node.get("ui_primitives", {}),
+        components=theme_node.get("components", {}),
+    )
+    with _LOCK:
+        if generation == _generation:
+            _CSS[(url, degree, mode)] = css
+    return css
+
+
+def invalidate(*namespaces: str) -> None:
+    """Drop cached namespaces (all of them if none given), in every database."""
+    global _generation
+    with _LOCK:
+        _generation += 1
+        if not namespaces:
+            _NAMESPACES.clear()
+            _drop_theme()
+            return
+        for key in [k for k in _NAMESPACES if k[1] in namespaces]:
+            del _NAMESPACES[key]
+        if THEME_NS in namespaces:
+            _drop_theme()
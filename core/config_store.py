@@ -3,6 +3,8 @@ import json
 from typing import Optional, Tuple, List
 from sqlalchemy import text as sql_text
 
+from core.config_snapshot import invalidate as invalidate_snapshot
+
 MAX_VERSIONS = 50  # cap history
 
 def ensure_schema(engine):
@@ -61,6 +63,7 @@ def save(engine, degree: str, namespace: str, new_cfg: dict, saved_by: Optional[
                 conn.execute(sql_text(
                     "DELETE FROM configs_versions WHERE id IN (%s)" % ",".join([str(i) for i in to_delete])
                 ))
+    invalidate_snapshot(namespace)
     return next_ver, current
 
 def history(engine, degree: str, namespace: str) -> List[dict]:
@@ -95,4 +98,5 @@ def rollback(engine, degree: str, namespace: str, version: int, saved_by: Option
             INSERT OR IGNORE INTO configs_versions (degree, namespace, version, config_json, saved_by, reason)
             VALUES (:d, :ns, (SELECT COALESCE(MAX(version),0)+1 FROM configs_versions WHERE degree=:d AND namespace=:ns), :cfg, :by, :why)
         """), dict(d=degree, ns=namespace, cfg=row[0], by=saved_by, why=reason))
+    invalidate_snapshot(namespace)
     return True
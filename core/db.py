@@ -1,19 +1,193 @@
 # app/core/db.py
 from __future__ import annotations
+import logging
+import re
+import threading
 from pathlib import Path
-from sqlalchemy import create_engine, text as sa_text
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import create_engine, event, text as sa_text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 
-from core.schema_registry import auto_discover, run_all
+from core.schema_registry import auto_discover, run_all, run_installers, SchemaInstaller
 
-def get_engine(db_url: str):
-    if db_url.startswith("sqlite:///"):
-        db_file = db_url.replace("sqlite:///", "")
-        Path(db_file).parent.mkdir(parents=True, exist_ok=True)
-    engine = create_engine(db_url, future=True)
+log = logging.getLogger(__name__)
+
+# Used when settings.yaml has no db.pragmas block
+DEFAULT_SQLITE_PRAGMAS: Dict[str, object] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "cache_size": -20000,
+    "mmap_size": 268435456,
+    "temp_store": "MEMORY",
+}
+
+# Process-wide engine registry: one engine (and one pool) per URL, shared by
+# every Streamlit session instead of one engine per browser tab.
+_ENGINES: Dict[str, Engine] = {}
+_ENGINES_LOCK = threading.Lock()
+
+# Extra per-connection setup, called as hook(dbapi_connection, engine_url)
+ConnectHook = Callable[[object, str], None]
+_CONNECT_HOOKS: List[ConnectHook] = []
+
+# URL -> names of extra installers already run by this process's bootstrap
+_BOOTSTRAPPED: Dict[str, Set[str]] = {}
+_BOOTSTRAP_LOCK = threading.Lock()
+
+_PRAGMA_NAME = re.compile(r"^[A-Za-z_]+$")
+_PRAGMA_VALUE = re.compile(r"^-?[A-Za-z0-9_]+$")
+
+
+def register_connect_hook(hook: ConnectHook) -> ConnectHook:
+    """Registers a function run on every new DBAPI connection of every engine."""
+    if hook not in _CONNECT_HOOKS:
+        _CONNECT_HOOKS.append(hook)
+    return hook
+
+
+def _is_sqlite(db_url: str) -> bool:
+    return db_url.startswith("sqlite")
+
+
+def _is_sqlite_memory(db_url: str) -> bool:
+    return db_url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in db_url
+
+
+def _db_settings():
+    try:
+        from core.settings import load_settings
+        return load_settings().db
+    except Exception:
+        return None
+
+
+def _apply_pragmas(dbapi_connection, pragmas: Dict[str, object]) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            value = str(value)
+            if not _PRAGMA_NAME.match(name) or not _PRAGMA_VALUE.match(value):
+                log.warning("Ignoring invalid PRAGMA %s=%s", name, value)
+                continue
+            try:
+                cursor.execute(f"PRAGMA {name}={value}")
+            except Exception as e:
+                log.warning("PRAGMA %s=%s failed: %s", name, value, e)
+    finally:
+        cursor.close()
+
+
+def _create_engine(db_url: str) -> Engine:
+    db_cfg = _db_settings()
+    is_sqlite = _is_sqlite(db_url)
+    is_memory = is_sqlite and _is_sqlite_memory(db_url)
+
+    kwargs: Dict[str, object] = {"future": True, "pool_pre_ping": True}
+    if not is_memory:
+        pool = db_cfg.pool if db_cfg is not None else None
+        kwargs["pool_size"] = pool.size if pool else 10
+        kwargs["max_overflow"] = pool.max_overflow if pool else 20
+        kwargs["pool_timeout"] = pool.timeout if pool else 30
+        kwargs["pool_recycle"] = pool.recycle if pool else 1800
+
+    pragmas: Dict[str, object] = {}
+    if is_sqlite:
+        # Pooled connections are handed between Streamlit script threads
+        kwargs["connect_args"] = {"check_same_thread": False}
+        pragmas = dict((db_cfg.pragmas if db_cfg is not None and db_cfg.pragmas else DEFAULT_SQLITE_PRAGMAS))
+        if is_memory:
+            pragmas.pop("journal_mode", None)
+            pragmas.pop("mmap_size", None)
+
+    engine = create_engine(db_url, **kwargs)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, _connection_record):
+        if pragmas:
+            _apply_pragmas(dbapi_connection, pragmas)
+        for hook in list(_CONNECT_HOOKS):
+            try:
+                hook(dbapi_connection, db_url)
+            except Exception as e:
+                log.warning("Connect hook %s failed: %s", getattr(hook, '__name__', hook), e)
+
+    return engine
+
+
+def get_engine(db_url: Optional[str] = None) -> Engine:
+    """
+    Returns the process-wide engine for db_url, creating it on first use.
+    If db_url is omitted, the URL from config/settings.yaml is used.
+    """
+    if not db_url:
+        db_cfg = _db_settings()
+        if db_cfg is None:
+            raise RuntimeError("No database URL given and settings.yaml could not be loaded.")
+        db_url = db_cfg.url
+
+    engine = _ENGINES.get(db_url)
+    if engine is not None:
+        return engine
+
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(db_url)
+        if engine is None:
+            if db_url.startswith("sqlite:///"):
+                db_file = db_url.replace("sqlite:///", "")
+                if db_file and db_file != ":memory:":
+                    Path(db_file).parent.mkdir(parents=True, exist_ok=True)
+            engine = _create_engine(db_url)
+            _ENGINES[db_url] = engine
     return engine
 
-def init_db(engine):
+
+def dispose_engines() -> None:
+    """Disposes and forgets every registered engine (tests, config reloads)."""
+    with _ENGINES_LOCK:
+        for engine in _ENGINES.values():
+            engine.dispose()
+        _ENGINES.clear()
+
+def init_db(
+    engine: Engine,
+    extra_installers: Optional[Iterable[Tuple[str, SchemaInstaller]]] = None,
+    force: bool = False,
+) -> None:
+    """
+    Bootstraps the schema once per process and database URL.
+
+    Later calls (other sessions, reruns, footer rendering) return immediately.
+    Within the bootstrap, installers already recorded in the schema_migrations
+    ledger with an unchanged source hash are skipped.
+    extra_installers are (name, fn) pairs for installers outside schemas/,
+    run after the registered ones through the same ledger.
+    """
+    key = str(engine.url)
+    extras = list(extra_installers or [])
+    if not force and _bootstrap_done(key, extras):
+        return
+
+    with _BOOTSTRAP_LOCK:
+        if not force and _bootstrap_done(key, extras):
+            return
+        if force or key not in _BOOTSTRAPPED:
+            _bootstrap(engine, extras, force)
+        else:
+            # Core bootstrap already ran (e.g. from the footer); only the
+            # extra installers this caller brought are still pending.
+            pending = [(n, fn) for n, fn in extras if n not in _BOOTSTRAPPED[key]]
+            run_installers(engine, pending)
+        _BOOTSTRAPPED.setdefault(key, set()).update(n for n, _ in extras)
+
+
+def _bootstrap_done(key: str, extras: List[Tuple[str, SchemaInstaller]]) -> bool:
+    done = _BOOTSTRAPPED.get(key)
+    return done is not None and all(n in done for n, _ in extras)
+
+
+def _bootstrap(engine: Engine, extra_installers: List[Tuple[str, SchemaInstaller]], force: bool) -> None:
     # 0) ultra-core tables that other modules may rely on
     with engine.begin() as conn:
         conn.execute(sa_text("""
@@ -31,6 +205,10 @@ def init_db(engine):
     auto_discover("schemas")
 
     # 2) run all registered ensure_*_schema(engine) functions
-    run_all(engine)
+    run_all(engine, force=force)
+
+    # 3) module-scoped installers that are not auto-discovered
+    if extra_installers:
+        run_installers(engine, extra_installers, force=force)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False)
@@ -0,0 +1,370 @@
+# core/import_jobs.py
+"""
+Background Import Jobs
+
+Large CSV imports run outside the Streamlit script run. An upload is stored
+as a job, then a worker thread feeds it to the screen's import function in
+fixed-size chunks. Each chunk commits on its own and is followed by a
+checkpoint (next_row + counters + row issues), so:
+
+- a page rerun or navigation does not lose the import,
+- a failure keeps every chunk committed before it,
+- resume_import_job() restarts from the last checkpoint.
+
+A chunk that committed but crashed before its checkpoint is re-run on
+resume; the registered import functions are upserts, so this is safe.
+
+Usage:
+    register_import_handler("students", run_chunk)        # once, at import time
+    job_id = submit_import_job(engine, "students", df, params={...})
+    render_import_jobs_panel(engine, "students")           # progress + errors
+"""
+from __future__ import annotations
+
+import io
+import json
+import logging
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+import streamlit as st
+from sqlalchemy import text as sa_text
+from sqlalchemy.engine import Engine
+
+from core.query_cache import clear_all
+
+log = logging.getLogger(__name__)
+
+# (engine, chunk, params) -> (errors, success_count, skipped_rows)
+ImportHandler = Callable[
+    [Engine, pd.DataFrame, Dict[str, Any]],
+    Tuple[List[Dict[str, Any]], int, List[Dict[str, Any]]],
+]
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_WORKERS = 2
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+STATUS_CANCEL_REQUESTED = "cancel_requested"
+
+_ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING, STATUS_CANCEL_REQUESTED)
+_RESUMABLE_STATUSES = (STATUS_FAILED, STATUS_CANCELLED)
+
+_HANDLERS: Dict[str, ImportHandler] = {}
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+# Job ids scheduled in this process; a 'running' job not in here was
+# interrupted by a restart and can be resumed.
+_LIVE_JOBS: Set[str] = set()
+
+
+def register_import_handler(kind: str, handler: ImportHandler) -> None:
+    """Register the chunk import function for a job kind."""
+    _HANDLERS[kind] = handler
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="import-job")
+        return _EXECUTOR
+
+
+def _schedule(engine: Engine, job_id: str) -> None:
+    with _EXECUTOR_LOCK:
+        _LIVE_JOBS.add(job_id)
+    _executor().submit(_run_job, engine, job_id)
+
+
+# ============================================================================
+# JOB API
+# ============================================================================
+
+def submit_import_job(
+    engine: Engine,
+    kind: str,
+    df: pd.DataFrame,
+    params: Optional[Dict[str, Any]] = None,
+    created_by: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> str:
+    """Store the upload as a job and queue it. Returns the job id."""
+    if kind not in _HANDLERS:
+        raise ValueError(f"No import handler registered for '{kind}'")
+
+    job_id = uuid.uuid4().hex
+    # The index is kept so chunk row numbers match the uploaded file
+    payload = df.to_csv(index=True)
+
+    with engine.begin() as conn:
+        conn.execute(sa_text("""
+            INSERT INTO import_jobs (id, kind, status, params_json, total_rows, chunk_size, created_by)
+            VALUES (:id, :kind, :status, :params, :total, :chunk, :by)
+        """), {
+            "id": job_id, "kind": kind, "status": STATUS_QUEUED,
+            "params": json.dumps(params or {}), "total": len(df),
+            "chunk": max(1, int(chunk_size)), "by": created_by,
+        })
+        conn.execute(sa_text(
+            "INSERT INTO import_job_payloads (job_id, data) VALUES (:id, :data)"
+        ), {"id": job_id, "data": payload})
+
+    _schedule(engine, job_id)
+    return job_id
+
+
+def resume_import_job(engine: Engine, job_id: str) -> bool:
+    """Requeue a failed, cancelled or interrupted job from its checkpoint."""
+    job = get_import_job(engine, job_id)
+    if not job or not is_resumable(job):
+        return False
+
+    with engine.begin() as conn:
+        conn.execute(sa_text("""
+            UPDATE import_jobs
+               SET status = :queued, last_error = NULL, finished_at = NULL, updated_at = CURRENT_TIMESTAMP
+             WHERE id = :id
+        """), {"queued": STATUS_QUEUED, "id": job_id})
+
+    _schedule(engine, job_id)
+    return True
+
+
+def cancel_import_job(engine: Engine, job_id: str) -> None:
+    """Ask a job to stop after its current chunk."""
+    with engine.begin() as conn:
+        conn.execute(sa_text("""
+            UPDATE import_jobs
+               SET status = :status, updated_at = CURRENT_TIMESTAMP
+             WHERE id = :id AND status IN ('queued', 'running')
+        """), {"status": STATUS_CANCEL_REQUESTED, "id": job_id})
+
+
+def get_import_job(engine: Engine, job_id: str) -> Optional[Dict[str, Any]]:
+    with engine.connect() as conn:
+        row = conn.execute(sa_text(
+            "SELECT * FROM import_jobs WHERE id = :id"
+        ), {"id": job_id}).mappings().fetchone()
+    return dict(row) if row else None
+
+
+def list_import_jobs(engine: Engine, kind: str, limit: int = 10) -> List[Dict[str, Any]]:
+    with engine.connect() as conn:
+        rows = conn.execute(sa_text("""
+            SELECT * FROM import_jobs
+             WHERE kind = :kind
+             ORDER BY created_at DESC, rowid DESC
+             LIMIT :limit
+        """), {"kind": kind, "limit": limit}).mappings().fetchall()
+    return [dict(r) for r in rows]
+
+
+def get_import_job_issues(engine: Engine, job_id: str) -> pd.DataFrame:
+    """Errors and skipped rows reported so far, in file order."""
+    with engine.connect() as conn:
+        rows = conn.execute(sa_text("""
+            SELECT row, email, issue_type, message
+              FROM import_job_issues
+             WHERE job_id = :id
+             ORDER BY row, id
+        """), {"id": job_id}).fetchall()
+    return pd.DataFrame(rows, columns=["row", "email", "type", "message"])
+
+
+def is_interrupted(job: Dict[str, Any]) -> bool:
+    """Running or queued in the DB, but no worker in this process owns it."""
+    return job["status"] in _ACTIVE_STATUSES and job["id"] not in _LIVE_JOBS
+
+
+def is_resumable(job: Dict[str, Any]) -> bool:
+    return job["status"] in _RESUMABLE_STATUSES or is_interrupted(job)
+
+
+# ============================================================================
+# WORKER
+# ============================================================================
+
+def _load_payload(engine: Engine, job_id: str) -> pd.DataFrame:
+    with engine.connect() as conn:
+        data = conn.execute(sa_text(
+            "SELECT data FROM import_job_payloads WHERE job_id = :id"
+        ), {"id": job_id}).scalar()
+    if data is None:
+        raise RuntimeError("Upload data for this job is no longer available")
+    return pd.read_csv(io.StringIO(data), index_col=0)
+
+
+def _checkpoint(
+    engine: Engine,
+    job_id: str,
+    chunk_start: int,
+    next_row: int,
+    errors: List[Dict[str, Any]],
+    success: int,
+    skipped: List[Dict[str, Any]],
+) -> str:
+    """Record one chunk's outcome; returns the job status after the update."""
+    issues = [
+        {"job": job_id, "start": chunk_start, "row": e.get("row"), "email": e.get("email"),
+         "type": "error", "msg": str(e.get("error", ""))}
+        for e in errors
+    ] + [
+        {"job": job_id, "start": chunk_start, "row": s.get("row"), "email": s.get("email"),
+         "type": "skipped", "msg": str(s.get("reason", ""))}
+        for s in skipped
+    ]
+    with engine.begin() as conn:
+        # Drop issues from an earlier attempt at this chunk (resume after crash)
+        conn.execute(sa_text(
+            "DELETE FROM import_job_issues WHERE job_id = :job AND chunk_start = :start"
+        ), {"job": job_id, "start": chunk_start})
+        if issues:
+            conn.execute(sa_text("""
+                INSERT INTO import_job_issues (job_id, chunk_start, row, email, issue_type, message)
+                VALUES (:job, :start, :row, :email, :type, :msg)
+            """), issues)
+        conn.execute(sa_text("""
+            UPDATE import_jobs
+               SET next_row = :next_row,
+                   success_count = success_count + :ok,
+                   error_count = error_count + :err,
+                   skipped_count = skipped_count + :skip,
+                   updated_at = CURRENT_TIMESTAMP
+             WHERE id = :id
+        """), {"next_row": next_row, "ok": success, "err": len(errors), "skip": len(skipped), "id": job_id})
+        return conn.execute(sa_text(
+            "SELECT status FROM import_jobs WHERE id = :id"
+        ), {"id": job_id}).scalar()
+
+
+def _finish(engine: Engine, job_id: str, status: str, last_error: Optional[str] = None) -> None:
+    with engine.begin() as conn:
+        conn.execute(sa_text("""
+            UPDATE import_jobs
+               SET status = :status, last_error = :err,
+                   finished_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+             WHERE id = :id
+        """), {"status": status, "err": last_error, "id": job_id})
+        if status == STATUS_COMPLETED:
+            conn.execute(sa_text("DELETE FROM import_job_payloads WHERE job_id = :id"), {"id": job_id})
+    # Committed chunks changed data behind any cached page queries
+    clear_all()
+    try:
+        st.cache_data.clear()
+    except Exception:
+        pass
+
+
+def _run_job(engine: Engine, job_id: str) -> None:
+    try:
+        job = get_import_job(engine, job_id)
+        if not job or job["status"] != STATUS_QUEUED:
+            return
+        handler = _HANDLERS.get(job["kind"])
+        if handler is None:
+            _finish(engine, job_id, STATUS_FAILED, f"No import handler registered for '{job['kind']}'")
+            return
+
+        with engine.begin() as conn:
+            conn.execute(sa_text("""
+                UPDATE import_jobs
+                   SET status = :status, started_at = COALESCE(started_at, CURRENT_TIMESTAMP),
+                       updated_at = CURRENT_TIMESTAMP
+                 WHERE id = :id
+            """), {"status": STATUS_RUNNING, "id": job_id})
+
+        df = _load_payload(engine, job_id)
+        params = json.loads(job["params_json"] or "{}")
+        chunk_size = int(job["chunk_size"])
+
+        for start in range(int(job["next_row"]), len(df), chunk_size):
+            chunk = df.iloc[start:start + chunk_size].copy()
+            errors, success, skipped = handler(engine, chunk, params)
+            status = _checkpoint(engine, job_id, start, start + len(chunk), errors, success, skipped)
+            if status == STATUS_CANCEL_REQUESTED:
+                _finish(engine, job_id, STATUS_CANCELLED)
+                return
+
+        _finish(engine, job_id, STATUS_COMPLETED)
+
+    except Exception as e:
+        log.error(f"Import job {job_id} failed: {traceback.format_exc()}")
+        try:
+            _finish(engine, job_id, STATUS_FAILED, str(e))
+        except Exception:
+            log.error(f"Could not record failure for import job {job_id}")
+    finally:
+        with _EXECUTOR_LOCK:
+            _LIVE_JOBS.discard(job_id)
+
+
+# ============================================================================
+# UI
+# ============================================================================
+
+def _render_job(engine: Engine, job: Dict[str, Any], key_prefix: str) -> None:
+    total = int(job["total_rows"] or 0)
+    done = int(job["next_row"] or 0)
+    status = job["status"]
+    interrupted = is_interrupted(job)
+    label = "interrupted" if interrupted else status
+
+    st.markdown(f"**Job** `{job['id'][:8]}` · {label} · created {job['created_at']}")
+    st.progress(done / total if total else 1.0, text=f"{done} / {total} rows")
+    st.caption(
+        f"✅ {job['success_count']} imported · ❌ {job['error_count']} errors · "
+        f"⏭️ {job['skipped_count']} skipped"
+    )
+    if job.get("last_error"):
+        st.error(f"Stopped at row {done + 2}: {job['last_error']}")
+
+    if status in (STATUS_QUEUED, STATUS_RUNNING) and not interrupted:
+        if st.button("⏹️ Cancel", key=f"{key_prefix}_cancel_{job['id']}"):
+            cancel_import_job(engine, job["id"])
+            st.rerun()
+    if is_resumable(job):
+        if st.button("▶️ Resume", key=f"{key_prefix}_resume_{job['id']}"):
+            resume_import_job(engine, job["id"])
+            st.rerun()
+
+    if job["error_count"] or job["skipped_count"]:
+        issues = get_import_job_issues(engine, job["id"])
+        with st.expander(f"Issues ({len(issues)})"):
+            st.dataframe(issues, use_container_width=True, hide_index=True)
+            st.download_button(
+                "Download Errors",
+                issues.to_csv(index=False),
+                f"import_errors_{job['id'][:8]}.csv",
+                "text/csv",
+                key=f"{key_prefix}_dl_{job['id']}",
+            )
+
+
+def render_import_jobs_panel(engine: Engine, kind: str, limit: int = 5) -> None:
+    """Recent jobs for one import kind; refreshes itself while any job is live."""
+    jobs = list_import_jobs(engine, kind, limit=limit)
+    if not jobs:
+        return
+    live = any(j["status"] in _ACTIVE_STATUSES and not is_interrupted(j) for j in jobs)
+
+    @st.fragment(run_every=2 if live else None)
+    def _panel() -> None:
+        st.markdown("#### 📊 Import Jobs")
+        current = list_import_jobs(engine, kind, limit=limit)
+        for job in current:
+            with st.container(border=True):
+                _render_job(engine, job, f"import_jobs_{kind}")
+        if live and not any(j["status"] in _ACTIVE_STATUSES and not is_interrupted(j) for j in current):
+            # Everything settled: rerun the page once so polling stops
+            st.rerun()
+
+    _panel()
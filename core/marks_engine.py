@@ -0,0 +1,444 @@
+# core/marks_engine.py
+"""
+Marks computation engine
+
+Turns per-criterion rubric scores into per-student subject results for
+whole classes at once. Every step is a pandas merge/groupby or a NumPy
+array operation over all students, assessments and offerings together;
+there is no per-student or per-row Python loop.
+
+Pipeline (compute_offering_results):
+1. load offerings, published rubric assessments, criteria weights, level
+   points and criterion scores (five queries for any number of offerings),
+2. score_assessments(): criterion scores x weights (analytic_points) or
+   level points / best level (analytic_levels) -> marks per assessment,
+3. aggregate_results(): sum per component (internal/exam/jury), normalise
+   to the offering's *_marks_max, total, percent and pass/fail against the
+   offering thresholds.
+
+Assessments are assigned to a component by the first segment of their
+component key (or their rubric's): "exam"/"external"/"ese" -> exam,
+"jury"/"viva" -> jury, anything else (including none) -> internal.
+
+Bulk entry: bulk_upsert_criterion_scores() and bulk_upsert_marks() take
+thousands of rows per call, validate them as DataFrames and write with
+executemany in one transaction.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text as sa_text
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger(__name__)
+
+COMPONENTS = ("internal", "exam", "jury")
+_COMPONENT_PREFIXES = {
+    "exam": "exam", "external": "exam", "ese": "exam",
+    "jury": "jury", "viva": "jury",
+}
+# Offering columns holding each component's maximum
+_COMPONENT_MAX = {
+    "internal": "internal_marks_max",
+    "exam": "exam_marks_max",
+    "jury": "jury_viva_marks_max",
+}
+# Same fallbacks create_offering_from_catalog uses
+DEFAULT_PASS_OVERALL = 40.0
+DEFAULT_PASS_INTERNAL = 50.0
+DEFAULT_PASS_EXTERNAL = 40.0
+
+WRITE_CHUNK = 5000
+
+Rows = Union[pd.DataFrame, Iterable[Dict[str, Any]]]
+
+
+def _read(conn, sql: str, params: Dict[str, Any]) -> pd.DataFrame:
+    result = conn.execute(sa_text(sql), params)
+    return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+
+
+def component_of(component_key: pd.Series) -> pd.Series:
+    """Map component keys ("internal.assignment", "exam", None...) to a component."""
+    prefix = component_key.fillna("").astype(str).str.split(".").str[0].str.strip().str.lower()
+    return prefix.map(_COMPONENT_PREFIXES).fillna("internal")
+
+
+def normalize(values: np.ndarray, raw_max: float, target_max: float) -> np.ndarray:
+    """Scale raw scores out of raw_max to target_max."""
+    values = np.asarray(values, dtype=float)
+    if not raw_max:
+        return np.zeros_like(values)
+    return values * (target_max / raw_max)
+
+
+# ===================================================================
+# LOADING
+# ===================================================================
+
+def load_marks_inputs(engine: Engine, offering_ids: List[int],
+                      published_only: bool = True) -> Dict[str, pd.DataFrame]:
+    """Offerings, assessments, criteria, levels and scores for the offerings."""
+    ids = json.dumps([int(i) for i in offering_ids])
+    status = "AND rc.status = 'published'" if published_only else ""
+    with engine.connect() as conn:
+        offerings = _read(conn, """
+            SELECT id AS offering_id, degree_code, program_code, ay_label,
+                   direct_weight_percent, indirect_weight_percent,
+                   internal_marks_max, exam_marks_max, jury_viva_marks_max, total_marks_max,
+                   pass_threshold_overall, pass_threshold_internal, pass_threshold_external
+            FROM subject_offerings
+            WHERE id IN (SELECT value FROM json_each(:ids))
+        """, {"ids": ids})
+        assessments = _read(conn, f"""
+            SELECT ra.id AS assessment_id, rc.offering_id, ra.max_marks,
+                   COALESCE(ra.component_key, rc.component_key) AS component_key,
+                   rc.normalization_enabled
+            FROM rubric_assessments ra
+            JOIN rubric_configs rc ON rc.id = ra.rubric_config_id
+            WHERE rc.offering_id IN (SELECT value FROM json_each(:ids)) {status}
+        """, {"ids": ids})
+        assessment_ids = json.dumps(assessments["assessment_id"].astype(int).tolist())
+        criteria = _read(conn, """
+            SELECT assessment_id, criterion_key, weight_pct, linked_cos
+            FROM rubric_assessment_criteria
+            WHERE assessment_id IN (SELECT value FROM json_each(:ids))
+        """, {"ids": assessment_ids})
+        levels = _read(conn, """
+            SELECT assessment_id, criterion_key, criterion_weight_pct, level_label, level_score,
+                   linked_cos
+            FROM rubric_assessment_levels
+            WHERE assessment_id IN (SELECT value FROM json_each(:ids))
+        """, {"ids": assessment_ids})
+        scores = _read(conn, """
+            SELECT assessment_id, student_id, criterion_key, score_pct, level_label
+            FROM rubric_criterion_scores
+            WHERE assessment_id IN (SELECT value FROM json_each(:ids))
+        """, {"ids": assessment_ids})
+
+    assessments["component"] = component_of(assessments["component_key"])
+    return {
+        "offerings": offerings,
+        "assessments": assessments,
+        "criteria": criteria,
+        "levels": levels,
+        "scores": scores,
+    }
+
+
+# ===================================================================
+# COMPUTATION
+# ===================================================================
+
+def criterion_fractions(scores: pd.DataFrame, criteria: pd.DataFrame,
+                        levels: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per scored (assessment, student, criterion): `achieved`, the fraction
+    of the criterion earned (0-1), and the criterion's `weight_pct`.
+    analytic_points: score_pct / 100
+    analytic_levels: level_score / best level_score of the criterion
+    """
+    keys = ["assessment_id", "criterion_key"]
+    columns = keys + ["student_id", "achieved", "weight_pct"]
+
+    points = scores.merge(criteria[keys + ["weight_pct"]], on=keys, how="inner")
+    points["achieved"] = np.nan_to_num(
+        np.clip(points["score_pct"].to_numpy(dtype=float), 0.0, 100.0) / 100.0
+    )
+
+    levels = levels.copy()
+    best = levels.groupby(keys)["level_score"].transform("max").to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        levels["achieved"] = np.where(best > 0, levels["level_score"].to_numpy(dtype=float) / best, 0.0)
+    levels["weight_pct"] = levels["criterion_weight_pct"]
+    leveled = scores.merge(levels[keys + ["level_label", "achieved", "weight_pct"]],
+                           on=keys + ["level_label"], how="inner")
+
+    fractions = pd.concat([points[columns], leveled[columns]], ignore_index=True)
+    fractions["weight_pct"] = np.nan_to_num(fractions["weight_pct"].to_numpy(dtype=float))
+    return fractions
+
+
+def score_assessments(scores: pd.DataFrame, assessments: pd.DataFrame,
+                      criteria: pd.DataFrame, levels: pd.DataFrame) -> pd.DataFrame:
+    """
+    Marks per (assessment, student).
+    analytic_points: max_marks * sum(weight_pct% * score_pct%)
+    analytic_levels: max_marks * sum(criterion_weight_pct% * level_score / best level_score)
+    Criteria a student has no score for count as zero.
+    """
+    parts = criterion_fractions(scores, criteria, levels)
+    parts["fraction"] = parts["weight_pct"].to_numpy() / 100.0 * parts["achieved"].to_numpy()
+
+    marks = (parts.groupby(["assessment_id", "student_id"], sort=False)["fraction"]
+             .sum().clip(upper=1.0).reset_index())
+    marks = marks.merge(assessments[["assessment_id", "max_marks"]], on="assessment_id", how="inner")
+    marks["marks"] = marks["fraction"].to_numpy() * marks["max_marks"].to_numpy(dtype=float)
+    return marks[["assessment_id", "student_id", "marks"]]
+
+
+def aggregate_results(assessment_marks: pd.DataFrame, assessments: pd.DataFrame,
+                      offerings: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per (offering, student): component marks normalised to the offering's
+    maxima (or capped at them when normalisation is off), total, percent
+    and pass/fail.
+    """
+    columns = ["offering_id", "student_id"] + [f"{c}_marks" for c in COMPONENTS] + \
+              ["total_marks", "percent", "passed"]
+    if assessment_marks.empty:
+        return pd.DataFrame(columns=columns)
+
+    marks = assessment_marks.merge(
+        assessments[["assessment_id", "offering_id", "component"]], on="assessment_id"
+    )
+    raw = (marks.pivot_table(index=["offering_id", "student_id"], columns="component",
+                             values="marks", aggfunc="sum", fill_value=0.0)
+           .reindex(columns=list(COMPONENTS), fill_value=0.0))
+
+    # Per offering: sum of assessment maxima and normalisation flag per component
+    raw_max = (assessments.pivot_table(index="offering_id", columns="component",
+                                       values="max_marks", aggfunc="sum", fill_value=0.0)
+               .reindex(columns=list(COMPONENTS), fill_value=0.0))
+    normalise = (assessments.assign(flag=assessments["normalization_enabled"].fillna(1).astype(int))
+                 .pivot_table(index="offering_id", columns="component",
+                              values="flag", aggfunc="max", fill_value=1)
+                 .reindex(columns=list(COMPONENTS), fill_value=1))
+
+    offerings = offerings.set_index("offering_id")
+    target = offerings[[_COMPONENT_MAX[c] for c in COMPONENTS]].fillna(0.0)
+    target.columns = list(COMPONENTS)
+
+    offering_index = raw.index.get_level_values("offering_id")
+    raw_values = raw.to_numpy(dtype=float)
+    raw_max_values = raw_max.reindex(offering_index).fillna(0.0).to_numpy(dtype=float)
+    target_values = target.reindex(offering_index).fillna(0.0).to_numpy(dtype=float)
+    normalise_values = normalise.reindex(offering_index).fillna(1).to_numpy(dtype=bool)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scaled = np.where(raw_max_values > 0, raw_values / raw_max_values * target_values, 0.0)
+    component_marks = np.where(normalise_values, scaled, np.minimum(raw_values, target_values))
+
+    result = pd.DataFrame(component_marks, index=raw.index,
+                          columns=[f"{c}_marks" for c in COMPONENTS]).reset_index()
+
+    total = component_marks.sum(axis=1)
+    total_max = offerings["total_marks_max"].reindex(offering_index).fillna(0.0).to_numpy(dtype=float)
+    internal_max, exam_max = target_values[:, 0], target_values[:, 1]
+
+    def threshold(column: str, default: float) -> np.ndarray:
+        return offerings[column].reindex(offering_index).fillna(default).to_numpy(dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent = np.where(total_max > 0, total / total_max * 100.0, 0.0)
+        internal_pct = np.where(internal_max > 0, component_marks[:, 0] / internal_max * 100.0, 100.0)
+        exam_pct = np.where(exam_max > 0, component_marks[:, 1] / exam_max * 100.0, 100.0)
+
+    passed = (
+        (percent >= threshold("pass_threshold_overall", DEFAULT_PASS_OVERALL))
+        & (internal_pct >= threshold("pass_threshold_internal", DEFAULT_PASS_INTERNAL))
+        & (exam_pct >= threshold("pass_threshold_external", DEFAULT_PASS_EXTERNAL))
+    )
+
+    result["total_marks"] = total
+    result["percent"] = percent
+    result["passed"] = passed
+    return result[columns]
+
+
+def compute_offering_results(engine: Engine, offering_ids: List[int],
+                             persist: bool = False,
+                             published_only: bool = True) -> pd.DataFrame:
+    """
+    Per-student results for many offerings in one vectorised pass.
+    With persist=True the offerings' rows in subject_marks are replaced.
+    """
+    offering_ids = list(dict.fromkeys(int(i) for i in offering_ids))
+    if not offering_ids:
+        return aggregate_results(pd.DataFrame(), pd.DataFrame(), pd.DataFrame())
+
+    inputs = load_marks_inputs(engine, offering_ids, published_only=published_only)
+    assessment_marks = score_assessments(
+        inputs["scores"], inputs["assessments"], inputs["criteria"], inputs["levels"]
+    )
+    results = aggregate_results(assessment_marks, inputs["assessments"], inputs["offerings"])
+
+    if persist:
+        save_results(engine, offering_ids, results)
+    return results
+
+
+def save_results(engine: Engine, offering_ids: List[int], results: pd.DataFrame) -> int:
+    """Replace the stored results of these offerings in one transaction."""
+    records = results.assign(passed=results["passed"].astype(int)).to_dict("records")
+    with engine.begin() as conn:
+        conn.execute(sa_text("""
+            DELETE FROM subject_marks WHERE offering_id IN (SELECT value FROM json_each(:ids))
+        """), {"ids": json.dumps([int(i) for i in offering_ids])})
+        for start in range(0, len(records), WRITE_CHUNK):
+            conn.execute(sa_text("""
+                INSERT INTO subject_marks (
+                    offering_id, student_id, internal_marks, exam_marks, jury_marks,
+                    total_marks, percent, passed
+                ) VALUES (
+                    :offering_id, :student_id, :internal_marks, :exam_marks, :jury_marks,
+                    :total_marks, :percent, :passed
+                )
+            """), records[start:start + WRITE_CHUNK])
+    return len(records)
+
+
+# ===================================================================
+# BULK ENTRY
+# ===================================================================
+
+def _frame(rows: Rows, required: List[str]) -> pd.DataFrame:
+    df = rows.copy() if isinstance(rows, pd.DataFrame) else pd.DataFrame(list(rows))
+    missing = [c for c in required if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    return df.reset_index(drop=True)
+
+
+def _matches(df: pd.DataFrame, reference: pd.DataFrame, on: Dict[str, str]) -> np.ndarray:
+    """Boolean mask of df rows whose `on` columns appear in reference."""
+    if reference.empty:
+        return np.zeros(len(df), dtype=bool)
+    left = pd.MultiIndex.from_frame(df[list(on)].astype(object))
+    right = pd.MultiIndex.from_frame(reference[list(on.values())].astype(object))
+    return np.asarray(left.isin(right))
+
+
+def _strip_keys(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """Strip text key columns in place; True where any of them is null or blank."""
+    missing = np.zeros(len(df), dtype=bool)
+    for column in columns:
+        absent = df[column].isna().to_numpy()
+        # Nulls are blanked before str() so they cannot turn into "None" / "nan"
+        df[column] = df[column].astype(str).str.strip().where(~absent, "")
+        missing |= (df[column] == "").to_numpy()
+    return missing
+
+
+def _issues(df: pd.DataFrame, mask: np.ndarray, message: str) -> List[Dict[str, Any]]:
+    return [{"row": int(i), "error": message} for i in np.flatnonzero(mask)]
+
+
+def bulk_upsert_criterion_scores(engine: Engine, rows: Rows,
+                                 entered_by: str = None) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Upsert many criterion scores (assessment_id, student_id, criterion_key
+    and score_pct or level_label). Rows with an unknown criterion or level,
+    or a score outside 0-100, are returned as errors and not written.
+    Returns (rows_written, errors).
+    """
+    df = _frame(rows, ["assessment_id", "student_id", "criterion_key"])
+    for column in ("score_pct", "level_label"):
+        if column not in df.columns:
+            df[column] = None
+    df["assessment_id"] = pd.to_numeric(df["assessment_id"], errors="coerce")
+    missing_key = _strip_keys(df, ["student_id", "criterion_key"])
+    df["score_pct"] = pd.to_numeric(df["score_pct"], errors="coerce")
+    df["level_label"] = df["level_label"].where(df["level_label"].notna(), None)
+
+    assessment_ids = df["assessment_id"].dropna().astype(int).unique().tolist()
+    with engine.connect() as conn:
+        params = {"ids": json.dumps(assessment_ids)}
+        criteria = _read(conn, """
+            SELECT assessment_id, criterion_key FROM rubric_assessment_criteria
+            WHERE assessment_id IN (SELECT value FROM json_each(:ids))
+        """, params)
+        levels = _read(conn, """
+            SELECT DISTINCT assessment_id, criterion_key, level_label FROM rubric_assessment_levels
+            WHERE assessment_id IN (SELECT value FROM json_each(:ids))
+        """, params)
+
+    df["_aid"] = df["assessment_id"].fillna(-1).astype(int)
+    is_points = _matches(df, criteria, {"_aid": "assessment_id", "criterion_key": "criterion_key"})
+    is_level = _matches(df, levels, {"_aid": "assessment_id", "criterion_key": "criterion_key",
+                                     "level_label": "level_label"})
+
+    bad_id = df["assessment_id"].isna().to_numpy() | missing_key
+    bad_score = is_points & ~df["score_pct"].between(0, 100).to_numpy()
+    unknown = ~bad_id & ~is_points & ~is_level
+
+    errors = sorted(_issues(df, bad_id, "Missing assessment_id, student_id or criterion_key")
+              + _issues(df, bad_score, "score_pct must be between 0 and 100")
+              + _issues(df, unknown, "Unknown criterion or level for this assessment"),
+                    key=lambda e: e["row"])
+    valid = df[~(bad_id | bad_score | unknown)]
+
+    records = [
+        {
+            "aid": int(r.assessment_id),
+            "sid": r.student_id,
+            "ck": r.criterion_key,
+            "score": None if pd.isna(r.score_pct) else float(r.score_pct),
+            "level": r.level_label,
+            "by": entered_by,
+        }
+        for r in valid.itertuples(index=False)
+    ]
+    with engine.begin() as conn:
+        for start in range(0, len(records), WRITE_CHUNK):
+            conn.execute(sa_text("""
+                INSERT INTO rubric_criterion_scores (
+                    assessment_id, student_id, criterion_key, score_pct, level_label, entered_by
+                ) VALUES (:aid, :sid, :ck, :score, :level, :by)
+                ON CONFLICT(assessment_id, student_id, criterion_key) DO UPDATE SET
+                    score_pct = excluded.score_pct,
+                    level_label = excluded.level_label,
+                    entered_by = excluded.entered_by,
+                    updated_at = CURRENT_TIMESTAMP
+            """), records[start:start + WRITE_CHUNK])
+        if records:
+            from core.attainment_engine import mark_stale_assessments
+            mark_stale_assessments(conn, valid["assessment_id"].astype(int).unique().tolist())
+    return len(records), errors
+
+
+def bulk_upsert_marks(engine: Engine, degree_code: str, rows: Rows) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Upsert many assignment marks (assignment_code, student_id,
+    marks_obtained) for a degree. Rows for unknown assignments or with
+    marks outside 0..max_marks are returned as errors and not written.
+    Returns (rows_written, errors).
+    """
+    df = _frame(rows, ["assignment_code", "student_id", "marks_obtained"])
+    missing_key = _strip_keys(df, ["assignment_code", "student_id"])
+    df["marks_obtained"] = pd.to_numeric(df["marks_obtained"], errors="coerce")
+
+    with engine.connect() as conn:
+        assignments = _read(conn, """
+            SELECT assignment_code, max_marks FROM assignments WHERE degree_code = :d
+        """, {"d": degree_code})
+
+    max_marks = df["assignment_code"].map(assignments.set_index("assignment_code")["max_marks"])
+    unknown = ~missing_key & max_marks.isna().to_numpy()
+    in_range = (df["marks_obtained"] >= 0) & (df["marks_obtained"] <= max_marks)
+    bad_marks = ~missing_key & ~unknown & ~in_range.to_numpy()
+
+    errors = sorted(_issues(df, missing_key, "Missing assignment_code or student_id")
+              + _issues(df, unknown, f"Unknown assignment for degree {degree_code}")
+              + _issues(df, bad_marks, "marks_obtained must be between 0 and the assignment's max marks"),
+                    key=lambda e: e["row"])
+    valid = df[~(missing_key | unknown | bad_marks)]
+
+    records = [
+        {"d": degree_code, "a": r.assignment_code, "s": r.student_id, "m": float(r.marks_obtained)}
+        for r in valid.itertuples(index=False)
+    ]
+    with engine.begin() as conn:
+        for start in range(0, len(records), WRITE_CHUNK):
+            conn.execute(sa_text("""
+                INSERT INTO marks (degree_code, assignment_code, student_id, marks_obtained)
+                VALUES (:d, :a, :s, :m)
+                ON CONFLICT(degree_code, assignment_code, student_id) DO UPDATE
+                SET marks_obtained = excluded.marks_obtained, updated_at = CURRENT_TIMESTAMP
+            """), records[start:start + WRITE_CHUNK])
+    return len(records), errors
@@ -2,9 +2,12 @@
 # --- REFACTORED AND DYNAMIC (FINAL) ---
 
 from __future__ import annotations
-from typing import Iterable, Optional, Set, Dict, Any, Callable
+from typing import Iterable, Optional, Set, Dict, Any, Callable, FrozenSet
+from dataclasses import dataclass
 import functools
+import threading
 import streamlit as st
+from cachetools import TTLCache
 from sqlalchemy.engine import Engine
 from sqlalchemy import text as sa_text
 
@@ -33,7 +36,39 @@ from core.db import get_engine
 # DYNAMIC PAGE ACCESS (Replaces hardcoded PAGE_ACCESS dictionary)
 # ============================================================================
 
-@st.cache_data(ttl=300)  # Cache rules for 5 minutes
+# Rules per db url, and compiled page sets per (db url, role set).
+# Both are process-wide and cleared by invalidate_page_access().
+_RULES_CACHE: TTLCache = TTLCache(maxsize=8, ttl=300)
+_SNAPSHOT_CACHE: TTLCache = TTLCache(maxsize=512, ttl=300)
+_CACHE_LOCK = threading.Lock()
+
+
+@dataclass(frozen=True)
+class PermissionSnapshot:
+    """Roles plus the pages they may view/edit, compiled once per role set."""
+    roles: FrozenSet[str]
+    view_pages: FrozenSet[str]
+    edit_pages: FrozenSet[str]
+    public_pages: FrozenSet[str]
+
+    def can_view(self, page_name: str) -> bool:
+        return page_name in self.view_pages or page_name in self.public_pages
+
+    def can_edit(self, page_name: str) -> bool:
+        return page_name in self.edit_pages
+
+
+def invalidate_page_access() -> None:
+    """Call after editing page_access_rules so the next rerun sees the change."""
+    with _CACHE_LOCK:
+        _RULES_CACHE.clear()
+        _SNAPSHOT_CACHE.clear()
+
+
+def _engine_or_default(engine: Optional[Engine] = None) -> Engine:
+    return engine or st.session_state.get("engine") or get_engine()
+
+
 def _load_page_access_rules(_engine: Engine) -> Dict[str, Set[str]]:
     """
     Fetches all page access rules from the database and returns a
@@ -43,6 +78,12 @@ def _load_page_access_rules(_engine: Engine) -> Dict[str, Set[str]]:
         Dict[str, Set[str]]: A lookup mapping like
         {'view_Degrees': {'superadmin', 'principal'}, 'edit_Degrees': {'superadmin'}}
     """
+    url = str(_engine.url)
+    with _CACHE_LOCK:
+        cached = _RULES_CACHE.get(url)
+    if cached is not None:
+        return cached
+
     lookup = {}
     try:
         with _engine.begin() as conn:
@@ -57,12 +98,48 @@ def _load_page_access_rules(_engine: Engine) -> Dict[str, Set[str]]:
             lookup[key].add(role)
             
     except Exception as e:
-        # Failsafe if table doesn't exist yet
+        # Failsafe if table doesn't exist yet (not cached, so it is retried)
         st.error(f"Error loading page access rules: {e}")
         lookup['view_Login'] = {'public'}  # Allow login
-        
+        return lookup
+
+    with _CACHE_LOCK:
+        _RULES_CACHE[url] = lookup
     return lookup
 
+
+def _compiled_permissions(roles: Iterable[str], engine: Optional[Engine] = None) -> PermissionSnapshot:
+    """Page sets for a role set; one dict walk per role set, then O(1) lookups."""
+    engine = _engine_or_default(engine)
+    role_set = frozenset(roles or ())
+    key = (str(engine.url), role_set)
+    with _CACHE_LOCK:
+        snapshot = _SNAPSHOT_CACHE.get(key)
+    if snapshot is not None:
+        return snapshot
+
+    view, edit, public = set(), set(), set()
+    for rule_key, allowed in _load_page_access_rules(engine).items():
+        perm_type, _, page = rule_key.partition("_")
+        if perm_type == "view":
+            if "public" in allowed:
+                public.add(page)
+            if role_set & allowed:
+                view.add(page)
+        elif perm_type == "edit" and role_set & allowed:
+            edit.add(page)
+
+    snapshot = PermissionSnapshot(role_set, frozenset(view), frozenset(edit), frozenset(public))
+    with _CACHE_LOCK:
+        _SNAPSHOT_CACHE[key] = snapshot
+    return snapshot
+
+
+def permission_snapshot(engine: Optional[Engine] = None, email: Optional[str] = None) -> PermissionSnapshot:
+    """Compiled roles + allowed pages for a user (default: the logged-in user)."""
+    engine = _engine_or_default(engine)
+    return _compiled_permissions(user_roles(engine=engine, email=email), engine)
+
 def current_user() -> Dict[str, Any]:
     return st.session_state.get("user") or {}
 
@@ -79,33 +156,19 @@ def user_roles(engine: Optional[Engine] = None, email: Optional[str] = None) ->
     if not email:
         return {"public"}
     
-    # Ensure we have an engine to pass to rbac
-    if not engine:
-        engine = st.session_state.get("engine") or get_engine()
-        
+    # Ensure we have an engine to pass to rbac (roles are cached there)
+    engine = _engine_or_default(engine)
     return _db_user_roles(engine, email)
 # --- END FIX 2 ---
 
 def can_view_page(page_name: str, roles: Set[str]) -> bool:
     """Checks if any of the user's roles can view the page."""
-    engine = st.session_state.get("engine") or get_engine()
-    rules_lookup = _load_page_access_rules(engine)
-    
-    allowed_roles = rules_lookup.get(f"view_{page_name}", set())
-    
     # 'public' can view any page that has 'public' as a view role
-    if "public" in allowed_roles:
-        return True
-        
-    return bool(roles & allowed_roles)
+    return _compiled_permissions(roles).can_view(page_name)
 
 def can_edit_page(page_name: str, roles: Set[str]) -> bool:
     """Checks if any of the user's roles can edit the page."""
-    engine = st.session_state.get("engine") or get_engine()
-    rules_lookup = _load_page_access_rules(engine)
-    
-    allowed_roles = rules_lookup.get(f"edit_{page_name}", set())
-    return bool(roles & allowed_roles)
+    return _compiled_permissions(roles).can_edit(page_name)
 
 def require_page(page_name: str):
     def _wrap(fn: Callable):
@@ -123,19 +186,8 @@ def require_page(page_name: str):
 
 def visible_pages_for(roles: Set[str]) -> list[str]:
     """Gets all pages the user's roles have view access to."""
-    engine = st.session_state.get("engine") or get_engine()
-    rules_lookup = _load_page_access_rules(engine)
-    
-    visible = set()
-    
-    # Get all unique page names from the rules
-    all_pages = set(key.split('_', 1)[1] for key in rules_lookup.keys())
-
-    for page in all_pages:
-        if can_view_page(page, roles):
-            visible.add(page)
-            
-    return sorted(list(visible))
+    snapshot = _compiled_permissions(roles)
+    return sorted(snapshot.view_pages | snapshot.public_pages)
 
 # ============================================================================
 # APPROVALS POLICY (No changes, just wiring)
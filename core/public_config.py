@@ -5,6 +5,7 @@ from pathlib import Path
 from sqlalchemy import text as sa_text
 from sqlalchemy.engine import Engine
 from core.config_store import get
+from core.config_snapshot import branding_config
 
 # Constants for clarity
 BRANDING_NAMESPACE = "branding"
@@ -31,10 +32,10 @@ def resolve_public_asset_path(path_or_url: str) -> tuple[bool, str]:
 
 def load_public_branding_config(engine: Engine) -> dict:
     """
-    Publicly fetches the branding config using the core get() function.
-    Reads from degree='default' and namespace='branding'.
+    Publicly fetches the branding config (degree='default', namespace='branding').
+    Runs on every rerun, so it reads the per-process config snapshot; read-only.
     """
-    return get(engine, degree='default', namespace=BRANDING_NAMESPACE)
+    return branding_config(engine)
 
 def load_public_footer_config(engine: Engine) -> dict:
     """
@@ -0,0 +1,202 @@
+# core/query_cache.py
+"""
+Table-tagged query cache
+
+Replacement for @st.cache_data on read helpers. Each cached function
+declares the tables it reads; write paths call invalidate_tables() for the
+tables they changed, and only the functions reading those tables are
+dropped. Other pages (and other users) keep their warm entries.
+
+- Entries live per function in a bounded TTLCache (LRU within the TTL).
+- Arguments whose name starts with "_" are not hashed, as with
+  st.cache_data; an Engine argument is keyed by its URL instead.
+- Hits return a deep copy, so callers may mutate what they get back.
+
+Usage:
+    @cached_query("branches", "programs", ttl=300)
+    def fetch_branches(_engine, degree_code): ...
+
+    invalidate_tables("branches")          # after a write
+    fetch_branches.invalidate(engine, "BARCH")   # drop one argument set
+    cache_stats()                          # hit/miss counters per function
+"""
+from __future__ import annotations
+
+import copy
+import functools
+import inspect
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Set
+
+from cachetools import TTLCache
+
+DEFAULT_TTL = 300
+DEFAULT_MAXSIZE = 256
+
+_LOCK = threading.RLock()
+# table name -> cached functions that read it
+_TABLE_INDEX: Dict[str, Set["_QueryCache"]] = {}
+# qualified function name -> cache (a module reload replaces its entry)
+_ALL: Dict[str, "_QueryCache"] = {}
+
+
+class _BoundedCache(TTLCache):
+    """TTLCache that counts LRU evictions."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.evictions = 0
+
+    def popitem(self):
+        self.evictions += 1
+        return super().popitem()
+
+    def clear(self):
+        # MutableMapping.clear() goes through popitem(); not an eviction
+        evictions = self.evictions
+        super().clear()
+        self.evictions = evictions
+
+
+def _freeze(value: Any) -> Any:
+    """Hashable form of an argument value."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(v) for v in value)
+    return value
+
+
+class _QueryCache:
+    def __init__(self, fn: Callable, tables: Iterable[str], ttl: float, maxsize: int):
+        self.fn = fn
+        self.name = f"{fn.__module__}.{fn.__qualname__}"
+        self.tables = frozenset(t.lower() for t in tables)
+        self.entries = _BoundedCache(maxsize=maxsize, ttl=ttl)
+        self.signature = inspect.signature(fn)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Bumped on every clear; a result computed across a clear is not stored
+        self.generation = 0
+
+    def key(self, args, kwargs) -> tuple:
+        bound = self.signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        parts = []
+        for name, value in bound.arguments.items():
+            if name.startswith("_"):
+                url = getattr(value, "url", None)
+                if url is not None:
+                    parts.append((name, str(url)))
+                continue
+            parts.append((name, _freeze(value)))
+        return tuple(parts)
+
+    def __call__(self, *args, **kwargs):
+        key = self.key(args, kwargs)
+        with _LOCK:
+            try:
+                value = self.entries[key]
+                self.hits += 1
+                return copy.deepcopy(value)
+            except KeyError:
+                self.misses += 1
+                generation = self.generation
+
+        value = self.fn(*args, **kwargs)
+        with _LOCK:
+            if generation == self.generation:
+                self.entries[key] = value
+        return copy.deepcopy(value)
+
+    def invalidate(self, args, kwargs) -> bool:
+        """Drop the entry for one set of arguments."""
+        key = self.key(args, kwargs)
+        with _LOCK:
+            # A call already in flight for this key must not store its result
+            self.generation += 1
+            return self.entries.pop(key, None) is not None
+
+    def clear(self) -> None:
+        with _LOCK:
+            if self.entries:
+                self.invalidations += 1
+            self.generation += 1
+            self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with _LOCK:
+            self.entries.expire()
+            return {
+                "function": self.name,
+                "tables": sorted(self.tables),
+                "size": len(self.entries),
+                "maxsize": int(self.entries.maxsize),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.entries.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+def cached_query(*tables: str, ttl: float = DEFAULT_TTL, maxsize: int = DEFAULT_MAXSIZE):
+    """
+    Cache a read helper and tag it with the tables it reads.
+
+    A function with no tables is only dropped by TTL or clear_all().
+    """
+    def decorator(fn: Callable) -> Callable:
+        cache = _QueryCache(fn, tables, ttl, maxsize)
+        with _LOCK:
+            old = _ALL.pop(cache.name, None)
+            if old is not None:
+                for table in old.tables:
+                    _TABLE_INDEX.get(table, set()).discard(old)
+            _ALL[cache.name] = cache
+            for table in cache.tables:
+                _TABLE_INDEX.setdefault(table, set()).add(cache)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return cache(*args, **kwargs)
+
+        # Same method name as st.cache_data, so existing fn.clear() calls keep working
+        wrapper.clear = cache.clear
+        wrapper.invalidate = lambda *args, **kwargs: cache.invalidate(args, kwargs)
+        wrapper.tables = cache.tables
+        wrapper.cache_info = cache.stats
+        return wrapper
+
+    return decorator
+
+
+def invalidate_tables(*tables: str) -> int:
+    """Drop cached results of every function reading any of these tables.
+
+    Returns the number of entries dropped.
+    """
+    dropped = 0
+    with _LOCK:
+        caches = set()
+        for table in tables:
+            caches |= _TABLE_INDEX.get(table.lower(), set())
+        for cache in caches:
+            dropped += len(cache.entries)
+            cache.clear()
+    return dropped
+
+
+def clear_all() -> None:
+    """Drop every cached query (e.g. after a restore or bulk import)."""
+    with _LOCK:
+        for cache in _ALL.values():
+            cache.clear()
+
+
+def cache_stats() -> List[Dict[str, Any]]:
+    """Hit/miss/eviction counters and current size for each cached function."""
+    with _LOCK:
+        return [cache.stats() for cache in _ALL.values()]
@@ -1,17 +1,30 @@
 # app/core/rbac.py
 from __future__ import annotations
-from typing import Optional, Set, Union
+import threading
+from typing import Dict, FrozenSet, Optional, Set, Tuple, Union
 import streamlit as st
+from cachetools import TTLCache
 from sqlalchemy import text as sa_text
 from sqlalchemy.engine import Engine, Connection
 from core.settings import load_settings
 from core.db import get_engine
 
-__all__ = ["user_roles", "upsert_user", "get_user_id", "grant_role", "revoke_role"]
+__all__ = ["user_roles", "upsert_user", "get_user_id", "grant_role", "revoke_role", "invalidate_user_roles"]
+
+# Per-user role sets, shared by every session in the process.
+# Keyed by (db url, lower-cased email); cleared by grant_role/revoke_role/upsert_user.
+ROLE_CACHE_SIZE = 4096
+ROLE_CACHE_TTL = 300
+_ROLE_CACHE: TTLCache = TTLCache(maxsize=ROLE_CACHE_SIZE, ttl=ROLE_CACHE_TTL)
+_ROLE_CACHE_LOCK = threading.Lock()
+
+# user_roles layout ("by_name" / "by_id") per db url, detected once per process
+_SCHEMA_MODES: Dict[str, str] = {}
 
 def _ensure_engine(engine: Optional[Engine] = None) -> Engine:
     if engine: return engine
     if "engine" in st.session_state: return st.session_state.engine
+    # Shared process-wide engine; no per-session pool is created here
     settings = load_settings()
     eng = get_engine(settings.db.url)
     st.session_state.engine = eng
@@ -22,7 +35,26 @@ def _table_has_column(conn: Connection, table: str, column: str) -> bool:
     return any(row[1] == column for row in info)
 
 def _user_roles_schema_mode(conn: Connection) -> str:
-    return "by_name" if _table_has_column(conn, "user_roles", "role_name") else "by_id"
+    url = str(conn.engine.url)
+    mode = _SCHEMA_MODES.get(url)
+    if mode is None:
+        info = conn.execute(sa_text("PRAGMA table_info(user_roles)")).fetchall()
+        mode = "by_name" if any(row[1] == "role_name" for row in info) else "by_id"
+        # Only remember it once the table exists; grant_role may still create it
+        if info:
+            _SCHEMA_MODES[url] = mode
+    return mode
+
+def _cache_key(engine: Engine, email: str) -> Tuple[str, str]:
+    return (str(engine.url), email.strip().lower())
+
+def invalidate_user_roles(email: Optional[str] = None, engine: Optional[Engine] = None) -> None:
+    """Drop cached roles for one user, or for everyone when email is None."""
+    with _ROLE_CACHE_LOCK:
+        if email is None:
+            _ROLE_CACHE.clear()
+        else:
+            _ROLE_CACHE.pop(_cache_key(_ensure_engine(engine), email), None)
 
 def _ensure_roles_table(conn: Connection) -> None:
     conn.execute(sa_text("CREATE TABLE IF NOT EXISTS roles(id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE NOT NULL)"))
@@ -33,20 +65,35 @@ def _ensure_role_row(conn: Connection, role_name: str) -> Optional[int]:
     row = conn.execute(sa_text("SELECT id FROM roles WHERE name=:n"), {"n": role_name}).fetchone()
     return int(row[0]) if row else None
 
+def _load_user_roles(engine: Engine, email: str) -> FrozenSet[str]:
+    with engine.connect() as conn:
+        mode = _user_roles_schema_mode(conn)
+        if mode == "by_name":
+            rows = conn.execute(sa_text("""
+                SELECT ur.role_name FROM users u JOIN user_roles ur ON ur.user_id = u.id
+                WHERE LOWER(u.email)=LOWER(:e) AND u.active=1
+            """), {"e": email}).fetchall()
+        else:
+            rows = conn.execute(sa_text("""
+                SELECT r.name FROM users u
+                JOIN user_roles ur ON ur.user_id = u.id
+                JOIN roles r ON r.id = ur.role_id
+                WHERE LOWER(u.email)=LOWER(:e) AND u.active=1
+            """), {"e": email}).fetchall()
+        return frozenset(r[0] for r in rows)
+
 def user_roles(engine: Optional[Engine], email: Optional[str]) -> Set[str]:
     if not email:
         return {"public"}
     engine = _ensure_engine(engine)
-    with engine.begin() as conn:
-        u = conn.execute(sa_text("SELECT id FROM users WHERE LOWER(email)=LOWER(:e) AND active=1"), {"e": email}).fetchone()
-        if not u: return set()
-        uid = int(u[0])
-        mode = _user_roles_schema_mode(conn)
-        if mode == "by_name":
-            rows = conn.execute(sa_text("SELECT role_name FROM user_roles WHERE user_id=:uid"), {"uid": uid}).fetchall()
-        else:
-            rows = conn.execute(sa_text("SELECT r.name FROM user_roles ur JOIN roles r ON r.id = ur.role_id WHERE ur.user_id=:uid"), {"uid": uid}).fetchall()
-        return {r[0] for r in rows} if rows else set()
+    key = _cache_key(engine, email)
+    with _ROLE_CACHE_LOCK:
+        roles = _ROLE_CACHE.get(key)
+    if roles is None:
+        roles = _load_user_roles(engine, email)
+        with _ROLE_CACHE_LOCK:
+            _ROLE_CACHE[key] = roles
+    return set(roles)
 
 def upsert_user(email: str, full_name: str = "", active: bool = True, employee_id: str = "", engine: Optional[Engine] = None) -> int:
     engine = _ensure_engine(engine)
@@ -65,7 +112,9 @@ def upsert_user(email: str, full_name: str = "", active: bool = True, employee_i
             {"n": full_name, "a": 1 if active else 0, "eid": emp_id, "e": email.lower()}
         )
         row = conn.execute(sa_text("SELECT id FROM users WHERE LOWER(email)=LOWER(:e)"), {"e": email.lower()}).fetchone()
-        return int(row[0])
+    # active may have changed
+    invalidate_user_roles(email, engine)
+    return int(row[0])
 
 def get_user_id(engine_or_conn: Union[Engine, Connection], email: str) -> int:
     if isinstance(engine_or_conn, Engine):
@@ -106,6 +155,7 @@ def grant_role(email: str, role_name: str, engine: Optional[Engine] = None) -> N
             rid = _ensure_role_row(conn, role_name)
             if rid is not None:
                 conn.execute(sa_text("INSERT OR IGNORE INTO user_roles(user_id, role_id) VALUES (:u, :rid)"), {"u": uid, "rid": rid})
+    invalidate_user_roles(email, engine)
 
 def revoke_role(email: str, role_name: str, engine: Optional[Engine] = None) -> None:
     engine = _ensure_engine(engine)
@@ -120,3 +170,5 @@ def revoke_role(email: str, role_name: str, engine: Optional[Engine] = None) ->
             rid = _ensure_role_row(conn, role_name)
             if rid is not None:
                 conn.execute(sa_text("DELETE FROM user_roles WHERE user_id=:u AND role_id=:rid"), {"u": uid, "rid": rid})
+    invalidate_user_roles(email, engine)
+
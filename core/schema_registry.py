@@ -1,7 +1,10 @@
 # core/schema_registry.py
 from __future__ import annotations
-from typing import Callable, List, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import text as sa_text
 from sqlalchemy.engine import Engine
+import hashlib
+import inspect
 import pkgutil
 import importlib
 import sys
@@ -13,6 +16,24 @@ SchemaInstaller = Callable[[Engine], None]
 # Registry: (name, installer_func)
 _REGISTRY: List[Tuple[str, SchemaInstaller]] = []
 
+# Called as hook(engine) after installers applied DDL (e.g. to drop table caches)
+_AFTER_INSTALL_HOOKS: List[Callable[[Engine], None]] = []
+
+# Ledger of applied installers: one row per installer name with the hash of
+# the source it was applied from. Unchanged installers are skipped.
+LEDGER_TABLE = "schema_migrations"
+
+# module name -> source hash (modules don't change within a process)
+_HASH_CACHE: Dict[str, str] = {}
+
+def _add(name: str, fn: SchemaInstaller) -> None:
+    """Adds or replaces an installer; re-registering a name keeps its position."""
+    for i, (existing, _) in enumerate(_REGISTRY):
+        if existing == name:
+            _REGISTRY[i] = (name, fn)
+            return
+    _REGISTRY.append((name, fn))
+
 def register(
     name: str | SchemaInstaller, installer: SchemaInstaller | None = None
 ) -> SchemaInstaller | Callable[[SchemaInstaller], SchemaInstaller]:
@@ -23,38 +44,143 @@ def register(
     # Used as @register("name")
     if isinstance(name, str) and installer is None:
         def decorator(fn: SchemaInstaller) -> SchemaInstaller:
-            _REGISTRY.append((name, fn))
+            _add(name, fn)
             return fn
         return decorator
     
     # Used as @register
     elif callable(name) and installer is None:
         fn = name
-        _REGISTRY.append((fn.__name__, fn))
+        _add(fn.__name__, fn)
         return fn
     
     # Used as register("name", fn)
     elif isinstance(name, str) and callable(installer):
-        _REGISTRY.append((name, installer))
+        _add(name, installer)
         return installer
     
     raise TypeError("Invalid usage of @register")
 
-def run_all(engine: Engine):
+def register_after_install_hook(hook: Callable[[Engine], None]) -> Callable[[Engine], None]:
+    """Registers a function run after run_installers() applied at least one installer."""
+    if hook not in _AFTER_INSTALL_HOOKS:
+        _AFTER_INSTALL_HOOKS.append(hook)
+    return hook
+
+
+def installer_hash(fn: SchemaInstaller) -> Optional[str]:
+    """
+    Hash of the source module an installer lives in, so edits to the
+    installer or its helpers cause it to be re-applied. None if unknown.
+    """
+    module_name = getattr(fn, "__module__", None)
+    if module_name in _HASH_CACHE:
+        return _HASH_CACHE[module_name]
+    try:
+        module = sys.modules.get(module_name) if module_name else None
+        source = inspect.getsource(module) if module is not None else inspect.getsource(fn)
+    except (OSError, TypeError):
+        return None
+    digest = hashlib.sha256(source.encode("utf-8")).hexdigest()
+    if module_name:
+        _HASH_CACHE[module_name] = digest
+    return digest
+
+def ensure_ledger(engine: Engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(sa_text(f"""
+            CREATE TABLE IF NOT EXISTS {LEDGER_TABLE} (
+                name TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+
+def _applied_hashes(engine: Engine) -> Dict[str, str]:
+    with engine.begin() as conn:
+        rows = conn.execute(sa_text(f"SELECT name, content_hash FROM {LEDGER_TABLE}")).fetchall()
+    return {r[0]: r[1] for r in rows}
+
+def _record_applied(engine: Engine, name: str, content_hash: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(sa_text(f"""
+            INSERT INTO {LEDGER_TABLE}(name, content_hash, applied_at)
+            VALUES(:n, :h, CURRENT_TIMESTAMP)
+            ON CONFLICT(name) DO UPDATE SET
+                content_hash = excluded.content_hash,
+                applied_at = excluded.applied_at
+        """), {"n": name, "h": content_hash})
+
+def run_installers(
+    engine: Engine,
+    installers: Iterable[Tuple[str, SchemaInstaller]],
+    force: bool = False,
+) -> Dict[str, List[str]]:
+    """
+    Runs the given installers, skipping those whose name and source hash are
+    already in the schema_migrations ledger. Failed installers are not
+    recorded, so they are retried on the next bootstrap.
+
+    Returns {"applied": [...], "skipped": [...], "failed": [...]}.
+    """
+    ensure_ledger(engine)
+    applied = {} if force else _applied_hashes(engine)
+    summary: Dict[str, List[str]] = {"applied": [], "skipped": [], "failed": []}
+
+    pending: List[Tuple[str, SchemaInstaller, Optional[str]]] = []
+    for name, installer_fn in installers:
+        content_hash = installer_hash(installer_fn)
+        if content_hash is not None and applied.get(name) == content_hash:
+            summary["skipped"].append(name)
+        else:
+            pending.append((name, installer_fn, content_hash))
+
+    # Installers that depend on tables created later in the list (e.g. seeds)
+    # fail on a fresh database; a second pass over the failures picks them up.
+    for attempt in (1, 2):
+        failed: List[Tuple[str, SchemaInstaller, Optional[str]]] = []
+        for name, installer_fn, content_hash in pending:
+            try:
+                print(f"  -> Applying schema: {name}")
+                installer_fn(engine)
+            except Exception as e:
+                print(f"  -> FAILED to apply schema {name}: {e}")
+                if attempt == 2:
+                    import traceback
+                    traceback.print_exc()
+                failed.append((name, installer_fn, content_hash))
+                # Continue with other installers instead of crashing
+                continue
+            if content_hash is not None:
+                _record_applied(engine, name, content_hash)
+            summary["applied"].append(name)
+        pending = failed
+        if not pending:
+            break
+
+    summary["failed"] = [name for name, _, _ in pending]
+    if summary["applied"]:
+        for hook in list(_AFTER_INSTALL_HOOKS):
+            try:
+                hook(engine)
+            except Exception as e:
+                print(f"  -> after-install hook {getattr(hook, '__name__', hook)} failed: {e}")
+    return summary
+
+def run_all(engine: Engine, force: bool = False) -> Dict[str, List[str]]:
     """
     Runs all registered schema installers in order.
+    Installers already applied with the same source hash are skipped
+    unless force=True.
     """
     print(f"SchemaRegistry: Running {len(_REGISTRY)} installers...")
-    for name, installer_fn in _REGISTRY:
-        try:
-            print(f"  -> Applying schema: {name}")
-            installer_fn(engine)
-        except Exception as e:
-            print(f"  -> FAILED to apply schema {name}: {e}")
-            import traceback
-            traceback.print_exc()
-            # Continue with other installers instead of crashing
-    print("SchemaRegistry: All installers complete.")
+    summary = run_installers(engine, list(_REGISTRY), force=force)
+    print(
+        f"SchemaRegistry: All installers complete "
+        f"({len(summary['applied'])} applied, {len(summary['skipped'])} up to date, "
+        f"{len(summary['failed'])} failed)."
+    )
+    return summary
 
 def _REGISTRY_count() -> int:
     return len(_REGISTRY)
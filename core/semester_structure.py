@@ -0,0 +1,195 @@
+# core/semester_structure.py
+"""
+Semester materialisation
+
+Builds the `semesters` rows a degree should have from its binding mode
+(degree / program / branch), the *_semester_struct tables and the label
+mode, then brings the table in line with a diff instead of delete + insert:
+
+- rows whose (program_id, branch_id, year_index, term_index) still exist
+  keep their id (subjects and offerings reference it); only a changed
+  semester_number/label/active is updated,
+- new positions are inserted, positions no longer in the structure are
+  deleted,
+- each of the three writes is a single executemany.
+
+Used by the Semesters screen and by the approvals cascade handlers.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text as sa_text
+
+log = logging.getLogger(__name__)
+
+BINDING_MODES = ("degree", "program", "branch")
+
+# engine url -> whether branches has its own degree_code column
+_BRANCH_HAS_DEGREE: Dict[str, bool] = {}
+
+
+def semester_label(label_mode: str, year: int, term: int, number: int) -> str:
+    if label_mode == "year_term":
+        return f"Year {year} • Term {term}"
+    return f"Semester {number}"
+
+
+def _branches_have_degree(conn) -> bool:
+    url = str(conn.engine.url)
+    if url not in _BRANCH_HAS_DEGREE:
+        cols = {r[1] for r in conn.execute(sa_text("PRAGMA table_info(branches)")).fetchall()}
+        if not cols:
+            # Table not created yet; decide again next time
+            return False
+        _BRANCH_HAS_DEGREE[url] = "degree_code" in cols
+    return _BRANCH_HAS_DEGREE[url]
+
+
+def _structures(conn, degree_code: str, binding_mode: str,
+                target_id: Optional[Any]) -> List[Tuple[Optional[int], Optional[int], int, int]]:
+    """(program_id, branch_id, years, terms_per_year) for every unit to materialise."""
+    params: Dict[str, Any] = {"dc": degree_code}
+    if binding_mode == "degree":
+        row = conn.execute(sa_text("""
+            SELECT years, terms_per_year FROM degree_semester_struct WHERE degree_code=:dc
+        """), params).fetchone()
+        return [(None, None, int(row[0]), int(row[1]))] if row else []
+
+    if binding_mode == "program":
+        sql = """
+            SELECT p.id, s.years, s.terms_per_year
+              FROM programs p
+              JOIN program_semester_struct s ON s.program_id=p.id
+             WHERE lower(p.degree_code)=lower(:dc)
+        """
+        if target_id:
+            sql += " AND p.id = :tid"
+            params["tid"] = target_id
+        rows = conn.execute(sa_text(sql), params).fetchall()
+        return [(r[0], None, int(r[1]), int(r[2])) for r in rows
+                if r[1] is not None and r[2] is not None]
+
+    if binding_mode == "branch":
+        if _branches_have_degree(conn):
+            sql = """
+                SELECT b.id, s.years, s.terms_per_year
+                  FROM branches b
+                  JOIN branch_semester_struct s ON s.branch_id=b.id
+                 WHERE lower(b.degree_code)=lower(:dc)
+            """
+        else:
+            sql = """
+                SELECT b.id, s.years, s.terms_per_year
+                  FROM branches b
+                  JOIN programs p ON p.id = b.program_id
+                  JOIN branch_semester_struct s ON s.branch_id=b.id
+                 WHERE lower(p.degree_code)=lower(:dc)
+            """
+        if target_id:
+            sql += " AND b.id = :tid"
+            params["tid"] = target_id
+        rows = conn.execute(sa_text(sql), params).fetchall()
+        return [(None, r[0], int(r[1]), int(r[2])) for r in rows
+                if r[1] is not None and r[2] is not None]
+
+    return []
+
+
+def plan_semesters(conn, degree_code: str, binding_mode: str, label_mode: str,
+                   target_id: Optional[Any] = None) -> List[Dict[str, Any]]:
+    """Every semesters row the structure calls for, built in memory."""
+    rows: List[Dict[str, Any]] = []
+    for program_id, branch_id, years, tpy in _structures(conn, degree_code, binding_mode, target_id):
+        n = 0
+        for y in range(1, years + 1):
+            for t in range(1, tpy + 1):
+                n += 1
+                rows.append({
+                    "dc": degree_code,
+                    "pid": program_id,
+                    "bid": branch_id,
+                    "y": y,
+                    "t": t,
+                    "n": n,
+                    "lbl": semester_label(label_mode, y, t, n),
+                })
+    return rows
+
+
+def _existing_scope(degree_code: str, binding_mode: str,
+                    target_id: Optional[Any]) -> Tuple[str, Dict[str, Any]]:
+    """WHERE clause for the rows a rebuild owns (what it used to delete)."""
+    if target_id and binding_mode == "program":
+        return "program_id=:tid", {"tid": target_id}
+    if target_id and binding_mode == "branch":
+        return "branch_id=:tid", {"tid": target_id}
+    if target_id and binding_mode == "degree":
+        return "degree_code=:dc AND program_id IS NULL AND branch_id IS NULL", {"dc": degree_code}
+    return "degree_code=:dc", {"dc": degree_code}
+
+
+def sync_semesters(conn, degree_code: str, binding_mode: str, label_mode: str,
+                   target_id: Optional[Any] = None) -> Dict[str, int]:
+    """
+    Materialise semesters for a degree (or one program/branch/degree target)
+    and diff them into the table. Returns counts:
+    {"total", "inserted", "updated", "deleted", "unchanged"}.
+    """
+    desired = plan_semesters(conn, degree_code, binding_mode, label_mode, target_id)
+    where, params = _existing_scope(degree_code, binding_mode, target_id)
+    existing = conn.execute(sa_text(f"""
+        SELECT id, program_id, branch_id, year_index, term_index, semester_number, label, active
+          FROM semesters
+         WHERE {where}
+         ORDER BY id
+    """), params).fetchall()
+
+    by_key: Dict[Tuple, Any] = {}
+    stale: List[Dict[str, Any]] = []
+    for r in existing:
+        key = (r[1], r[2], r[3], r[4])
+        if key in by_key:
+            stale.append({"id": r[0]})  # duplicate position; keep the oldest id
+        else:
+            by_key[key] = r
+
+    inserts: List[Dict[str, Any]] = []
+    updates: List[Dict[str, Any]] = []
+    unchanged = 0
+    for row in desired:
+        current = by_key.pop((row["pid"], row["bid"], row["y"], row["t"]), None)
+        if current is None:
+            inserts.append(row)
+        elif (current[5], current[6], current[7]) != (row["n"], row["lbl"], 1):
+            updates.append({"id": current[0], "n": row["n"], "lbl": row["lbl"]})
+        else:
+            unchanged += 1
+    stale.extend({"id": r[0]} for r in by_key.values())
+
+    if stale:
+        conn.execute(sa_text("DELETE FROM semesters WHERE id=:id"), stale)
+    if updates:
+        conn.execute(sa_text("""
+            UPDATE semesters
+               SET semester_number=:n, label=:lbl, active=1, updated_at=CURRENT_TIMESTAMP
+             WHERE id=:id
+        """), updates)
+    if inserts:
+        conn.execute(sa_text("""
+            INSERT INTO semesters(degree_code, program_id, branch_id, year_index, term_index,
+                                  semester_number, label, active)
+            VALUES(:dc, :pid, :bid, :y, :t, :n, :lbl, 1)
+        """), inserts)
+
+    stats = {
+        "total": len(desired),
+        "inserted": len(inserts),
+        "updated": len(updates),
+        "deleted": len(stale),
+        "unchanged": unchanged,
+    }
+    log.info("semesters synced for %s (%s%s): %s", degree_code, binding_mode,
+             f":{target_id}" if target_id else "", stats)
+    return stats
@@ -15,8 +15,17 @@ class AuthConfig(BaseModel):
 class BrandingDefaults(BaseModel):
     default_degree_branding: bool = True
 
+class DBPoolConfig(BaseModel):
+    size: int = 10
+    max_overflow: int = 20
+    timeout: int = 30
+    recycle: int = 1800
+
 class DBConfig(BaseModel):
     url: str
+    pool: DBPoolConfig = DBPoolConfig()
+    # PRAGMA name -> value, applied to every new SQLite connection
+    pragmas: dict = {}
 
 class Settings(BaseModel):
     app: AppConfig
@@ -0,0 +1,366 @@
+# core/snapshot_store.py
+"""
+Delta-encoded snapshot store
+
+Offering snapshots (subject_offerings_snapshots) and rubric versions
+(version_snapshots) used to keep the complete JSON state on every row.
+Rows written through this module hold either
+
+- a full base: the whole state, or
+- a delta: only what differs from the entity's latest base, plus the base
+  row id, so any version is rebuilt from two rows.
+
+A new base is written every BASE_INTERVAL snapshots of an entity, or when
+a delta would not be smaller than the state itself. Payloads are zlib
+compressed and base64 encoded so they fit the existing TEXT columns. Rows
+from before this module (plain JSON) are read as full bases.
+
+compact_snapshots() applies retention, rebases deltas whose base was
+pruned and re-encodes legacy rows; start_compaction_worker() runs it
+periodically on a daemon thread.
+
+Usage:
+    data = encode_snapshots(conn, OFFERING_SNAPSHOTS, {offering_id: row_dict})
+    state = load_snapshot(conn, OFFERING_SNAPSHOTS, snapshot_id)
+"""
+from __future__ import annotations
+
+import base64
+import copy
+import json
+import logging
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text as sa_text
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger(__name__)
+
+BASE_INTERVAL = 20
+COMPACTION_INTERVAL_SECONDS = 6 * 60 * 60
+COMPACTION_BATCH = 200
+
+_PREFIX = "z1:"
+
+# Patch ops: set value, patch nested dict, patch list items, delete key
+_SET, _DICT, _LIST, _DEL = "=", "~", "[", "-"
+
+
+@dataclass(frozen=True)
+class SnapshotTable:
+    """Where an entity's versions live and how they are ordered."""
+    table: str
+    entity_col: str
+    order_col: str
+    scope_sql: str = "1 = 1"
+    keep_last: Optional[int] = None
+
+
+# keep_last matches VERSIONING_SETTINGS["keep_last"] in screens/subject_offerings/constants.py
+OFFERING_SNAPSHOTS = SnapshotTable(
+    "subject_offerings_snapshots", "offering_id", "snapshot_number", keep_last=100
+)
+# Rubric versions are history, not undo steps: compacted but never pruned
+RUBRIC_VERSIONS = SnapshotTable(
+    "version_snapshots", "entity_id", "id", scope_sql="entity_type = 'rubric_config'"
+)
+SNAPSHOT_TABLES = (OFFERING_SNAPSHOTS, RUBRIC_VERSIONS)
+
+
+# ===================================================================
+# ENCODING
+# ===================================================================
+
+def _normalize(state: Dict[str, Any]) -> Dict[str, Any]:
+    """The state as it will read back from JSON (dates become strings)."""
+    return json.loads(json.dumps(state, default=str))
+
+
+def _pack(doc: Dict[str, Any]) -> str:
+    raw = json.dumps(doc, separators=(",", ":")).encode("utf-8")
+    return _PREFIX + base64.b64encode(zlib.compress(raw, 9)).decode("ascii")
+
+
+def _unpack(data: str) -> Dict[str, Any]:
+    if data.startswith(_PREFIX):
+        raw = zlib.decompress(base64.b64decode(data[len(_PREFIX):]))
+        return json.loads(raw)
+    # Plain JSON written before delta encoding
+    return {"kind": "full", "state": json.loads(data)}
+
+
+def _diff_value(old: Any, new: Any) -> list:
+    if isinstance(old, dict) and isinstance(new, dict):
+        return [_DICT, diff_state(old, new)]
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        return [_LIST, {str(i): _diff_value(o, n) for i, (o, n) in enumerate(zip(old, new)) if o != n}]
+    return [_SET, new]
+
+
+def diff_state(base: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, list]:
+    """Patch that turns base into state; nested dicts and equal-length lists are diffed."""
+    patch = {}
+    for key, value in state.items():
+        if key not in base:
+            patch[key] = [_SET, value]
+        elif base[key] != value:
+            patch[key] = _diff_value(base[key], value)
+    for key in base:
+        if key not in state:
+            patch[key] = [_DEL]
+    return patch
+
+
+def _apply_value(old: Any, op: list) -> Any:
+    if op[0] == _DICT:
+        return apply_patch(old, op[1])
+    if op[0] == _LIST:
+        items = list(old)
+        for index, item_op in op[1].items():
+            items[int(index)] = _apply_value(items[int(index)], item_op)
+        return items
+    return op[1]
+
+
+def apply_patch(base: Dict[str, Any], patch: Dict[str, list]) -> Dict[str, Any]:
+    """Inverse of diff_state(); base is not modified."""
+    state = copy.deepcopy(base)
+    for key, op in patch.items():
+        if op[0] == _DEL:
+            state.pop(key, None)
+        else:
+            state[key] = _apply_value(state.get(key), op)
+    return state
+
+
+def _encode(state: Dict[str, Any], base: Optional[Tuple[int, Dict[str, Any], int]]) -> str:
+    """
+    Encode state as a delta against base (id, state, depth) when that is
+    worthwhile, otherwise as a full base.
+    """
+    if base is not None:
+        base_id, base_state, depth = base
+        if depth + 1 < BASE_INTERVAL:
+            patch = diff_state(base_state, state)
+            if len(json.dumps(patch)) < len(json.dumps(state)):
+                return _pack({"kind": "delta", "base": base_id, "depth": depth + 1, "patch": patch})
+    return _pack({"kind": "full", "state": state})
+
+
+# ===================================================================
+# READ / WRITE
+# ===================================================================
+
+def _latest_bases(conn, spec: SnapshotTable, entity_ids: List[int]) -> Dict[int, Tuple[int, Dict[str, Any], int]]:
+    """(base id, base state, depth of the latest row) per entity, in two queries."""
+    rows = conn.execute(sa_text(f"""
+        SELECT entity, id, snapshot_data FROM (
+            SELECT {spec.entity_col} AS entity, id, snapshot_data,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY {spec.entity_col} ORDER BY {spec.order_col} DESC
+                   ) AS rn
+            FROM {spec.table}
+            WHERE {spec.entity_col} IN (SELECT value FROM json_each(:ids))
+            AND {spec.scope_sql}
+        ) WHERE rn = 1
+    """), {"ids": json.dumps(entity_ids)}).fetchall()
+
+    bases = {}
+    pending = {}
+    for entity, row_id, data in rows:
+        if not data:
+            continue
+        doc = _unpack(data)
+        if doc["kind"] == "full":
+            bases[entity] = (row_id, doc["state"], 0)
+        else:
+            pending[entity] = (doc["base"], doc["depth"])
+
+    if pending:
+        base_rows = dict(conn.execute(sa_text(f"""
+            SELECT id, snapshot_data FROM {spec.table}
+            WHERE id IN (SELECT value FROM json_each(:ids))
+        """), {"ids": json.dumps([b for b, _ in pending.values()])}).fetchall())
+        for entity, (base_id, depth) in pending.items():
+            if base_id in base_rows:
+                bases[entity] = (base_id, _unpack(base_rows[base_id])["state"], depth)
+    return bases
+
+
+def encode_snapshots(conn, spec: SnapshotTable, states: Dict[int, Dict[str, Any]]) -> Dict[int, str]:
+    """
+    snapshot_data for the next version of each entity (entity id -> state).
+    Call inside the transaction that inserts the rows.
+    """
+    if not states:
+        return {}
+    bases = _latest_bases(conn, spec, list(states))
+    return {
+        entity: _encode(_normalize(state), bases.get(entity))
+        for entity, state in states.items()
+    }
+
+
+def _decode_row(conn, spec: SnapshotTable, data: str) -> Dict[str, Any]:
+    doc = _unpack(data)
+    if doc["kind"] == "full":
+        return doc["state"]
+    base = conn.execute(sa_text(f"SELECT snapshot_data FROM {spec.table} WHERE id = :id"),
+                        {"id": doc["base"]}).fetchone()
+    if not base:
+        raise ValueError(f"Base snapshot {doc['base']} is missing from {spec.table}")
+    return apply_patch(_unpack(base[0])["state"], doc["patch"])
+
+
+def load_snapshot(conn, spec: SnapshotTable, snapshot_id: int) -> Dict[str, Any]:
+    """Rebuild the full state stored by one snapshot row."""
+    row = conn.execute(sa_text(f"SELECT snapshot_data FROM {spec.table} WHERE id = :id"),
+                       {"id": snapshot_id}).fetchone()
+    if not row:
+        raise ValueError(f"Snapshot {snapshot_id} not found in {spec.table}")
+    return _decode_row(conn, spec, row[0])
+
+
+# ===================================================================
+# COMPACTION
+# ===================================================================
+
+def _entities_needing_work(conn, spec: SnapshotTable, keep_last: Optional[int]) -> List[int]:
+    having = ["SUM(CASE WHEN snapshot_data NOT LIKE :prefix THEN 1 ELSE 0 END) > 0"]
+    params: Dict[str, Any] = {"prefix": _PREFIX + "%"}
+    if keep_last is not None:
+        having.append("COUNT(*) > :keep_last")
+        params["keep_last"] = keep_last
+    rows = conn.execute(sa_text(f"""
+        SELECT {spec.entity_col} FROM {spec.table}
+        WHERE {spec.scope_sql} AND snapshot_data IS NOT NULL
+        GROUP BY {spec.entity_col}
+        HAVING {" OR ".join(having)}
+    """), params).fetchall()
+    return [r[0] for r in rows]
+
+
+def _compact_entities(conn, spec: SnapshotTable, entity_ids: List[int],
+                      keep_last: Optional[int]) -> Tuple[int, int]:
+    """Prune and re-encode the given entities. Returns (deleted, rewritten)."""
+    rows = conn.execute(sa_text(f"""
+        SELECT id, {spec.entity_col} AS entity, snapshot_data FROM {spec.table}
+        WHERE {spec.entity_col} IN (SELECT value FROM json_each(:ids))
+        AND {spec.scope_sql} AND snapshot_data IS NOT NULL
+        ORDER BY {spec.entity_col}, {spec.order_col}
+    """), {"ids": json.dumps(entity_ids)}).fetchall()
+
+    by_id = {r[0]: r[2] for r in rows}
+    history: Dict[int, List[Tuple[int, str]]] = {}
+    for row_id, entity, data in rows:
+        history.setdefault(entity, []).append((row_id, data))
+
+    delete_ids: List[int] = []
+    updates: List[Dict[str, Any]] = []
+    for entity, versions in history.items():
+        states = {}
+        for row_id, data in versions:
+            doc = _unpack(data)
+            if doc["kind"] == "full":
+                states[row_id] = doc["state"]
+            elif doc["base"] in by_id:
+                states[row_id] = apply_patch(_unpack(by_id[doc["base"]])["state"], doc["patch"])
+        if len(states) < len(versions):
+            log.warning("Skipping %s %s=%s: a delta references a missing base",
+                        spec.table, spec.entity_col, entity)
+            continue
+
+        cut = len(versions) - keep_last if keep_last is not None and len(versions) > keep_last else 0
+        delete_ids.extend(row_id for row_id, _ in versions[:cut])
+
+        base = None
+        for row_id, data in versions[cut:]:
+            encoded = _encode(states[row_id], base)
+            doc = _unpack(encoded)
+            base = (row_id, states[row_id], 0) if doc["kind"] == "full" else (base[0], base[1], doc["depth"])
+            if encoded != data:
+                updates.append({"id": row_id, "data": encoded})
+
+    if delete_ids:
+        conn.execute(sa_text(f"""
+            DELETE FROM {spec.table} WHERE id IN (SELECT value FROM json_each(:ids))
+        """), {"ids": json.dumps(delete_ids)})
+    if updates:
+        conn.execute(sa_text(f"UPDATE {spec.table} SET snapshot_data = :data WHERE id = :id"), updates)
+    return len(delete_ids), len(updates)
+
+
+def prune_snapshots(engine: Engine, spec: SnapshotTable, keep_last: Optional[int] = None) -> int:
+    """
+    Keep the most recent keep_last versions per entity (spec.keep_last by
+    default); surviving deltas are rebased. Returns the number deleted.
+    """
+    keep_last = spec.keep_last if keep_last is None else keep_last
+    deleted = 0
+    with engine.begin() as conn:
+        entity_ids = _entities_needing_work(conn, spec, keep_last)
+    for start in range(0, len(entity_ids), COMPACTION_BATCH):
+        with engine.begin() as conn:
+            deleted += _compact_entities(conn, spec, entity_ids[start:start + COMPACTION_BATCH], keep_last)[0]
+    return deleted
+
+
+def compact_snapshots(engine: Engine) -> Dict[str, Dict[str, int]]:
+    """
+    Apply retention and delta-encode legacy rows in every snapshot table.
+    Each batch of entities commits on its own, so the job can be stopped
+    at any point. Returns {table: {"entities", "deleted", "rewritten"}}.
+    """
+    summary = {}
+    for spec in SNAPSHOT_TABLES:
+        try:
+            with engine.begin() as conn:
+                entity_ids = _entities_needing_work(conn, spec, spec.keep_last)
+        except Exception as e:
+            if "no such table" not in str(e).lower():
+                raise
+            continue
+
+        deleted = rewritten = 0
+        for start in range(0, len(entity_ids), COMPACTION_BATCH):
+            with engine.begin() as conn:
+                d, r = _compact_entities(conn, spec, entity_ids[start:start + COMPACTION_BATCH], spec.keep_last)
+            deleted += d
+            rewritten += r
+        summary[spec.table] = {"entities": len(entity_ids), "deleted": deleted, "rewritten": rewritten}
+        if entity_ids:
+            log.info("Compacted %s: %d entities, %d deleted, %d rewritten",
+                     spec.table, len(entity_ids), deleted, rewritten)
+    return summary
+
+
+_WORKERS: Dict[str, threading.Thread] = {}
+_WORKERS_LOCK = threading.Lock()
+
+
+def _compaction_loop(engine: Engine, interval: float) -> None:
+    while True:
+        try:
+            compact_snapshots(engine)
+        except Exception:
+            log.exception("Snapshot compaction failed")
+        time.sleep(interval)
+
+
+def start_compaction_worker(engine: Engine, interval: float = COMPACTION_INTERVAL_SECONDS) -> None:
+    """Start the periodic compaction thread for this database (once per process)."""
+    key = str(engine.url)
+    with _WORKERS_LOCK:
+        worker = _WORKERS.get(key)
+        if worker is not None and worker.is_alive():
+            return
+        worker = threading.Thread(
+            target=_compaction_loop, args=(engine, interval),
+            name="snapshot-compaction", daemon=True
+        )
+        _WORKERS[key] = worker
+        worker.start()
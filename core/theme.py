@@ -149,6 +149,19 @@ def inject_css(
     primitives: dict | None = None,
     components: dict | None = None,
 ):
+    st.markdown(build_css(mode, colors, background, fonts, primitives, components=components),
+                unsafe_allow_html=True)
+
+
+def build_css(
+    mode: str,
+    colors: dict,
+    background: dict,
+    fonts: dict,
+    primitives: dict | None = None,
+    components: dict | None = None,
+) -> str:
+    """The theme <style> block; pure, so core.config_snapshot can cache it per (degree, mode)."""
     # --- CHANGED ---
     # Removed all hardcoded fallbacks (e.g., "... or '#0a84ff'").
     # We now trust theme_manager to provide a complete 'colors' dict.
@@ -250,8 +263,7 @@ section[data-testid="stSidebar"] a {{
 }}
 """
 
-    # (Rest of CSS injection is unchanged)
-    st.markdown(f"""
+    return f"""
     <style>
       :root {{
         {root_css};
@@ -322,4 +334,4 @@ section[data-testid="stSidebar"] a {{
 
       {css_sidebar}
     </style>
-    """, unsafe_allow_html=True)
+    """
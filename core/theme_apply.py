@@ -3,8 +3,8 @@ from __future__ import annotations
 from typing import Optional, Dict, Any
 import streamlit as st
 
-from core.theme_manager import get_app_theme
-from core.theme import inject_css, decide_mode
+from core.config_snapshot import app_theme, theme_css
+from core.theme import decide_mode
 
 
 def apply_theme_for_degree(
@@ -18,11 +18,12 @@ def apply_theme_for_degree(
     
     --- CHANGED ---
     This function is now simpler as get_app_theme() guarantees a complete
-    theme config with defaults.
+    theme config with defaults. The config and CSS come from
+    core.config_snapshot, so a rerun costs no queries or merging.
     """
-    # 1) Load full theme config for the degree (or global fallback)
-    #    This is now guaranteed to be a complete, merged config.
-    theme_cfg: Dict[str, Any] = get_app_theme(engine, degree_code)
+    # 1) Full theme config for the degree (or global fallback), merged with
+    #    defaults once per process by the config snapshot; read-only.
+    theme_cfg: Dict[str, Any] = app_theme(engine, degree_code)
 
     # 2) Resolve light/dark mode; allow temporary in-session override if present
     forced = st.session_state.get("theme_force_mode")
@@ -31,32 +32,10 @@ def apply_theme_for_degree(
     else:
         mode = decide_mode(theme_cfg, engine=engine, logged_email=user_email)
 
-    # 3) Collect tokens/colors safely
-    # --- CHANGED ---
-    # Simplified logic, as we now have a guaranteed structure.
-    theme_node = theme_cfg.get("theme", {})
-    tokens = theme_node.get("tokens", {})
-    colors = tokens.get(mode, tokens.get("light", {})) # Fallback to light tokens
-    
-    background = theme_node.get("background", {})
-    primitives = theme_node.get("ui_primitives", {})
-    components = theme_node.get("components", {}) # --- BUG FIX ---
-    fonts = theme_cfg.get("fonts", {}) # This is at the root level
-
-    # 4) Inject the CSS once for this render
-    # --- BUG FIX ---
-    # Now correctly passes the `components` dictionary to inject_css,
-    # so things like sidebar colors will be applied.
-    inject_css(
-        mode, 
-        colors, 
-        background, 
-        fonts, 
-        primitives, 
-        components=components
-    )
+    # 3) Inject the CSS for this render (built once per degree and mode)
+    st.markdown(theme_css(engine, degree_code, mode), unsafe_allow_html=True)
 
-    # 5) Stash the chosen mode for other widgets
+    # 4) Stash the chosen mode for other widgets
     st.session_state["theme_mode"] = mode
 
     return theme_cfg
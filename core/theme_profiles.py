@@ -4,6 +4,8 @@ from typing import List, Optional
 import json
 from sqlalchemy import text as sa_text
 
+from core.config_snapshot import invalidate as invalidate_snapshot
+
 # We store named theme profiles in the existing `configs` table.
 # - namespace = "theme_profiles"
 # - degree column is reused to hold the *profile name*
@@ -85,6 +87,7 @@ def save_profile(engine, name: str, theme_cfg: dict) -> None:
               config_json=excluded.config_json,
               updated_at=CURRENT_TIMESTAMP
         """), {"name": name, "ns": PROFILE_NS, "j": payload})
+    invalidate_snapshot(PROFILE_NS)
 
 
 def delete_profile(engine, name: str) -> None:
@@ -97,6 +100,7 @@ def delete_profile(engine, name: str) -> None:
             DELETE FROM configs
              WHERE degree=:name AND namespace=:ns
         """), {"name": name, "ns": PROFILE_NS})
+    invalidate_snapshot(PROFILE_NS)
 
 
 def apply_profile_to_draft(engine, name: str) -> None:
@@ -116,3 +120,4 @@ def apply_profile_to_draft(engine, name: str) -> None:
               config_json=excluded.config_json,
               updated_at=CURRENT_TIMESTAMP
         """), {"ns": THEME_NS, "j": json.dumps(prof)})
+    invalidate_snapshot(THEME_NS)
@@ -1,41 +1,19 @@
 # app/core/ui.py
 from __future__ import annotations
-import json, datetime
+import datetime
 import streamlit as st
-from sqlalchemy import text as sa_text
+from core.config_snapshot import footer_config
 from core.settings import load_settings
 from core.db import get_engine, init_db
 
-def _fetch_one(conn, degree: str):
-    return conn.execute(
-        sa_text("SELECT config_json FROM configs WHERE namespace='footer' AND degree=:d ORDER BY updated_at DESC LIMIT 1"),
-        dict(d=degree)
-    ).fetchone()
-
 def _get_footer_cfg_global() -> dict:
     """Return a single footer config to apply everywhere, preferring degree='*'."""
     settings = load_settings()
     engine = get_engine(settings.db.url)
     init_db(engine)
-
-    with engine.begin() as conn:
-        # 1) global '*' wins
-        row = _fetch_one(conn, "*")
-        if not row:
-            # 2) fallback to 'default'
-            row = _fetch_one(conn, "default")
-        if not row:
-            # 3) fallback to most recent footer of any degree
-            row = conn.execute(sa_text(
-                "SELECT config_json FROM configs WHERE namespace='footer' ORDER BY updated_at DESC LIMIT 1"
-            )).fetchone()
-
-    if not row:
-        return {}
-    try:
-        return json.loads(row[0]) or {}
-    except Exception:
-        return {}
+    # '*' wins, then 'default', then the most recent footer of any degree;
+    # loaded once per process (core.config_snapshot)
+    return footer_config(engine)
 
 def _expand(text: str, cfg: dict) -> str:
     year = str(datetime.datetime.now().year)
@@ -18,13 +18,15 @@ Usage:
                      display_name=program_name)
 """
 
+import time
 import streamlit as st
-from typing import Optional, Dict, Any, Callable
+from typing import Optional, Dict, Any, Callable, Iterable, Set, Tuple
 from datetime import datetime
 from sqlalchemy import text as sa_text
 from sqlalchemy.engine import Engine
 
 from core.approval_handler_enhanced import ApprovalHandler
+from core.schema_registry import register_after_install_hook
 
 
 # ============================================================================
@@ -123,6 +125,93 @@ DELETE_CONFIG = {
 # DEPENDENCY CHECKER
 # ============================================================================
 
+# Table name -> column names, per database, loaded with one query and
+# reused for CATALOG_TTL seconds; schema installs drop it (see
+# refresh_table_catalog).
+CATALOG_TTL = 300
+_TABLE_CATALOG: Dict[str, Tuple[float, Dict[str, Set[str]]]] = {}
+
+# Max ids per IN (...) list; SQLite's default variable limit is 999
+_ID_CHUNK = 500
+
+
+def _table_catalog(conn) -> Dict[str, Set[str]]:
+    url = str(conn.engine.url)
+    cached = _TABLE_CATALOG.get(url)
+    if cached and time.monotonic() - cached[0] < CATALOG_TTL:
+        return cached[1]
+
+    catalog: Dict[str, Set[str]] = {}
+    rows = conn.execute(sa_text("""
+        SELECT m.name, p.name
+        FROM sqlite_master m
+        JOIN pragma_table_info(m.name) p
+        WHERE m.type = 'table'
+    """)).fetchall()
+    for table, column in rows:
+        catalog.setdefault(table, set()).add(column)
+
+    _TABLE_CATALOG[url] = (time.monotonic(), catalog)
+    return catalog
+
+
+@register_after_install_hook
+def refresh_table_catalog(engine: Optional[Engine] = None) -> None:
+    """Forget the cached table catalog of engine (all of them if None)."""
+    if engine is None:
+        _TABLE_CATALOG.clear()
+    else:
+        _TABLE_CATALOG.pop(str(engine.url), None)
+
+
+def check_dependencies_bulk(
+    engine: Engine,
+    object_type: str,
+    object_ids: Iterable[str],
+) -> Dict[str, Dict[str, int]]:
+    """
+    Dependency counts for many objects of one type.
+
+    One grouped COUNT query per dependency table (per 500 ids), instead of
+    one query per table per object.
+
+    Returns:
+        Dict mapping object_id to {display_name: count}; objects without
+        dependencies map to {}.
+    """
+    ids = list(dict.fromkeys(str(i) for i in object_ids))
+    results: Dict[str, Dict[str, int]] = {oid: {} for oid in ids}
+    config = DELETE_CONFIG.get(object_type, {})
+
+    if not ids or not config.get("check_dependencies"):
+        return results
+
+    with engine.connect() as conn:
+        catalog = _table_catalog(conn)
+        for table, column, display_name in config.get("dependency_tables", []):
+            if column not in catalog.get(table, ()):
+                continue
+
+            for start in range(0, len(ids), _ID_CHUNK):
+                chunk = ids[start:start + _ID_CHUNK]
+                params = {f"id{i}": oid for i, oid in enumerate(chunk)}
+                placeholders = ", ".join(f":id{i}" for i in range(len(chunk)))
+                try:
+                    rows = conn.execute(sa_text(
+                        f"SELECT {column}, COUNT(*) FROM {table} "
+                        f"WHERE {column} IN ({placeholders}) GROUP BY {column}"
+                    ), params).fetchall()
+                except Exception:
+                    # If query fails, skip this dependency
+                    break
+
+                for oid, count in rows:
+                    if count > 0 and str(oid) in results:
+                        results[str(oid)][display_name] = int(count)
+
+    return results
+
+
 def check_dependencies(
     engine: Engine,
     object_type: str,
@@ -134,37 +223,7 @@ def check_dependencies(
     Returns:
         Dict mapping table names to counts, e.g., {"programs": 3, "semesters": 12}
     """
-    config = DELETE_CONFIG.get(object_type, {})
-    
-    if not config.get("check_dependencies"):
-        return {}
-    
-    dependencies = {}
-    dependency_tables = config.get("dependency_tables", [])
-    
-    with engine.begin() as conn:
-        for table, column, display_name in dependency_tables:
-            # Check if table exists
-            table_exists = conn.execute(sa_text(
-                f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table}'"
-            )).fetchone()
-            
-            if not table_exists:
-                continue
-            
-            # Count dependencies
-            try:
-                count = conn.execute(sa_text(
-                    f"SELECT COUNT(*) FROM {table} WHERE {column} = :oid"
-                ), {"oid": object_id}).fetchone()[0]
-                
-                if count > 0:
-                    dependencies[display_name] = count
-            except Exception:
-                # If query fails, skip this dependency
-                pass
-    
-    return dependencies
+    return check_dependencies_bulk(engine, object_type, [object_id]).get(str(object_id), {})
 
 
 # ============================================================================
@@ -475,11 +534,35 @@ def show_bulk_delete_form(
     st.markdown(f"### {icon} Bulk Delete {obj_display}")
     st.info(f"Selected {len(object_ids)} {obj_display.lower()} for deletion")
     
+    # Dependencies for the whole selection, scanned once and reused by the
+    # confirm step (form submit reruns the script with the same selection)
+    deps_key = f"bulk_delete_deps_{object_type}"
+    selection = (object_type, tuple(object_ids))
+    cached = st.session_state.get(deps_key)
+    if cached and cached[0] == selection:
+        dependencies = cached[1]
+    else:
+        dependencies = check_dependencies_bulk(engine, object_type, object_ids)
+        st.session_state[deps_key] = (selection, dependencies)
+
+    with_deps = {oid: deps for oid, deps in dependencies.items() if deps}
+    if with_deps:
+        totals: Dict[str, int] = {}
+        for deps in with_deps.values():
+            for name, count in deps.items():
+                totals[name] = totals.get(name, 0) + count
+        st.warning(
+            f"⚠️ **{len(with_deps)} of {len(object_ids)} selected {obj_display.lower()} have dependencies:**\n\n" +
+            "\n".join([f"- **{count} {name}**" for name, count in totals.items()])
+        )
+
     # Show list of objects
     with st.expander(f"View {len(object_ids)} selected {obj_display.lower()}"):
         for obj_id in object_ids:
             display_name = (display_names or {}).get(obj_id, obj_id)
-            st.write(f"- {display_name}")
+            deps = dependencies.get(str(obj_id)) or {}
+            suffix = " — " + ", ".join(f"{c} {n}" for n, c in deps.items()) if deps else ""
+            st.write(f"- {display_name}{suffix}")
     
     # Form
     with st.form(f"bulk_delete_{object_type}"):
@@ -509,12 +592,11 @@ def show_bulk_delete_form(
             # Create approval requests for each object
             approval_ids = []
             
+            handler = ApprovalHandler(engine, object_type, degree_code=degree_code)
             for obj_id in object_ids:
                 display_name = (display_names or {}).get(obj_id, obj_id)
                 
                 try:
-                    handler = ApprovalHandler(engine, object_type, degree_code=degree_code)
-                    
                     approval_id = handler.request_approval(
                         object_id=obj_id,
                         action="delete",
@@ -524,6 +606,7 @@ def show_bulk_delete_form(
                             "display_name": display_name,
                             "bulk_operation": True,
                             "bulk_count": len(object_ids),
+                            "dependencies": dependencies.get(str(obj_id), {}),
                         }
                     )
                     
@@ -540,6 +623,7 @@ def show_bulk_delete_form(
                     st.error(f"Error for {display_name}: {e}")
             
             if approval_ids:
+                st.session_state.pop(deps_key, None)
                 st.success(
                     f"✅ **Bulk deletion request submitted!**\n\n"
                     f"Created {len(approval_ids)} approval requests\n\n"
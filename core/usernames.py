@@ -0,0 +1,128 @@
+# core/usernames.py
+"""
+Collision-free username allocation
+
+Usernames are a base derived from the person's name plus a suffix. The
+allocator reads every existing username that starts with any of a batch of
+bases in one query (a range scan on the lower(username) index the schema
+installers create), then hands out free names in memory, so a whole import
+costs one query however many people share a first name.
+
+Suffix styles:
+- "counter": base, base1, base2, ... (students)
+- "digits":  base + 4 random digits not in use (faculty and admins; the
+  digits also go into the initial password)
+
+Usage:
+    allocator = UsernameAllocator(conn, "student_profiles")
+    allocator.prefetch(bases)            # one query for the batch
+    names = [allocator.allocate(b) for b in bases]
+"""
+from __future__ import annotations
+
+import json
+import random
+import string
+from typing import Dict, Iterable, Optional, Set
+
+from sqlalchemy import text as sa_text
+
+USERNAME_TABLES = ("student_profiles", "faculty_profiles", "tech_admins", "academic_admins")
+SUFFIX_STYLES = ("counter", "digits")
+
+
+def username_index_sql(table: str) -> str:
+    """DDL for the normalised-username index the allocator's range scan uses."""
+    return f"CREATE INDEX IF NOT EXISTS ix_{table}_username_lower ON {table}(lower(username))"
+
+
+def _prefix_bounds(base: str):
+    """[lo, hi) such that lo <= name < hi exactly when name starts with base."""
+    return base, base[:-1] + chr(ord(base[-1]) + 1)
+
+
+class UsernameAllocator:
+    """Hands out usernames that are free in `table` and unique within the batch."""
+
+    def __init__(self, conn, table: str, style: str = "counter"):
+        if table not in USERNAME_TABLES:
+            raise ValueError(f"Unknown username table: {table}")
+        if style not in SUFFIX_STYLES:
+            raise ValueError(f"Unknown suffix style: {style}")
+        self.conn = conn
+        self.table = table
+        self.style = style
+        self._taken: Dict[str, Set[str]] = {}
+        self._next: Dict[str, int] = {}
+        self._reserved: Set[str] = set()
+
+    def prefetch(self, bases: Iterable[str]) -> None:
+        """Load the usernames starting with each not yet loaded base (one query)."""
+        pending = sorted({b.lower() for b in bases if b} - set(self._taken))
+        if not pending:
+            return
+        bounds = json.dumps([list(_prefix_bounds(b)) for b in pending])
+        rows = self.conn.execute(sa_text(f"""
+            SELECT json_extract(b.value, '$[0]'), lower(t.username)
+            FROM json_each(:bounds) b
+            JOIN {self.table} t
+              ON lower(t.username) >= json_extract(b.value, '$[0]')
+             AND lower(t.username) < json_extract(b.value, '$[1]')
+        """), {"bounds": bounds}).fetchall()
+        for base in pending:
+            self._taken[base] = set()
+        for base, username in rows:
+            self._taken[base].add(username)
+
+    def reserve(self, usernames: Iterable[str]) -> None:
+        """Treat these (e.g. handed out earlier but not written yet) as taken."""
+        self._reserved.update(u.lower() for u in usernames if u)
+
+    def _free(self, base: str, candidate: str) -> bool:
+        return candidate not in self._taken[base] and candidate not in self._reserved
+
+    def allocate(self, base: str) -> str:
+        base = (base or "").lower()
+        if not base:
+            raise ValueError("Username base is empty")
+        self.prefetch([base])
+        taken = self._taken[base]
+
+        if self.style == "counter":
+            n = self._next.get(base, 0)
+            candidate = base if n == 0 else f"{base}{n}"
+            while not self._free(base, candidate):
+                n += 1
+                candidate = f"{base}{n}"
+            self._next[base] = n + 1
+        else:
+            candidate = self._random_digits(base)
+
+        taken.add(candidate)
+        # Another base can produce the same string ("jsmith" -> "jsmith1" vs base "jsmith1")
+        self._reserved.add(candidate)
+        return candidate
+
+    def _random_digits(self, base: str) -> str:
+        for _ in range(20):
+            candidate = f"{base}{''.join(random.choices(string.digits, k=4))}"
+            if self._free(base, candidate):
+                return candidate
+        free = [f"{base}{n:04d}" for n in range(10000) if self._free(base, f"{base}{n:04d}")]
+        if free:
+            return random.choice(free)
+        # All 10,000 four-digit suffixes used: letter + 3 digits on top
+        while True:
+            candidate = (f"{base}{''.join(random.choices(string.digits, k=4))}"
+                         f"{random.choice(string.ascii_lowercase)}{''.join(random.choices(string.digits, k=3))}")
+            if self._free(base, candidate):
+                return candidate
+
+
+def allocate_username(conn, table: str, base: str, style: str = "counter",
+                      reserved: Optional[Set[str]] = None) -> str:
+    """Single allocation: one query."""
+    allocator = UsernameAllocator(conn, table, style)
+    if reserved:
+        allocator.reserve(reserved)
+    return allocator.allocate(base)
@@ -0,0 +1,220 @@
+# core/wide_export.py
+"""
+Streaming wide exports
+
+Exports of profiles + custom fields used to load every row and every
+custom value into pandas, pivot everything at once and build the file in
+memory. Here rows are read in keyset-paginated chunks, the custom values
+of each chunk's rows are fetched and pivoted long -> wide for that chunk
+only, and every chunk is appended to a temporary file. Memory is bounded
+by the chunk size whatever the number of rows.
+
+Formats: CSV, XLSX (openpyxl write-only mode), Parquet (pyarrow). Parquet
+columns are written as strings so every chunk shares one schema.
+
+The page query carries an `{after}` placeholder for the keyset predicate
+and a `:limit` parameter; key columns must be unique together and match
+the query's ORDER BY. When a page joins one-to-many rows (enrollments,
+affiliations), put the LIMIT and `{after}` on a profiles subquery so all
+rows of a profile land in the same page:
+
+    spec = WideExportSpec(
+        page_sql="SELECT id, name FROM people WHERE {after} ORDER BY name, id LIMIT :limit",
+        keys=[("name", "name"), ("id", "id")],
+        custom_sql="SELECT person_id, field, value FROM people_custom "
+                   "WHERE person_id IN (SELECT value FROM json_each(:ids))",
+        custom_key="id",
+        custom_columns=["blood_group", "hostel"],
+    )
+    export = stream_wide_export(engine, spec, "xlsx", "people_export")
+    with open(export.path, "rb") as fh:
+        st.download_button("Download", fh, export.file_name, export.mime)
+    export.cleanup()
+"""
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from sqlalchemy import text as sa_text
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger(__name__)
+
+CHUNK_ROWS = 2000
+
+EXPORT_FORMATS: Dict[str, Tuple[str, str]] = {
+    "csv": ("text/csv", ".csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+
+
+@dataclass
+class WideExportSpec:
+    page_sql: str
+    # (SQL expression, result column) pairs the pages are keyed on
+    keys: List[Tuple[str, str]]
+    params: Dict[str, Any] = field(default_factory=dict)
+    # (key, field, value) rows for the keys bound to :ids (a JSON list)
+    custom_sql: Optional[str] = None
+    custom_key: Optional[str] = None
+    custom_columns: Sequence[str] = ()
+    # Pivoted columns are named prefix + field, keeping them apart from base columns
+    custom_prefix: str = ""
+    # Per-chunk hook: rename/reorder/fill columns, drop helper columns
+    transform: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None
+
+
+@dataclass
+class ExportFile:
+    path: str
+    file_name: str
+    mime: str
+    rows: int
+
+    def cleanup(self) -> None:
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+# ===================================================================
+# WRITERS
+# ===================================================================
+
+class _CsvWriter:
+    def __init__(self, path: str):
+        self.fh = open(path, "w", newline="", encoding="utf-8")
+        self.header = True
+
+    def write(self, df: pd.DataFrame) -> None:
+        df.to_csv(self.fh, index=False, header=self.header, quoting=csv.QUOTE_MINIMAL)
+        self.header = False
+
+    def close(self) -> None:
+        self.fh.close()
+
+
+class _XlsxWriter:
+    def __init__(self, path: str):
+        from openpyxl import Workbook
+
+        self.path = path
+        self.book = Workbook(write_only=True)
+        self.sheet = self.book.create_sheet("Export")
+        self.header = True
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.header:
+            self.sheet.append([str(c) for c in df.columns])
+            self.header = False
+        for row in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+            self.sheet.append(list(row))
+
+    def close(self) -> None:
+        self.book.save(self.path)
+
+
+class _ParquetWriter:
+    def __init__(self, path: str):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa, self.pq = pa, pq
+        self.path = path
+        self.writer = None
+        self.schema = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        strings = df.astype(object).where(df.notna(), None).map(lambda v: v if v is None else str(v))
+        if self.writer is None:
+            self.schema = self.pa.schema([(str(c), self.pa.string()) for c in df.columns])
+            self.writer = self.pq.ParquetWriter(self.path, self.schema)
+        table = self.pa.Table.from_pandas(strings, schema=self.schema, preserve_index=False)
+        self.writer.write_table(table)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+
+_WRITERS = {"csv": _CsvWriter, "xlsx": _XlsxWriter, "parquet": _ParquetWriter}
+
+
+# ===================================================================
+# STREAMING
+# ===================================================================
+
+def _read(conn, sql: str, params: Dict[str, Any]) -> pd.DataFrame:
+    result = conn.execute(sa_text(sql), params)
+    # object dtype keeps DB values as they are (ints with NULLs stay ints)
+    return pd.DataFrame(result.fetchall(), columns=list(result.keys()), dtype=object)
+
+
+def iter_wide_chunks(conn, spec: WideExportSpec, chunk_rows: int = CHUNK_ROWS):
+    """Yield the export chunk by chunk as wide DataFrames."""
+    after: Optional[Tuple[Any, ...]] = None
+    key_exprs = ", ".join(expr for expr, _ in spec.keys)
+    key_params = ", ".join(f":_after{i}" for i in range(len(spec.keys)))
+    while True:
+        params = dict(spec.params, limit=chunk_rows)
+        if after is None:
+            predicate = "1=1"
+        else:
+            predicate = f"({key_exprs}) > ({key_params})"
+            params.update({f"_after{i}": v for i, v in enumerate(after)})
+        page = _read(conn, spec.page_sql.replace("{after}", predicate), params)
+        if page.empty:
+            return
+        last = page.iloc[-1]
+        after = tuple(last[column] for _, column in spec.keys)
+
+        if spec.custom_sql:
+            ids = page[spec.custom_key].dropna().unique().tolist()
+            custom = _read(conn, spec.custom_sql, {"ids": json.dumps(ids)})
+            if not custom.empty:
+                key, field_col, value = custom.columns[:3]
+                wide = (custom.drop_duplicates([key, field_col], keep="last")
+                        .pivot(index=key, columns=field_col, values=value))
+            else:
+                wide = pd.DataFrame()
+            wide = wide.reindex(columns=list(spec.custom_columns)).add_prefix(spec.custom_prefix)
+            page = page.join(wide, on=spec.custom_key)
+
+        yield spec.transform(page) if spec.transform else page
+
+
+def stream_wide_export(engine: Engine, spec: WideExportSpec, fmt: str, file_stem: str,
+                       chunk_rows: int = CHUNK_ROWS) -> ExportFile:
+    """Write the export to a temporary file; the caller serves it and calls cleanup()."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    mime, suffix = EXPORT_FORMATS[fmt]
+    handle, path = tempfile.mkstemp(prefix=f"{file_stem}_", suffix=suffix)
+    os.close(handle)
+
+    rows = 0
+    writer = _WRITERS[fmt](path)
+    try:
+        with engine.connect() as conn:
+            for chunk in iter_wide_chunks(conn, spec, chunk_rows):
+                writer.write(chunk)
+                rows += len(chunk)
+        writer.close()
+    except Exception:
+        try:
+            writer.close()
+        finally:
+            os.remove(path)
+        raise
+
+    log.info("export %s: %d rows -> %s", file_stem, rows, fmt)
+    return ExportFile(path=path, file_name=f"{file_stem}{suffix}", mime=mime, rows=rows)
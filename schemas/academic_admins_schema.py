@@ -1,6 +1,7 @@
 # app/schemas/academic_admins_schema.py
 from sqlalchemy import text as sa_text
 from core.schema_registry import register
+from core.usernames import username_index_sql
 
 @register
 def ensure_academic_admins_schema(engine):
@@ -28,6 +29,7 @@ def ensure_academic_admins_schema(engine):
         # Existing indexes (kept as-is)
         conn.execute(sa_text("CREATE INDEX IF NOT EXISTS ix_aa_user ON academic_admins(user_id);"))
         conn.execute(sa_text("CREATE INDEX IF NOT EXISTS ix_aa_fixed_role ON academic_admins(fixed_role);"))
+        conn.execute(sa_text(username_index_sql("academic_admins")))
 
 def _ensure_column(conn, col: str, col_def: str):
     """SQLite-safe helper to add a missing column on academic_admins."""
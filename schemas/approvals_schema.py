@@ -67,6 +67,8 @@ def ensure_approvals_schema(engine):
         conn.execute(sa_text("CREATE INDEX IF NOT EXISTS idx_approvals_status ON approvals(status)"))
         conn.execute(sa_text("CREATE INDEX IF NOT EXISTS idx_approvals_type_action ON approvals(object_type, action)"))
         conn.execute(sa_text("CREATE INDEX IF NOT EXISTS idx_approvals_requester ON approvals(requester_email)"))
+        # Approval inbox: pending rows of one object type, newest first
+        conn.execute(sa_text("CREATE INDEX IF NOT EXISTS idx_approvals_inbox ON approvals(object_type, status, created_at)"))
         conn.execute(sa_text("CREATE INDEX IF NOT EXISTS idx_votes_approval ON approvals_votes(approval_id)"))
         
         # --- 5. Add any missing columns (idempotent) ---
@@ -0,0 +1,76 @@
+from __future__ import annotations
+from sqlalchemy import text as sa_text
+from core.schema_registry import register
+
+@register
+def ensure_attainment_schema(engine):
+    with engine.begin() as conn:
+        # Indirect CO attainment (course exit surveys etc.), entered per CO
+        conn.execute(sa_text("""
+        CREATE TABLE IF NOT EXISTS co_indirect_attainment (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            offering_id INTEGER NOT NULL,
+            co_id INTEGER NOT NULL,
+            attainment_percent REAL NOT NULL,
+            respondents INTEGER,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(offering_id, co_id)
+        )"""))
+
+        # Materialised attainment (core/attainment_engine.py)
+        conn.execute(sa_text("""
+        CREATE TABLE IF NOT EXISTS co_attainment (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            offering_id INTEGER NOT NULL,
+            co_id INTEGER NOT NULL,
+            co_code TEXT NOT NULL,
+            students_assessed INTEGER NOT NULL DEFAULT 0,
+            students_attained INTEGER NOT NULL DEFAULT 0,
+            direct_percent REAL,
+            indirect_percent REAL,
+            attainment_percent REAL,
+            computed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(offering_id, co_id)
+        )"""))
+
+        conn.execute(sa_text("""
+        CREATE TABLE IF NOT EXISTS outcome_attainment (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            offering_id INTEGER NOT NULL,
+            kind TEXT NOT NULL CHECK (kind IN ('po', 'pso')),
+            outcome_code TEXT NOT NULL,
+            attainment_percent REAL NOT NULL,
+            correlation_weight REAL NOT NULL,
+            computed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(offering_id, kind, outcome_code)
+        )"""))
+
+        # program_code is '' for offerings not tied to a program
+        conn.execute(sa_text("""
+        CREATE TABLE IF NOT EXISTS program_outcome_attainment (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            degree_code TEXT NOT NULL COLLATE NOCASE,
+            program_code TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+            ay_label TEXT NOT NULL COLLATE NOCASE,
+            kind TEXT NOT NULL CHECK (kind IN ('po', 'pso')),
+            outcome_code TEXT NOT NULL,
+            attainment_percent REAL NOT NULL,
+            offerings INTEGER NOT NULL DEFAULT 0,
+            computed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(degree_code, program_code, ay_label, kind, outcome_code)
+        )"""))
+
+        # Offerings whose inputs changed since their attainment was computed
+        conn.execute(sa_text("""
+        CREATE TABLE IF NOT EXISTS attainment_stale (
+            offering_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 1,
+            marked_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )"""))
+
+        conn.execute(sa_text(
+            "CREATE INDEX IF NOT EXISTS idx_co_attainment_offering ON co_attainment(offering_id)"
+        ))
+        conn.execute(sa_text(
+            "CREATE INDEX IF NOT EXISTS idx_outcome_attainment_offering ON outcome_attainment(offering_id)"
+        ))
@@ -12,6 +12,7 @@ from __future__ import annotations
 from sqlalchemy import text as sa_text
 from sqlalchemy.engine import Engine
 from core.schema_registry import register
+from core.co_matrix import load_offering_cos
 import logging
 
 logger = logging.getLogger(__name__)
@@ -230,42 +231,8 @@ def get_offering_by_context(engine: Engine, degree_code: str, ay_label: str,
 
 def get_cos_for_offering(engine: Engine, offering_id: int, include_correlations: bool = True):
     """Retrieve all COs for an offering with optional correlations."""
-    with engine.begin() as conn:
-        cos = _exec(conn, """
-        SELECT * FROM subject_cos
-        WHERE offering_id = :offering_id
-        ORDER BY sequence, co_code
-        """, {'offering_id': offering_id}).fetchall()
-        
-        result = []
-        for co in cos:
-            co_dict = dict(co)
-            
-            if include_correlations:
-                # Get PO correlations
-                po_corrs = _exec(conn, """
-                SELECT po_code, correlation_value FROM co_po_correlations
-                WHERE co_id = :co_id
-                """, {'co_id': co_dict['id']}).fetchall()
-                co_dict['po_correlations'] = {r['po_code']: r['correlation_value'] for r in po_corrs}
-                
-                # Get PSO correlations
-                pso_corrs = _exec(conn, """
-                SELECT pso_code, correlation_value FROM co_pso_correlations
-                WHERE co_id = :co_id
-                """, {'co_id': co_dict['id']}).fetchall()
-                co_dict['pso_correlations'] = {r['pso_code']: r['correlation_value'] for r in pso_corrs}
-                
-                # Get PEO correlations
-                peo_corrs = _exec(conn, """
-                SELECT peo_code, correlation_value FROM co_peo_correlations
-                WHERE co_id = :co_id
-                """, {'co_id': co_dict['id']}).fetchall()
-                co_dict['peo_correlations'] = {r['peo_code']: r['correlation_value'] for r in peo_corrs}
-            
-            result.append(co_dict)
-        
-        return result
+    loaded = load_offering_cos(engine, [offering_id], include_correlations=include_correlations)
+    return loaded[int(offering_id)].cos
 
 def get_rubric_for_offering(engine: Engine, offering_id: int, scope: str = 'subject', 
                             component_key: str = None):
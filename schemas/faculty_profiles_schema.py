@@ -1,6 +1,7 @@
 # faculty_profiles_schema.py
 from sqlalchemy import text as T
 from core.schema_registry import register
+from core.usernames import username_index_sql
 
 # Import the helper from the core module
 try:
@@ -64,6 +65,8 @@ def install_faculty_profiles(engine):
         _ensure_column(c, "faculty_profiles", "created_at", "DATETIME DEFAULT CURRENT_TIMESTAMP")
         _ensure_column(c, "faculty_profiles", "updated_at", "DATETIME")
         
+        c.execute(T(username_index_sql("faculty_profiles")))
+        
         print("✅ [SCHEMA] faculty_profiles migration complete")
         
         # Verify the columns exist
@@ -0,0 +1,60 @@
+# schemas/import_jobs_schema.py
+"""
+Background Import Jobs Schema
+- import_jobs: one row per upload, with checkpoint (next_row) and counters
+- import_job_payloads: the uploaded rows, kept until the job finishes
+- import_job_issues: per-row errors and skipped rows reported by each chunk
+"""
+from __future__ import annotations
+from sqlalchemy.engine import Engine
+from sqlalchemy import text as sa_text
+from core.schema_registry import register
+
+
+@register("import_jobs")
+def install_schema(engine: Engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(sa_text("""
+            CREATE TABLE IF NOT EXISTS import_jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                params_json TEXT,
+                total_rows INTEGER NOT NULL DEFAULT 0,
+                chunk_size INTEGER NOT NULL DEFAULT 500,
+                next_row INTEGER NOT NULL DEFAULT 0,
+                success_count INTEGER NOT NULL DEFAULT 0,
+                error_count INTEGER NOT NULL DEFAULT 0,
+                skipped_count INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                created_by TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                started_at TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                finished_at TIMESTAMP
+            )
+        """))
+        conn.execute(sa_text("CREATE INDEX IF NOT EXISTS idx_import_jobs_kind_created ON import_jobs(kind, created_at)"))
+        conn.execute(sa_text("CREATE INDEX IF NOT EXISTS idx_import_jobs_status ON import_jobs(status)"))
+
+        conn.execute(sa_text("""
+            CREATE TABLE IF NOT EXISTS import_job_payloads (
+                job_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                FOREIGN KEY (job_id) REFERENCES import_jobs(id) ON DELETE CASCADE
+            )
+        """))
+
+        conn.execute(sa_text("""
+            CREATE TABLE IF NOT EXISTS import_job_issues (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                chunk_start INTEGER NOT NULL,
+                row INTEGER,
+                email TEXT,
+                issue_type TEXT NOT NULL DEFAULT 'error',
+                message TEXT,
+                FOREIGN KEY (job_id) REFERENCES import_jobs(id) ON DELETE CASCADE
+            )
+        """))
+        conn.execute(sa_text("CREATE INDEX IF NOT EXISTS idx_import_job_issues_job ON import_job_issues(job_id, issue_type)"))
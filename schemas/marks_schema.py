@@ -15,3 +15,37 @@ def ensure_marks_schema(engine):
             updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
             UNIQUE(degree_code, assignment_code, student_id)
         )"""))
+
+        # Per-criterion rubric scores: score_pct (0-100 of the criterion) for
+        # analytic_points, level_label for analytic_levels
+        conn.execute(sa_text("""
+        CREATE TABLE IF NOT EXISTS rubric_criterion_scores (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            assessment_id INTEGER NOT NULL,
+            student_id TEXT NOT NULL,
+            criterion_key TEXT NOT NULL,
+            score_pct REAL,
+            level_label TEXT,
+            entered_by TEXT,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(assessment_id, student_id, criterion_key)
+        )"""))
+
+        # Computed per-student results for an offering (core/marks_engine.py)
+        conn.execute(sa_text("""
+        CREATE TABLE IF NOT EXISTS subject_marks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            offering_id INTEGER NOT NULL,
+            student_id TEXT NOT NULL,
+            internal_marks REAL NOT NULL DEFAULT 0,
+            exam_marks REAL NOT NULL DEFAULT 0,
+            jury_marks REAL NOT NULL DEFAULT 0,
+            total_marks REAL NOT NULL DEFAULT 0,
+            percent REAL NOT NULL DEFAULT 0,
+            passed INTEGER NOT NULL DEFAULT 0,
+            computed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(offering_id, student_id)
+        )"""))
+        conn.execute(sa_text(
+            "CREATE INDEX IF NOT EXISTS idx_subject_marks_offering ON subject_marks(offering_id)"
+        ))
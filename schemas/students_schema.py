@@ -9,6 +9,7 @@ from __future__ import annotations
 from sqlalchemy.engine import Engine
 from sqlalchemy import text as sa_text
 from core.schema_registry import register
+from core.usernames import username_index_sql
 
 
 @register("students")
@@ -50,6 +51,7 @@ def install_schema(engine: Engine) -> None:
         conn.execute(sa_text("CREATE INDEX IF NOT EXISTS idx_student_profiles_student_id ON student_profiles(student_id)"))
         conn.execute(sa_text("CREATE INDEX IF NOT EXISTS idx_student_profiles_email ON student_profiles(email)"))
         conn.execute(sa_text("CREATE INDEX IF NOT EXISTS idx_student_profiles_username ON student_profiles(username)"))
+        conn.execute(sa_text(username_index_sql("student_profiles")))
 
         # 2. student_enrollments
         conn.execute(sa_text("""
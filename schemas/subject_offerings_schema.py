@@ -15,6 +15,7 @@ from __future__ import annotations
 from sqlalchemy import text as sa_text
 from sqlalchemy.engine import Engine
 from core.schema_registry import register
+from core.snapshot_store import OFFERING_SNAPSHOTS, encode_snapshots, load_snapshot, prune_snapshots
 import logging
 
 logger = logging.getLogger(__name__)
@@ -872,8 +873,6 @@ def run_health_check(engine: Engine, check_type: str, ay_label: str = None, degr
 
 def create_snapshot(engine: Engine, offering_id: int, snapshot_type: str, actor: str, note: str = None) -> int:
     """Create a version snapshot of an offering."""
-    import json
-    
     with engine.begin() as conn:
         # Get current offering data
         offering = _exec(conn, "SELECT * FROM subject_offerings WHERE id = :id", {"id": offering_id}).fetchone()
@@ -891,6 +890,9 @@ def create_snapshot(engine: Engine, offering_id: int, snapshot_type: str, actor:
         
         next_num = result[0]
         
+        # Delta against the offering's latest base snapshot
+        snapshot_data = encode_snapshots(conn, OFFERING_SNAPSHOTS, {offering_id: offering_dict})[offering_id]
+        
         # Mark previous snapshots as inactive
         _exec(conn, """
         UPDATE subject_offerings_snapshots
@@ -910,7 +912,7 @@ def create_snapshot(engine: Engine, offering_id: int, snapshot_type: str, actor:
             "subject_code": offering_dict["subject_code"],
             "ay_label": offering_dict["ay_label"],
             "snapshot_number": next_num,
-            "snapshot_data": json.dumps(offering_dict, default=str),
+            "snapshot_data": snapshot_data,
             "snapshot_type": snapshot_type,
             "note": note,
             "created_by": actor
@@ -924,8 +926,6 @@ def create_snapshot(engine: Engine, offering_id: int, snapshot_type: str, actor:
 
 def rollback_to_snapshot(engine: Engine, offering_id: int, snapshot_id: int, actor: str) -> bool:
     """Rollback an offering to a previous snapshot."""
-    import json
-    
     with engine.begin() as conn:
         # Get snapshot
         snapshot = _exec(conn, """
@@ -937,7 +937,7 @@ def rollback_to_snapshot(engine: Engine, offering_id: int, snapshot_id: int, act
             raise ValueError(f"Snapshot {snapshot_id} not found for offering {offering_id}")
         
         snapshot_dict = dict(snapshot._mapping)
-        offering_data = json.loads(snapshot_dict["snapshot_data"])
+        offering_data = load_snapshot(conn, OFFERING_SNAPSHOTS, snapshot_id)
         
         # Check if offering is frozen
         current = _exec(conn, "SELECT is_frozen FROM subject_offerings WHERE id = :id", 
@@ -987,23 +987,10 @@ def rollback_to_snapshot(engine: Engine, offering_id: int, snapshot_id: int, act
 
 
 def cleanup_old_snapshots(engine: Engine, keep_last: int = 100):
-    """Clean up old snapshots, keeping only the most recent N per offering."""
-    with engine.begin() as conn:
-        deleted = _exec(conn, """
-        DELETE FROM subject_offerings_snapshots
-        WHERE id IN (
-            SELECT id FROM (
-                SELECT id, 
-                       ROW_NUMBER() OVER (PARTITION BY offering_id ORDER BY snapshot_number DESC) as rn
-                FROM subject_offerings_snapshots
-            )
-            WHERE rn > :keep_last
-        )
-        """, {"keep_last": keep_last})
-        
-        count = deleted.rowcount
-        logger.info(f"✅ Cleaned up {count} old snapshots")
-        return count
+    """Clean up old snapshots, keeping only the most recent N per offering (deltas are rebased)."""
+    count = prune_snapshots(engine, OFFERING_SNAPSHOTS, keep_last)
+    logger.info(f"✅ Cleaned up {count} old snapshots")
+    return count
 
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 # app/schemas/tech_admins_schema.py
 from sqlalchemy import text as sa_text
 from core.schema_registry import register
+from core.usernames import username_index_sql
 
 @register
 def ensure_tech_admins_schema(engine):
@@ -18,3 +19,4 @@ def ensure_tech_admins_schema(engine):
         );
         """))
         conn.execute(sa_text("CREATE INDEX IF NOT EXISTS ix_ta_user ON tech_admins(user_id)"))
+        conn.execute(sa_text(username_index_sql("tech_admins")))
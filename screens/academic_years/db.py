@@ -4,6 +4,7 @@
 # - Added _db_check_batch_has_students function (at the end)
 # - Added get_semester_mapping_for_year helper.
 # - Updated calendar profile resolution to include anchor_mmdd.
+# - Added the ay_term_windows term-window index (rebuild/lookup).
 # -------------------------------------------------------------------
 from __future__ import annotations
 
@@ -158,6 +159,7 @@ def insert_ay(
         actor,
         note=f"Created with dates {start_date} to {end_date}",
     )
+    rebuild_term_windows(conn, ay_codes=[ay_code])
 
 
 def update_ay_dates(
@@ -217,6 +219,8 @@ def delete_ay(conn: Connection, ay_code: str, actor: str = "system") -> None:
     # ... (code omitted for brevity) ...
     _log_ay_audit(conn, ay_code, "delete", actor, note="Record deleted")
     _exec(conn, "DELETE FROM academic_years WHERE ay_code=:c", {"c": ay_code})
+    if _table_exists(conn, "ay_term_windows"):
+        _exec(conn, "DELETE FROM ay_term_windows WHERE ay_code=:c", {"c": ay_code})
 
 
 def check_overlap(
@@ -472,6 +476,10 @@ def insert_calendar_profile(
             "spec": term_spec_json,
         },
     )
+    # A new profile only changes resolved windows if it is the system default
+    default_code = _get_default_calendar_code(conn)
+    if default_code and default_code.lower() == (code or "").lower():
+        rebuild_term_windows(conn)
 
 
 def _get_default_calendar_code(conn: Connection) -> Optional[str]:
@@ -586,6 +594,8 @@ def insert_calendar_assignment(
     )
     note = f"Set to calendar_id={calendar_id}, shift={shift_days} days"
     _log_calendar_assignment_audit(conn, target_key, "create/update", actor, note)
+    # Only this degree's windows from the effective AY onwards can change
+    rebuild_term_windows(conn, degree_codes=[degree_code], from_ay=effective_from_ay)
 
 
 # -----------------------------
@@ -692,7 +702,29 @@ def compute_terms_with_validation(
     branch_code: Optional[str],
     progression_year: int,
 ) -> Tuple[List[Dict[str, Any]], List[str]]:
-    # ... (code omitted for brevity) ...
+    """
+    Term windows for a scope and progression year, plus warnings.
+    Served from the ay_term_windows index (one read); scopes not indexed
+    yet are resolved and computed live.
+    """
+    cached = lookup_term_windows(
+        conn, ay_code, degree_code, program_code, branch_code, progression_year
+    )
+    if cached is not None:
+        return cached
+    return _compute_terms_live(
+        conn, ay_code, degree_code, program_code, branch_code, progression_year
+    )
+
+
+def _compute_terms_live(
+    conn: Connection,
+    ay_code: str,
+    degree_code: str,
+    program_code: Optional[str],
+    branch_code: Optional[str],
+    progression_year: int,
+) -> Tuple[List[Dict[str, Any]], List[str]]:
     warnings: List[str] = []
     ay = get_ay_by_code(conn, ay_code)
     if not ay:
@@ -701,7 +733,7 @@ def compute_terms_with_validation(
         conn, ay_code, degree_code, program_code, branch_code, progression_year
     )
     if not profile:
-        return [], ["No specific or default calendar assignment found for this selection."]
+        return [], [_NO_CALENDAR_MSG]
     warnings.append(f"Calendar resolved via: {source_key}. Shift: {shift_days} days.")
     if "compute_term_windows_for_ay" not in globals():
         return [], ["Term calculation utility is not imported or defined."]
@@ -714,6 +746,324 @@ def compute_terms_with_validation(
         )
         return [], warnings
 
+
+_NO_CALENDAR_MSG = "No specific or default calendar assignment found for this selection."
+
+
+# -----------------------------
+# Term-window index
+# -----------------------------
+# ay_term_windows holds the resolved calendar and computed windows for every
+# AY x degree x scope x progression year. Scopes indexed per degree are
+# ('', '') plus every (program, branch) and (program, '') used by an
+# assignment; a lookup for any other branch/program falls back to its
+# parent scope, which resolves identically because no assignment names it.
+
+
+def _rule_matches(rule: Dict[str, Any], level: str, p: str, b: str, py: int, ay: str) -> bool:
+    return (
+        rule["level"] == level
+        and rule["program_code"] == p
+        and rule["branch_code"] == b
+        and rule["progression_year"] == py
+        and rule["effective_from_ay"] <= ay
+    )
+
+
+def _pick_calendar_rule(
+    rules: List[Dict[str, Any]],
+    ay_code: str,
+    program_code: str,
+    branch_code: str,
+    progression_year: int,
+) -> Optional[Tuple[Dict[str, Any], int]]:
+    """In-memory equivalent of _resolve_calendar_profile over one degree's rules."""
+    ay = ay_code.lower()
+    keys_to_try = [
+        ("branch", program_code, branch_code, progression_year),
+        ("program", program_code, "", progression_year),
+        ("degree", "", "", progression_year),
+        ("branch", program_code, branch_code, 1),
+        ("program", program_code, "", 1),
+        ("degree", "", "", 1),
+    ]
+    for level, p, b, py in keys_to_try:
+        if (level == "branch" and not branch_code) or (level == "program" and not program_code):
+            continue
+        matches = [r for r in rules if _rule_matches(r, level, p, b, py, ay)]
+        if matches:
+            return max(matches, key=lambda r: r["effective_from_ay"]), py
+    return None
+
+
+def _load_calendar_rules(
+    conn: Connection,
+    degree_codes: Optional[Sequence[str]] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Active assignments joined to their profiles, per lower-cased degree code."""
+    rows = _exec(
+        conn,
+        """
+        SELECT a.level, a.degree_code, a.program_code, a.branch_code,
+               a.effective_from_ay, a.progression_year, a.shift_days,
+               p.code, p.term_spec_json, p.anchor_mmdd
+          FROM calendar_assignments a
+          JOIN calendar_profiles p ON p.id = a.calendar_id
+         WHERE a.active = 1
+        """,
+    ).fetchall()
+    wanted = {d.lower() for d in degree_codes} if degree_codes is not None else None
+    rules: Dict[str, List[Dict[str, Any]]] = {}
+    for r in rows:
+        degree = (r[1] or "").lower()
+        if wanted is not None and degree not in wanted:
+            continue
+        rules.setdefault(degree, []).append({
+            "level": r[0],
+            "degree_code": r[1],
+            "program_code": (r[2] or "").lower(),
+            "branch_code": (r[3] or "").lower(),
+            "effective_from_ay": (r[4] or "").lower(),
+            "progression_year": int(r[5] or 1),
+            "shift_days": int(r[6] or 0),
+            "profile": {"code": r[7], "term_spec_json": r[8], "anchor_mmdd": r[9]},
+            "raw": (r[2] or "", r[3] or "", r[4]),
+        })
+    return rules
+
+
+def _degree_durations(conn: Connection) -> Dict[str, int]:
+    if not _table_exists(conn, "degree_semester_struct") or not _col_exists(
+        conn, "degree_semester_struct", "years"
+    ):
+        return {}
+    rows = _exec(
+        conn, "SELECT degree_code, years FROM degree_semester_struct WHERE active=1"
+    ).fetchall()
+    return {str(r[0]).lower(): int(r[1]) for r in rows if r[1] and r[1] > 0}
+
+
+def rebuild_term_windows(
+    conn: Connection,
+    ay_codes: Optional[Sequence[str]] = None,
+    degree_codes: Optional[Sequence[str]] = None,
+    from_ay: Optional[str] = None,
+) -> int:
+    """
+    (Re)build ay_term_windows for the given AYs and degrees (all if None);
+    from_ay limits it to AYs on or after that code.
+    Loads assignments, profiles, AYs and degree durations once and resolves
+    every scope in memory. Returns the number of rows written.
+    """
+    if not _table_exists(conn, "ay_term_windows") or not _table_exists(conn, "calendar_assignments"):
+        return 0
+
+    ay_rows = _exec(conn, "SELECT ay_code FROM academic_years").fetchall()
+    ays = [r[0] for r in ay_rows]
+    if ay_codes is not None:
+        wanted_ays = {a.lower() for a in ay_codes}
+        ays = [a for a in ays if a.lower() in wanted_ays]
+    if from_ay:
+        ays = [a for a in ays if a.lower() >= from_ay.lower()]
+
+    rules = _load_calendar_rules(conn, degree_codes)
+    degrees: Dict[str, str] = {}
+    for d in get_all_degrees(conn):
+        degrees.setdefault(d["code"].lower(), d["code"])
+    for key, degree_rules in rules.items():
+        degrees.setdefault(key, degree_rules[0]["degree_code"])
+    if degree_codes is not None:
+        wanted = {d.lower() for d in degree_codes}
+        degrees = {k: v for k, v in degrees.items() if k in wanted}
+    if not ays or not degrees:
+        return 0
+
+    default_code = _get_default_calendar_code(conn)
+    default_profile = _get_calendar_profile_by_code(conn, default_code) if default_code else None
+    durations = _degree_durations(conn)
+
+    windows: Dict[Tuple[str, str, int], Any] = {}
+
+    def _windows(profile: Dict[str, Any], ay: str, shift: int):
+        key = (profile["code"], ay, shift)
+        if key not in windows:
+            try:
+                windows[key] = compute_term_windows_for_ay(profile, ay, shift_days=shift)
+            except Exception as e:
+                windows[key] = e
+        return windows[key]
+
+    records: List[Dict[str, Any]] = []
+    for degree_key, degree_code in degrees.items():
+        degree_rules = rules.get(degree_key, [])
+        scopes = {("", ""): ("", "")}
+        for r in degree_rules:
+            p, b = r["raw"][0], r["raw"][1]
+            scopes.setdefault((r["program_code"], r["branch_code"]), (p, b))
+            scopes.setdefault((r["program_code"], ""), (p, ""))
+        max_py = max(
+            [durations.get(degree_key, 10)] + [r["progression_year"] for r in degree_rules]
+        )
+        for ay in ays:
+            for (p_key, b_key), (p, b) in scopes.items():
+                for py in range(1, max_py + 1):
+                    base = {
+                        "ay": ay, "d": degree_code, "p": p, "b": b, "py": py,
+                        "label": None, "start": None, "end": None,
+                        "cal": None, "shift": 0, "src": None, "err": None,
+                    }
+                    picked = _pick_calendar_rule(degree_rules, ay, p_key, b_key, py)
+                    if picked:
+                        rule, rule_py = picked
+                        profile, shift = rule["profile"], rule["shift_days"]
+                        source_key = (
+                            f"Level: {str(rule['level']).upper()}, "
+                            f"Effective: {rule['raw'][2]}, PY: {rule_py}"
+                        )
+                    elif default_profile:
+                        profile, shift = default_profile, 0
+                        source_key = f"System Default ({default_code})"
+                    else:
+                        records.append(dict(base, idx=0, err=_NO_CALENDAR_MSG))
+                        continue
+
+                    base.update(cal=profile.get("code"), shift=shift, src=source_key)
+                    terms = _windows(profile, ay, shift)
+                    if isinstance(terms, Exception):
+                        records.append(dict(
+                            base, idx=0,
+                            err=f"Error calculating terms using profile '{profile.get('code')}': {terms}",
+                        ))
+                        continue
+                    for idx, t in enumerate(terms, start=1):
+                        records.append(dict(
+                            base, idx=idx, label=t["label"],
+                            start=t["start_date"], end=t["end_date"],
+                        ))
+                    if not terms:
+                        records.append(dict(base, idx=0))
+
+    params = {
+        "ays": json.dumps(ays),
+        "degs": json.dumps(list(degrees.values())),
+    }
+    _exec(
+        conn,
+        """
+        DELETE FROM ay_term_windows
+         WHERE ay_code IN (SELECT value FROM json_each(:ays))
+           AND degree_code IN (SELECT value FROM json_each(:degs))
+        """,
+        params,
+    )
+    if records:
+        _exec(
+            conn,
+            """
+            INSERT INTO ay_term_windows (
+                ay_code, degree_code, program_code, branch_code, progression_year,
+                term_index, label, start_date, end_date,
+                calendar_code, shift_days, source_key, error
+            ) VALUES (
+                :ay, :d, :p, :b, :py, :idx, :label, :start, :end, :cal, :shift, :src, :err
+            )
+            """,
+            records,
+        )
+    return len(records)
+
+
+def _fetch_term_windows(
+    conn: Connection,
+    ay_code: str,
+    degree_code: str,
+    program_code: str,
+    branch_code: str,
+    progression_year: int,
+) -> List[Any]:
+    return _exec(
+        conn,
+        """
+        SELECT program_code, branch_code, term_index, label, start_date, end_date,
+               shift_days, source_key, error
+          FROM ay_term_windows
+         WHERE ay_code = :ay AND degree_code = :d AND progression_year = :py
+           AND ((program_code = :p AND branch_code IN (:b, ''))
+                OR (program_code = '' AND branch_code = ''))
+         ORDER BY term_index
+        """,
+        {"ay": ay_code, "d": degree_code, "p": program_code,
+         "b": branch_code, "py": progression_year},
+    ).fetchall()
+
+
+def lookup_term_windows(
+    conn: Connection,
+    ay_code: str,
+    degree_code: str,
+    program_code: Optional[str],
+    branch_code: Optional[str],
+    progression_year: int,
+) -> Optional[Tuple[List[Dict[str, Any]], List[str]]]:
+    """
+    (terms, warnings) from the index, in the shape compute_terms_with_validation
+    returns, or None when the index has nothing for this AY/degree/year.
+    An AY/degree not indexed yet is built on first lookup.
+    """
+    if not _table_exists(conn, "ay_term_windows"):
+        return None
+    p, b = program_code or "", branch_code or ""
+    rows = _fetch_term_windows(conn, ay_code, degree_code, p, b, progression_year)
+    if not rows:
+        indexed = _exec(
+            conn,
+            "SELECT 1 FROM ay_term_windows WHERE ay_code=:ay AND degree_code=:d LIMIT 1",
+            {"ay": ay_code, "d": degree_code},
+        ).fetchone()
+        if indexed or not rebuild_term_windows(conn, [ay_code], [degree_code]):
+            return None
+        rows = _fetch_term_windows(conn, ay_code, degree_code, p, b, progression_year)
+        if not rows:
+            return None
+
+    # Most specific scope present wins: (p, b) > (p, '') > ('', '')
+    def _rank(r) -> Tuple[int, int]:
+        return (1 if r[1] else 0, 1 if r[0] else 0)
+
+    best = max(_rank(r) for r in rows)
+    rows = [r for r in rows if _rank(r) == best]
+
+    first = rows[0]
+    if first[7] is None:
+        return [], [first[8] or _NO_CALENDAR_MSG]
+    warnings = [f"Calendar resolved via: {first[7]}. Shift: {first[6]} days."]
+    if first[8]:
+        return [], warnings + [first[8]]
+    terms = [
+        {"label": r[3], "start_date": r[4], "end_date": r[5]}
+        for r in rows if r[2] > 0
+    ]
+    return terms, warnings
+
+
+def get_term_window(
+    conn: Connection,
+    ay_code: str,
+    degree_code: str,
+    progression_year: int,
+    term_index: int,
+    program_code: Optional[str] = None,
+    branch_code: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """One term's {label, start_date, end_date} (term_index is 1-based), or None."""
+    terms, _ = compute_terms_with_validation(
+        conn, ay_code, degree_code, program_code, branch_code, progression_year
+    )
+    if 1 <= term_index <= len(terms):
+        return terms[term_index - 1]
+    return None
+
+
 def _db_get_batches_for_degree(
     conn: Connection,
     degree_code: str,
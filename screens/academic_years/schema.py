@@ -107,6 +107,33 @@ def install_calendar_assignments_audit(engine: Engine):
         _exec(conn, "CREATE INDEX IF NOT EXISTS ix_calasg_audit_target ON calendar_assignments_audit(target_key)")
         _exec(conn, "CREATE INDEX IF NOT EXISTS ix_calasg_audit_at ON calendar_assignments_audit(at)")
 
+def install_term_window_index(engine: Engine):
+    """
+    Materialised term windows per AY, degree, program/branch scope and
+    progression year (see db.rebuild_term_windows). Scopes are '' when not
+    set. term_index 0 marks a scope whose calendar could not be resolved
+    or computed; `error` holds the message.
+    """
+    with engine.begin() as conn:
+        _exec(conn, """
+        CREATE TABLE IF NOT EXISTS ay_term_windows(
+          ay_code TEXT NOT NULL COLLATE NOCASE,
+          degree_code TEXT NOT NULL COLLATE NOCASE,
+          program_code TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+          branch_code TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+          progression_year INTEGER NOT NULL,
+          term_index INTEGER NOT NULL,
+          label TEXT,
+          start_date TEXT,
+          end_date TEXT,
+          calendar_code TEXT,
+          shift_days INTEGER NOT NULL DEFAULT 0,
+          source_key TEXT,
+          error TEXT,
+          built_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+          PRIMARY KEY(ay_code, degree_code, progression_year, program_code, branch_code, term_index)
+        );""")
+
 def seed_default_calendar_profiles(engine: Engine):
     """Seed default and example calendar profiles."""
     with engine.begin() as conn:
@@ -155,4 +182,5 @@ def install_all(engine: Engine):
     install_calendar_profiles(engine)
     install_calendar_assignments(engine)
     install_calendar_assignments_audit(engine)
+    install_term_window_index(engine)
     seed_default_calendar_profiles(engine)
@@ -9,6 +9,7 @@ from core.settings import load_settings
 from core.db import get_engine, init_db
 from core.policy import require_page, user_roles, can_edit_page
 from core.theme_manager import get_app_theme
+from core.config_snapshot import invalidate as invalidate_snapshot
 from core.theme import decide_mode, inject_css
 from core.ui import render_footer_global
 from core.theme_profiles import (
@@ -500,6 +501,7 @@ def render():
                 _write_cfg("draft", cfg) # Pass the loaded cfg to be modified
                 with engine.begin() as conn:
                     conn.execute(sa_text("INSERT INTO configs(degree, namespace, config_json) VALUES ('default','app_theme', :j) ON CONFLICT(degree, namespace) DO UPDATE SET config_json=excluded.config_json"), {"j": json.dumps(cfg)})
+                invalidate_snapshot("app_theme")
                 st.success("Saved draft.")
             except Exception as ex: st.error(str(ex))
     with col_s2:
@@ -508,6 +510,7 @@ def render():
                 _write_cfg("published", cfg) # Pass the loaded cfg to be modified
                 with engine.begin() as conn:
                     conn.execute(sa_text("INSERT INTO configs(degree, namespace, config_json) VALUES ('default','app_theme', :j) ON CONFLICT(degree, namespace) DO UPDATE SET config_json=excluded.config_json"), {"j": json.dumps(cfg)})
+                invalidate_snapshot("app_theme")
                 st.success("Published theme.")
             except Exception as ex: st.error(str(ex))
 
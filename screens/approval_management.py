@@ -27,7 +27,7 @@ from core.approvals_policy import (
 )
 from core.settings import load_settings
 from core.db import get_engine, init_db
-from core.policy import require_page, user_roles
+from core.policy import require_page, user_roles, invalidate_page_access
 from sqlalchemy import text as sa_text
 
 PAGE_KEY = "Approval Management"
@@ -490,6 +490,7 @@ def _render_page_access_management(engine, admin_email):
                                     "role": role
                                 })
                                 st.toast(f"Revoked {perm_type} for {role} on {page}")
+                        invalidate_page_access()
                         st.rerun()
                     except Exception as e:
                         st.error(f"Error updating {page}: {e}")
@@ -1,7 +1,7 @@
 # action_handlers.py
 
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
 from sqlalchemy import text as sa_text
 
@@ -18,6 +18,7 @@ from .schema_helpers import _table_exists, _has_col
 from . import data_loader as dl
 from screens.office_admin import db as odb
 from screens.outcomes.helpers import update_outcome_item as _update_outcome_item
+from core.query_cache import clear_all, invalidate_tables
 
 
 # Academic Year helpers (soft import: don't break if module missing)
@@ -48,6 +49,15 @@ except Exception:
 # ───────────────────────────────────────────────────────────────────────────────
 
 _HANDLER_REGISTRY: Dict[str, Dict[str, Any]] = {}
+# (object_type, action) -> tables the handler writes, for cache invalidation
+_HANDLER_TABLES: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+
+# Tables still read by @st.cache_data helpers (students/db.py,
+# faculty/importer.py); only writes to these clear the Streamlit cache.
+_ST_CACHED_TABLES = frozenset({
+    "student_profiles", "student_enrollments", "degree_batches",
+    "faculty_affiliations", "position_assignments",
+})
 
 
 def get_action_handler(object_type: str, action: str):
@@ -58,17 +68,25 @@ def get_action_handler(object_type: str, action: str):
     return _HANDLER_REGISTRY[otype][act]
 
 
-def register_action_handler_key(otype: str, action: str, fn):
+def get_action_tables(object_type: str, action: str) -> Tuple[str, ...]:
+    otype = (object_type or "").strip().lower()
+    act = (action or "").strip().lower()
+    return _HANDLER_TABLES.get((otype, act), ())
+
+
+def register_action_handler_key(otype: str, action: str, fn, tables: Tuple[str, ...] = ()):
     o = (otype or "").strip().lower()
     a = (action or "").strip().lower()
     _HANDLER_REGISTRY.setdefault(o, {})[a] = fn
+    _HANDLER_TABLES[(o, a)] = tuple(tables)
 
 
 # This is a wrapper over the imported decorator so that we also fill the local
-# registry.
-def register_action_handler(otype: str, action: str):
+# registry. `tables` lists what the handler writes; handlers without it drop
+# every cache after they run.
+def register_action_handler(otype: str, action: str, tables: Tuple[str, ...] = ()):
     def _decorator(fn):
-        register_action_handler_key(otype, action, fn)
+        register_action_handler_key(otype, action, fn, tables)
         return fn
 
     return _decorator
@@ -79,7 +97,7 @@ def register_action_handler(otype: str, action: str):
 # ───────────────────────────────────────────────────────────────────────────────
 
 
-@register_action_handler("degree", "delete")
+@register_action_handler("degree", "delete", tables=("degrees", "programs", "branches", "semesters"))
 def handle_degree_delete(conn, object_id: str, payload: dict) -> None:
     """
     Handle a degree deletion approval.
@@ -110,7 +128,7 @@ def handle_degree_delete(conn, object_id: str, payload: dict) -> None:
 # ───────────────────────────────────────────────────────────────────────────────
 
 
-@register_action_handler("program", "delete")
+@register_action_handler("program", "delete", tables=("programs", "branches", "semesters", "curriculum_groups"))
 def handle_program_delete(conn, object_id: str, payload: dict) -> None:
     """
     Handle program deletion approvals.
@@ -166,7 +184,7 @@ def handle_program_delete(conn, object_id: str, payload: dict) -> None:
         )
 
 
-@register_action_handler("branch", "delete")
+@register_action_handler("branch", "delete", tables=("branches",))
 def handle_branch_delete(conn, object_id: str, payload: dict) -> None:
     """
     Handle branch deletion, by numeric ID (if branches.id exists) or by branch_code
@@ -192,7 +210,7 @@ def handle_branch_delete(conn, object_id: str, payload: dict) -> None:
             {"bc": oid_str},
         )
 
-@register_action_handler("curriculum_group", "delete")
+@register_action_handler("curriculum_group", "delete", tables=("curriculum_groups", "curriculum_group_links"))
 def handle_curriculum_group_delete(conn, object_id: str, payload: dict) -> None:
     """Handle curriculum group delete via approvals.
 
@@ -263,7 +281,7 @@ def handle_curriculum_group_delete(conn, object_id: str, payload: dict) -> None:
 # ───────────────────────────────────────────────────────────────────────────────
 
 
-@register_action_handler("subject", "delete")
+@register_action_handler("subject", "delete", tables=("subjects",))
 def handle_subject_delete(conn, object_id: str, payload: dict) -> None:
     """
     Handle subject delete by subject_code. If the table has a numeric ID as well,
@@ -284,7 +302,7 @@ def handle_subject_delete(conn, object_id: str, payload: dict) -> None:
 # ───────────────────────────────────────────────────────────────────────────────
 
 
-@register_action_handler("office_admin", "delete_student")
+@register_action_handler("office_admin", "delete_student", tables=("students",))
 def handle_office_delete_student(conn, object_id: str, payload: dict) -> None:
     """
     Handle deletes for student records.
@@ -308,7 +326,7 @@ def handle_office_delete_student(conn, object_id: str, payload: dict) -> None:
         )
 
 
-@register_action_handler("office_admin", "export_data")
+@register_action_handler("office_admin", "export_data", tables=("office_admin_export_requests",))
 def handle_office_export_data(conn, object_id: str, payload: dict) -> None:
     """
     Handle an office data export request once it is approved.
@@ -320,7 +338,7 @@ def handle_office_export_data(conn, object_id: str, payload: dict) -> None:
     odb.approve_export(conn, object_id)
 
 
-@register_action_handler("office_admin", "export_request")
+@register_action_handler("office_admin", "export_request", tables=("office_admin_export_requests",))
 def handle_office_export_request(conn, object_id: str, payload: dict) -> None:
     """
     Handle an export request approval when the export was requested via an
@@ -331,7 +349,7 @@ def handle_office_export_request(conn, object_id: str, payload: dict) -> None:
     odb.mark_export_request_approved(conn, object_id)
 
 
-@register_action_handler("academic_year", "status_change")
+@register_action_handler("academic_year", "status_change", tables=("academic_years",))
 def handle_academic_year_status_change(conn, object_id: str, payload: dict) -> None:
     """
     On approval: actually change the status of an Academic Year.
@@ -353,7 +371,7 @@ def handle_academic_year_status_change(conn, object_id: str, payload: dict) -> N
     _ay_update_status(conn, ay_code, new_status, actor=actor, reason=reason)
 
 
-@register_action_handler("academic_year", "delete")
+@register_action_handler("academic_year", "delete", tables=("academic_years", "ay_term_windows"))
 def handle_academic_year_delete(conn, object_id: str, payload: dict) -> None:
     """
     On approval: delete the Academic Year record.
@@ -374,7 +392,7 @@ def handle_academic_year_delete(conn, object_id: str, payload: dict) -> None:
 # ───────────────────────────────────────────────────────────────────────────────
 
 
-@register_action_handler("semesters", "binding_change")
+@register_action_handler("semesters", "binding_change", tables=("semester_binding", "semesters"))
 def handle_binding_change(conn, degree_code: str, payload: dict) -> None:
     """
     Handle semester binding mode changes at the degree level and rebuild if requested.
@@ -420,7 +438,9 @@ def handle_binding_change(conn, degree_code: str, payload: dict) -> None:
             _rebuild_semesters_for_approval(conn, degree_code, binding_mode, label_mode)
 
 
-@register_action_handler("semesters", "edit_structure")
+@register_action_handler("semesters", "edit_structure", tables=(
+    "degree_semester_struct", "program_semester_struct", "branch_semester_struct", "semesters",
+))
 def handle_structure_edit(conn, target_key: str, payload: dict) -> None:
     """
     Handle semester structure edits against degree/program/branch structure tables,
@@ -493,7 +513,7 @@ def handle_structure_edit(conn, target_key: str, payload: dict) -> None:
             _rebuild_semesters_for_approval(conn, degree_code, binding_mode, label_mode)
 
 
-@register_action_handler("semesters", "rebuild_semesters")
+@register_action_handler("semesters", "rebuild_semesters", tables=("semesters",))
 def handle_semesters_rebuild(conn, target_key: str, payload: dict) -> None:
     """
     Handle a targeted semester rebuild for a single degree/program/branch.
@@ -557,7 +577,7 @@ def handle_semesters_rebuild(conn, target_key: str, payload: dict) -> None:
     _rebuild_semesters_for_approval(conn, degree_code, binding_mode, label_mode)
 
 
-@register_action_handler("semesters", "rebuild_all_semesters")
+@register_action_handler("semesters", "rebuild_all_semesters", tables=("semesters",))
 def handle_semesters_rebuild_all(conn, degree_code: str, payload: dict) -> None:
     """
     Handle a full rebuild of all semesters for a degree
@@ -582,7 +602,7 @@ def handle_semesters_rebuild_all(conn, degree_code: str, payload: dict) -> None:
     _rebuild_semesters_for_approval(conn, degree_code, binding_mode, label_mode)
 
 
-@register_action_handler("semesters", "clear_all_semesters")
+@register_action_handler("semesters", "clear_all_semesters", tables=("semesters",))
 def handle_semesters_clear_all(conn, degree_code: str, payload: dict) -> None:
     """
     Handle clearing all semesters for a degree.
@@ -601,7 +621,7 @@ def handle_semesters_clear_all(conn, degree_code: str, payload: dict) -> None:
 # ───────────────────────────────────────────────────────────────────────────────
 
 
-@register_action_handler("affiliation", "edit_in_use")
+@register_action_handler("affiliation", "edit_in_use", tables=("faculty_affiliations",))
 def handle_affiliation_edit(conn, affiliation_id: str, payload: dict) -> None:
     """
     Handle faculty affiliation edits while the affiliation is in use elsewhere.
@@ -629,7 +649,7 @@ def handle_affiliation_edit(conn, affiliation_id: str, payload: dict) -> None:
 # ───────────────────────────────────────────────────────────────────────────────
 
 
-@register_action_handler("subject", "edit")
+@register_action_handler("subject", "edit", tables=("subjects",))
 def handle_subject_edit(conn, object_id: str, payload: dict) -> None:
     """
     Example handler for subject edits. Not fully wired, but demonstrates pattern.
@@ -657,7 +677,7 @@ def handle_subject_edit(conn, object_id: str, payload: dict) -> None:
     """
     conn.execute(sa_text(sql), params)
 
-@register_action_handler("outcome", "edit")
+@register_action_handler("outcome", "edit", tables=("outcomes_items", "outcomes_sets"))
 def handle_outcome_edit(conn, object_id: str, payload: dict) -> None:
     """
     Handle major outcome edits via approvals.
@@ -717,7 +737,7 @@ def handle_outcome_edit(conn, object_id: str, payload: dict) -> None:
 # ───────────────────────────────────────────────────────────────────────────────
 
 
-@register_action_handler("semester", "edit_details")
+@register_action_handler("semester", "edit_details", tables=("semesters",))
 def handle_semester_edit_details(conn, object_id: str, payload: dict) -> None:
     """
     Example: editing fields on the semesters table.
@@ -787,7 +807,7 @@ def handle_semester_edit_details(conn, object_id: str, payload: dict) -> None:
 # ───────────────────────────────────────────────────────────────────────────────
 
 
-@register_action_handler("office_admin", "export_status_update")
+@register_action_handler("office_admin", "export_status_update", tables=("office_admin_export_requests",))
 def handle_office_export_status_update(conn, object_id: str, payload: dict) -> None:
     """
     Example handler to update export request status when an office_admin export request is approved in the central inbox.
@@ -823,7 +843,11 @@ def _resolve_faculty_id(conn, object_id: str, payload: dict) -> int:
     return int(row[0])
 
 
-@register_action_handler("faculty", "delete")
+@register_action_handler("faculty", "delete", tables=(
+    "faculty", "faculty_profiles", "faculty_custom_field_values", "faculty_affiliations",
+    "faculty_roles", "faculty_initial_credentials", "faculty_teachings", "faculty_workloads",
+    "faculty_documents", "faculty_tags_map",
+))
 def handle_faculty_delete(conn, object_id: str, payload: dict) -> None:
     """
     Handle faculty delete via approvals, cascading to workloads, affiliations,
@@ -865,8 +889,17 @@ def perform_action(conn, approval_row: Dict[str, Any]) -> None:
     handler = get_action_handler(otype, action)
     handler(conn, object_id, payload)
 
-        # ✅ CRITICAL: Clear Streamlit cache after any database modification
-    # This ensures all pages see fresh data after approvals
+    _invalidate_after_action(get_action_tables(otype, action))
+
+
+def _invalidate_after_action(tables: Tuple[str, ...]) -> None:
+    """Drop cached reads of the tables the handler wrote (everything if it declared none)."""
+    if tables:
+        invalidate_tables(*tables)
+    else:
+        clear_all()
+    if tables and not _ST_CACHED_TABLES.intersection(tables):
+        return
     try:
         import streamlit as st
         st.cache_data.clear()
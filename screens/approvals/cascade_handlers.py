@@ -4,6 +4,8 @@ from typing import Dict, Optional
 
 from sqlalchemy import text as sa_text
 
+from core.semester_structure import sync_semesters
+
 from .schema_helpers import _table_exists, _cols, _count, _has_col
 
 
@@ -197,145 +199,17 @@ def _faculty_delete_cascade(conn, faculty_id: int) -> None:
 def _rebuild_semesters_for_approval(conn, degree_code: str, binding_mode: str, label_mode: str) -> int:
     """
     Rebuild all semesters for a degree based on binding mode and label mode.
-    Returns number of inserted semester rows.
+    Existing rows are diffed in place, so unchanged semesters keep their ids.
+    Returns the number of semester rows the structure defines.
     """
-    # Clear existing semesters for the degree
-    if _table_exists(conn, "semesters") and _has_col(conn, "semesters", "degree_code"):
-        conn.execute(sa_text("DELETE FROM semesters WHERE degree_code=:dc"), {"dc": degree_code})
-    else:
+    if not (_table_exists(conn, "semesters") and _has_col(conn, "semesters", "degree_code")):
         return 0  # nothing to do if semesters table not present
+    struct_table = {
+        "degree": "degree_semester_struct",
+        "program": "program_semester_struct",
+        "branch": "branch_semester_struct",
+    }.get(binding_mode)
+    if struct_table is None or not _table_exists(conn, struct_table):
+        return 0
+    return sync_semesters(conn, degree_code, binding_mode, label_mode)["total"]
 
-    def label(y: int, t: int, n: int) -> str:
-        if label_mode == "year_term":
-            return f"Year {y} • Term {t}"
-        return f"Semester {n}"
-
-    inserted = 0
-
-    if binding_mode == "degree":
-        # Read structure from degree_semester_struct
-        if not _table_exists(conn, "degree_semester_struct"):
-            return 0
-        row = conn.execute(
-            sa_text("SELECT years, terms_per_year FROM degree_semester_struct WHERE degree_code=:dc"),
-            {"dc": degree_code},
-        ).fetchone()
-        if not row:
-            return 0
-
-        years, tpy = int(row[0]), int(row[1])
-        n = 0
-        for y in range(1, years + 1):
-            for t in range(1, tpy + 1):
-                n += 1
-                conn.execute(
-                    sa_text(
-                        """
-                        INSERT INTO semesters(degree_code, year_index, term_index, semester_number, label, active)
-                        VALUES(:dc, :y, :t, :n, :lbl, 1)
-                        """
-                    ),
-                    {"dc": degree_code, "y": y, "t": t, "n": n, "lbl": label(y, t, n)},
-                )
-                inserted += 1
-        return inserted
-
-    elif binding_mode == "program":
-        # Build for each program under this degree using program_semester_struct
-        if not (_table_exists(conn, "programs") and _table_exists(conn, "program_semester_struct")):
-            return 0
-
-        # Find programs of the degree
-        programs = conn.execute(
-            sa_text("SELECT id, program_code FROM programs WHERE degree_code=:dc"), {"dc": degree_code}
-        ).fetchall()
-
-        for pid, pcode in programs:
-            row = conn.execute(
-                sa_text("SELECT years, terms_per_year FROM program_semester_struct WHERE program_id=:pid"),
-                {"pid": pid},
-            ).fetchone()
-            if not row:
-                continue
-            years, tpy = int(row[0]), int(row[1])
-
-            n = 0
-            for y in range(1, years + 1):
-                for t in range(1, tpy + 1):
-                    n += 1
-                    conn.execute(
-                        sa_text(
-                            """
-                            INSERT INTO semesters(degree_code, program_code, year_index, term_index, semester_number, label, active)
-                            VALUES(:dc, :pc, :y, :t, :n, :lbl, 1)
-                            """
-                        ),
-                        {
-                            "dc": degree_code,
-                            "pc": pcode,
-                            "y": y,
-                            "t": t,
-                            "n": n,
-                            "lbl": label(y, t, n),
-                        },
-                    )
-                    inserted += 1
-        return inserted
-
-    elif binding_mode == "branch":
-        # Build for each branch under this degree using branch_semester_struct
-        if not (_table_exists(conn, "branches") and _table_exists(conn, "branch_semester_struct")):
-            return 0
-
-        # Find branches (either branches.degree_code or via programs)
-        if _has_col(conn, "branches", "degree_code"):
-            branches = conn.execute(
-                sa_text("SELECT id, branch_code FROM branches WHERE degree_code=:dc"), {"dc": degree_code}
-            ).fetchall()
-        else:
-            branches = conn.execute(
-                sa_text(
-                    """
-                    SELECT b.id, b.branch_code
-                      FROM branches b
-                      JOIN programs p ON b.program_id=p.id
-                     WHERE p.degree_code=:dc
-                    """
-                ),
-                {"dc": degree_code},
-            ).fetchall()
-
-        for bid, bcode in branches:
-            row = conn.execute(
-                sa_text("SELECT years, terms_per_year FROM branch_semester_struct WHERE branch_id=:bid"),
-                {"bid": bid},
-            ).fetchone()
-            if not row:
-                continue
-            years, tpy = int(row[0]), int(row[1])
-
-            n = 0
-            for y in range(1, years + 1):
-                for t in range(1, tpy + 1):
-                    n += 1
-                    conn.execute(
-                        sa_text(
-                            """
-                            INSERT INTO semesters(degree_code, branch_code, year_index, term_index, semester_number, label, active)
-                            VALUES(:dc, :bc, :y, :t, :n, :lbl, 1)
-                            """
-                        ),
-                        {
-                            "dc": degree_code,
-                            "bc": bcode,
-                            "y": y,
-                            "t": t,
-                            "n": n,
-                            "lbl": label(y, t, n),
-                        },
-                    )
-                    inserted += 1
-        return inserted
-
-    # Unknown binding mode — nothing done
-    return 0
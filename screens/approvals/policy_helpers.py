@@ -3,6 +3,7 @@ import json
 import streamlit as st
 from sqlalchemy import text as sa_text
 from .schema_helpers import _table_exists, _cols
+from core.query_cache import invalidate_tables
 
 # --- MODIFIED IMPORTS ---
 # Import from the NEW enhanced policy engine (from Batch 1)
@@ -103,3 +104,4 @@ def _record_vote_and_finalize(engine, approval_id: int, decision: str, actor_ema
                SET {', '.join(update_clauses)}
              WHERE id=:id
         """), params)
+    invalidate_tables("approvals", "approvals_votes")
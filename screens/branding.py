@@ -9,6 +9,7 @@ from core.settings import load_settings
 from core.db import get_engine, init_db, SessionLocal
 from core.forms import tagline, success, warn
 from core.config_store import save, history
+from core.config_snapshot import invalidate as invalidate_snapshot
 # We now use the modern security system from policy.py
 from core.policy import require_page, can_edit_page, user_roles
 from core.a11y import contrast_ratio, meets_wcag_aa
@@ -86,6 +87,7 @@ def _lint_and_persist(engine, degree: str, namespace: str, cfg: dict, lint_rules
     payload = json.dumps(cfg, ensure_ascii=False)
     with engine.begin() as conn:
         conn.execute(sa_text("INSERT INTO configs (degree, namespace, config_json) VALUES (:d, :ns, :cfg) ON CONFLICT(degree, namespace) DO UPDATE SET config_json=excluded.config_json, updated_at=CURRENT_TIMESTAMP"), dict(d=degree, ns=namespace, cfg=payload))
+    invalidate_snapshot(namespace)
 #</editor-fold>
 
 def get_login_branding(engine, degree: str = "default", namespace: str = DEFAULT_NAMESPACE) -> dict:
@@ -15,6 +15,7 @@ from sqlalchemy import text as sa_text
 from core.settings import load_settings
 from core.db import get_engine, init_db, SessionLocal
 from core.forms import tagline, success
+from core.query_cache import clear_all, invalidate_tables
 from core.policy import require_page, can_edit_page, user_roles, can_request  # central policy helper (who may request delete)
 from core.universal_delete import show_delete_form
 from schemas.degrees_schema import migrate_degrees # <--- 1. ADDED THIS IMPORT
@@ -750,6 +751,7 @@ def render():
                                               payload["cg_branch"])
                 
                 st.cache_data.clear() # <-- FIX: Clear cache on save
+                invalidate_tables("degrees", "semester_binding", "degree_semester_struct")
                 st.rerun()
             except Exception as e:
                 st.error(str(e))
@@ -804,6 +806,7 @@ def render():
                         copy_degree(engine, src, dst, actor_email=actor, note=note_copy)
                         success(f"Copied {src} → {dst}")
                         st.cache_data.clear() # <-- FIX: Clear cache on copy
+                        invalidate_tables("degrees", "semester_binding", "degree_semester_struct")
                         st.rerun()
                 except Exception as e:
                     st.error(str(e))
@@ -847,6 +850,7 @@ def render():
                     else:
                         success(f"Imported {up} rows.")
                     st.cache_data.clear() # <-- FIX: Clear cache on import
+                    invalidate_tables("degrees", "semester_binding", "degree_semester_struct")
                     st.rerun()
     else:
         st.info("Import functionality requires edit permissions")
@@ -892,6 +896,7 @@ def render():
                         set_active(engine, sel, False, actor, note2)
                         success(f"Degree {sel} deactivated.")
                         st.cache_data.clear() # <-- FIX: Clear cache on deactivate
+                        invalidate_tables("degrees", "semester_binding", "degree_semester_struct")
                         st.rerun()
                     except Exception as e:
                         st.error(str(e))
@@ -901,6 +906,7 @@ def render():
                         set_active(engine, sel, True, actor, note2)
                         success(f"Degree {sel} reactivated.")
                         st.cache_data.clear() # <-- FIX: Clear cache on reactivate
+                        invalidate_tables("degrees", "semester_binding", "degree_semester_struct")
                         st.rerun()
                     except Exception as e:
                         st.error(str(e))
@@ -986,6 +992,7 @@ def render():
                             st.success(f"{emergency_sel} degree and all children force deleted: {result}")
                             del st.session_state['confirm_force_delete']
                             st.cache_data.clear() # <-- FIX: Clear cache on emergency delete
+                            clear_all()
                             st.rerun()
                         except Exception as e:
                             st.error(f"Force delete failed: {e}")
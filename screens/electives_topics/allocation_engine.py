@@ -7,12 +7,17 @@ UPDATED: Integrated with electives_policy for cross-batch/cross-branch enforceme
 
 from __future__ import annotations
 import logging
-import random
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 from sqlalchemy import text as sa_text
 from sqlalchemy.engine import Engine
 
+from screens.electives_topics.allocation_solver import (
+    AllocationInputs,
+    AllocationResult,
+    solve_allocation,
+)
+
 # NEW: electives policy (optional)
 try:
     from core import electives_policy as core_electives_policy
@@ -204,12 +209,7 @@ class AllocationEngine:
             self._enforce_scope_constraints(policy, selections)
             
             # Run appropriate allocation strategy
-            if 'student_select_ranked' in strategy:
-                results = self._allocate_ranked(selections, topic_map, run_id, max_iterations)
-            elif 'student_select_first_come' in strategy:
-                results = self._allocate_first_come(selections, topic_map, run_id)
-            else:
-                results = self._confirm_manual_assignments(selections, run_id)
+            results = self._allocate(selections, topic_map, run_id, strategy, max_iterations)
             
             # Calculate satisfaction
             satisfaction = self._calculate_satisfaction()
@@ -247,270 +247,167 @@ class AllocationEngine:
             self._update_run_status(run_id, 'failed', error=str(e))
             raise
     
-    def _allocate_ranked(self, selections: List[Dict], topic_map: Dict[str, Dict], 
-                        run_id: int, max_iterations: int) -> Dict:
+    def _allocate(self, selections: List[Dict], topic_map: Dict[str, Dict],
+                  run_id: int, strategy: List[str], max_iterations: int) -> Dict:
         """
-        Allocate using ranked choice algorithm.
+        Allocate with the pure solver and write its decisions.
         
-        Algorithm:
-        1. Group by student
-        2. For each rank (1, 2, 3...):
-           - Get all students who have a choice at this rank and aren't assigned
-           - Shuffle for fairness
-           - Process each student in order
-           - Assign if capacity available, else waitlist
+        State is loaded inside the write transaction so the solver sees the
+        same confirmed counts that the bulk write is applied against.
         """
-        
-        assigned_count = 0
-        waitlisted_count = 0
-        iterations = 0
-        
-        # Group selections by student
-        student_prefs = {}
-        for sel in selections:
-            roll = sel['student_roll_no']
-            if roll not in student_prefs:
-                student_prefs[roll] = []
-            student_prefs[roll].append(sel)
-        
-        # Sort each student's preferences by rank
-        for roll in student_prefs:
-            student_prefs[roll].sort(key=lambda x: x['rank_choice'] or 999)
-        
-        logger.info(f"Processing {len(student_prefs)} students with ranked preferences")
-        
         with self.engine.begin() as conn:
-            # Process each rank level
-            for rank in range(1, max_iterations + 1):
-                students_at_rank = []
-                
-                # Find students who have a preference at this rank and aren't assigned
-                for roll_no, prefs in student_prefs.items():
-                    if self._is_student_assigned(conn, roll_no):
-                        continue
-                    
-                    pref = next((p for p in prefs if p['rank_choice'] == rank), None)
-                    if pref:
-                        students_at_rank.append((roll_no, pref))
-                
-                if not students_at_rank:
-                    logger.debug(f"No students at rank {rank}, stopping")
-                    break
-                
-                iterations += 1
-                logger.info(f"Processing rank {rank}: {len(students_at_rank)} students")
-                
-                # Apply tiebreaker (shuffle for fairness)
-                students_at_rank = self._apply_tiebreaker(students_at_rank)
-                
-                # Process each student at this rank
-                for roll_no, pref in students_at_rank:
-                    topic_code = pref['topic_code_ay']
-                    topic = topic_map.get(topic_code)
-                    
-                    if not topic:
-                        logger.warning(f"Topic {topic_code} not found")
-                        continue
-                    
-                    # Get current confirmed count for this topic
-                    confirmed = self._get_confirmed_count(conn, topic_code)
-                    capacity = topic['capacity']
-                    
-                    # Check if space available
-                    if capacity == 0 or confirmed < capacity:
-                        # Assign!
-                        self._confirm_selection(conn, pref['id'], 'allocation_engine', run_id)
-                        assigned_count += 1
-                        logger.debug(f"✓ Assigned {roll_no} to {topic_code} (rank {rank})")
-                    else:
-                        # Waitlist
-                        self._waitlist_selection(conn, pref['id'], 'allocation_engine', run_id)
-                        waitlisted_count += 1
-                        logger.debug(f"⏳ Waitlisted {roll_no} for {topic_code} (rank {rank})")
+            inputs = self._build_inputs(conn, selections, topic_map)
+            result = solve_allocation(inputs, strategy, max_iterations=max_iterations)
+            self._write_status_changes(conn, result.confirms, result.waitlists,
+                                       'allocation_engine', run_id)
         
-        logger.info(f"Ranked allocation complete: {iterations} iterations")
+        logger.info(f"{result.strategy} allocation complete: {result.iterations} iterations")
         
         return {
-            'assigned': assigned_count,
-            'waitlisted': waitlisted_count,
-            'iterations': iterations
-        }
-    
-    def _allocate_first_come(self, selections: List[Dict], 
-                            topic_map: Dict[str, Dict], run_id: int) -> Dict:
-        """Allocate based on submission time (first-come-first-served)."""
-        
-        assigned_count = 0
-        waitlisted_count = 0
-        
-        # Sort by selected_at
-        selections.sort(key=lambda x: x['selected_at'] or datetime.max)
-        
-        with self.engine.begin() as conn:
-            for sel in selections:
-                # Skip if already assigned
-                if self._is_student_assigned(conn, sel['student_roll_no']):
-                    continue
-                
-                topic_code = sel['topic_code_ay']
-                topic = topic_map.get(topic_code)
-                
-                if not topic:
-                    continue
-                
-                # Check capacity
-                confirmed = self._get_confirmed_count(conn, topic_code)
-                capacity = topic['capacity']
-                
-                if capacity == 0 or confirmed < capacity:
-                    self._confirm_selection(conn, sel['id'], 'allocation_engine', run_id)
-                    assigned_count += 1
-                else:
-                    self._waitlist_selection(conn, sel['id'], 'allocation_engine', run_id)
-                    waitlisted_count += 1
-        
-        return {
-            'assigned': assigned_count,
-            'waitlisted': waitlisted_count,
-            'iterations': 1
-        }
-    
-    def _confirm_manual_assignments(self, selections: List[Dict], run_id: int) -> Dict:
-        """Confirm manual assignments (no algorithm)."""
-        
-        assigned_count = 0
-        
-        with self.engine.begin() as conn:
-            for sel in selections:
-                if sel['selection_strategy'] == 'manual_assign':
-                    self._confirm_selection(conn, sel['id'], 'allocation_engine', run_id)
-                    assigned_count += 1
-        
-        return {
-            'assigned': assigned_count,
-            'waitlisted': 0,
-            'iterations': 1
+            'assigned': len(result.confirms),
+            'waitlisted': len(result.waitlists),
+            'iterations': result.iterations
         }
     
     # ========================================================================
-    # TIEBREAKER & FAIRNESS
+    # DRY RUN
     # ========================================================================
     
-    def _apply_tiebreaker(self, students: List[Tuple[str, Dict]]) -> List[Tuple[str, Dict]]:
+    def load_inputs(self) -> AllocationInputs:
+        """Load selections, capacities and current state once (read-only)."""
+        selections = self._fetch_pending_selections()
+        topic_map = {t['topic_code_ay']: t for t in self._fetch_topic_capacities()}
+        with self.engine.connect() as conn:
+            return self._build_inputs(conn, selections, topic_map)
+    
+    def simulate(self, strategy: List[str] = None,
+                 capacity_overrides: Optional[Dict[str, int]] = None,
+                 max_iterations: int = 10,
+                 inputs: Optional[AllocationInputs] = None) -> AllocationResult:
         """
-        Apply tiebreaker rules when multiple students want same topic at same rank.
-        
-        Current implementation: Random shuffle with daily seed for fairness.
-        
-        TODO: Enhance with CGPA, credits earned, etc.
+        Run the allocation without writing anything.
+        Pass inputs from load_inputs() to try several scenarios on one load.
         """
-        # Use date as seed for reproducibility within a day
-        seed = datetime.now().date().isoformat()
-        random.seed(seed)
-        random.shuffle(students)
-        
-        # Future: Sort by CGPA, credits, etc.
-        # students.sort(key=lambda x: x[1].get('cgpa', 0), reverse=True)
-        
-        return students
+        inputs = inputs or self.load_inputs()
+        return solve_allocation(
+            inputs.with_capacities(capacity_overrides),
+            strategy or ['student_select_ranked'],
+            max_iterations=max_iterations,
+        )
+    
+    def _build_inputs(self, conn, selections: List[Dict],
+                      topic_map: Dict[str, Dict]) -> AllocationInputs:
+        assigned, confirmed_counts = self._load_allocation_state(conn)
+        return AllocationInputs(
+            selections=selections,
+            capacities={code: int(t['capacity'] or 0) for code, t in topic_map.items()},
+            assigned=assigned,
+            confirmed_counts=confirmed_counts,
+        )
     
     # ========================================================================
     # HELPER QUERIES
     # ========================================================================
     
-    def _is_student_assigned(self, conn, roll_no: str) -> bool:
-        """Check if student already has confirmed selection."""
-        result = conn.execute(sa_text("""
-            SELECT COUNT(*) AS cnt FROM elective_student_selections
-            WHERE student_roll_no = :roll
-            AND subject_code = :subj
+    def _load_allocation_state(self, conn) -> Tuple[set, Dict[str, int]]:
+        """
+        Load allocation state in two queries:
+        - roll numbers already holding a confirmed selection for this subject
+        - confirmed count per topic in this AY, from the trigger-maintained
+          elective_capacity_tracking counters
+        """
+        assigned_rows = conn.execute(sa_text("""
+            SELECT DISTINCT student_roll_no FROM elective_student_selections
+            WHERE subject_code = :subj
             AND ay_label = :ay
             AND status = 'confirmed'
         """), {
-            "roll": roll_no,
             "subj": self.subject_code,
             "ay": self.ay_label
-        }).scalar()
-        return result > 0
+        }).fetchall()
+        
+        count_rows = conn.execute(sa_text("""
+            SELECT topic_code_ay, confirmed_count FROM elective_capacity_tracking
+            WHERE ay_label = :ay
+            AND confirmed_count > 0
+        """), {
+            "ay": self.ay_label
+        }).fetchall()
+        
+        return {r[0] for r in assigned_rows}, {r[0]: int(r[1]) for r in count_rows}
     
     def _get_confirmed_count(self, conn, topic_code: str) -> int:
         """Get current confirmed count for topic."""
         result = conn.execute(sa_text("""
-            SELECT COUNT(*) AS cnt FROM elective_student_selections
+            SELECT confirmed_count FROM elective_capacity_tracking
             WHERE topic_code_ay = :topic
             AND ay_label = :ay
-            AND status = 'confirmed'
         """), {
             "topic": topic_code,
             "ay": self.ay_label
         }).scalar()
         return result or 0
     
-    def _confirm_selection(self, conn, selection_id: int, actor: str, run_id: int):
-        """Confirm a selection."""
-        now = datetime.now()
-        
-        conn.execute(sa_text("""
-            UPDATE elective_student_selections
-            SET status = 'confirmed',
-                confirmed_at = :now,
-                confirmed_by = :actor,
-                updated_at = :now
-            WHERE id = :id
-        """), {
-            "id": selection_id,
-            "now": now,
-            "actor": f"{actor}_run_{run_id}"
-        })
+    def _write_status_changes(self, conn, confirms: List[Dict], waitlists: List[Dict],
+                              actor: str, run_id: int) -> None:
+        """
+        Write confirmations and waitlistings with one executemany UPDATE per
+        status and one bulk audit insert.
+        """
+        if not confirms and not waitlists:
+            return
         
-        # Audit
-        conn.execute(sa_text("""
-            INSERT INTO elective_selections_audit (
-                selection_id, student_roll_no, topic_code_ay, subject_code, ay_label,
-                action, old_status, new_status, actor, occurred_at, operation, source
-            )
-            SELECT 
-                id, student_roll_no, topic_code_ay, subject_code, ay_label,
-                'auto_confirm', 'draft', 'confirmed', :actor, :now, 'allocation', 'engine'
-            FROM elective_student_selections
-            WHERE id = :id
-        """), {
-            "id": selection_id,
-            "actor": f"{actor}_run_{run_id}",
-            "now": now
-        })
-    
-    def _waitlist_selection(self, conn, selection_id: int, actor: str, run_id: int):
-        """Waitlist a selection."""
         now = datetime.now()
+        run_actor = f"{actor}_run_{run_id}"
         
-        conn.execute(sa_text("""
-            UPDATE elective_student_selections
-            SET status = 'waitlisted',
-                waitlisted_at = :now,
-                updated_at = :now
-            WHERE id = :id
-        """), {
-            "id": selection_id,
-            "now": now
-        })
+        if confirms:
+            conn.execute(sa_text("""
+                UPDATE elective_student_selections
+                SET status = 'confirmed',
+                    confirmed_at = :now,
+                    confirmed_by = :actor,
+                    updated_at = :now
+                WHERE id = :id
+            """), [{"id": sel['id'], "now": now, "actor": run_actor} for sel in confirms])
+        
+        if waitlists:
+            conn.execute(sa_text("""
+                UPDATE elective_student_selections
+                SET status = 'waitlisted',
+                    waitlisted_at = :now,
+                    updated_at = :now
+                WHERE id = :id
+            """), [{"id": sel['id'], "now": now} for sel in waitlists])
         
         # Audit
+        audit_rows = [
+            {
+                "id": sel['id'],
+                "roll": sel['student_roll_no'],
+                "topic": sel['topic_code_ay'],
+                "subj": sel['subject_code'],
+                "ay": sel['ay_label'],
+                "action": action,
+                "new_status": new_status,
+                "actor": run_actor,
+                "now": now,
+            }
+            for rows, action, new_status in (
+                (confirms, 'auto_confirm', 'confirmed'),
+                (waitlists, 'auto_waitlist', 'waitlisted'),
+            )
+            for sel in rows
+        ]
         conn.execute(sa_text("""
             INSERT INTO elective_selections_audit (
                 selection_id, student_roll_no, topic_code_ay, subject_code, ay_label,
                 action, old_status, new_status, actor, occurred_at, operation, source
             )
-            SELECT 
-                id, student_roll_no, topic_code_ay, subject_code, ay_label,
-                'auto_waitlist', 'draft', 'waitlisted', :actor, :now, 'allocation', 'engine'
-            FROM elective_student_selections
-            WHERE id = :id
-        """), {
-            "id": selection_id,
-            "actor": f"{actor}_run_{run_id}",
-            "now": now
-        })
+            VALUES (
+                :id, :roll, :topic, :subj, :ay,
+                :action, 'draft', :new_status, :actor, :now, 'allocation', 'engine'
+            )
+        """), audit_rows)
     
     def _fetch_pending_selections(self) -> List[Dict]:
         """Fetch all draft selections for this subject."""
@@ -706,17 +603,23 @@ def get_allocation_run_details(engine: Engine, run_id: int) -> Optional[Dict]:
 
 def simulate_allocation(engine: Engine, subject_code: str, ay_label: str,
                        year: int, term: int, degree_code: str,
-                       dry_run: bool = True) -> Dict:
+                       dry_run: bool = True,
+                       strategy: List[str] = None,
+                       capacity_overrides: Optional[Dict[str, int]] = None,
+                       max_iterations: int = 10) -> Dict:
     """
     Simulate allocation without actually confirming.
     Useful for testing and preview.
+    
+    With dry_run=True the real algorithm runs in memory against the current
+    pending selections; nothing is written. With dry_run=False this is the
+    same as trigger_allocation.
+    
+    capacity_overrides maps topic_code_ay -> capacity for what-if scenarios.
     """
     
     logger.info(f"Simulating allocation (dry_run={dry_run})")
     
-    # In dry run mode, we'd need to clone selections to temp table
-    # For now, just return statistics
-    
     allocator = AllocationEngine(
         engine=engine,
         subject_code=subject_code,
@@ -726,28 +629,84 @@ def simulate_allocation(engine: Engine, subject_code: str, ay_label: str,
         degree_code=degree_code
     )
     
-    # Get pending selections
-    selections = allocator._fetch_pending_selections()
-    topics = allocator._fetch_topic_capacities()
+    if not dry_run:
+        return allocator.run_allocation(
+            strategy=strategy or ['student_select_ranked'],
+            max_iterations=max_iterations
+        )
     
-    # Calculate statistics
-    total_students = len(set(s['student_roll_no'] for s in selections))
-    total_capacity = sum(t['capacity'] for t in topics if t['capacity'] > 0)
+    inputs = allocator.load_inputs()
+    return _simulation_report(
+        inputs.with_capacities(capacity_overrides),
+        allocator.simulate(strategy, capacity_overrides, max_iterations, inputs=inputs)
+    )
+
+
+def compare_allocation_scenarios(engine: Engine, subject_code: str, ay_label: str,
+                                 year: int, term: int, degree_code: str,
+                                 scenarios: List[Dict]) -> List[Dict]:
+    """
+    Dry-run several scenarios against one load of the selections.
+    
+    Each scenario is a dict with optional keys: name, strategy,
+    capacity_overrides, max_iterations.
+    """
+    allocator = AllocationEngine(
+        engine=engine,
+        subject_code=subject_code,
+        ay_label=ay_label,
+        year=year,
+        term=term,
+        degree_code=degree_code
+    )
+    inputs = allocator.load_inputs()
+    
+    reports = []
+    for i, scenario in enumerate(scenarios, 1):
+        overrides = scenario.get('capacity_overrides')
+        result = allocator.simulate(
+            strategy=scenario.get('strategy'),
+            capacity_overrides=overrides,
+            max_iterations=scenario.get('max_iterations', 10),
+            inputs=inputs
+        )
+        report = _simulation_report(inputs.with_capacities(overrides), result)
+        report['scenario'] = scenario.get('name') or f"Scenario {i}"
+        reports.append(report)
+    return reports
+
+
+def _simulation_report(inputs: AllocationInputs, result: AllocationResult) -> Dict:
+    """Dry-run summary; keeps the keys the old statistics-only preview returned."""
+    total_capacity = sum(c for c in inputs.capacities.values() if c > 0)
     
     first_choices = {}
-    for s in selections:
+    for s in inputs.selections:
         if s['rank_choice'] == 1:
             topic = s['topic_code_ay']
             first_choices[topic] = first_choices.get(topic, 0) + 1
     
-    return {
-        'total_students': total_students,
-        'total_topics': len(topics),
+    satisfaction = result.top_choice_satisfaction
+    
+    report = result.summary()
+    report.update({
+        'dry_run': True,
+        'total_topics': len(inputs.capacities),
         'total_capacity': total_capacity,
-        'capacity_sufficient': total_capacity >= total_students,
+        'capacity_sufficient': total_capacity >= result.total_students,
         'first_choice_distribution': first_choices,
-        'estimated_satisfaction': 'High' if total_capacity >= total_students * 1.2 else 'Medium'
-    }
+        'estimated_satisfaction': 'High' if satisfaction >= 80 else 'Medium' if satisfaction >= 50 else 'Low',
+        'assignments': result.assignments,
+        'waitlists': [
+            {
+                'student_roll_no': s['student_roll_no'],
+                'topic_code_ay': s['topic_code_ay'],
+                'rank_choice': s['rank_choice'],
+            }
+            for s in result.waitlists
+        ],
+    })
+    return report
 
 
 if __name__ == "__main__":
@@ -0,0 +1,433 @@
+# screens/electives_topics/allocation_solver.py
+"""
+Pure allocation core for elective student selections.
+
+No database access: takes selections, topic capacities and the current
+allocation state, and returns who would be confirmed or waitlisted.
+AllocationEngine.run_allocation writes the result; simulate_allocation
+only reports it, so what-if scenarios never touch elective_student_selections.
+"""
+
+from __future__ import annotations
+import random
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+STRATEGY_RANKED = 'student_select_ranked'
+STRATEGY_OPTIMAL = 'student_select_optimal'
+STRATEGY_FIRST_COME = 'student_select_first_come'
+STRATEGY_MANUAL = 'manual_assign'
+
+
+@dataclass
+class AllocationInputs:
+    """
+    Everything an allocation needs, loaded once.
+
+    selections: pending (draft) selection rows as dicts
+    capacities: topic_code_ay -> capacity (0 = unlimited); only published topics
+    assigned: roll numbers that already hold a confirmed selection for the subject
+    confirmed_counts: topic_code_ay -> confirmed seats already taken in the AY
+    """
+    selections: List[Dict]
+    capacities: Dict[str, int]
+    assigned: set = field(default_factory=set)
+    confirmed_counts: Dict[str, int] = field(default_factory=dict)
+
+    def with_capacities(self, overrides: Optional[Dict[str, int]]) -> "AllocationInputs":
+        """Copy with some topic capacities replaced (what-if scenarios)."""
+        if not overrides:
+            return self
+        capacities = dict(self.capacities)
+        for topic_code, capacity in overrides.items():
+            if topic_code in capacities:
+                capacities[topic_code] = max(0, int(capacity))
+        return AllocationInputs(self.selections, capacities, self.assigned, self.confirmed_counts)
+
+
+@dataclass
+class AllocationResult:
+    """Outcome of one allocation pass."""
+    strategy: str
+    confirms: List[Dict] = field(default_factory=list)
+    waitlists: List[Dict] = field(default_factory=list)
+    iterations: int = 0
+    total_students: int = 0
+    topic_fill: List[Dict] = field(default_factory=list)
+
+    @property
+    def assignments(self) -> Dict[str, str]:
+        """student_roll_no -> topic_code_ay for every new confirmation."""
+        return {s['student_roll_no']: s['topic_code_ay'] for s in self.confirms}
+
+    @property
+    def rank_satisfaction(self) -> Dict[int, int]:
+        """rank_choice -> number of students confirmed at that rank."""
+        counts: Dict[int, int] = {}
+        for sel in self.confirms:
+            rank = sel.get('rank_choice')
+            if rank is not None:
+                counts[rank] = counts.get(rank, 0) + 1
+        return dict(sorted(counts.items()))
+
+    @property
+    def top_choice_satisfaction(self) -> float:
+        """% of confirmed students who got their 1st choice (as _calculate_satisfaction)."""
+        if not self.confirms:
+            return 0.0
+        first = sum(1 for s in self.confirms if s.get('rank_choice') == 1)
+        return (first / len(self.confirms)) * 100
+
+    @property
+    def unassigned(self) -> List[str]:
+        """Students with pending selections who got no seat in this pass."""
+        confirmed = {s['student_roll_no'] for s in self.confirms}
+        waiting = {s['student_roll_no'] for s in self.waitlists}
+        return sorted(waiting - confirmed)
+
+    def summary(self) -> Dict:
+        return {
+            'strategy': self.strategy,
+            'total_students': self.total_students,
+            'students_assigned': len(self.confirms),
+            'students_waitlisted': len(self.waitlists),
+            'students_unassigned': self.total_students - len(self.confirms),
+            'top_choice_satisfaction': self.top_choice_satisfaction,
+            'rank_satisfaction': self.rank_satisfaction,
+            'topic_fill': self.topic_fill,
+            'iterations': self.iterations,
+        }
+
+
+def resolve_strategy(strategy: Optional[Iterable[str]]) -> str:
+    """Pick the algorithm for a strategy list, in the engine's priority order."""
+    strategy = list(strategy or [STRATEGY_RANKED])
+    if STRATEGY_OPTIMAL in strategy:
+        return STRATEGY_OPTIMAL
+    if STRATEGY_RANKED in strategy:
+        return STRATEGY_RANKED
+    if STRATEGY_FIRST_COME in strategy:
+        return STRATEGY_FIRST_COME
+    return STRATEGY_MANUAL
+
+
+def shuffle_tiebreak(students: List[Tuple[str, Dict]], seed: Optional[str] = None) -> List[Tuple[str, Dict]]:
+    """
+    Random shuffle with a daily seed, so reruns on the same day are reproducible.
+    Uses a private Random instance; the global random state is left alone.
+    """
+    seed = seed or datetime.now().date().isoformat()
+    random.Random(seed).shuffle(students)
+    return students
+
+
+def solve_allocation(inputs: AllocationInputs, strategy: Optional[Iterable[str]] = None,
+                     max_iterations: int = 10, seed: Optional[str] = None) -> AllocationResult:
+    """Run the allocation algorithm for a strategy list without side effects."""
+    name = resolve_strategy(strategy)
+    if name == STRATEGY_RANKED:
+        result = _solve_ranked(inputs, max_iterations, seed)
+    elif name == STRATEGY_OPTIMAL:
+        result = _solve_optimal(inputs, max_iterations, seed)
+    elif name == STRATEGY_FIRST_COME:
+        result = _solve_first_come(inputs)
+    else:
+        result = _solve_manual(inputs)
+    result.total_students = len({s['student_roll_no'] for s in inputs.selections})
+    result.topic_fill = _topic_fill(inputs, result)
+    return result
+
+
+def _solve_ranked(inputs: AllocationInputs, max_iterations: int, seed: Optional[str]) -> AllocationResult:
+    """
+    Ranked choice: for each rank, shuffle the unassigned students who have a
+    choice at that rank, then confirm while capacity lasts and waitlist the rest.
+    """
+    result = AllocationResult(strategy=STRATEGY_RANKED)
+    assigned = set(inputs.assigned)
+    confirmed_counts = dict(inputs.confirmed_counts)
+
+    student_prefs: Dict[str, Dict[int, Dict]] = {}
+    for sel in inputs.selections:
+        rank = sel.get('rank_choice')
+        if rank is None:
+            continue
+        # Keep the first selection at each rank (selections arrive by selected_at)
+        student_prefs.setdefault(sel['student_roll_no'], {}).setdefault(rank, sel)
+
+    for rank in range(1, max_iterations + 1):
+        students_at_rank = [
+            (roll_no, prefs[rank])
+            for roll_no, prefs in student_prefs.items()
+            if roll_no not in assigned and rank in prefs
+        ]
+        if not students_at_rank:
+            break
+
+        result.iterations += 1
+        students_at_rank = shuffle_tiebreak(students_at_rank, seed)
+
+        for roll_no, pref in students_at_rank:
+            topic_code = pref['topic_code_ay']
+            if topic_code not in inputs.capacities:
+                continue
+            capacity = inputs.capacities[topic_code]
+            confirmed = confirmed_counts.get(topic_code, 0)
+            if capacity == 0 or confirmed < capacity:
+                result.confirms.append(pref)
+                assigned.add(roll_no)
+                confirmed_counts[topic_code] = confirmed + 1
+            else:
+                result.waitlists.append(pref)
+
+    return result
+
+
+def _solve_optimal(inputs: AllocationInputs, max_iterations: int, seed: Optional[str]) -> AllocationResult:
+    """
+    Min-cost assignment: place as many students as capacity allows, and among
+    those placements minimise the total rank (rank 1 costs 1, rank 2 costs 2...).
+
+    Successive shortest paths on the topic graph. Students are never graph
+    nodes: an edge a -> b means "move some student from topic a to their
+    choice b", weighted by the cheapest such move. Per-edge counts of
+    available moves live in NumPy arrays, so each augmentation only
+    recomputes the rows it touched and runs a vectorised Bellman-Ford over
+    the topics. Direct placements at the current shortest distance are
+    applied in bulk, which covers most students in a few passes.
+
+    Selections ranked better than the student's final seat are waitlisted,
+    as in the ranked pass.
+    """
+    result = AllocationResult(strategy=STRATEGY_OPTIMAL)
+
+    topics = [code for code, _ in sorted(inputs.capacities.items())]
+    topic_idx = {code: i for i, code in enumerate(topics)}
+    n_topics = len(topics)
+
+    # Students in tiebreak order; choices keep the first selection per rank
+    student_prefs: Dict[str, Dict[int, Dict]] = {}
+    for sel in inputs.selections:
+        rank = sel.get('rank_choice')
+        if rank is None or rank > max_iterations or sel['topic_code_ay'] not in topic_idx:
+            continue
+        if sel['student_roll_no'] in inputs.assigned:
+            continue
+        student_prefs.setdefault(sel['student_roll_no'], {}).setdefault(rank, sel)
+    order = shuffle_tiebreak(list(student_prefs.items()), seed)
+
+    if not order or not n_topics:
+        return result
+
+    n_students = len(order)
+    # choices[s] = {topic index: (cost, selection)}; one seat per student per topic
+    choices: List[Dict[int, Tuple[int, Dict]]] = []
+    for _, prefs in order:
+        by_topic: Dict[int, Tuple[int, Dict]] = {}
+        for rank in sorted(prefs):
+            t = topic_idx[prefs[rank]['topic_code_ay']]
+            by_topic.setdefault(t, (rank, prefs[rank]))
+        choices.append(by_topic)
+
+    max_cost = max(c for ch in choices for c, _ in ch.values())
+    n_deltas = 2 * max_cost - 1
+    offset = max_cost - 1
+
+    spare = np.array([
+        n_students if inputs.capacities[code] == 0
+        else max(inputs.capacities[code] - inputs.confirmed_counts.get(code, 0), 0)
+        for code in topics
+    ], dtype=np.int64)
+
+    seat = np.full(n_students, -1, dtype=np.int64)
+    # Unplaced students available per (topic, cost) and per (from, to, delta)
+    free_cnt = np.zeros((n_topics, max_cost + 1), dtype=np.int64)
+    free_bucket: Dict[Tuple[int, int], set] = {}
+    move_cnt = np.zeros((n_topics, n_topics, n_deltas), dtype=np.int64)
+    move_bucket: Dict[Tuple[int, int, int], set] = {}
+
+    for s, ch in enumerate(choices):
+        for t, (cost, _) in ch.items():
+            free_cnt[t, cost] += 1
+            free_bucket.setdefault((t, cost), set()).add(s)
+
+    def _place(s: int, t: int) -> None:
+        ch = choices[s]
+        old = int(seat[s])
+        if old < 0:
+            for b, (cost, _) in ch.items():
+                free_cnt[b, cost] -= 1
+                free_bucket[(b, cost)].discard(s)
+        else:
+            base = ch[old][0]
+            for b, (cost, _) in ch.items():
+                if b != old:
+                    d = cost - base + offset
+                    move_cnt[old, b, d] -= 1
+                    move_bucket[(old, b, d)].discard(s)
+        base = ch[t][0]
+        for b, (cost, _) in ch.items():
+            if b != t:
+                d = cost - base + offset
+                move_cnt[t, b, d] += 1
+                move_bucket.setdefault((t, b, d), set()).add(s)
+        seat[s] = t
+
+    costs = np.arange(max_cost + 1)
+    all_topics = np.arange(n_topics)
+    deltas = np.arange(n_deltas) - offset
+
+    def _edge_weights(cnt: np.ndarray, values: np.ndarray) -> np.ndarray:
+        has = cnt > 0
+        first = has.argmax(axis=-1)
+        return np.where(has.any(axis=-1), values[first], np.inf)
+
+    move_w = np.full((n_topics, n_topics), np.inf)
+    dirty_rows = set(range(n_topics))
+
+    while True:
+        result.iterations += 1
+        if dirty_rows:
+            rows = np.fromiter(dirty_rows, dtype=np.int64)
+            move_w[rows] = _edge_weights(move_cnt[rows], deltas)
+            dirty_rows.clear()
+        direct_w = _edge_weights(free_cnt, costs)
+
+        # Bellman-Ford from the pool of unplaced students over topic nodes,
+        # relaxing only from topics whose distance changed last round
+        dist = direct_w.copy()
+        pred = np.full(n_topics, -1, dtype=np.int64)
+        frontier = np.nonzero(np.isfinite(dist))[0]
+        for _ in range(n_topics):
+            if not frontier.size:
+                break
+            via = dist[frontier, None] + move_w[frontier]
+            best_from = via.argmin(axis=0)
+            best = via[best_from, all_topics]
+            improved = best < dist
+            dist[improved] = best[improved]
+            pred[improved] = frontier[best_from[improved]]
+            frontier = np.nonzero(improved)[0]
+
+        reachable = np.where(spare > 0, dist, np.inf)
+        target = int(reachable.argmin())
+        shortest = reachable[target]
+        if not np.isfinite(shortest):
+            break
+
+        # Bulk: every direct placement at the shortest distance is itself a
+        # shortest path, and placing one leaves the others valid.
+        cost = int(shortest)
+        if cost == shortest and cost <= max_cost:
+            direct_topics = np.nonzero((spare > 0) & (free_cnt[:, cost] > 0))[0]
+            if len(direct_topics):
+                for t in direct_topics:
+                    t = int(t)
+                    for s in sorted(free_bucket[(t, cost)]):
+                        if spare[t] == 0:
+                            break
+                        if seat[s] >= 0:
+                            continue
+                        _place(s, t)
+                        spare[t] -= 1
+                        dirty_rows.add(t)
+                continue
+
+        # Single augmenting path: walk back from the target topic
+        path = []
+        node = target
+        while node >= 0:
+            path.append(node)
+            node = int(pred[node])
+            if len(path) > n_topics:
+                raise RuntimeError("Optimal allocation: cycle in shortest-path tree")
+        path.reverse()
+
+        # Pick the students first, then move them (moves change the buckets)
+        moves = []
+        entry = int(path[0])
+        s = min(free_bucket[(entry, int(direct_w[entry]))])
+        moves.append((s, entry))
+        for a, b in zip(path, path[1:]):
+            d = int(move_w[a, b]) + offset
+            s = min(move_bucket[(a, b, d)])
+            moves.append((s, b))
+        for s, t in reversed(moves):
+            if seat[s] >= 0:
+                dirty_rows.add(int(seat[s]))
+            _place(s, t)
+            dirty_rows.add(t)
+        spare[target] -= 1
+
+    for s, ch in enumerate(choices):
+        t = int(seat[s])
+        placed_cost = ch[t][0] if t >= 0 else max_cost + 1
+        if t >= 0:
+            result.confirms.append(ch[t][1])
+        for b, (cost, sel) in sorted(ch.items(), key=lambda kv: kv[1][0]):
+            if cost < placed_cost:
+                result.waitlists.append(sel)
+    return result
+
+
+def _solve_first_come(inputs: AllocationInputs) -> AllocationResult:
+    """First-come-first-served by selected_at."""
+    result = AllocationResult(strategy=STRATEGY_FIRST_COME, iterations=1)
+    assigned = set(inputs.assigned)
+    confirmed_counts = dict(inputs.confirmed_counts)
+
+    ordered = sorted(inputs.selections, key=lambda x: x.get('selected_at') or datetime.max)
+    for sel in ordered:
+        if sel['student_roll_no'] in assigned:
+            continue
+        topic_code = sel['topic_code_ay']
+        if topic_code not in inputs.capacities:
+            continue
+        capacity = inputs.capacities[topic_code]
+        confirmed = confirmed_counts.get(topic_code, 0)
+        if capacity == 0 or confirmed < capacity:
+            result.confirms.append(sel)
+            assigned.add(sel['student_roll_no'])
+            confirmed_counts[topic_code] = confirmed + 1
+        else:
+            result.waitlists.append(sel)
+
+    return result
+
+
+def _solve_manual(inputs: AllocationInputs) -> AllocationResult:
+    """Confirm manual assignments as they are (no capacity check)."""
+    return AllocationResult(
+        strategy=STRATEGY_MANUAL,
+        confirms=[s for s in inputs.selections if s.get('selection_strategy') == STRATEGY_MANUAL],
+        iterations=1,
+    )
+
+
+def _topic_fill(inputs: AllocationInputs, result: AllocationResult) -> List[Dict]:
+    """Per-topic seats before and after the pass."""
+    new_confirmed: Dict[str, int] = {}
+    for sel in result.confirms:
+        new_confirmed[sel['topic_code_ay']] = new_confirmed.get(sel['topic_code_ay'], 0) + 1
+    new_waitlisted: Dict[str, int] = {}
+    for sel in result.waitlists:
+        new_waitlisted[sel['topic_code_ay']] = new_waitlisted.get(sel['topic_code_ay'], 0) + 1
+
+    fill = []
+    for topic_code, capacity in sorted(inputs.capacities.items()):
+        before = inputs.confirmed_counts.get(topic_code, 0)
+        filled = before + new_confirmed.get(topic_code, 0)
+        fill.append({
+            'topic_code_ay': topic_code,
+            'capacity': capacity,
+            'already_confirmed': before,
+            'newly_confirmed': new_confirmed.get(topic_code, 0),
+            'waitlisted': new_waitlisted.get(topic_code, 0),
+            'filled': filled,
+            'remaining': None if capacity == 0 else max(capacity - filled, 0),
+            'fill_percent': None if capacity == 0 else round(filled / capacity * 100, 1),
+        })
+    return fill
@@ -22,6 +22,7 @@ try:
     from core.db import get_engine
     from core.policy import require_page, can_edit_page, user_roles
     from core.forms import tagline, success
+    from core.query_cache import cached_query, invalidate_tables
 except Exception as e:
     st.error(f"Core imports failed: {e}")
     st.stop()
@@ -37,6 +38,7 @@ try:
     from screens.electives_topics.schema import (
         install_electives_schema,
         refresh_capacity_tracking,
+        reconcile_capacity_tracking,
     )
 except Exception as e:
     st.error(f"Schema import failed: {e}")
@@ -172,7 +174,7 @@ def _suggest_batches_for_window(
     return []
 
 
-@st.cache_data(ttl=300)
+@cached_query("degrees")
 def fetch_degrees(_engine: Engine) -> List[Dict]:
     """Fetch active degrees."""
     return _fetch_all(
@@ -186,7 +188,7 @@ def fetch_degrees(_engine: Engine) -> List[Dict]:
     )
 
 
-@st.cache_data(ttl=300)
+@cached_query("programs")
 def fetch_programs(_engine: Engine, degree_code: str) -> List[Dict]:
     """Fetch programs for degree."""
     return _fetch_all(
@@ -202,7 +204,7 @@ def fetch_programs(_engine: Engine, degree_code: str) -> List[Dict]:
     )
 
 
-@st.cache_data(ttl=300)
+@cached_query("branches", "programs")
 def fetch_branches(
     _engine: Engine, degree_code: str, program_code: Optional[str]
 ) -> List[Dict]:
@@ -235,7 +237,7 @@ def fetch_branches(
         )
 
 
-@st.cache_data(ttl=300)
+@cached_query("academic_years")
 def fetch_academic_years(_engine: Engine) -> List[str]:
     """Fetch academic years that are usable for electives."""
     rows = _fetch_all(
@@ -333,7 +335,7 @@ def get_syllabus_details(engine: Engine, subject_code: str, degree_code: str,
         }
     )
 
-@st.cache_data(ttl=300)
+@cached_query("faculty_profiles")
 def fetch_faculty_list(_engine: Engine) -> List[Dict]:
     """Fetch active faculty for dropdowns."""
     return _fetch_all(
@@ -903,7 +905,7 @@ def render():
 
     # TAB 3: CAPACITY VIEW
     with tabs[2]:
-        render_capacity_tab(topics)
+        render_capacity_tab(topics, engine, ay_label, CAN_EDIT)
 
     # TAB 4: FINAL ASSIGNMENTS
     with tabs[3]:
@@ -1132,7 +1134,7 @@ def render_topics_tab(
                                 delete_topic(engine, topic["id"])
                                 st.success("Deleted!")
                                 del st.session_state[f"confirm_delete_{topic['id']}"]
-                                st.cache_data.clear()
+                                invalidate_tables("elective_topics")
                                 st.rerun()
                             except Exception as e:
                                 st.error(f"Cannot delete: {e}")
@@ -1202,7 +1204,7 @@ def render_topics_tab(
                                         )
                                         st.success("Updated!")
                                         del st.session_state[f'editing_{topic["id"]}']
-                                        st.cache_data.clear()
+                                        invalidate_tables("elective_topics")
                                         st.rerun()
                                     except Exception as e:
                                         st.error(f"Error: {e}")
@@ -1289,7 +1291,7 @@ def render_topics_tab(
                             )
 
                             st.success(f"✅ Topic created! ID: {topic_id}")
-                            st.cache_data.clear()
+                            invalidate_tables("elective_topics")
                             st.rerun()
 
                         except Exception as e:
@@ -1393,6 +1395,17 @@ def render_selections_tab(
                 # Get satisfaction target (not directly in policy, use default)
                 min_satisfaction = 50.0
             
+            if strategy is None or "student_select_ranked" in strategy:
+                algorithm = st.radio(
+                    "Algorithm",
+                    ["Ranked (rank by rank)", "Optimal (min total rank)"],
+                    horizontal=True,
+                    help="Optimal places as many students as capacity allows, "
+                         "then minimises the total rank of their assigned topics.",
+                )
+                if algorithm.startswith("Optimal"):
+                    strategy = ["student_select_optimal"]
+            
             if st.button("▶️ Run Allocation Now", type="primary"):
                 try:
                     with st.spinner("Running allocation..."):
@@ -1427,11 +1440,27 @@ def render_selections_tab(
         st.info("No student selections yet")
 
 
-def render_capacity_tab(topics):
+def render_capacity_tab(topics, engine=None, ay_label=None, can_edit=False):
     """Render capacity overview tab."""
 
     st.subheader("📊 Capacity Overview")
 
+    if can_edit and engine is not None:
+        if st.button(
+            "🔄 Reconcile Seat Counts",
+            key="reconcile_capacity",
+            help="Recount confirmed/waitlisted seats for this AY and repair any drift",
+        ):
+            try:
+                drift = reconcile_capacity_tracking(engine, ay_label)
+                if drift:
+                    st.warning(f"Repaired seat counts for {len(drift)} topic(s)")
+                    st.dataframe(pd.DataFrame(drift), use_container_width=True, hide_index=True)
+                else:
+                    st.success("Seat counts are consistent")
+            except Exception as e:
+                st.error(f"Error: {e}")
+
     if topics:
         col1, col2, col3, col4 = st.columns(4)
 
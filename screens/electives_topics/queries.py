@@ -9,6 +9,11 @@ from datetime import datetime, timedelta
 from sqlalchemy import text as sa_text
 from sqlalchemy.engine import Engine
 
+try:
+    from screens.academic_years.db import get_term_window
+except ImportError:
+    get_term_window = None
+
 
 def _exec(conn, sql: str, params: dict = None):
     """Execute SQL with parameters."""
@@ -34,11 +39,34 @@ def _fetch_all(engine: Engine, sql: str, params: dict = None) -> List[Dict]:
 # ===========================================================================
 
 
-def get_term_start_date(engine: Engine, ay_label: str, year: int, term: int) -> Optional[datetime]:
+def get_term_start_date(
+    engine: Engine,
+    ay_label: str,
+    year: int,
+    term: int,
+    degree_code: Optional[str] = None,
+    program_code: Optional[str] = None,
+    branch_code: Optional[str] = None,
+) -> Optional[datetime]:
     """
     Get the start date for a specific term.
-    Assumes term starts at regular intervals from AY start date.
+    With a degree, the date comes from the academic-years term-window index
+    (the calendar actually assigned to that scope and year). Otherwise, or
+    if no calendar resolves, it is estimated at regular intervals from the
+    AY start date.
     """
+    if degree_code and get_term_window is not None:
+        with engine.begin() as conn:
+            window = get_term_window(
+                conn, ay_label, degree_code, year, term,
+                program_code=program_code, branch_code=branch_code,
+            )
+        if window and window.get("start_date"):
+            try:
+                return datetime.fromisoformat(window["start_date"])
+            except (ValueError, TypeError):
+                pass
+
     ay = _fetch_one(engine, """
         SELECT start_date, end_date FROM academic_years WHERE ay_code = :ay
     """, {"ay": ay_label})
@@ -64,7 +92,10 @@ def validate_topic_creation_timing(
     ay_label: str,
     year: int,
     term: int,
-    lead_days: int = 21
+    lead_days: int = 21,
+    degree_code: Optional[str] = None,
+    program_code: Optional[str] = None,
+    branch_code: Optional[str] = None
 ) -> Tuple[bool, str]:
     """
     Validate that topics are being created within the allowed window.
@@ -72,7 +103,10 @@ def validate_topic_creation_timing(
     
     Returns: (is_valid, message)
     """
-    term_start = get_term_start_date(engine, ay_label, year, term)
+    term_start = get_term_start_date(
+        engine, ay_label, year, term,
+        degree_code=degree_code, program_code=program_code, branch_code=branch_code,
+    )
     
     if not term_start:
         # If we can't determine term start, allow creation but warn
@@ -96,7 +130,10 @@ def validate_selection_window_open(
     year: int,
     term: int,
     lead_days: int = 21,
-    deadline_days: int = 7
+    deadline_days: int = 7,
+    degree_code: Optional[str] = None,
+    program_code: Optional[str] = None,
+    branch_code: Optional[str] = None
 ) -> Tuple[bool, str]:
     """
     Validate that student selections are within the allowed window.
@@ -104,7 +141,10 @@ def validate_selection_window_open(
     
     Returns: (is_valid, message)
     """
-    term_start = get_term_start_date(engine, ay_label, year, term)
+    term_start = get_term_start_date(
+        engine, ay_label, year, term,
+        degree_code=degree_code, program_code=program_code, branch_code=branch_code,
+    )
     
     if not term_start:
         return True, "Warning: Could not validate selection window"
@@ -516,7 +556,8 @@ def create_topic_with_validation(
     if enforce_timing:
         lead_days = data.get("elective_selection_lead_days", 21)
         timing_ok, timing_msg = validate_topic_creation_timing(
-            engine, ay_label, year, term, lead_days
+            engine, ay_label, year, term, lead_days,
+            degree_code=degree_code, program_code=data.get("prog"), branch_code=data.get("br"),
         )
         if not timing_ok:
             raise ValueError(f"Timing validation failed: {timing_msg}")
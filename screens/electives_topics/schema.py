@@ -566,102 +566,147 @@ def install_elective_views(engine: Engine):
 # TRIGGERS FOR CAPACITY TRACKING
 # ===========================================================================
 
-def install_capacity_triggers(engine: Engine):
-    """Create triggers to maintain capacity tracking."""
-    with engine.begin() as conn:
-        # Trigger: Update capacity on new confirmed selection
-        _exec(conn, """
-        CREATE TRIGGER IF NOT EXISTS trg_selection_confirmed_insert
-        AFTER INSERT ON elective_student_selections
-        WHEN NEW.status IN ('confirmed', 'waitlisted')
-        BEGIN
+# Remaining capacity stored for unlimited topics (capacity = 0)
+UNLIMITED_REMAINING = 999999
+
+# Earlier trigger set: only handled inserts and updates of existing rows
+_LEGACY_CAPACITY_TRIGGERS = ("trg_selection_confirmed_insert", "trg_selection_status_update")
+
+
+def _capacity_delta_sql(topic: str, ay: str, confirmed: str, waitlisted: str) -> str:
+    """
+    Upsert that applies a confirmed/waitlisted delta to one topic's counters.
+    Creates the tracking row from elective_topics if it is missing.
+    """
+    return f"""
             INSERT INTO elective_capacity_tracking (
-                topic_code_ay, ay_label, max_capacity, 
-                confirmed_count, waitlisted_count, remaining_capacity, 
+                topic_code_ay, ay_label, max_capacity,
+                confirmed_count, waitlisted_count, remaining_capacity,
                 is_full, has_waitlist, updated_at
             )
-            SELECT 
-                NEW.topic_code_ay,
-                NEW.ay_label,
+            SELECT
+                t.topic_code_ay,
+                t.ay_label,
                 t.capacity,
-                CASE WHEN NEW.status = 'confirmed' THEN 1 ELSE 0 END,
-                CASE WHEN NEW.status = 'waitlisted' THEN 1 ELSE 0 END,
-                CASE 
-                    WHEN t.capacity = 0 THEN 999999
-                    ELSE t.capacity - CASE WHEN NEW.status = 'confirmed' THEN 1 ELSE 0 END
-                END,
-                CASE 
-                    WHEN t.capacity > 0 AND NEW.status = 'confirmed' AND t.capacity <= 1 THEN 1
-                    ELSE 0
-                END,
-                CASE WHEN NEW.status = 'waitlisted' THEN 1 ELSE 0 END,
+                MAX({confirmed}, 0),
+                MAX({waitlisted}, 0),
+                CASE WHEN t.capacity = 0 THEN {UNLIMITED_REMAINING}
+                     ELSE MAX(t.capacity - MAX({confirmed}, 0), 0) END,
+                CASE WHEN t.capacity > 0 AND MAX({confirmed}, 0) >= t.capacity THEN 1 ELSE 0 END,
+                CASE WHEN MAX({waitlisted}, 0) > 0 THEN 1 ELSE 0 END,
                 CURRENT_TIMESTAMP
-            FROM elective_topics t
-            WHERE t.topic_code_ay = NEW.topic_code_ay
-            AND t.ay_label = NEW.ay_label
+            FROM (SELECT topic_code_ay, ay_label, COALESCE(capacity, 0) AS capacity FROM elective_topics) t
+            WHERE t.topic_code_ay = {topic}
+            AND t.ay_label = {ay}
             ON CONFLICT(topic_code_ay, ay_label) DO UPDATE SET
-                confirmed_count = confirmed_count + CASE WHEN NEW.status = 'confirmed' THEN 1 ELSE 0 END,
-                waitlisted_count = waitlisted_count + CASE WHEN NEW.status = 'waitlisted' THEN 1 ELSE 0 END,
-                remaining_capacity = CASE 
-                    WHEN max_capacity = 0 THEN 999999
-                    ELSE max_capacity - (confirmed_count + CASE WHEN NEW.status = 'confirmed' THEN 1 ELSE 0 END)
-                END,
-                is_full = CASE 
-                    WHEN max_capacity > 0 AND (confirmed_count + CASE WHEN NEW.status = 'confirmed' THEN 1 ELSE 0 END) >= max_capacity THEN 1
-                    ELSE 0
-                END,
-                has_waitlist = CASE 
-                    WHEN (waitlisted_count + CASE WHEN NEW.status = 'waitlisted' THEN 1 ELSE 0 END) > 0 THEN 1
+                confirmed_count = MAX(confirmed_count + ({confirmed}), 0),
+                waitlisted_count = MAX(waitlisted_count + ({waitlisted}), 0),
+                remaining_capacity = CASE WHEN max_capacity = 0 THEN {UNLIMITED_REMAINING}
+                    ELSE MAX(max_capacity - MAX(confirmed_count + ({confirmed}), 0), 0) END,
+                is_full = CASE
+                    WHEN max_capacity > 0 AND MAX(confirmed_count + ({confirmed}), 0) >= max_capacity THEN 1
                     ELSE 0
                 END,
+                has_waitlist = CASE WHEN MAX(waitlisted_count + ({waitlisted}), 0) > 0 THEN 1 ELSE 0 END,
                 updated_at = CURRENT_TIMESTAMP;
+    """
+
+
+def _is_status(row: str, status: str) -> str:
+    return f"(CASE WHEN {row}.status = '{status}' THEN 1 ELSE 0 END)"
+
+
+def install_capacity_triggers(engine: Engine):
+    """
+    Create triggers that keep elective_capacity_tracking current.
+
+    Every insert, delete, status change or topic switch in
+    elective_student_selections adjusts the counters in the same
+    transaction, so readers get seat counts with one indexed lookup.
+    Topic inserts, capacity edits and deletes keep the row itself in step.
+    """
+    with engine.begin() as conn:
+        fresh = not conn.execute(sa_text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_selection_capacity_delete'"
+        )).fetchone()
+
+        for name in _LEGACY_CAPACITY_TRIGGERS:
+            _exec(conn, f"DROP TRIGGER IF EXISTS {name}")
+
+        # Selection added as confirmed/waitlisted
+        _exec(conn, f"""
+        CREATE TRIGGER IF NOT EXISTS trg_selection_capacity_insert
+        AFTER INSERT ON elective_student_selections
+        WHEN NEW.status IN ('confirmed', 'waitlisted')
+        BEGIN
+            {_capacity_delta_sql('NEW.topic_code_ay', 'NEW.ay_label',
+                                 _is_status('NEW', 'confirmed'), _is_status('NEW', 'waitlisted'))}
         END;
         """)
-        
-        # Trigger: Update capacity on status change
-        _exec(conn, """
-        CREATE TRIGGER IF NOT EXISTS trg_selection_status_update
-        AFTER UPDATE OF status ON elective_student_selections
-        WHEN OLD.status != NEW.status
+
+        # Selection removed
+        _exec(conn, f"""
+        CREATE TRIGGER IF NOT EXISTS trg_selection_capacity_delete
+        AFTER DELETE ON elective_student_selections
+        WHEN OLD.status IN ('confirmed', 'waitlisted')
+        BEGIN
+            {_capacity_delta_sql('OLD.topic_code_ay', 'OLD.ay_label',
+                                 '-' + _is_status('OLD', 'confirmed'), '-' + _is_status('OLD', 'waitlisted'))}
+        END;
+        """)
+
+        # Status change or move to another topic: release the old seat, take the new one
+        _exec(conn, f"""
+        CREATE TRIGGER IF NOT EXISTS trg_selection_capacity_update
+        AFTER UPDATE OF status, topic_code_ay, ay_label ON elective_student_selections
+        WHEN (OLD.status IN ('confirmed', 'waitlisted') OR NEW.status IN ('confirmed', 'waitlisted'))
+        AND (OLD.status IS NOT NEW.status
+             OR OLD.topic_code_ay IS NOT NEW.topic_code_ay
+             OR OLD.ay_label IS NOT NEW.ay_label)
+        BEGIN
+            {_capacity_delta_sql('OLD.topic_code_ay', 'OLD.ay_label',
+                                 '-' + _is_status('OLD', 'confirmed'), '-' + _is_status('OLD', 'waitlisted'))}
+            {_capacity_delta_sql('NEW.topic_code_ay', 'NEW.ay_label',
+                                 _is_status('NEW', 'confirmed'), _is_status('NEW', 'waitlisted'))}
+        END;
+        """)
+
+        # New topic starts with an empty counter row
+        _exec(conn, f"""
+        CREATE TRIGGER IF NOT EXISTS trg_topic_capacity_insert
+        AFTER INSERT ON elective_topics
+        BEGIN
+            {_capacity_delta_sql('NEW.topic_code_ay', 'NEW.ay_label', '0', '0')}
+        END;
+        """)
+
+        # Capacity edited: recompute remaining/is_full from the kept counters
+        _exec(conn, f"""
+        CREATE TRIGGER IF NOT EXISTS trg_topic_capacity_update
+        AFTER UPDATE OF capacity ON elective_topics
+        WHEN OLD.capacity IS NOT NEW.capacity
         BEGIN
             UPDATE elective_capacity_tracking
-            SET 
-                confirmed_count = confirmed_count 
-                    - CASE WHEN OLD.status = 'confirmed' THEN 1 ELSE 0 END
-                    + CASE WHEN NEW.status = 'confirmed' THEN 1 ELSE 0 END,
-                waitlisted_count = waitlisted_count 
-                    - CASE WHEN OLD.status = 'waitlisted' THEN 1 ELSE 0 END
-                    + CASE WHEN NEW.status = 'waitlisted' THEN 1 ELSE 0 END,
-                remaining_capacity = CASE 
-                    WHEN max_capacity = 0 THEN 999999
-                    ELSE max_capacity - (
-                        confirmed_count 
-                        - CASE WHEN OLD.status = 'confirmed' THEN 1 ELSE 0 END
-                        + CASE WHEN NEW.status = 'confirmed' THEN 1 ELSE 0 END
-                    )
-                END,
-                is_full = CASE 
-                    WHEN max_capacity > 0 AND (
-                        confirmed_count 
-                        - CASE WHEN OLD.status = 'confirmed' THEN 1 ELSE 0 END
-                        + CASE WHEN NEW.status = 'confirmed' THEN 1 ELSE 0 END
-                    ) >= max_capacity THEN 1
-                    ELSE 0
-                END,
-                has_waitlist = CASE 
-                    WHEN (
-                        waitlisted_count 
-                        - CASE WHEN OLD.status = 'waitlisted' THEN 1 ELSE 0 END
-                        + CASE WHEN NEW.status = 'waitlisted' THEN 1 ELSE 0 END
-                    ) > 0 THEN 1
-                    ELSE 0
-                END,
+            SET max_capacity = COALESCE(NEW.capacity, 0),
+                remaining_capacity = CASE WHEN COALESCE(NEW.capacity, 0) = 0 THEN {UNLIMITED_REMAINING}
+                    ELSE MAX(NEW.capacity - confirmed_count, 0) END,
+                is_full = CASE WHEN NEW.capacity > 0 AND confirmed_count >= NEW.capacity THEN 1 ELSE 0 END,
                 updated_at = CURRENT_TIMESTAMP
-            WHERE topic_code_ay = NEW.topic_code_ay 
+            WHERE topic_code_ay = NEW.topic_code_ay
             AND ay_label = NEW.ay_label;
         END;
         """)
-        
+
+        _exec(conn, """
+        CREATE TRIGGER IF NOT EXISTS trg_topic_capacity_delete
+        AFTER DELETE ON elective_topics
+        BEGIN
+            DELETE FROM elective_capacity_tracking
+            WHERE topic_code_ay = OLD.topic_code_ay
+            AND ay_label = OLD.ay_label;
+        END;
+        """)
+
         # Trigger: Prevent topic deletion with students
         _exec(conn, """
         CREATE TRIGGER IF NOT EXISTS trg_prevent_topic_delete_with_students
@@ -676,9 +721,12 @@ def install_capacity_triggers(engine: Engine):
             SELECT RAISE(ABORT, 'Cannot delete topic with assigned students. Archive instead.');
         END;
         """)
-        
-        logger.info("✓ Installed capacity triggers")
 
+        if fresh:
+            # Counters written by the old triggers can't be trusted; start from the data
+            _rebuild_capacity(conn)
+
+        logger.info("✓ Installed capacity triggers")
 
 # ===========================================================================
 # MASTER INSTALL FUNCTION
@@ -721,91 +769,143 @@ def install_electives_schema(engine: Engine):
 # UTILITY FUNCTIONS
 # ===========================================================================
 
+def _capacity_scope(topic_code_ay: str = None, ay_label: str = None, alias: str = "t") -> tuple:
+    """WHERE fragment + params limiting a capacity query to one topic or AY."""
+    clauses, params = [], {}
+    if topic_code_ay:
+        clauses.append(f"{alias}.topic_code_ay = :topic_code_ay")
+        params["topic_code_ay"] = topic_code_ay
+    if ay_label:
+        clauses.append(f"{alias}.ay_label = :ay_label")
+        params["ay_label"] = ay_label
+    return (" AND ".join(clauses) or "1 = 1"), params
+
+
+def _rebuild_capacity(conn, topic_code_ay: str = None, ay_label: str = None):
+    """Recount tracking rows from elective_student_selections on an open connection."""
+    where, params = _capacity_scope(topic_code_ay, ay_label)
+    tracked_where, _ = _capacity_scope(topic_code_ay, ay_label, alias="elective_capacity_tracking")
+
+    # Drop rows in scope first so counters of deleted topics go too
+    _exec(conn, f"DELETE FROM elective_capacity_tracking WHERE {tracked_where}", params)
+    _exec(conn, f"""
+    INSERT INTO elective_capacity_tracking (
+        topic_code_ay, ay_label, max_capacity,
+        confirmed_count, waitlisted_count, remaining_capacity,
+        is_full, has_waitlist, updated_at
+    )
+    SELECT
+        t.topic_code_ay,
+        t.ay_label,
+        t.capacity,
+        COALESCE(s.confirmed, 0),
+        COALESCE(s.waitlisted, 0),
+        CASE WHEN t.capacity = 0 THEN {UNLIMITED_REMAINING}
+             ELSE MAX(t.capacity - COALESCE(s.confirmed, 0), 0) END,
+        CASE WHEN t.capacity > 0 AND COALESCE(s.confirmed, 0) >= t.capacity THEN 1 ELSE 0 END,
+        CASE WHEN COALESCE(s.waitlisted, 0) > 0 THEN 1 ELSE 0 END,
+        CURRENT_TIMESTAMP
+    FROM (SELECT topic_code_ay, ay_label, COALESCE(capacity, 0) AS capacity FROM elective_topics) t
+    LEFT JOIN (
+        SELECT topic_code_ay, ay_label,
+               SUM(CASE WHEN status = 'confirmed' THEN 1 ELSE 0 END) AS confirmed,
+               SUM(CASE WHEN status = 'waitlisted' THEN 1 ELSE 0 END) AS waitlisted
+        FROM elective_student_selections
+        WHERE status IN ('confirmed', 'waitlisted')
+        GROUP BY topic_code_ay, ay_label
+    ) s ON s.topic_code_ay = t.topic_code_ay AND s.ay_label = t.ay_label
+    WHERE {where}
+    """, params)
+
+
 def refresh_capacity_tracking(engine: Engine, topic_code_ay: str = None, ay_label: str = None):
-    """Manually refresh capacity tracking (for bulk operations)."""
+    """
+    Rebuild capacity tracking from the selections table.
+    Limited to one topic, one AY, or everything when neither is given.
+    """
     with engine.begin() as conn:
-        if topic_code_ay and ay_label:
-            # Refresh specific topic
-            _exec(conn, """
-            INSERT OR REPLACE INTO elective_capacity_tracking (
-                topic_code_ay, ay_label, max_capacity, 
-                confirmed_count, waitlisted_count, remaining_capacity,
-                is_full, has_waitlist, updated_at
-            )
-            SELECT 
-                t.topic_code_ay,
-                t.ay_label,
-                t.capacity,
-                COALESCE(SUM(CASE WHEN s.status = 'confirmed' THEN 1 ELSE 0 END), 0),
-                COALESCE(SUM(CASE WHEN s.status = 'waitlisted' THEN 1 ELSE 0 END), 0),
-                CASE 
-                    WHEN t.capacity = 0 THEN 999999
-                    ELSE t.capacity - COALESCE(SUM(CASE WHEN s.status = 'confirmed' THEN 1 ELSE 0 END), 0)
-                END,
-                CASE 
-                    WHEN t.capacity > 0 AND COALESCE(SUM(CASE WHEN s.status = 'confirmed' THEN 1 ELSE 0 END), 0) >= t.capacity THEN 1
-                    ELSE 0
-                END,
-                CASE 
-                    WHEN COALESCE(SUM(CASE WHEN s.status = 'waitlisted' THEN 1 ELSE 0 END), 0) > 0 THEN 1
-                    ELSE 0
-                END,
-                CURRENT_TIMESTAMP
-            FROM elective_topics t
-            LEFT JOIN elective_student_selections s 
-                ON s.topic_code_ay = t.topic_code_ay 
-                AND s.ay_label = t.ay_label
-                AND s.status IN ('confirmed', 'waitlisted')
-            WHERE t.topic_code_ay = :topic_code_ay 
-            AND t.ay_label = :ay_label
-            GROUP BY t.topic_code_ay, t.ay_label, t.capacity
-            """, {"topic_code_ay": topic_code_ay, "ay_label": ay_label})
-        else:
-            # Refresh all
-            _exec(conn, """
-            INSERT OR REPLACE INTO elective_capacity_tracking (
-                topic_code_ay, ay_label, max_capacity, 
-                confirmed_count, waitlisted_count, remaining_capacity,
-                is_full, has_waitlist, updated_at
-            )
-            SELECT 
-                t.topic_code_ay,
-                t.ay_label,
-                t.capacity,
-                COALESCE(SUM(CASE WHEN s.status = 'confirmed' THEN 1 ELSE 0 END), 0),
-                COALESCE(SUM(CASE WHEN s.status = 'waitlisted' THEN 1 ELSE 0 END), 0),
-                CASE 
-                    WHEN t.capacity = 0 THEN 999999
-                    ELSE t.capacity - COALESCE(SUM(CASE WHEN s.status = 'confirmed' THEN 1 ELSE 0 END), 0)
-                END,
-                CASE 
-                    WHEN t.capacity > 0 AND COALESCE(SUM(CASE WHEN s.status = 'confirmed' THEN 1 ELSE 0 END), 0) >= t.capacity THEN 1
-                    ELSE 0
-                END,
-                CASE 
-                    WHEN COALESCE(SUM(CASE WHEN s.status = 'waitlisted' THEN 1 ELSE 0 END), 0) > 0 THEN 1
-                    ELSE 0
-                END,
-                CURRENT_TIMESTAMP
-            FROM elective_topics t
-            LEFT JOIN elective_student_selections s 
-                ON s.topic_code_ay = t.topic_code_ay 
-                AND s.ay_label = t.ay_label
-                AND s.status IN ('confirmed', 'waitlisted')
-            GROUP BY t.topic_code_ay, t.ay_label, t.capacity
-            """)
-        
-        logger.info(f"✓ Refreshed capacity tracking for {topic_code_ay or 'all topics'}")
+        _rebuild_capacity(conn, topic_code_ay, ay_label)
+
+    logger.info(f"✓ Refreshed capacity tracking for {topic_code_ay or ay_label or 'all topics'}")
+
+
+def find_capacity_drift(conn, ay_label: str = None) -> list:
+    """
+    Topics whose tracked counters differ from a recount (or have no row,
+    or whose row outlived the topic).
+    """
+    where, params = _capacity_scope(ay_label=ay_label, alias="k")
+    rows = conn.execute(sa_text(f"""
+    WITH keys AS (
+        SELECT topic_code_ay, ay_label FROM elective_topics
+        UNION
+        SELECT topic_code_ay, ay_label FROM elective_capacity_tracking
+    ),
+    actual AS (
+        SELECT topic_code_ay, ay_label,
+               SUM(CASE WHEN status = 'confirmed' THEN 1 ELSE 0 END) AS confirmed,
+               SUM(CASE WHEN status = 'waitlisted' THEN 1 ELSE 0 END) AS waitlisted
+        FROM elective_student_selections
+        WHERE status IN ('confirmed', 'waitlisted')
+        GROUP BY topic_code_ay, ay_label
+    )
+    SELECT k.topic_code_ay, k.ay_label,
+           t.id IS NOT NULL AS topic_exists,
+           c.id IS NOT NULL AS tracked,
+           t.capacity, c.max_capacity,
+           c.confirmed_count, COALESCE(a.confirmed, 0) AS actual_confirmed,
+           c.waitlisted_count, COALESCE(a.waitlisted, 0) AS actual_waitlisted
+    FROM keys k
+    LEFT JOIN elective_topics t ON t.topic_code_ay = k.topic_code_ay AND t.ay_label = k.ay_label
+    LEFT JOIN elective_capacity_tracking c ON c.topic_code_ay = k.topic_code_ay AND c.ay_label = k.ay_label
+    LEFT JOIN actual a ON a.topic_code_ay = k.topic_code_ay AND a.ay_label = k.ay_label
+    WHERE {where}
+    AND (
+        t.id IS NULL OR c.id IS NULL
+        OR c.max_capacity != COALESCE(t.capacity, 0)
+        OR c.confirmed_count != COALESCE(a.confirmed, 0)
+        OR c.waitlisted_count != COALESCE(a.waitlisted, 0)
+    )
+    ORDER BY k.ay_label, k.topic_code_ay
+    """), params).fetchall()
+    return [dict(r._mapping) for r in rows]
+
+
+def reconcile_capacity_tracking(engine: Engine, ay_label: str = None) -> list:
+    """
+    Detect and repair counter drift (e.g. rows written with triggers
+    disabled or by an older schema). Returns the drifted topics as found
+    before the repair; an empty list means the counters were correct.
+    """
+    with engine.begin() as conn:
+        drift = find_capacity_drift(conn, ay_label)
+        if drift:
+            _rebuild_capacity(conn, ay_label=ay_label)
+
+    if drift:
+        logger.warning(f"Capacity tracking drift repaired for {len(drift)} topic(s) in {ay_label or 'all AYs'}")
+    return drift
 
 
 if __name__ == "__main__":
-    # Test installation
-    from sqlalchemy import create_engine
-    
-    engine = create_engine("sqlite:///test_electives.db")
-    success = install_electives_schema(engine)
-    
-    if success:
-        print("✅ Schema installation test passed!")
+    import argparse
+    from core.db import get_engine
+
+    parser = argparse.ArgumentParser(description="Electives schema utilities")
+    parser.add_argument("--db", default=None, help="Database URL (default: the app's URL from settings.yaml)")
+    parser.add_argument("--reconcile", action="store_true", help="Repair elective seat counters")
+    parser.add_argument("--ay", default=None, help="Limit reconcile to one academic year")
+    args = parser.parse_args()
+
+    engine = get_engine(args.db)
+
+    if args.reconcile:
+        fixed = reconcile_capacity_tracking(engine, args.ay)
+        print(f"✅ Repaired {len(fixed)} topic counter(s)" if fixed else "✅ Seat counters are consistent")
     else:
-        print("❌ Schema installation test failed!")
+        # Test installation
+        success = install_electives_schema(engine)
+        if success:
+            print("✅ Schema installation test passed!")
+        else:
+            print("❌ Schema installation test failed!")
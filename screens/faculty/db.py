@@ -11,6 +11,8 @@ import streamlit as st
 from sqlalchemy import text as sa_text
 from sqlalchemy.engine import Connection
 
+from core.usernames import UsernameAllocator
+
 # -------------------- degree / designation helpers --------------------
 def _active_degrees(conn: Connection) -> List[str]:
     try:
@@ -287,18 +289,19 @@ def _faculty_username_from_name(full_name: str) -> tuple[str,str,str]:
     
     return base5, last_initial, digits
 
-def _generate_faculty_username(conn: Connection, full_name: str, retries: int = 6) -> str:
-    # This function uses the one above, so no changes are needed here.
-    base5, last_initial, digits = _faculty_username_from_name(full_name)
-    candidate = "failed"
-    for _ in range(retries):
-        candidate = f"{base5}{last_initial}{digits}".lower()
-        exists = conn.execute(sa_text("SELECT 1 FROM faculty_profiles WHERE username=:u"), {"u": candidate}).fetchone()
-        if not exists:
-            return candidate
-        digits = "".join(random.choices(string.digits, k=4))
-    fallback = f"{random.choice(string.ascii_lowercase)}{''.join(random.choices(string.digits, k=3))}"
-    return f"{base5}{last_initial}{digits}{fallback}".lower()
+def _generate_faculty_username(conn: Connection, full_name: str,
+                               allocator: Optional[UsernameAllocator] = None) -> str:
+    """
+    base5 + last initial + 4 digits no other faculty profile uses. Pass the
+    import's allocator (prefetched with _faculty_username_base) to avoid a
+    query per row.
+    """
+    allocator = allocator or UsernameAllocator(conn, "faculty_profiles", style="digits")
+    return allocator.allocate(_faculty_username_base(full_name))
+
+def _faculty_username_base(full_name: str) -> str:
+    base5, last_initial, _ = _faculty_username_from_name(full_name)
+    return f"{base5}{last_initial}".lower()
 
 def _initial_faculty_password_from_name(full_name: str, digits: str) -> str:
     # This function also uses the fixed _faculty_username_from_name
@@ -10,16 +10,20 @@ import pandas as pd
 import streamlit as st
 from sqlalchemy import text as sa_text
 from sqlalchemy.engine import Engine, Connection
-from collections import defaultdict
 import logging
 
 # Import helpers from other modules
 from screens.faculty.utils import _safe_int_convert, _handle_error
+from core.import_jobs import register_import_handler, submit_import_job, render_import_jobs_panel
+from core.query_cache import invalidate_tables
+from core.usernames import UsernameAllocator
+from core.wide_export import EXPORT_FORMATS, ExportFile, WideExportSpec, stream_wide_export
 from screens.faculty.db import (
     _get_custom_profile_fields, _get_custom_field_mapping, _save_custom_field_value,
-    _active_degrees, _designation_catalog, _designation_enabled, _get_all_custom_field_data,
+    _active_degrees, _designation_catalog, _designation_enabled,
     _get_all_positions,              # for positions import validation
     _generate_faculty_username,      # NEW: username generator
+    _faculty_username_base,
     _initial_faculty_password_from_name,  # NEW: initial password generator
 )
 
@@ -286,12 +290,14 @@ def _csv_get_email(row: pd.Series) -> str:
 
 # ---------- NEW: Ensure username + initial credentials for a faculty email ----------
 
-def _ensure_username_and_initial_creds(conn, email: str, full_name: str) -> None:
+def _ensure_username_and_initial_creds(conn, email: str, full_name: str,
+                                       allocator: Optional[UsernameAllocator] = None) -> None:
     """
     Creates a username in faculty_profiles (if missing), and an entry in
     faculty_initial_credentials with a plaintext password (if missing or consumed).
     Also flips first_login_pending=1 and password_export_available=1 so
     Export Credentials can list the row.
+    Imports pass one allocator for the whole file (see _username_allocator).
     """
     # Get profile id, name, username
     prof = conn.execute(sa_text(
@@ -302,7 +308,7 @@ def _ensure_username_and_initial_creds(conn, email: str, full_name: str) -> None
     pid, name_db, username = int(prof[0]), (full_name or prof[1] or ""), (prof[2] or "")
     if not username:
         # Generate a unique username from the name
-        username = _generate_faculty_username(conn, name_db)
+        username = _generate_faculty_username(conn, name_db, allocator)
         conn.execute(sa_text(
             "UPDATE faculty_profiles SET username=:u, updated_at=CURRENT_TIMESTAMP WHERE id=:id"
         ), {"u": username, "id": pid})
@@ -350,6 +356,13 @@ def _export_profiles_template():
     sample_data = pd.DataFrame(columns=columns)
     return sample_data.to_csv(index=False)
 
+def _username_allocator(conn, df: pd.DataFrame) -> UsernameAllocator:
+    """Allocator with the usernames every name in the file could need loaded in one query."""
+    allocator = UsernameAllocator(conn, "faculty_profiles", style="digits")
+    if 'name' in df.columns:
+        allocator.prefetch(_faculty_username_base(n) for n in df['name'].dropna().astype(str))
+    return allocator
+
 def _import_profiles_with_validation(engine: Engine, df: pd.DataFrame, dry_run: bool = False) -> Tuple[List[Dict[str, Any]], int]:
     """
     Import profiles with validation.
@@ -379,6 +392,8 @@ def _import_profiles_with_validation(engine: Engine, df: pd.DataFrame, dry_run:
             elif col.lower() in field_mapping:
                 custom_columns.append(col)
 
+        usernames = _username_allocator(conn, df)
+
         for idx, row in df.iterrows():
             try:
                 if not row.get('name') or not row.get('email'):
@@ -419,7 +434,7 @@ def _import_profiles_with_validation(engine: Engine, df: pd.DataFrame, dry_run:
                             _save_custom_field_value(conn, row['email'].lower(), field_name, str(row[col]))
 
                 # NEW: Ensure username + initial credentials exist
-                _ensure_username_and_initial_creds(conn, row['email'], row['name'])
+                _ensure_username_and_initial_creds(conn, row['email'], row['name'], usernames)
 
                 success_count += 1
 
@@ -810,7 +825,8 @@ def _import_combined_with_validation(
     df: pd.DataFrame, 
     dry_run: bool,
     mappings: Optional[Dict[str, Dict[str, str]]] = None,
-    conn_for_transaction: Optional[Connection] = None
+    conn_for_transaction: Optional[Connection] = None,
+    notify_skipped_admins: bool = True,
 ) -> Tuple[List[Dict[str, Any]], int, List[Dict[str, Any]]]: # <-- NEW: ADDED SKIPPED LIST
     """
     Import combined profiles and affiliations with validation AND MAPPINGS.
@@ -818,6 +834,8 @@ def _import_combined_with_validation(
     Also ensures username + initial credentials are generated for each profile.
     
     If conn_for_transaction is provided, it uses it for the import.
+    With notify_skipped_admins=False (background jobs, no page to write to),
+    skipped admins are returned in skipped_rows instead of shown with st.info.
     
     RETURNS: (errors, success_count, skipped_rows)
     """
@@ -856,6 +874,8 @@ def _import_combined_with_validation(
             elif col.lower() in field_mapping:
                 custom_columns.append(col)
 
+        usernames = _username_allocator(conn, df)
+
         for idx, row in df.iterrows():
             try:
                 if not row.get('name') or not row.get('email'):
@@ -864,6 +884,12 @@ def _import_combined_with_validation(
 
                 if _is_academic_admin(conn, row['email']):
                     skipped_admins.append(row['email'])
+                    if not notify_skipped_admins:
+                        skipped_rows.append({
+                            "row": idx + 2,
+                            "email": row['email'],
+                            "reason": "Academic admin (managed in User Roles)"
+                        })
                     continue
 
                 degree_code = row.get('degree_code')
@@ -899,7 +925,7 @@ def _import_combined_with_validation(
                             _save_custom_field_value(conn, row['email'].lower(), field_name, str(row[col]))
 
                 # (Credentials logic is unchanged)
-                _ensure_username_and_initial_creds(conn, row['email'], row['name'])
+                _ensure_username_and_initial_creds(conn, row['email'], row['name'], usernames)
 
                 # Process affiliation if degree and designation provided
                 if degree_code and row.get('designation'):
@@ -993,34 +1019,71 @@ def _import_combined_with_validation(
         if should_close:
             conn.close()
 
-    if skipped_admins and not dry_run:
+    if skipped_admins and not dry_run and notify_skipped_admins:
         st.info(f"ℹ️ Skipped {len(skipped_admins)} academic admin(s): {', '.join(skipped_admins)}\n(Academic admins are managed in User Roles)")
 
     return errors, success_count, skipped_rows # <-- NEW: RETURN SKIPPED LIST
 
 
+def _run_combined_import_chunk(
+    engine: Engine,
+    chunk: pd.DataFrame,
+    params: Dict[str, Any],
+) -> Tuple[List[Dict[str, Any]], int, List[Dict[str, Any]]]:
+    """Background job handler: import one committed chunk of the combined CSV."""
+    return _import_combined_with_validation(
+        engine, chunk, dry_run=False, mappings=params.get("mappings") or None,
+        notify_skipped_admins=False
+    )
+
+
+register_import_handler("faculty_combined", _run_combined_import_chunk)
+
+
 # ----------------------------- Export helpers (profiles/affiliations) -----------------------------
 
-@st.cache_data
-def _prepare_profiles_export_data(_engine: Engine) -> pd.DataFrame:
-    """Helper to generate the DataFrame for profiles export."""
-    with _engine.begin() as conn:
-        rows = conn.execute(sa_text("""
-            SELECT name, email, phone, employee_id, status, first_login_pending
-            FROM faculty_profiles ORDER BY name
-        """)).fetchall()
-        df = pd.DataFrame(rows, columns=["Name", "Email", "Phone", "Employee ID", "Status", "First Login Pending"])
+_FACULTY_CUSTOM_DATA_SQL = """
+    SELECT lower(email), field_name, value
+    FROM faculty_profile_custom_data
+    WHERE lower(email) IN (SELECT value FROM json_each(:ids))
+"""
 
-        custom_fields = _get_custom_profile_fields(conn)
-        active_fields = [f for f in custom_fields if f['is_active']]
-        custom_data_map = _get_all_custom_field_data(conn)
 
+def _active_custom_fields(engine: Engine) -> List[Dict[str, Any]]:
+    with engine.begin() as conn:
+        return [f for f in _get_custom_profile_fields(conn) if f['is_active']]
+
+
+def _prepare_profiles_export_data(engine: Engine, fmt: str = "csv") -> ExportFile:
+    """Stream the profiles export (one row per profile, active custom fields by display name)."""
+    active_fields = _active_custom_fields(engine)
+    base_columns = ["Name", "Email", "Phone", "Employee ID", "Status", "First Login Pending"]
+    columns = list(dict.fromkeys(base_columns + [f['display_name'] for f in active_fields]))
+
+    def _shape(df: pd.DataFrame) -> pd.DataFrame:
         for field in active_fields:
-            field_name = field['field_name']
-            df[field['display_name']] = df['Email'].apply(
-                lambda email: custom_data_map.get(email.lower(), {}).get(field_name, '')
-            )
-    return df
+            df[field['display_name']] = df[f"custom_{field['field_name']}"].fillna('')
+        return df[columns]
+
+    spec = WideExportSpec(
+        page_sql="""
+            SELECT id AS _id, lower(email) AS _email_key,
+                   name AS "Name", email AS "Email", phone AS "Phone",
+                   employee_id AS "Employee ID", status AS "Status",
+                   first_login_pending AS "First Login Pending"
+            FROM faculty_profiles
+            WHERE {after}
+            ORDER BY name, id
+            LIMIT :limit
+        """,
+        keys=[("name", "Name"), ("id", "_id")],
+        custom_sql=_FACULTY_CUSTOM_DATA_SQL,
+        custom_key="_email_key",
+        custom_columns=[f['field_name'] for f in active_fields],
+        custom_prefix="custom_",
+        transform=_shape,
+    )
+    return stream_wide_export(engine, spec, fmt, "faculty_profiles_export")
 
 @st.cache_data
 def _prepare_affiliations_export_data(_engine: Engine, degree: str) -> pd.DataFrame:
@@ -1038,94 +1101,59 @@ def _prepare_affiliations_export_data(_engine: Engine, degree: str) -> pd.DataFr
     ])
     return df
 
-@st.cache_data
-def _prepare_combined_export_data(_engine: Engine) -> pd.DataFrame:
-    """Helper to generate the DataFrame for combined export."""
-    with _engine.begin() as conn:
-        profile_rows = conn.execute(sa_text("""
-            SELECT name, email, phone, employee_id, status, first_login_pending
-            FROM faculty_profiles ORDER BY name
-        """)).fetchall()
-
-        custom_fields = _get_custom_profile_fields(conn)
-        active_fields = [f for f in custom_fields if f['is_active']]
-        custom_data_map = _get_all_custom_field_data(conn)
-
-        affiliation_rows = conn.execute(sa_text("""
-            SELECT email, degree_code, program_code, branch_code, group_code,
-                   designation, type, allowed_credit_override, active
-            FROM faculty_affiliations ORDER BY email, degree_code
-        """)).fetchall()
-
-        profiles_dict: Dict[str, Dict[str, Any]] = {}
-        for row in profile_rows:
-            email = row[1].lower()
-            profiles_dict[email] = {
-                "name": row[0],
-                "email": row[1],
-                "phone": row[2],
-                "employee_id": row[3],
-                "status": row[4],
-                "first_login_pending": row[5]
-            }
-            user_custom_data = custom_data_map.get(email, {})
-            for field in active_fields:
-                profiles_dict[email][field['display_name']] = user_custom_data.get(field['field_name'], '')
-
-        affiliation_map: Dict[str, List[Any]] = defaultdict(list)
-        for aff_row in affiliation_rows:
-            affiliation_map[aff_row[0].lower()].append(aff_row)
-
-        combined_data: List[Dict[str, Any]] = []
-
-        for email, profile_data in profiles_dict.items():
-            if email in affiliation_map:
-                for aff_row in affiliation_map[email]:
-                    combined_row = profile_data.copy()
-                    combined_row.update({
-                        "degree_code": aff_row[1],
-                        "program_code": aff_row[2] or "",
-                        "branch_code": aff_row[3] or "",
-                        "group_code": aff_row[4] or "",
-                        "designation": aff_row[5],
-                        "type": aff_row[6],
-                        "allowed_credit_override": aff_row[7],
-                        "active": aff_row[8]
-                    })
-                    combined_data.append(combined_row)
-            else:
-                combined_data.append(profile_data.copy())
-
-        columns = [
-            "name", "email", "phone", "employee_id", "status", "first_login_pending",
-            "degree_code", "program_code", "branch_code", "group_code",
-            "designation", "type", "allowed_credit_override", "active"
-        ]
-
-        df = pd.DataFrame(combined_data)
+def _prepare_combined_export_data(engine: Engine, fmt: str = "csv") -> ExportFile:
+    """
+    Stream the combined export: one row per affiliation (profiles without
+    affiliations get a single row), then each active custom field as its
+    display name and as custom_<field_name>.
+    """
+    active_fields = _active_custom_fields(engine)
+    columns = [
+        "name", "email", "phone", "employee_id", "status", "first_login_pending",
+        "degree_code", "program_code", "branch_code", "group_code",
+        "designation", "type", "allowed_credit_override", "active"
+    ]
+    for field in active_fields:
+        for column in (field['display_name'], f"custom_{field['field_name']}"):
+            if column not in columns:
+                columns.append(column)
 
-        final_columns = columns.copy()
+    def _shape(df: pd.DataFrame) -> pd.DataFrame:
         for field in active_fields:
-            display_name = field['display_name']
-            field_name = f"custom_{field['field_name']}"
-
-            if display_name not in final_columns:
-                final_columns.append(display_name)
-                df[display_name] = df['email'].map(lambda e: profiles_dict.get(e.lower(), {}).get(display_name, ''))
-
-            if field_name not in final_columns:
-                final_columns.append(field_name)
-                if display_name in df.columns:
-                    df[field_name] = df[display_name]
-                else:
-                    df[field_name] = ''
-
-        for col in final_columns:
-            if col not in df.columns:
-                df[col] = ''
-
-        df = df.reindex(columns=final_columns)
-        return df
+            custom_column = f"custom_{field['field_name']}"
+            df[custom_column] = df[custom_column].fillna('')
+            if field['display_name'] not in df.columns:
+                df[field['display_name']] = df[custom_column]
+        return df.reindex(columns=columns)
+
+    # Profiles are paged in the subquery so all affiliations of a profile share a page
+    spec = WideExportSpec(
+        page_sql="""
+            SELECT p.id AS _id, lower(p.email) AS _email_key,
+                   p.name, p.email, p.phone, p.employee_id, p.status, p.first_login_pending,
+                   a.degree_code,
+                   CASE WHEN a.id IS NOT NULL THEN COALESCE(a.program_code, '') END AS program_code,
+                   CASE WHEN a.id IS NOT NULL THEN COALESCE(a.branch_code, '') END AS branch_code,
+                   CASE WHEN a.id IS NOT NULL THEN COALESCE(a.group_code, '') END AS group_code,
+                   a.designation, a.type, a.allowed_credit_override, a.active
+            FROM (
+                SELECT id, name, email, phone, employee_id, status, first_login_pending
+                FROM faculty_profiles
+                WHERE {after}
+                ORDER BY name, id
+                LIMIT :limit
+            ) p
+            LEFT JOIN faculty_affiliations a ON lower(a.email) = lower(p.email)
+            ORDER BY p.name, p.id, a.degree_code, a.id
+        """,
+        keys=[("name", "name"), ("id", "_id")],
+        custom_sql=_FACULTY_CUSTOM_DATA_SQL,
+        custom_key="_email_key",
+        custom_columns=[f['field_name'] for f in active_fields],
+        custom_prefix="custom_",
+        transform=_shape,
+    )
+    return stream_wide_export(engine, spec, fmt, "faculty_combined_export")
 
 
 # ----------------------------- UI Sections -----------------------------
@@ -1148,12 +1176,17 @@ def _add_import_export_section(engine: Engine, entity_type: str, degree: str):
             template_csv = _export_profiles_template()
             st.download_button("Download Profiles Template", template_csv, "faculty_profiles_template.csv", "text/csv")
 
-            try:
-                export_df = _prepare_profiles_export_data(engine)
-                export_csv = export_df.to_csv(index=False)
-                st.download_button("Export All Profiles", export_csv, "faculty_profiles_export.csv", "text/csv")
-            except Exception as e:
-                st.error(f"Failed to prepare export data: {str(e)}")
+            fmt = st.selectbox("Export format", list(EXPORT_FORMATS), key="faculty_profiles_export_format")
+            if st.button("Prepare Profiles Export", key="prepare_profiles_export"):
+                try:
+                    export = _prepare_profiles_export_data(engine, fmt)
+                    try:
+                        with open(export.path, "rb") as fh:
+                            st.download_button("Export All Profiles", fh, export.file_name, export.mime)
+                    finally:
+                        export.cleanup()
+                except Exception as e:
+                    st.error(f"Failed to prepare export data: {str(e)}")
 
         with col2:
             st.markdown("**Import**")
@@ -1185,6 +1218,7 @@ def _add_import_export_section(engine: Engine, entity_type: str, degree: str):
                         else:
                             st.success(f"✅ Successfully imported {success_count} profiles")
                             st.cache_data.clear() # <-- CACHE CLEAR
+                            invalidate_tables("faculty_profiles")
                             st.rerun()
                     except Exception as e:
                         _handle_error(e, "Import failed.")
@@ -1373,21 +1407,27 @@ def _add_combined_import_export_section(engine: Engine):
 
         with col2:
             st.markdown("**Export Existing Data**")
-            try:
-                export_df = _prepare_combined_export_data(engine)
-                export_csv = export_df.to_csv(index=False)
-                st.download_button(
-                    label="Export All Faculty Data",
-                    data=export_csv,
-                    file_name="faculty_combined_export.csv",
-                    mime="text/csv",
-                    key="download_combined_export_direct"
-                )
-            except Exception as e:
-                st.error(f"Failed to prepare export data: {e}")
+            fmt = st.selectbox("Export format", list(EXPORT_FORMATS), key="faculty_combined_export_format")
+            if st.button("Prepare Faculty Data Export", key="prepare_combined_export"):
+                try:
+                    export = _prepare_combined_export_data(engine, fmt)
+                    try:
+                        with open(export.path, "rb") as fh:
+                            st.download_button(
+                                label="Export All Faculty Data",
+                                data=fh,
+                                file_name=export.file_name,
+                                mime=export.mime,
+                                key="download_combined_export_direct"
+                            )
+                    finally:
+                        export.cleanup()
+                except Exception as e:
+                    st.error(f"Failed to prepare export data: {e}")
 
     # --- 4. File Uploader (Persistent at top) ---
     st.markdown("### 📤 Import Faculty Data")
+    render_import_jobs_panel(engine, "faculty_combined")
     
     up = st.file_uploader("Upload Combined CSV", type="csv", key="combined_uploader")
     
@@ -1694,33 +1734,20 @@ def _add_combined_import_export_section(engine: Engine):
         with col2:
             if st.button("🚀 Execute Import", key="execute_combined", type="primary"):
                 try:
-                    with st.spinner("Executing Import..."):
-                        
+                    with st.spinner("Creating mapped affiliations..."):
                         _apply_creations_from_mappings(engine, selected_degree, mappings)
-                        
-                        # --- NEW: UNPACK SKIPPED ---
-                        errors, success, skipped = _import_combined_with_validation(
-                            engine, df_to_import, dry_run=False, mappings=mappings
-                        )
-                    
-                    if errors:
-                        st.error(f"❌ Import completed with {len(errors)} errors out of {len(df_to_import)} rows")
-                        st.download_button(
-                            "Download Import Errors",
-                            pd.DataFrame(errors).to_csv(index=False),
-                            "combined_import_errors.csv",
-                            "text/csv"
-                        )
-                    else:
-                        st.success(f"✅ Successfully imported {success} record(s)")
-                    
-                    # --- NEW: DISPLAY SKIPPED ---
-                    if skipped:
-                        st.info(f"ℹ️ {len(skipped)} rows were skipped due to your 'Ignore' mapping rules.")
+
+                    # Rows are imported by a background job in committed chunks;
+                    # progress and errors show in the Import Jobs panel.
+                    submit_import_job(
+                        engine, "faculty_combined", df_to_import,
+                        params={"mappings": mappings, "degree_code": selected_degree},
+                        created_by=(st.session_state.get("user") or {}).get("email"),
+                    )
                     
                     # --- NEW: CACHE CLEAR ---
                     st.cache_data.clear()
-                    log.info("Cleared all st.cache_data after successful import.")
+                    log.info("Cleared all st.cache_data after queuing import.")
                     
                     _reset_import_state()
                     st.rerun()
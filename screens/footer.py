@@ -11,6 +11,7 @@ from core.settings import load_settings
 from core.db import get_engine
 from core.forms import tagline, success
 from core.config_store import save, history
+from core.config_snapshot import invalidate as invalidate_snapshot
 # We now import and use the modern security system from policy.py
 from core.policy import require_page, can_edit_page, user_roles
 
@@ -52,6 +53,7 @@ def _save(engine_or_conn, degree: str, cfg: dict) -> None:
         # It's an engine, create a new transaction
         with engine_or_conn.begin() as conn:
             conn.execute(sql, params)
+    invalidate_snapshot(NAMESPACE)
 
 
 # --- DECORATOR HAS BEEN CORRECTED ---
@@ -1,9 +1,11 @@
 from __future__ import annotations
+import pandas as pd
 import streamlit as st
 from sqlalchemy import text
 from core.settings import load_settings
 from core.db import get_engine, init_db, SessionLocal
 from core.forms import tagline, success, warn
+from core.marks_engine import bulk_upsert_marks
 
 def render():
     st.title("Marks Entry (Demo)")
@@ -50,6 +52,23 @@ def render():
             success("Saved!")
             st.rerun()
 
+    with st.expander("Bulk upload (CSV)"):
+        st.caption("Columns: student_id, marks_obtained (optional assignment_code; defaults to the selected assignment)")
+        upload = st.file_uploader("Marks CSV", type=["csv"], key="marks_bulk_csv")
+        if upload is not None and st.button("Upload marks"):
+            df = pd.read_csv(upload, dtype={"student_id": str, "assignment_code": str})
+            if "assignment_code" not in df.columns:
+                df["assignment_code"] = assgn['code']
+            try:
+                written, errors = bulk_upsert_marks(engine, degree_code, df)
+            except ValueError as e:
+                warn(str(e))
+            else:
+                success(f"Saved {written} mark(s).")
+                if errors:
+                    warn(f"{len(errors)} row(s) skipped.")
+                    st.dataframe(pd.DataFrame(errors))
+
     st.subheader("Marks for this assignment")
     with engine.begin() as conn:
         rows = conn.execute(text("""        SELECT student_id, marks_obtained, updated_at
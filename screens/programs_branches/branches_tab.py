@@ -6,6 +6,7 @@ import pandas as pd
 from sqlalchemy import text as sa_text
 from sqlalchemy.exc import IntegrityError
 
+from core.query_cache import invalidate_tables
 from screens.programs_branches.db_helpers import _programs_df, _branches_df, _program_id_by_code, _table_cols
 from screens.programs_branches.audit_helpers import _audit_branch, _request_deletion
 
@@ -166,7 +167,7 @@ def render_branches_tab(engine, degree_sel, deg, dfp, dfb_all, df_approvals,
                             print("------------------------------------------")
                     
                     if success:
-                        st.cache_data.clear()
+                        invalidate_tables("branches")
                         st.rerun()
             
             # Display errors if any
@@ -254,7 +255,7 @@ def render_branches_tab(engine, degree_sel, deg, dfp, dfb_all, df_approvals,
                                 st.error(str(ex))
                             
                             if success:
-                                st.cache_data.clear()
+                                invalidate_tables("branches")
                                 st.rerun()
                     
                     # Delete button
@@ -275,7 +276,7 @@ def render_branches_tab(engine, degree_sel, deg, dfp, dfb_all, df_approvals,
                                     raise error
                             
                             st.success("Delete request submitted.")
-                            st.cache_data.clear()
+                            invalidate_tables("approvals")
                             st.rerun()
                         except Exception as ex:
                             st.error(str(ex))
@@ -6,6 +6,7 @@ import pandas as pd
 from sqlalchemy import text as sa_text
 from sqlalchemy.exc import IntegrityError
 
+from core.query_cache import invalidate_tables
 from screens.programs_branches.audit_helpers import (
     _audit_curriculum_group, 
     _audit_curriculum_group_link,
@@ -67,7 +68,7 @@ def render_curriculum_groups_tab(engine, degree_sel, deg, df_cg, df_cgl,
                     conn.execute(sa_text("DELETE FROM curriculum_group_links WHERE id = :id"), {"id": link_id_to_delete})
                     _audit_curriculum_group_link(conn, "delete", actor, link_row_details, note="Link deleted")
                 st.success(f"Successfully deleted link: {link_to_delete_label}")
-                st.cache_data.clear()
+                invalidate_tables("curriculum_group_links")
                 st.rerun()
             except Exception as ex:
                 st.error(f"Could not delete link: {ex}")
@@ -124,7 +125,7 @@ def render_curriculum_groups_tab(engine, degree_sel, deg, df_cg, df_cgl,
                         print("------------------------------------------")
                 
                 if success:
-                    st.cache_data.clear()
+                    invalidate_tables("curriculum_groups")
                     st.rerun()
         
         # Display errors if any
@@ -191,7 +192,7 @@ def render_curriculum_groups_tab(engine, degree_sel, deg, df_cg, df_cgl,
                             st.error(str(ex))
                         
                         if success:
-                            st.cache_data.clear()
+                            invalidate_tables("curriculum_groups")
                             st.rerun()
                 
                 # Delete button
@@ -212,7 +213,7 @@ def render_curriculum_groups_tab(engine, degree_sel, deg, df_cg, df_cgl,
                                 raise error
                         
                         st.success("Delete request submitted.")
-                        st.cache_data.clear()
+                        invalidate_tables("approvals")
                         st.rerun()
                         
                     except Exception as ex:
@@ -361,7 +362,7 @@ def _render_link_creation_section(engine, degree_sel, deg, df_cg, df_cgl, actor,
                                 st.error(f"Failed to create link. Details: {ex}")
                         
                         if success:
-                            st.cache_data.clear()
+                            invalidate_tables("curriculum_group_links")
                             st.rerun()
     else:
         st.info("Linking is not available. Enable curriculum groups at the Degree, Program, or Branch level on the Degrees page.")
@@ -2,10 +2,11 @@
 Database helper functions for Programs/Branches module
 """
 import pandas as pd
-import streamlit as st
 from sqlalchemy import text as sa_text
 from sqlalchemy.engine import Engine
 
+from core.query_cache import cached_query
+
 
 def _ensure_curriculum_columns(engine: Engine):
     """Ensure the curriculum group columns exist in the degrees table."""
@@ -33,7 +34,7 @@ def _fetch_degree(conn, degree_code: str):
     """), {"c": degree_code}).fetchone()
 
 
-@st.cache_data
+@cached_query("degrees")
 def _degrees_df(_engine: Engine):
     cols = ["code","title","cohort_splitting_mode","roll_number_scope","active","sort_order","logo_file_name"]
     with _engine.begin() as conn:
@@ -47,7 +48,7 @@ def _degrees_df(_engine: Engine):
     return pd.DataFrame([dict(r._mapping) for r in rows], columns=cols)
 
 
-@st.cache_data
+@cached_query("programs")
 def _programs_df(_engine: Engine, degree_filter: str | None = None):
     cols = ["id","program_code","program_name","degree_code","active","sort_order","logo_file_name","description"]
     q = f"SELECT {', '.join(cols)} FROM programs"
@@ -63,7 +64,7 @@ def _programs_df(_engine: Engine, degree_filter: str | None = None):
     return pd.DataFrame([dict(r._mapping) for r in rows], columns=cols)
 
 
-@st.cache_data
+@cached_query(ttl=3600)
 def _table_cols(_engine: Engine, table: str) -> set[str]:
     try:
         with _engine.begin() as conn:
@@ -72,7 +73,7 @@ def _table_cols(_engine: Engine, table: str) -> set[str]:
         return set()
 
 
-@st.cache_data
+@cached_query("branches", "programs")
 def _branches_df(_engine: Engine, degree_filter: str | None = None, program_id: int | None = None):
     """List branches; supports schemas with or without degree_code on branches."""
     bcols = _table_cols(_engine, "branches")
@@ -177,7 +178,7 @@ def _program_id_by_code(conn, degree_code: str, program_code: str) -> int | None
     return int(row.id) if row else None
 
 
-@st.cache_data
+@cached_query("curriculum_groups")
 def _curriculum_groups_df(_engine: Engine, degree_filter: str):
     with _engine.begin() as conn:
         rows = conn.execute(sa_text("""
@@ -189,7 +190,7 @@ def _curriculum_groups_df(_engine: Engine, degree_filter: str):
     return pd.DataFrame([dict(r._mapping) for r in rows]) if rows else pd.DataFrame()
 
 
-@st.cache_data
+@cached_query("curriculum_group_links", "curriculum_groups")
 def _curriculum_group_links_df(_engine: Engine, degree_filter: str):
     with _engine.begin() as conn:
         rows = conn.execute(sa_text("""
@@ -202,7 +203,7 @@ def _curriculum_group_links_df(_engine: Engine, degree_filter: str):
     return pd.DataFrame([dict(r._mapping) for r in rows]) if rows else pd.DataFrame()
 
 
-@st.cache_data
+@cached_query("approvals", ttl=60)
 def _get_approvals_df(_engine: Engine, object_types: list[str]):
     """Fetches approval requests for specific object types."""
     cols = _table_cols(_engine, "approvals")
@@ -6,6 +6,7 @@ import pandas as pd
 from sqlalchemy import text as sa_text
 from sqlalchemy.exc import IntegrityError
 
+from core.query_cache import invalidate_tables
 from screens.programs_branches.db_helpers import _program_id_by_code
 from screens.programs_branches.audit_helpers import _audit_program, _request_deletion
 
@@ -95,7 +96,7 @@ def render_programs_tab(engine, degree_sel, deg, dfp, df_approvals, actor, CAN_E
                         print("------------------------------------------")
                 
                 if success:
-                    st.cache_data.clear()
+                    invalidate_tables("programs")
                     st.rerun()
 
         # Display errors if any
@@ -162,7 +163,7 @@ def render_programs_tab(engine, degree_sel, deg, dfp, df_approvals, actor, CAN_E
                             st.error(str(ex))
                         
                         if success:
-                            st.cache_data.clear()
+                            invalidate_tables("programs")
                             st.rerun()
                 
                 # Delete button
@@ -183,7 +184,7 @@ def render_programs_tab(engine, degree_sel, deg, dfp, df_approvals, actor, CAN_E
                                 raise error
 
                         st.success("Delete request submitted.")
-                        st.cache_data.clear()
+                        invalidate_tables("approvals")
                         st.rerun()
                     except Exception as ex:
                         st.error(str(ex))
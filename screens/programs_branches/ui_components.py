@@ -7,6 +7,7 @@ import pandas as pd
 import streamlit as st
 from sqlalchemy import text as sa_text
 
+from core.query_cache import invalidate_tables
 from .constants import (
     PROGRAM_IMPORT_COLS, BRANCH_IMPORT_COLS,
     CG_IMPORT_COLS, CGL_IMPORT_COLS
@@ -391,7 +392,7 @@ def _handle_program_import(engine, prog_file, degree_sel, actor, dry_run_mode, d
                                    {"d": degree_sel}).fetchone()[0]
                     st.info(f"✅ Verified: {cnt} programs in database for {degree_sel}")
                 
-                st.cache_data.clear()
+                invalidate_tables("programs")
                 st.rerun()
             else:
                 st.info("Import complete: No changes (data identical)")
@@ -439,7 +440,7 @@ def _handle_branch_import(engine, branch_file, degree_sel, actor, BR_HAS_PID, dr
                         """), {"dc": degree_sel}).fetchone()[0]
                     st.info(f"✅ Verified: {cnt} branches in database for {degree_sel}")
                 
-                st.cache_data.clear()
+                invalidate_tables("branches")
                 st.rerun()
             else:
                 st.info("Import complete: No changes (data identical)")
@@ -480,7 +481,7 @@ def _handle_cg_import(engine, cg_file, degree_sel, actor, SHOW_CG, dry_run_mode,
                     """), {"dc": degree_sel}).fetchone()[0]
                     st.info(f"✅ Verified: {cnt} curriculum groups in database for {degree_sel}")
                 
-                st.cache_data.clear()
+                invalidate_tables("curriculum_groups")
                 st.rerun()
             else:
                 st.info("Import complete: No changes (data identical)")
@@ -525,7 +526,7 @@ def _handle_cgl_import(engine, cgl_file, degree_sel, actor, SHOW_CG,
                     st.info(f"✅ Verified: {cnt} curriculum group links in database for {degree_sel}")
                 
                 if st.button("🔄 Refresh to see changes", key="refresh_cgl"):
-                    st.cache_data.clear()
+                    invalidate_tables("curriculum_group_links")
                     st.rerun()
             else:
                 st.info("Import complete: No new links created (all links already exist)")
@@ -12,6 +12,7 @@ from core.settings import load_settings
 from core.db import get_engine
 from core.policy import require_page, can_edit_page, user_roles
 from core.forms import tagline, success, error_box
+from core.query_cache import cached_query, invalidate_tables
 
 # Import service
 try:
@@ -28,7 +29,7 @@ PAGE_TITLE = "📋 Rubrics Management"
 # HELPER FUNCTIONS
 # ===========================================================================
 
-@st.cache_data(ttl=300)
+@cached_query("subject_offerings")
 def fetch_offerings(_engine):
     """Fetch published offerings."""
     with _engine.begin() as conn:
@@ -135,7 +136,7 @@ def render_rubric_config_tab(engine, service: RubricsService, actor: str, can_ed
                                     )
                                     service.publish_rubric(rubric['id'], audit)
                                     success("Rubric published successfully!")
-                                    st.cache_data.clear()
+                                    invalidate_tables("rubric_configs")
                                     st.rerun()
                                 except Exception as e:
                                     st.error(f"Error: {str(e)}")
@@ -158,7 +159,7 @@ def render_rubric_config_tab(engine, service: RubricsService, actor: str, can_ed
                                 )
                                 new_version = service.create_rubric_version(rubric['id'], audit)
                                 success(f"Created version {new_version}")
-                                st.cache_data.clear()
+                                invalidate_tables("rubric_configs")
                                 st.rerun()
                             except Exception as e:
                                 st.error(f"Error: {str(e)}")
@@ -178,7 +179,7 @@ def render_rubric_config_tab(engine, service: RubricsService, actor: str, can_ed
                                     service.lock_rubric(rubric['id'], reason, audit)
                                     success("Rubric locked")
                                     del st.session_state[f'locking_{rubric["id"]}']
-                                    st.cache_data.clear()
+                                    invalidate_tables("rubric_configs")
                                     st.rerun()
                                 except Exception as e:
                                     st.error(f"Error: {str(e)}")
@@ -203,7 +204,7 @@ def render_rubric_config_tab(engine, service: RubricsService, actor: str, can_ed
                                     service.unlock_rubric(rubric['id'], reason, audit)
                                     success("Rubric unlocked")
                                     del st.session_state[f'unlocking_{rubric["id"]}']
-                                    st.cache_data.clear()
+                                    invalidate_tables("rubric_configs")
                                     st.rerun()
                                 except Exception as e:
                                     st.error(f"Error: {str(e)}")
@@ -272,7 +273,7 @@ def render_rubric_config_tab(engine, service: RubricsService, actor: str, can_ed
                     
                     config_id = service.create_rubric_config(config, audit)
                     success(f"Rubric configuration created (ID: {config_id})")
-                    st.cache_data.clear()
+                    invalidate_tables("rubric_configs")
                     st.rerun()
                 
                 except Exception as e:
@@ -403,7 +404,7 @@ def render_assessments_tab(engine, service: RubricsService, actor: str, can_edit
                                     )
                                     service.delete_assessment(assessment['id'], audit)
                                     success("Assessment deleted")
-                                    st.cache_data.clear()
+                                    invalidate_tables("rubric_assessments")
                                     st.rerun()
                                 except Exception as e:
                                     st.error(f"Error: {str(e)}")
@@ -453,7 +454,7 @@ def render_assessments_tab(engine, service: RubricsService, actor: str, can_edit
                         
                         assess_id = service.add_assessment(assessment, audit)
                         success(f"Assessment added (ID: {assess_id})")
-                        st.cache_data.clear()
+                        invalidate_tables("rubric_assessments")
                         st.rerun()
                     
                     except Exception as e:
@@ -601,7 +602,7 @@ def render_criteria_editor_tab(engine, service: RubricsService, actor: str, can_
                                     assessment, criteria_data, audit_entry=audit
                                 )
                                 success("Criteria added successfully")
-                                st.cache_data.clear()
+                                invalidate_tables("rubric_assessment_criteria")
                                 st.rerun()
                             except Exception as e:
                                 st.error(f"Error: {str(e)}")
@@ -689,7 +690,7 @@ def render_criteria_editor_tab(engine, service: RubricsService, actor: str, can_
                                 assessment, levels_data, audit
                             )
                             success("Levels added successfully")
-                            st.cache_data.clear()
+                            invalidate_tables("rubric_assessment_levels")
                             st.rerun()
                         except Exception as e:
                             st.error(f"Error: {str(e)}")
@@ -740,7 +741,7 @@ def render_criteria_catalog_tab(engine, service: RubricsService, actor: str, can
                     try:
                         criterion_id = service.add_catalog_criterion(key, label, description)
                         success(f"Criterion added (ID: {criterion_id})")
-                        st.cache_data.clear()
+                        invalidate_tables("rubric_criteria_catalog")
                         st.rerun()
                     except Exception as e:
                         st.error(f"Error: {str(e)}")
@@ -769,6 +770,28 @@ def render_validation_tab(engine, service: RubricsService, actor: str, can_edit:
         key="val_offering"
     )
 
+    with st.expander("📊 Rubric status across all offerings"):
+        if st.button("Check All Offerings", key="val_all_offerings"):
+            trees = service.get_rubrics_for_offerings([o['id'] for o in offerings])
+            rows = []
+            for offering in offerings:
+                for rubric in trees[offering['id']]:
+                    result = service.validate_rubric_tree(rubric)
+                    rows.append({
+                        'Offering': get_offering_label(offering),
+                        'Scope': rubric['scope'],
+                        'Version': rubric['version'],
+                        'Status': rubric['status'],
+                        'Assessments': len(rubric['assessments']),
+                        'Valid': '✅' if result['is_valid'] else '❌',
+                        'Errors': len(result['errors']),
+                        'Warnings': len(result['warnings']),
+                    })
+                if not trees[offering['id']]:
+                    rows.append({'Offering': get_offering_label(offering), 'Scope': '—',
+                                 'Valid': '—'})
+            st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
     if not offering_id:
         return
 
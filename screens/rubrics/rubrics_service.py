@@ -5,14 +5,88 @@ from typing import List, Dict, Optional, Tuple
 from dataclasses import asdict
 import json
 import logging
+import numpy as np
 from sqlalchemy.engine import Engine
 from sqlalchemy import text as sa_text
 
+from core.attainment_engine import mark_stale, mark_stale_assessments
+from core.marks_engine import normalize
+from core.query_cache import cached_query
+from core.snapshot_store import RUBRIC_VERSIONS, encode_snapshots, load_snapshot
 from screens.subject_cos.base_service import BaseService
 from screens.subject_cos.models import RubricConfig, RubricAssessment, AuditEntry
 
 logger = logging.getLogger(__name__)
 
+RUBRIC_TABLES = (
+    "rubric_configs", "rubric_assessments",
+    "rubric_assessment_criteria", "rubric_assessment_levels",
+)
+
+
+def load_rubric_trees(engine: Engine, offering_ids: Optional[List[int]] = None,
+                      config_ids: Optional[List[int]] = None) -> List[Dict]:
+    """
+    Load complete rubrics (config -> assessments -> criteria/levels) for
+    many offerings or configs in four queries, whatever their size.
+    Trees have the same shape get_rubric() always returned.
+    """
+    if offering_ids is not None:
+        where, ids = "offering_id", offering_ids
+    else:
+        where, ids = "id", config_ids or []
+    if not ids:
+        return []
+
+    with engine.begin() as conn:
+        configs = [dict(r._mapping) for r in conn.execute(sa_text(f"""
+        SELECT * FROM rubric_configs
+        WHERE {where} IN (SELECT value FROM json_each(:ids))
+        ORDER BY offering_id, scope, component_key
+        """), {'ids': json.dumps(list(ids))}).fetchall()]
+        if not configs:
+            return []
+
+        assessments = [dict(r._mapping) for r in conn.execute(sa_text("""
+        SELECT * FROM rubric_assessments
+        WHERE rubric_config_id IN (SELECT value FROM json_each(:ids))
+        ORDER BY rubric_config_id, code
+        """), {'ids': json.dumps([c['id'] for c in configs])}).fetchall()]
+
+        assessment_ids = json.dumps([a['id'] for a in assessments])
+        criteria = conn.execute(sa_text("""
+        SELECT * FROM rubric_assessment_criteria
+        WHERE assessment_id IN (SELECT value FROM json_each(:ids))
+        ORDER BY assessment_id, criterion_key
+        """), {'ids': assessment_ids}).fetchall()
+        levels = conn.execute(sa_text("""
+        SELECT * FROM rubric_assessment_levels
+        WHERE assessment_id IN (SELECT value FROM json_each(:ids))
+        ORDER BY assessment_id, criterion_key, level_sequence
+        """), {'ids': assessment_ids}).fetchall()
+
+    children: Dict[Tuple[str, int], List[Dict]] = {}
+    for kind, rows in (('criteria', criteria), ('levels', levels)):
+        for row in rows:
+            row = dict(row._mapping)
+            children.setdefault((kind, row['assessment_id']), []).append(row)
+
+    by_config: Dict[int, List[Dict]] = {}
+    for assessment in assessments:
+        kind = 'criteria' if assessment['mode'] == 'analytic_points' else 'levels'
+        assessment[kind] = children.get((kind, assessment['id']), [])
+        by_config.setdefault(assessment['rubric_config_id'], []).append(assessment)
+
+    for config in configs:
+        config['assessments'] = by_config.get(config['id'], [])
+    return configs
+
+
+@cached_query(*RUBRIC_TABLES, ttl=300)
+def _offering_rubrics(_engine: Engine, offering_id: int) -> List[Dict]:
+    """Every rubric tree of one offering; RubricsService drops the entry on writes."""
+    return load_rubric_trees(_engine, offering_ids=[offering_id])
+
 
 class RubricsService(BaseService):
     """Complete service for managing rubrics (Slide 21)."""
@@ -53,6 +127,7 @@ class RubricsService(BaseService):
         params['created_by'] = audit_entry.actor_id
         config_id = self._insert(sql, params, audit_entry)
 
+        self._invalidate_rubrics(config.offering_id)
         self._audit_rubric('RUBRIC_CREATED', config_id, config.offering_id, 
                           config.scope, audit_entry)
         logger.info(f"Created rubric config {config_id}")
@@ -90,7 +165,9 @@ class RubricsService(BaseService):
             params['config_id'] = config_id
             params['updated_by'] = audit_entry.actor_id
             self._exec(conn, sql, params)
+            mark_stale(conn, [config['offering_id']])
 
+        self._invalidate_rubrics(config['offering_id'])
         self._audit_rubric('RUBRIC_UPDATED', config_id, config['offering_id'],
                           config['scope'], audit_entry, 
                           changed_fields=json.dumps(list(updates.keys())))
@@ -113,6 +190,7 @@ class RubricsService(BaseService):
             })
 
         config = self.get_rubric_config(config_id)
+        self._invalidate_rubrics(config['offering_id'])
         self._audit_rubric('RUBRIC_LOCKED', config_id, config['offering_id'],
                           config['scope'], audit_entry, note=reason)
         logger.info(f"Locked rubric {config_id}: {reason}")
@@ -138,6 +216,7 @@ class RubricsService(BaseService):
             })
 
         config = self.get_rubric_config(config_id)
+        self._invalidate_rubrics(config['offering_id'])
         self._audit_rubric('RUBRIC_UNLOCKED', config_id, config['offering_id'],
                           config['scope'], audit_entry, note=reason)
         logger.info(f"Unlocked rubric {config_id}: {reason}")
@@ -165,7 +244,9 @@ class RubricsService(BaseService):
                 'config_id': config_id,
                 'updated_by': audit_entry.actor_id
             })
+            mark_stale(conn, [config['offering_id']])
 
+        self._invalidate_rubrics(config['offering_id'])
         self._audit_rubric('RUBRIC_PUBLISHED', config_id, config['offering_id'],
                           config['scope'], audit_entry)
         logger.info(f"Published rubric {config_id}")
@@ -196,6 +277,7 @@ class RubricsService(BaseService):
                 'updated_by': audit_entry.actor_id
             })
 
+        self._invalidate_rubrics(old_config['offering_id'])
         self._audit_rubric('RUBRIC_VERSION_CREATED', config_id, 
                           old_config['offering_id'], old_config['scope'], audit_entry)
         logger.info(f"Created version {new_version} of rubric {config_id}")
@@ -230,6 +312,7 @@ class RubricsService(BaseService):
         )
         """
         assessment_id = self._insert(sql, asdict(assessment), audit_entry)
+        self._invalidate_rubrics(config['offering_id'])
         logger.info(f"Added assessment {assessment.code} (ID: {assessment_id})")
         return assessment_id
 
@@ -237,7 +320,7 @@ class RubricsService(BaseService):
                          audit_entry: AuditEntry) -> bool:
         """Update assessment."""
         assessment = self._fetch_one("""
-        SELECT ra.*, rc.is_locked 
+        SELECT ra.*, rc.is_locked, rc.offering_id
         FROM rubric_assessments ra
         JOIN rubric_configs rc ON ra.rubric_config_id = rc.id
         WHERE ra.id = :id
@@ -264,14 +347,16 @@ class RubricsService(BaseService):
             params = updates.copy()
             params['assessment_id'] = assessment_id
             self._exec(conn, sql, params)
+            mark_stale(conn, [assessment['offering_id']])
 
+        self._invalidate_rubrics(assessment['offering_id'])
         logger.info(f"Updated assessment {assessment_id}")
         return True
 
     def delete_assessment(self, assessment_id: int, audit_entry: AuditEntry) -> bool:
         """Delete assessment."""
         assessment = self._fetch_one("""
-        SELECT ra.*, rc.is_locked 
+        SELECT ra.*, rc.is_locked, rc.offering_id
         FROM rubric_assessments ra
         JOIN rubric_configs rc ON ra.rubric_config_id = rc.id
         WHERE ra.id = :id
@@ -287,7 +372,9 @@ class RubricsService(BaseService):
         
         with self.engine.begin() as conn:
             self._exec(conn, sql, {'assessment_id': assessment_id})
+            mark_stale(conn, [assessment['offering_id']])
 
+        self._invalidate_rubrics(assessment['offering_id'])
         logger.info(f"Deleted assessment {assessment_id}")
         return True
 
@@ -322,7 +409,9 @@ class RubricsService(BaseService):
                     'weight_pct': weight_pct,
                     'linked_cos': cos_json
                 })
+            mark_stale_assessments(conn, [assessment_id])
 
+        self._invalidate_rubrics(assessment_id=assessment_id)
         logger.info(f"Added {len(criteria)} criteria to assessment {assessment_id}")
         return True
 
@@ -341,6 +430,9 @@ class RubricsService(BaseService):
                 'criterion_key': criterion_key,
                 'weight': new_weight
             })
+            mark_stale_assessments(conn, [assessment_id])
+
+        self._invalidate_rubrics(assessment_id=assessment_id)
 
         # Validate total still equals 100
         is_valid, total = self.validate_rubric_weights(assessment_id)
@@ -362,7 +454,9 @@ class RubricsService(BaseService):
                 'assessment_id': assessment_id,
                 'criterion_key': criterion_key
             })
+            mark_stale_assessments(conn, [assessment_id])
 
+        self._invalidate_rubrics(assessment_id=assessment_id)
         logger.info(f"Deleted criterion {criterion_key} from assessment {assessment_id}")
         return True
 
@@ -403,7 +497,9 @@ class RubricsService(BaseService):
                 'criterion_key': criterion_key,
                 'cos_json': json.dumps(co_codes)
             })
+            mark_stale(conn, [assessment['offering_id']])
 
+        self._invalidate_rubrics(assessment['offering_id'])
         logger.info(f"Linked criterion {criterion_key} to COs: {co_codes}")
         return True
 
@@ -450,7 +546,9 @@ class RubricsService(BaseService):
                     'level_sequence': level.get('level_sequence', 0),
                     'linked_cos': cos_json
                 })
+            mark_stale_assessments(conn, [assessment_id])
 
+        self._invalidate_rubrics(assessment_id=assessment_id)
         logger.info(f"Added {len(levels_data)} levels to assessment {assessment_id}")
         return True
 
@@ -469,6 +567,7 @@ class RubricsService(BaseService):
                 'descriptor': new_descriptor
             })
 
+        self._invalidate_rubrics(level_id=level_id)
         return True
 
     # ========================================================================
@@ -484,45 +583,27 @@ class RubricsService(BaseService):
     def get_rubric(self, offering_id: int, scope: str = 'subject',
                   component_key: Optional[str] = None) -> Optional[Dict]:
         """Get complete rubric with assessments."""
-        config = self._fetch_one("""
-        SELECT * FROM rubric_configs
-        WHERE offering_id = :offering_id AND scope = :scope
-        AND (component_key = :component_key OR (component_key IS NULL AND :component_key IS NULL))
-        """, {
-            'offering_id': offering_id,
-            'scope': scope,
-            'component_key': component_key
-        })
+        return next((
+            rubric for rubric in _offering_rubrics(self.engine, offering_id)
+            if rubric['scope'] == scope and rubric['component_key'] == component_key
+        ), None)
 
+    def get_rubric_by_id(self, config_id: int) -> Optional[Dict]:
+        """Get complete rubric with assessments by config ID."""
+        config = self.get_rubric_config(config_id)
         if not config:
             return None
-
-        # Get assessments
-        assessments = self._fetch_all("""
-        SELECT * FROM rubric_assessments
-        WHERE rubric_config_id = :config_id
-        ORDER BY code
-        """, {'config_id': config['id']})
-
-        # Get criteria/levels for each assessment
-        for assessment in assessments:
-            if assessment['mode'] == 'analytic_points':
-                criteria = self._fetch_all("""
-                SELECT * FROM rubric_assessment_criteria
-                WHERE assessment_id = :assessment_id
-                ORDER BY criterion_key
-                """, {'assessment_id': assessment['id']})
-                assessment['criteria'] = criteria
-            else:  # analytic_levels
-                levels = self._fetch_all("""
-                SELECT * FROM rubric_assessment_levels
-                WHERE assessment_id = :assessment_id
-                ORDER BY criterion_key, level_sequence
-                """, {'assessment_id': assessment['id']})
-                assessment['levels'] = levels
-
-        config['assessments'] = assessments
-        return config
+        return next((
+            rubric for rubric in _offering_rubrics(self.engine, config['offering_id'])
+            if rubric['id'] == config_id
+        ), None)
+
+    def get_rubrics_for_offerings(self, offering_ids: List[int]) -> Dict[int, List[Dict]]:
+        """Complete rubrics for many offerings at once (offering_id -> trees)."""
+        result = {offering_id: [] for offering_id in offering_ids}
+        for rubric in load_rubric_trees(self.engine, offering_ids=list(result)):
+            result[rubric['offering_id']].append(rubric)
+        return result
 
     def list_rubrics_for_offering(self, offering_id: int) -> List[Dict]:
         """List all rubrics for an offering."""
@@ -600,12 +681,17 @@ class RubricsService(BaseService):
 
     def validate_rubric_complete(self, config_id: int) -> Dict:
         """Validate rubric is complete and ready to publish."""
-        errors = []
-        warnings = []
-
-        config = self.get_rubric(config_id)
+        # Uncached: the publish gate must see what is in the DB now
+        config = next(iter(load_rubric_trees(self.engine, config_ids=[config_id])), None)
         if not config:
             return {'is_valid': False, 'errors': ['Rubric not found']}
+        return self.validate_rubric_tree(config)
+
+    @staticmethod
+    def validate_rubric_tree(config: Dict) -> Dict:
+        """Validate an already loaded rubric tree (see get_rubrics_for_offerings)."""
+        errors = []
+        warnings = []
 
         # Check has assessments
         if not config.get('assessments'):
@@ -669,13 +755,10 @@ class RubricsService(BaseService):
         if not assessment:
             raise ValueError(f"Assessment {assessment_id} not found")
 
-        raw_max = assessment['max_marks']
-        
-        normalized = {}
-        for student_id, raw_score in raw_scores.items():
-            normalized[student_id] = (raw_score / raw_max) * target_max
-
-        return normalized
+        students = list(raw_scores.keys())
+        values = normalize(np.fromiter(raw_scores.values(), dtype=float, count=len(students)),
+                           assessment['max_marks'], target_max)
+        return dict(zip(students, values.tolist()))
 
     # ========================================================================
     # HELPER METHODS
@@ -689,6 +772,37 @@ class RubricsService(BaseService):
         ]
         return all(k in minor_fields for k in updates.keys())
 
+    def _invalidate_rubrics(self, offering_id: Optional[int] = None,
+                            assessment_id: Optional[int] = None,
+                            level_id: Optional[int] = None):
+        """
+        Drop the cached rubric trees of the offering a write touched.
+        Writes that change attainment inputs (publishing, max marks,
+        criteria, levels, CO links) call mark_stale() in their own
+        transaction instead.
+        """
+        if offering_id is None:
+            if assessment_id is not None:
+                row = self._fetch_one("""
+                SELECT rc.offering_id
+                FROM rubric_assessments ra
+                JOIN rubric_configs rc ON ra.rubric_config_id = rc.id
+                WHERE ra.id = :id
+                """, {'id': assessment_id})
+            else:
+                row = self._fetch_one("""
+                SELECT rc.offering_id
+                FROM rubric_assessment_levels rl
+                JOIN rubric_assessments ra ON rl.assessment_id = ra.id
+                JOIN rubric_configs rc ON ra.rubric_config_id = rc.id
+                WHERE rl.id = :id
+                """, {'id': level_id})
+            if not row:
+                _offering_rubrics.clear()
+                return
+            offering_id = row['offering_id']
+        _offering_rubrics.invalidate(self.engine, offering_id)
+
     def _audit_rubric(self, action: str, config_id: int, offering_id: int,
                      scope: str, audit_entry: AuditEntry, note: str = None,
                      changed_fields: str = None):
@@ -719,8 +833,10 @@ class RubricsService(BaseService):
 
     def _create_version_snapshot(self, config_id: int, reason: str, 
                                 audit_entry: AuditEntry):
-        """Create version snapshot."""
-        rubric_data = self.get_rubric(config_id)
+        """Create version snapshot (stored as a delta against the last full version)."""
+        rubric_data = next(iter(load_rubric_trees(self.engine, config_ids=[config_id])), None)
+        if not rubric_data:
+            raise ValueError(f"Rubric config {config_id} not found")
         
         with self.engine.begin() as conn:
             self._exec(conn, """
@@ -733,6 +849,17 @@ class RubricsService(BaseService):
                 'config_id': config_id,
                 'reason': reason,
                 'actor': audit_entry.actor_id,
-                'data': json.dumps(rubric_data),
+                'data': encode_snapshots(conn, RUBRIC_VERSIONS, {config_id: rubric_data})[config_id],
                 'version': rubric_data['version']
             })
+
+    def get_version_snapshot(self, config_id: int, version_number: int) -> Optional[Dict]:
+        """Rebuild the rubric tree saved when the given version was superseded."""
+        with self.engine.begin() as conn:
+            row = self._exec(conn, """
+            SELECT id FROM version_snapshots
+            WHERE entity_type = 'rubric_config' AND entity_id = :config_id
+            AND version_number = :version
+            ORDER BY id DESC LIMIT 1
+            """, {'config_id': config_id, 'version': version_number}).fetchone()
+            return load_snapshot(conn, RUBRIC_VERSIONS, row[0]) if row else None
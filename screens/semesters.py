@@ -8,6 +8,7 @@ from core.policy import require_page, can_edit_page
 from core.policy import can_view_page
 from core.theme_toggle import render_theme_toggle
 from core.settings import load_settings
+from core.semester_structure import sync_semesters
 
 PAGE_KEY = "Semesters"
 
@@ -202,109 +203,11 @@ def _has_child_semesters(conn, degree_code, target, key):
         """), {"k": key}).fetchone()
         return bool(row)
 
-# REFACTOR: Function updated to support rebuilding a single target (program/branch)
-# or all semesters for the degree.
+# Rebuilds a single target (program/branch/degree) or, with no target_id, the
+# whole degree. Rows are diffed in place (core.semester_structure) so
+# unchanged semesters keep their ids.
 def _rebuild_semesters(conn, degree_code, binding_mode, label_mode, target_id=None):
-    params = {"dc": degree_code}
-    
-    # clear existing for degree
-    if binding_mode == "program" and target_id:
-        conn.execute(sa_text("DELETE FROM semesters WHERE program_id=:tid"), {"tid": target_id})
-    elif binding_mode == "branch" and target_id:
-        conn.execute(sa_text("DELETE FROM semesters WHERE branch_id=:tid"), {"tid": target_id})
-    elif binding_mode == "degree" and target_id: # target_id will be degree_code
-        conn.execute(sa_text("DELETE FROM semesters WHERE degree_code=:dc AND program_id IS NULL AND branch_id IS NULL"), {"dc": degree_code})
-    elif not target_id: # "Rebuild All" quick action
-        conn.execute(sa_text("DELETE FROM semesters WHERE degree_code=:dc"), {"dc": degree_code})
-
-    def label(y, t, n):
-        if label_mode == "year_term":
-            return f"Year {y} • Term {t}"
-        else:
-            return f"Semester {n}"
-
-    if binding_mode == "degree":
-        row = conn.execute(sa_text("""
-            SELECT years, terms_per_year FROM degree_semester_struct WHERE degree_code=:dc
-        """), {"dc": degree_code}).fetchone()
-        if not row:
-            return 0
-        years, tpy = int(row[0]), int(row[1])
-        n = 0
-        for y in range(1, years+1):
-            for t in range(1, tpy+1):
-                n += 1
-                conn.execute(sa_text("""
-                    INSERT INTO semesters(degree_code, year_index, term_index, semester_number, label, active)
-                    VALUES(:dc, :y, :t, :n, :lbl, 1)
-                """), {"dc": degree_code, "y": y, "t": t, "n": n, "lbl": label(y,t,n)})
-        return n
-
-    if binding_mode == "program":
-        sql = """
-            SELECT p.id, s.years, s.terms_per_year
-              FROM programs p
-         LEFT JOIN program_semester_struct s ON s.program_id=p.id
-             WHERE lower(p.degree_code)=lower(:dc)
-        """
-        if target_id:
-            sql += " AND p.id = :tid"
-            params["tid"] = target_id
-            
-        prows = conn.execute(sa_text(sql), params).fetchall()
-        total = 0
-        for pid, years, tpy in prows:
-            if years is None or tpy is None:
-                continue
-            n = 0
-            for y in range(1, int(years)+1):
-                for t in range(1, int(tpy)+1):
-                    n += 1
-                    total += 1
-                    conn.execute(sa_text("""
-                        INSERT INTO semesters(degree_code, program_id, year_index, term_index, semester_number, label, active)
-                        VALUES(:dc, :pid, :y, :t, :n, :lbl, 1)
-                    """), {"dc": degree_code, "pid": pid, "y": y, "t": t, "n": n, "lbl": label(y,t,n)})
-        return total
-
-    if binding_mode == "branch":
-        b_has_deg = _has_column(conn, "branches", "degree_code")
-        if b_has_deg:
-            sql = """
-                SELECT b.id, s.years, s.terms_per_year
-                  FROM branches b
-             LEFT JOIN branch_semester_struct s ON s.branch_id=b.id
-                 WHERE lower(b.degree_code)=lower(:dc)
-            """
-        else:
-            sql = """
-                SELECT b.id, s.years, s.terms_per_year
-                  FROM branches b
-                  JOIN programs p ON p.id = b.program_id
-             LEFT JOIN branch_semester_struct s ON s.branch_id=b.id
-                 WHERE lower(p.degree_code)=lower(:dc)
-            """
-        
-        if target_id:
-            sql += " AND b.id = :tid"
-            params["tid"] = target_id
-            
-        brows = conn.execute(sa_text(sql), params).fetchall()
-        
-        total = 0
-        for bid, years, tpy in brows:
-            if years is None or tpy is None:
-                continue
-            n = 0
-            for y in range(1, int(years)+1):
-                for t in range(1, int(tpy)+1):
-                    n += 1
-                    total += 1
-                    conn.execute(sa_text("""
-                        INSERT INTO semesters(degree_code, branch_id, year_index, term_index, semester_number, label, active)
-                        VALUES(:dc, :bid, :y, :t, :n, :lbl, 1)
-                    """), {"dc": degree_code, "bid": bid, "y": y, "t": t, "n": n, "lbl": label(y,t,n)})
-        return total
+    return sync_semesters(conn, degree_code, binding_mode, label_mode, target_id=target_id)["total"]
 
 # Structure helpers
 def _get_degree_struct(conn, degree_code: str) -> tuple | None:
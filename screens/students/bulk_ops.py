@@ -9,6 +9,7 @@
 import streamlit as st
 from sqlalchemy.engine import Engine
 from sqlalchemy import text as sa_text
+from core.query_cache import invalidate_tables
 
 from screens.students.importer import (
     _add_student_import_export_section,
@@ -288,6 +289,7 @@ def _add_division_mover_section(engine: Engine):
             
             st.success(f"✅ Successfully moved {len(selected_students)} student(s) to division {to_division}")
             st.cache_data.clear()
+            invalidate_tables("student_enrollments")
             
             # Clear session state
             if "divmover_students" in st.session_state:
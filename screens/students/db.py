@@ -9,13 +9,15 @@
 
 from __future__ import annotations
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set, Tuple
 import pandas as pd
 import streamlit as st
 from sqlalchemy.engine import Engine, Connection
 from sqlalchemy import text as sa_text
 import logging
 
+from core.usernames import UsernameAllocator, allocate_username
+
 ...
 # --- Batch & Year Helpers -----------------------------------------------------
 
@@ -85,14 +87,12 @@ def _db_get_years_for_degree(_conn: Connection, degree_code: str) -> List[int]:
 # --- Student Credentials Helpers ---------------------------------------------
 
 
-def _generate_student_username(conn: Connection, full_name: str, student_id: str) -> str:
+def _student_username_base(full_name: str, student_id: str) -> str:
     """
-    Generate a simple username based on student name and id.
-
-    This is intentionally simple: first part of the name + last 4 digits of id.
+    First part of the name + last 4 digits of the id.
     You can replace this later with the Slide 13 pattern.
     """
-    if not full_name:
+    if not full_name or not full_name.strip():
         base = "student"
     else:
         base = full_name.strip().split()[0].lower()
@@ -103,22 +103,26 @@ def _generate_student_username(conn: Connection, full_name: str, student_id: str
     elif student_id:
         suffix = student_id
 
-    username = f"{base}{suffix}".lower()
+    return f"{base}{suffix}".lower()
 
-    # Ensure uniqueness by appending a counter if needed
-    counter = 0
-    candidate = username
-    while True:
-        row = conn.execute(
-            sa_text("SELECT 1 FROM student_profiles WHERE lower(username)=lower(:u)"),
-            {"u": candidate},
-        ).fetchone()
-        if not row:
-            break
-        counter += 1
-        candidate = f"{username}{counter}"
 
-    return candidate
+def _generate_student_username(
+    conn: Connection,
+    full_name: str,
+    student_id: str,
+    reserved: Optional[Set[str]] = None,
+) -> str:
+    """
+    Generate a unique username based on student name and id; a counter is
+    appended when the name is taken (amit1234, amit12341, ...).
+
+    reserved holds lowercase usernames handed out earlier in the same batch
+    but not written yet; they are skipped like existing ones. For many
+    students use a UsernameAllocator (see _ensure_student_creds_bulk).
+    """
+    return allocate_username(
+        conn, "student_profiles", _student_username_base(full_name, student_id), reserved=reserved
+    )
 
 
 def _initial_student_password_from_name(full_name: str, student_id: str) -> str:
@@ -201,15 +205,95 @@ def _ensure_student_username_and_initial_creds(
         pass
 
 
-@st.cache_data
-def _get_student_credentials_to_export(_engine: Engine) -> pd.DataFrame:
+def _ensure_student_creds_bulk(
+    conn: Connection,
+    students: List[Tuple[int, str, str]],
+) -> None:
+    """
+    Bulk version of _ensure_student_username_and_initial_creds.
+
+    students: (student_profile_id, full_name, student_id) tuples.
+    Existing usernames and credential rows are read in one query each;
+    missing ones are written with executemany.
+    """
+    if not students:
+        return
+
+    ids = sorted({int(pid) for pid, _, _ in students})
+    usernames: Dict[int, Optional[str]] = {}
+    has_creds: Set[int] = set()
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        params = {f"p{i}": pid for i, pid in enumerate(chunk)}
+        placeholders = ", ".join(f":p{i}" for i in range(len(chunk)))
+        for pid, username in conn.execute(sa_text(
+            f"SELECT id, username FROM student_profiles WHERE id IN ({placeholders})"
+        ), params).fetchall():
+            usernames[int(pid)] = username
+        has_creds.update(int(r[0]) for r in conn.execute(sa_text(
+            f"SELECT student_profile_id FROM student_initial_credentials WHERE student_profile_id IN ({placeholders})"
+        ), params).fetchall())
+
+    # One query reserves usernames for every student still missing one
+    allocator = UsernameAllocator(conn, "student_profiles")
+    allocator.prefetch(
+        _student_username_base(full_name, student_id)
+        for pid, full_name, student_id in students
+        if int(pid) in usernames and not usernames[int(pid)]
+    )
+    username_updates: List[Dict[str, Any]] = []
+    cred_inserts: List[Dict[str, Any]] = []
+    seen: Set[int] = set()
+
+    for pid, full_name, student_id in students:
+        pid = int(pid)
+        if pid in seen or pid not in usernames:
+            continue
+        seen.add(pid)
+
+        username = usernames[pid]
+        if not username:
+            username = allocator.allocate(_student_username_base(full_name, student_id))
+            username_updates.append({"u": username, "id": pid})
+
+        if pid not in has_creds:
+            cred_inserts.append({
+                "sid": pid,
+                "username": username,
+                "plaintext": _initial_student_password_from_name(full_name, student_id),
+            })
+
+    if username_updates:
+        conn.execute(
+            sa_text(
+                "UPDATE student_profiles SET username = :u, updated_at = CURRENT_TIMESTAMP WHERE id = :id"
+            ),
+            username_updates,
+        )
+    if cred_inserts:
+        conn.execute(
+            sa_text(
+                """
+                INSERT INTO student_initial_credentials
+                    (student_profile_id, username, plaintext, consumed)
+                VALUES
+                    (:sid, :username, :plaintext, 0)
+            """
+            ),
+            cred_inserts,
+        )
+
+
+def _get_student_credentials_to_export(engine: Engine) -> pd.DataFrame:
     """
     Fetches all student credentials marked for export.
-    
-    NOTE: The _engine parameter uses leading underscore to prevent Streamlit
-    from trying to hash it (SQLAlchemy Engine objects are not hashable).
+
+    NOTE: Deliberately not cached. The result holds plaintext initial
+    passwords, and st.cache_data would keep them in process memory (shared
+    across sessions) with no expiry, and keep serving them after they were
+    consumed.
     """
-    with _engine.begin() as conn:
+    with engine.begin() as conn:
         rows = conn.execute(sa_text("""
             SELECT 
                 c.id AS cred_id,
@@ -30,10 +30,13 @@ import re
 # Import common helpers
 from screens.faculty.utils import _safe_int_convert, _handle_error
 from screens.faculty.db import _active_degrees
+from core.import_jobs import register_import_handler, submit_import_job, render_import_jobs_panel
+from core.query_cache import invalidate_tables
+from core.wide_export import EXPORT_FORMATS, ExportFile, WideExportSpec, stream_wide_export
 
 # Import from student db.py file
 from screens.students.db import (
-    _ensure_student_username_and_initial_creds,
+    _ensure_student_creds_bulk,
     _get_student_credentials_to_export,
     _get_existing_enrollment_data,
     _db_get_batches_for_degree,
@@ -743,6 +746,7 @@ def _show_no_degrees_help(engine: Engine, context: str = "student operations"):
                             
                             st.success(f"✅ Created degree: **{degree_code}** ({duration} years)")
                             st.cache_data.clear()
+                            invalidate_tables("degrees", "degree_semester_struct", "batch_year_scaffold")
                             st.balloons()
                             st.rerun()
                 except Exception as e:
@@ -752,6 +756,417 @@ def _show_no_degrees_help(engine: Engine, context: str = "student operations"):
     return False
 
 
+# ------------------------------------------------------------------
+# Batch Import Pipeline: prefetch -> validate (vectorised) -> apply (bulk)
+# ------------------------------------------------------------------
+
+_IMPORT_SETTING_DEFAULTS = {
+    "email_edu_enabled": "True",
+    "email_edu_domain": "college.edu",
+    "roll_derivation_mode": "hybrid",
+    "roll_year_from_first4": "True",
+    "div_enabled": "True",
+    "div_import_optional": "True",
+}
+
+_IN_CHUNK = 500
+
+
+@dataclass
+class StudentImportContext:
+    """Reference data for one import, loaded once before validation."""
+    degrees: Set[str] = field(default_factory=set)
+    valid_years: Dict[str, List[int]] = field(default_factory=dict)
+    batches: Set[Tuple[str, str]] = field(default_factory=set)
+    divisions: Set[Tuple[str, str, str, str]] = field(default_factory=set)
+    settings: Dict[str, Any] = field(default_factory=dict)
+    custom_fields: Set[str] = field(default_factory=set)
+    # student_id -> profile id
+    profiles: Dict[str, int] = field(default_factory=dict)
+    # (profile id, degree_code) -> enrollment id
+    enrollments: Dict[Tuple[int, str], int] = field(default_factory=dict)
+    # (student_id, degree_code) -> roll on the enrollment the import updates
+    current_rolls: Dict[Tuple[str, str], Optional[str]] = field(default_factory=dict)
+    # roll_number -> student_ids already holding it
+    roll_owners: Dict[str, Set[str]] = field(default_factory=dict)
+    # (degree_code, batch, 4-digit year prefix) -> highest roll suffix in use
+    roll_counters: Dict[Tuple[str, str, str], int] = field(default_factory=dict)
+
+
+def _in_chunks(values: List[Any]):
+    """Yield (placeholders, params) for IN (...) lists of bounded size."""
+    values = list(values)
+    for start in range(0, len(values), _IN_CHUNK):
+        chunk = values[start:start + _IN_CHUNK]
+        params = {f"v{i}": v for i, v in enumerate(chunk)}
+        yield ", ".join(f":v{i}" for i in range(len(chunk))), params
+
+
+def _str_col(df: pd.DataFrame, col: str) -> pd.Series:
+    """Column as stripped strings, '' if absent (same as str(row.get(col, '')).strip())."""
+    if col not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    return df[col].map(lambda v: str(v).strip())
+
+
+def _opt_str_col(df: pd.DataFrame, col: str) -> pd.Series:
+    """Stripped strings with '' as None (same as str(row.get(col, '')).strip() or None)."""
+    return pd.Series([v or None for v in _str_col(df, col)], index=df.index, dtype=object)
+
+
+def _raw_col(df: pd.DataFrame, col: str, default: Any = None) -> pd.Series:
+    """Column values with NaN as None, default if absent."""
+    if col not in df.columns:
+        return pd.Series(default, index=df.index, dtype=object)
+    return df[col].astype(object).where(df[col].notna(), None)
+
+
+def _prefetch_student_import_context(conn: Connection, df: pd.DataFrame) -> StudentImportContext:
+    """Load every lookup the import needs in a fixed number of queries."""
+    ctx = StudentImportContext()
+    ctx.degrees = set(_active_degrees(conn))
+    ctx.custom_fields = {
+        row[0] for row in conn.execute(sa_text(
+            "SELECT code FROM student_custom_profile_fields WHERE active = 1"
+        )).fetchall()
+    }
+    ctx.settings = {key: _get_setting(conn, key, default) for key, default in _IMPORT_SETTING_DEFAULTS.items()}
+
+    degrees = sorted(set(_str_col(df, 'degree_code')) & ctx.degrees)
+    for degree in degrees:
+        ctx.valid_years[degree] = _get_valid_years_for_degree(conn, degree)
+
+    for placeholders, params in _in_chunks(degrees):
+        ctx.batches.update(
+            (r[0], r[1]) for r in conn.execute(sa_text(
+                f"SELECT degree_code, batch_code FROM degree_batches WHERE degree_code IN ({placeholders})"
+            ), params).fetchall()
+        )
+        # Legacy batches that only exist on enrollments
+        ctx.batches.update(
+            (r[0], r[1]) for r in conn.execute(sa_text(
+                f"SELECT DISTINCT degree_code, batch FROM student_enrollments WHERE degree_code IN ({placeholders})"
+            ), params).fetchall()
+        )
+        ctx.divisions.update(
+            (r[0], r[1], str(r[2]), r[3]) for r in conn.execute(sa_text(f"""
+                SELECT degree_code, batch, current_year, division_code
+                  FROM division_master
+                 WHERE active = 1 AND degree_code IN ({placeholders})
+            """), params).fetchall()
+        )
+        for degree, batch, prefix, max_roll in conn.execute(sa_text(f"""
+            SELECT degree_code, batch, SUBSTR(roll_number, 1, 4), MAX(CAST(SUBSTR(roll_number, -4) AS INTEGER))
+              FROM student_enrollments
+             WHERE degree_code IN ({placeholders})
+               AND LENGTH(roll_number) = 8
+             GROUP BY degree_code, batch, SUBSTR(roll_number, 1, 4)
+        """), params).fetchall():
+            ctx.roll_counters[(degree, batch, prefix)] = int(max_roll or 0)
+
+    student_ids = sorted(set(_str_col(df, 'student_id')) - {''})
+    for placeholders, params in _in_chunks(student_ids):
+        for pid, sid in conn.execute(sa_text(
+            f"SELECT id, student_id FROM student_profiles WHERE student_id IN ({placeholders})"
+        ), params).fetchall():
+            ctx.profiles[sid] = int(pid)
+
+    sid_by_pid = {pid: sid for sid, pid in ctx.profiles.items()}
+    for placeholders, params in _in_chunks(sorted(sid_by_pid)):
+        for eid, pid, degree, roll in conn.execute(sa_text(f"""
+            SELECT id, student_profile_id, degree_code, roll_number
+              FROM student_enrollments
+             WHERE student_profile_id IN ({placeholders})
+             ORDER BY id
+        """), params).fetchall():
+            if (int(pid), degree) not in ctx.enrollments:
+                ctx.enrollments[(int(pid), degree)] = int(eid)
+                ctx.current_rolls[(sid_by_pid[int(pid)], degree)] = roll
+
+    rolls = sorted(set(_str_col(df, 'roll_number')) - {''})
+    for placeholders, params in _in_chunks(rolls):
+        for roll, sid in conn.execute(sa_text(f"""
+            SELECT e.roll_number, p.student_id
+              FROM student_enrollments e
+              JOIN student_profiles p ON p.id = e.student_profile_id
+             WHERE e.roll_number IN ({placeholders})
+        """), params).fetchall():
+            ctx.roll_owners.setdefault(roll, set()).add(sid)
+
+    return ctx
+
+
+def _email_errors(emails: pd.Series, years: pd.Series, ctx: StudentImportContext) -> pd.Series:
+    """Vectorised _validate_email_for_year; returns '' where valid."""
+    errors = pd.Series("", index=emails.index, dtype=object)
+    bad_format = (emails == "") | ~emails.str.contains("@", regex=False)
+    errors[bad_format] = "Invalid email format"
+
+    if ctx.settings["email_edu_enabled"] == "True":
+        domains = [d.strip().lower() for d in str(ctx.settings["email_edu_domain"]).split(",")]
+        lowered = emails.str.lower()
+        is_edu = pd.Series(False, index=emails.index)
+        for domain in domains:
+            is_edu |= lowered.str.endswith(f"@{domain}") | lowered.str.endswith(f".{domain}")
+        needs_edu = ~bad_format & (years >= 2) & ~is_edu
+        errors[needs_edu] = years[needs_edu].map(
+            lambda y: f"Year {y} students require .edu email (allowed: {', '.join(domains)})"
+        )
+    return errors
+
+
+def _roll_year_error(roll: str, year_from_first4: bool) -> Optional[str]:
+    if year_from_first4 and len(roll) >= 4:
+        try:
+            extracted_year = int(roll[:4])
+            if not (2000 <= extracted_year <= 2100):
+                return f"Invalid year in roll number: {extracted_year}"
+        except ValueError:
+            log.warning(f"Roll number {roll} doesn't start with 4-digit year")
+    return None
+
+
+def _validate_student_rows(
+    df: pd.DataFrame,
+    ctx: StudentImportContext,
+    translation_map: Dict[str, Dict[str, str]],
+) -> Tuple[pd.DataFrame, List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Validate the whole frame against the prefetched context.
+
+    Checks run in the same order as the old row-by-row import, so each row
+    reports the same first error. Returns (valid rows, errors, skipped).
+    """
+    v = pd.DataFrame(index=df.index)
+    v['row'] = df.index + 2
+    v['email'] = _str_col(df, 'email').str.lower()
+    v['student_id'] = _str_col(df, 'student_id')
+    v['name'] = _str_col(df, 'name')
+    v['degree_code'] = _str_col(df, 'degree_code')
+    v['batch'] = _str_col(df, 'batch')
+    v['current_year'] = _str_col(df, 'current_year')
+    v['roll_number'] = _str_col(df, 'roll_number')
+    v['program_code'] = _opt_str_col(df, 'program_code')
+    v['branch_code'] = _opt_str_col(df, 'branch_code')
+    v['division_code'] = _opt_str_col(df, 'division_code')
+    v['error'] = ""
+    v['skip'] = False
+
+    def _fail(mask: pd.Series, message) -> None:
+        mask = mask & (v['error'] == "") & ~v['skip']
+        if mask.any():
+            v.loc[mask, 'error'] = message if isinstance(message, str) else message[mask]
+
+    _fail((v['name'] == "") | (v['email'] == "") | (v['student_id'] == ""),
+          "Missing required fields: name, email, student_id")
+    _fail(v['degree_code'] == "", "Missing degree_code")
+    _fail(~v['degree_code'].isin(ctx.degrees), v['degree_code'].map(lambda d: f"Degree '{d}' not found"))
+    _fail((v['batch'] == "") | (v['current_year'] == ""), "Missing batch or year")
+
+    year_int = pd.to_numeric(v['current_year'].where(v['current_year'].str.fullmatch(r"[+-]?\d+"), None),
+                             errors='coerce')
+    _fail(year_int.isna(), v['current_year'].map(lambda y: f"Invalid year value: {y}"))
+    v['year_int'] = year_int.fillna(0).astype(int)
+
+    def _year_error(row) -> str:
+        valid = ctx.valid_years.get(row.degree_code) or []
+        if valid and row.year_int not in valid:
+            return f"Year {row.year_int} is outside degree duration (valid: {valid})"
+        return ""
+    pending = (v['error'] == "")
+    if pending.any():
+        year_errors = v[pending].apply(_year_error, axis=1)
+        _fail(pending & (year_errors.reindex(v.index).fillna("") != ""), year_errors.reindex(v.index).fillna(""))
+
+    batch_map = translation_map.get('batch', {})
+    year_map = translation_map.get('year', {})
+    v['mapped_batch'] = v['batch'].map(lambda b: batch_map.get(b, b))
+    v['mapped_year'] = v['current_year'].map(lambda y: year_map.get(y, y))
+    ignored = (v['error'] == "") & ((v['mapped_batch'] == "[IGNORE]") | (v['mapped_year'] == "[IGNORE]"))
+    v.loc[ignored, 'skip'] = True
+
+    email_errors = _email_errors(v['email'], v['year_int'], ctx)
+    _fail(email_errors != "", email_errors.map(lambda e: f"Email validation failed: {e}"))
+
+    batch_known = pd.Series(
+        [(d, b) in ctx.batches for d, b in zip(v['degree_code'], v['mapped_batch'])], index=v.index
+    )
+    div_missing = pd.Series(False, index=v.index)
+    if ctx.settings["div_enabled"] == "True":
+        div_missing = pd.Series(
+            [
+                div is not None and (d, b, str(y), div) not in ctx.divisions
+                for d, b, y, div in zip(v['degree_code'], v['mapped_batch'], v['mapped_year'], v['division_code'])
+            ],
+            index=v.index,
+        )
+    div_optional = ctx.settings["div_import_optional"] == "True"
+    blocked = ~batch_known | (div_missing & (not div_optional))
+
+    # Roll numbers depend on earlier rows (uniqueness, batch counters), so this
+    # step walks the remaining rows in file order, in memory only. Rows that
+    # will fail a later check do not reserve a roll.
+    year_from_first4 = ctx.settings["roll_year_from_first4"] == "True"
+    manual_rolls = ctx.settings["roll_derivation_mode"] == "manual"
+    roll_owners = {roll: set(owners) for roll, owners in ctx.roll_owners.items()}
+    counters = dict(ctx.roll_counters)
+    current_rolls = dict(ctx.current_rolls)
+    final_rolls = pd.Series(None, index=v.index, dtype=object)
+
+    for idx, row in v[(v['error'] == "") & ~v['skip']].iterrows():
+        provided = row['roll_number']
+        if provided:
+            error = _roll_year_error(provided, year_from_first4)
+            if error is None and roll_owners.get(provided, set()) - {row['student_id']}:
+                error = f"Roll number '{provided}' already assigned to another student"
+            if error:
+                v.at[idx, 'error'] = f"Roll number validation failed: {error}"
+                continue
+            roll = provided
+        elif row['year_int'] == 1:
+            roll = None
+            year_match = re.search(r'(\d{4})', row['mapped_batch']) if not manual_rolls else None
+            if year_match:
+                key = (row['degree_code'], row['mapped_batch'], year_match.group(1))
+                roll = f"{year_match.group(1)}{counters.get(key, 0) + 1:04d}"
+            if not roll:
+                roll = row['student_id']
+                log.warning(f"Roll generation failed for {row['student_id']}, using student_id")
+        else:
+            roll = row['student_id']
+
+        if blocked[idx]:
+            continue
+        final_rolls[idx] = roll
+        # Re-importing a student replaces the roll on their enrollment
+        enrollment_key = (row['student_id'], row['degree_code'])
+        previous = current_rolls.get(enrollment_key)
+        if previous and previous != roll and previous in roll_owners:
+            roll_owners[previous].discard(row['student_id'])
+        current_rolls[enrollment_key] = roll
+        roll_owners.setdefault(roll, set()).add(row['student_id'])
+        if len(roll) == 8 and roll[-4:].isdigit():
+            key = (row['degree_code'], row['mapped_batch'], roll[:4])
+            counters[key] = max(counters.get(key, 0), int(roll[-4:]))
+    v['final_roll'] = final_rolls
+
+    _fail(~batch_known, v['mapped_batch'].map(lambda b: f"Batch '{b}' does not exist. Create it first."))
+    if div_optional:
+        v.loc[div_missing & (v['error'] == "") & ~v['skip'], 'division_code'] = None
+    else:
+        _fail(div_missing, v.apply(
+            lambda r: f"Division '{r['division_code']}' not found for "
+                      f"{r['degree_code']}/{r['mapped_batch']}/Year {r['mapped_year']}",
+            axis=1,
+        ))
+
+    errors = v.loc[v['error'] != "", ['row', 'email', 'error']].to_dict('records')
+    skipped = [
+        {"row": r, "email": e, "reason": "Ignored by mapping"}
+        for r, e in zip(v.loc[v['skip'], 'row'], v.loc[v['skip'], 'email'])
+    ]
+    valid = v[(v['error'] == "") & ~v['skip']].copy()
+    valid['phone'] = _raw_col(df, 'phone')
+    valid['status'] = _raw_col(df, 'status', 'Good')
+    valid['enrollment_status'] = _raw_col(df, 'enrollment_status', 'active')
+    for field_code in ctx.custom_fields:
+        if field_code in df.columns:
+            valid[f"custom__{field_code}"] = _raw_col(df, field_code)
+    return valid, errors, skipped
+
+
+def _apply_student_rows(conn: Connection, valid: pd.DataFrame, ctx: StudentImportContext) -> None:
+    """Write validated rows: profiles, credentials, enrollments, custom fields."""
+    if valid.empty:
+        return
+
+    # Later rows for the same student win, as they did row by row
+    profiles = valid.drop_duplicates('student_id', keep='last')
+    profile_params = [
+        {"name": r.name, "email": r.email, "sid": r.student_id, "phone": r.phone, "status": r.status,
+         "id": ctx.profiles.get(r.student_id)}
+        for r in profiles.itertuples(index=False)
+    ]
+    new_profiles = [p for p in profile_params if p["id"] is None]
+    old_profiles = [p for p in profile_params if p["id"] is not None]
+
+    if old_profiles:
+        conn.execute(sa_text("""
+            UPDATE student_profiles
+            SET name = :name, email = :email, phone = :phone, status = :status, updated_at = CURRENT_TIMESTAMP
+            WHERE id = :id
+        """), old_profiles)
+    if new_profiles:
+        conn.execute(sa_text("""
+            INSERT INTO student_profiles (name, email, student_id, phone, status)
+            VALUES (:name, :email, :sid, :phone, :status)
+        """), new_profiles)
+        for placeholders, params in _in_chunks([p["sid"] for p in new_profiles]):
+            for pid, sid in conn.execute(sa_text(
+                f"SELECT id, student_id FROM student_profiles WHERE student_id IN ({placeholders})"
+            ), params).fetchall():
+                ctx.profiles[sid] = int(pid)
+
+    _ensure_student_creds_bulk(conn, [
+        (ctx.profiles[r.student_id], r.name, r.student_id) for r in profiles.itertuples(index=False)
+    ])
+
+    enrollments = valid.drop_duplicates(['student_id', 'degree_code'], keep='last')
+    enrollment_params = []
+    for r in enrollments.itertuples(index=False):
+        pid = ctx.profiles[r.student_id]
+        enrollment_params.append({
+            "pid": pid, "degree": r.degree_code, "prog": r.program_code, "branch": r.branch_code,
+            "div": r.division_code, "roll": r.final_roll, "batch": r.mapped_batch,
+            "year": r.mapped_year, "status": r.enrollment_status,
+            "id": ctx.enrollments.get((pid, r.degree_code)),
+        })
+    updates = [p for p in enrollment_params if p["id"] is not None]
+    inserts = [p for p in enrollment_params if p["id"] is None]
+    if updates:
+        conn.execute(sa_text("""
+            UPDATE student_enrollments
+            SET batch = :batch, 
+                program_code = :prog, 
+                branch_code = :branch, 
+                division_code = :div,
+                roll_number = :roll,
+                current_year = :year,
+                enrollment_status = :status, 
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = :id
+        """), updates)
+    if inserts:
+        conn.execute(sa_text("""
+            INSERT INTO student_enrollments (
+                student_profile_id, degree_code, program_code, branch_code, division_code,
+                roll_number, batch, current_year, enrollment_status, is_primary
+            ) VALUES (
+                :pid, :degree, :prog, :branch, :div,
+                :roll, :batch, :year, :status, 1
+            )
+        """), inserts)
+
+    custom_cols = [c for c in valid.columns if c.startswith("custom__")]
+    if custom_cols:
+        custom_params = [
+            {
+                "pid": ctx.profiles[sid],
+                "code": col[len("custom__"):],
+                "val": str(value) if value is not None else None,
+            }
+            for col in custom_cols
+            for sid, value in zip(profiles['student_id'], profiles[col])
+        ]
+        conn.execute(sa_text("""
+            INSERT INTO student_custom_profile_data (student_profile_id, field_code, value, updated_at)
+            VALUES (:pid, :code, :val, CURRENT_TIMESTAMP)
+            ON CONFLICT(student_profile_id, field_code) DO UPDATE SET
+                value = excluded.value,
+                updated_at = CURRENT_TIMESTAMP
+        """), custom_params)
+
+
 def _import_students_with_validation(
     engine: Engine,
     df: pd.DataFrame,
@@ -762,22 +1177,14 @@ def _import_students_with_validation(
     """
     Import students with strict validation.
     NOW INCLUDES: Email validation & Roll number generation.
+
+    Staged: reference data is prefetched once, the whole frame is validated
+    in memory, and valid rows are written with executemany. Rows that fail
+    validation are never written.
     """
     df.columns = [col.lower().strip().replace(' ', '_') for col in df.columns]
-    errors: List[Dict[str, Any]] = []
-    skipped_rows: List[Dict[str, Any]] = []
-    success_count = 0
     translation_map = _build_translation_map(mappings) if mappings else {}
 
-    # Metadata fetch
-    with engine.begin() as meta_conn:
-        all_degrees = _active_degrees(meta_conn)
-        
-        active_custom_fields_rows = meta_conn.execute(sa_text(
-            "SELECT code FROM student_custom_profile_fields WHERE active = 1"
-        )).fetchall()
-        active_custom_fields = {row[0] for row in active_custom_fields_rows}
-
     # Transaction logic
     if conn_for_transaction:
         conn = conn_for_transaction
@@ -789,265 +1196,10 @@ def _import_students_with_validation(
         should_close = True
 
     try:
-        for idx, row in df.iterrows():
-            row_num = idx + 2
-            try:
-                # 1. Validate Profile Data
-                email = str(row.get('email', '')).strip().lower()
-                student_id = str(row.get('student_id', '')).strip()
-                name = str(row.get('name', '')).strip()
-
-                if not name or not email or not student_id:
-                    errors.append({'row': row_num, 'email': email, 'error': "Missing required fields: name, email, student_id"})
-                    continue
-
-                # 1.5 Process Enrollment Data First (needed for validation)
-                degree_code = str(row.get('degree_code', '')).strip()
-                if not degree_code:
-                    errors.append({'row': row_num, 'email': email, 'error': "Missing degree_code"})
-                    continue
-                
-                if degree_code not in all_degrees:
-                    errors.append({'row': row_num, 'email': email, 'error': f"Degree '{degree_code}' not found"})
-                    continue
-                
-                batch = str(row.get('batch', '')).strip()
-                current_year = str(row.get('current_year', '')).strip()
-                
-                if not batch or not current_year:
-                    errors.append({'row': row_num, 'email': email, 'error': "Missing batch or year"})
-                    continue
-                
-                try:
-                    year_int = int(current_year)
-                    valid_years = _get_valid_years_for_degree(conn, degree_code)
-                    if valid_years and year_int not in valid_years:
-                        errors.append({
-                            'row': row_num, 
-                            'email': email, 
-                            'error': f"Year {year_int} is outside degree duration (valid: {valid_years})"
-                        })
-                        continue
-                except ValueError:
-                    errors.append({'row': row_num, 'email': email, 'error': f"Invalid year value: {current_year}"})
-                    continue
-                
-                mapped_batch = translation_map.get('batch', {}).get(batch, batch)
-                mapped_year = translation_map.get('year', {}).get(current_year, current_year)
-                
-                if mapped_batch == "[IGNORE]" or mapped_year == "[IGNORE]":
-                    skipped_rows.append({"row": row_num, "email": email, "reason": "Ignored by mapping"})
-                    continue
-
-                # **NEW: EMAIL VALIDATION BASED ON YEAR**
-                email_valid, email_error = _validate_email_for_year(conn, email, year_int)
-                if not email_valid:
-                    errors.append({
-                        'row': row_num, 
-                        'email': email, 
-                        'error': f"Email validation failed: {email_error}"
-                    })
-                    continue
-
-                # **NEW: ROLL NUMBER GENERATION/VALIDATION**
-                provided_roll = str(row.get('roll_number', '')).strip() or None
-                
-                if provided_roll:
-                    # Validate provided roll number
-                    roll_valid, roll_error = _validate_roll_number(conn, provided_roll, degree_code, student_id)
-                    if not roll_valid:
-                        errors.append({
-                            'row': row_num, 
-                            'email': email, 
-                            'error': f"Roll number validation failed: {roll_error}"
-                        })
-                        continue
-                    roll_number = provided_roll
-                else:
-                    # Generate roll number for 1st year students
-                    if year_int == 1:
-                        generated_roll = _generate_roll_number_for_first_year(
-                            conn, student_id, degree_code, mapped_batch, name
-                        )
-                        if generated_roll:
-                            roll_number = generated_roll
-                        else:
-                            # Fallback to student_id
-                            roll_number = student_id
-                            log.warning(f"Roll generation failed for {student_id}, using student_id")
-                    else:
-                        # Year 2+: use student_id as roll number if not provided
-                        roll_number = student_id
-
-                # 2. Upsert Profile
-                profile_id = conn.execute(sa_text(
-                    "SELECT id FROM student_profiles WHERE student_id = :sid"
-                ), {"sid": student_id}).fetchone()
-
-                if profile_id:
-                    profile_id = profile_id[0]
-                    conn.execute(sa_text("""
-                        UPDATE student_profiles
-                        SET name = :name, email = :email, phone = :phone, status = :status, updated_at = CURRENT_TIMESTAMP
-                        WHERE id = :id
-                    """), {
-                        "name": name, "email": email, "phone": row.get('phone'),
-                        "status": row.get('status', 'Good'), "id": profile_id
-                    })
-                else:
-                    res = conn.execute(sa_text("""
-                        INSERT INTO student_profiles (name, email, student_id, phone, status)
-                        VALUES (:name, :email, :sid, :phone, :status)
-                    """), {
-                        "name": name, "email": email, "sid": student_id,
-                        "phone": row.get('phone'), "status": row.get('status', 'Good')
-                    })
-                    profile_id = res.lastrowid
-
-                # 3. Ensure Credentials
-                _ensure_student_username_and_initial_creds(conn, profile_id, name, student_id)
-
-                # 4. Process Enrollment (continued)
-                batch_exists = conn.execute(sa_text(
-                    "SELECT 1 FROM degree_batches WHERE degree_code = :d AND batch_code = :b"
-                ), {"d": degree_code, "b": mapped_batch}).fetchone()
-                
-                if not batch_exists:
-                    legacy_batch = conn.execute(sa_text(
-                        "SELECT 1 FROM student_enrollments WHERE degree_code = :d AND batch = :b LIMIT 1"
-                    ), {"d": degree_code, "b": mapped_batch}).fetchone()
-                    if not legacy_batch:
-                        errors.append({'row': row_num, 'email': email, 'error': f"Batch '{mapped_batch}' does not exist. Create it first."})
-                        continue
-                
-                program_code = str(row.get('program_code', '')).strip() or None
-                branch_code = str(row.get('branch_code', '')).strip() or None
-                
-                # Handle division_code from CSV
-                division_code = str(row.get('division_code', '')).strip() or None
-                
-                # Validate division exists if provided
-                if division_code:
-                    div_enabled = _get_setting(conn, "div_enabled", "True") == "True"
-                    
-                    if div_enabled:
-                        div_exists = conn.execute(sa_text("""
-                            SELECT 1 FROM division_master
-                            WHERE degree_code = :degree
-                              AND batch = :batch
-                              AND current_year = :year
-                              AND division_code = :div
-                              AND active = 1
-                        """), {
-                            "degree": degree_code,
-                            "batch": mapped_batch,
-                            "year": mapped_year,
-                            "div": division_code
-                        }).fetchone()
-                        
-                        if not div_exists:
-                            import_optional = _get_setting(conn, "div_import_optional", "True") == "True"
-                            
-                            if not import_optional:
-                                errors.append({
-                                    'row': row_num, 
-                                    'email': email, 
-                                    'error': f"Division '{division_code}' not found for {degree_code}/{mapped_batch}/Year {mapped_year}"
-                                })
-                                continue
-                            else:
-                                division_code = None
-
-                # Upsert Enrollment WITH ROLL NUMBER
-                enrollment_id = conn.execute(sa_text("""
-                    SELECT id FROM student_enrollments
-                    WHERE student_profile_id = :pid AND degree_code = :degree
-                """), {
-                    "pid": profile_id, "degree": degree_code
-                }).fetchone()
-
-                if enrollment_id:
-                    conn.execute(sa_text("""
-                        UPDATE student_enrollments
-                        SET batch = :batch, 
-                            program_code = :prog, 
-                            branch_code = :branch, 
-                            division_code = :div,
-                            roll_number = :roll,
-                            current_year = :year,
-                            enrollment_status = :status, 
-                            updated_at = CURRENT_TIMESTAMP
-                        WHERE id = :id
-                    """), {
-                        "batch": mapped_batch, 
-                        "prog": program_code, 
-                        "branch": branch_code,
-                        "div": division_code,
-                        "roll": roll_number,
-                        "year": mapped_year, 
-                        "status": row.get('enrollment_status', 'active'),
-                        "id": enrollment_id[0]
-                    })
-                else:
-                    conn.execute(sa_text("""
-                        INSERT INTO student_enrollments (
-                            student_profile_id, 
-                            degree_code, 
-                            program_code, 
-                            branch_code,
-                            division_code,
-                            roll_number,
-                            batch, 
-                            current_year, 
-                            enrollment_status, 
-                            is_primary
-                        ) VALUES (
-                            :pid, 
-                            :degree, 
-                            :prog, 
-                            :branch, 
-                            :div,
-                            :roll,
-                            :batch, 
-                            :year, 
-                            :status, 
-                            1
-                        )
-                    """), {
-                        "pid": profile_id, 
-                        "degree": degree_code, 
-                        "prog": program_code,
-                        "branch": branch_code, 
-                        "div": division_code,
-                        "roll": roll_number,
-                        "batch": mapped_batch, 
-                        "year": mapped_year,
-                        "status": row.get('enrollment_status', 'active')
-                    })
-
-                # 5. Process Custom Fields
-                for field_code in active_custom_fields:
-                    if field_code in row:
-                        value = row.get(field_code)
-                        if pd.isna(value):
-                            value = None
-                        
-                        conn.execute(sa_text("""
-                            INSERT INTO student_custom_profile_data (student_profile_id, field_code, value, updated_at)
-                            VALUES (:pid, :code, :val, CURRENT_TIMESTAMP)
-                            ON CONFLICT(student_profile_id, field_code) DO UPDATE SET
-                                value = excluded.value,
-                                updated_at = CURRENT_TIMESTAMP
-                        """), {
-                            "pid": profile_id,
-                            "code": field_code,
-                            "val": str(value) if value is not None else None
-                        })
-
-                success_count += 1
-
-            except Exception as e:
-                errors.append({'row': row_num, 'email': str(row.get('email', '')).strip().lower(), 'error': str(e)})
+        ctx = _prefetch_student_import_context(conn, df)
+        valid, errors, skipped_rows = _validate_student_rows(df, ctx, translation_map)
+        _apply_student_rows(conn, valid, ctx)
+        errors.sort(key=lambda e: e['row'])
 
         if dry_run:
             trans.rollback()
@@ -1063,7 +1215,21 @@ def _import_students_with_validation(
         if should_close:
             conn.close()
 
-    return errors, success_count, skipped_rows
+    return errors, len(valid), skipped_rows
+
+
+def _run_student_import_chunk(
+    engine: Engine,
+    chunk: pd.DataFrame,
+    params: Dict[str, Any],
+) -> Tuple[List[Dict[str, Any]], int, List[Dict[str, Any]]]:
+    """Background job handler: import one committed chunk."""
+    return _import_students_with_validation(
+        engine, chunk, dry_run=False, mappings=params.get("mappings") or None
+    )
+
+
+register_import_handler("students", _run_student_import_chunk)
 
 
 # ------------------------------------------------------------------
@@ -1239,6 +1405,7 @@ def _add_student_import_export_section(engine: Engine):
                     if success:
                         st.success(message)
                         st.cache_data.clear()
+                        invalidate_tables("degree_batches", "batch_year_scaffold", "student_enrollments")
                         st.rerun()
                     else:
                         st.error(message)
@@ -1280,12 +1447,14 @@ def _add_student_import_export_section(engine: Engine):
                             if success:
                                 st.success(message)
                                 st.cache_data.clear()
+                                invalidate_tables("degree_batches", "batch_year_scaffold", "student_enrollments")
                                 st.rerun()
                             else:
                                 st.error(message)
 
     # File Uploader
     st.markdown("### 📤 Import Student Data")
+    render_import_jobs_panel(engine, "students")
     up = st.file_uploader("Upload CSV", type="csv", key="student_uploader")
 
     if st.session_state.student_import_step != 'initial':
@@ -1498,24 +1667,13 @@ Your CSV contains years outside the degree duration.
         with col2:
             if st.button("🚀 Import", key="execute", type="primary"):
                 try:
-                    with st.spinner("Importing with validation..."):
-                        errors, success, skipped = _import_students_with_validation(
-                            engine, df_to_import, dry_run=False, mappings=mappings
-                        )
-                    if errors:
-                        st.error(f"❌ {len(errors)} errors in {len(df_to_import)} rows")
-                        st.dataframe(pd.DataFrame(errors)[['row', 'email', 'error']], use_container_width=True)
-                        st.download_button(
-                            "Download Errors",
-                            pd.DataFrame(errors).to_csv(index=False),
-                            "errors.csv",
-                            "text/csv"
-                        )
-                    else:
-                        st.success(f"✅ Imported {success} students with validated emails & roll numbers")
-                        st.balloons()
-                    if skipped:
-                        st.info(f"ℹ️ {len(skipped)} skipped")
+                    # Runs in the background in committed chunks; progress
+                    # and errors are shown in the Import Jobs panel below.
+                    submit_import_job(
+                        engine, "students", df_to_import,
+                        params={"mappings": mappings, "degree_code": selected_degree},
+                        created_by=(st.session_state.get("user") or {}).get("email"),
+                    )
                     st.cache_data.clear()
                     _reset_student_import_state()
                     st.rerun()
@@ -1673,6 +1831,7 @@ def _add_student_mover_section(engine: Engine):
             
             st.success(success_msg + warning_msg)
             st.cache_data.clear()
+            invalidate_tables("student_enrollments")
 
             if "students_to_move_df" in st.session_state:
                 del st.session_state.students_to_move_df
@@ -1725,15 +1884,24 @@ def _add_student_credential_export_section(engine: Engine):
 # UI SECTION 4: STUDENT DATA EXPORTER
 # ------------------------------------------------------------------
 
-@st.cache_data
-def _get_student_data_to_export(_engine: Engine) -> pd.DataFrame:
+STUDENT_EXPORT_BASE_COLUMNS = [
+    "student_profile_id", "name", "email", "student_id", "phone", "status",
+    "degree_code", "program_code", "branch_code", "batch", "current_year",
+    "division_code", "roll_number", "enrollment_status",
+]
+
+
+def _student_data_export_spec(conn: Connection) -> WideExportSpec:
     """
-    Fetches all student profile, enrollment, and custom field data
-    and merges it into a single wide DataFrame for export.
+    Profile + primary enrollment rows, keyset-paged on the unique student_id,
+    with every custom field (by code) pivoted in per page.
     """
-    with _engine.connect() as conn:
-        # 1. Fetch base profile and enrollment data (WITH roll_number)
-        base_sql = """
+    custom_codes = [r[0] for r in conn.execute(sa_text(
+        "SELECT code FROM student_custom_profile_fields ORDER BY code"
+    )).fetchall()]
+    # Profiles are paged in the subquery so all enrollments of a student share a page
+    return WideExportSpec(
+        page_sql="""
             SELECT
                 p.id as student_profile_id,
                 p.name,
@@ -1749,90 +1917,62 @@ def _get_student_data_to_export(_engine: Engine) -> pd.DataFrame:
                 e.division_code,
                 e.roll_number,
                 e.enrollment_status
-            FROM student_profiles p
+            FROM (
+                SELECT id, name, email, student_id, phone, status
+                FROM student_profiles
+                WHERE {after}
+                ORDER BY student_id
+                LIMIT :limit
+            ) p
             LEFT JOIN student_enrollments e ON p.id = e.student_profile_id AND e.is_primary = 1
-            ORDER BY p.student_id
-        """
-        base_df = pd.read_sql_query(base_sql, conn)
-        
-        if base_df.empty:
-            return pd.DataFrame()
-
-        # 2. Fetch all custom data in long format
-        custom_sql = """
-            SELECT
-                student_profile_id,
-                field_code,
-                value
+            ORDER BY p.student_id, e.id
+        """,
+        keys=[("student_id", "student_id")],
+        custom_sql="""
+            SELECT student_profile_id, field_code, value
             FROM student_custom_profile_data
-        """
-        custom_df = pd.read_sql_query(custom_sql, conn)
-        
-        if custom_df.empty:
-            return base_df
+            WHERE student_profile_id IN (SELECT value FROM json_each(:ids))
+        """,
+        custom_key="student_profile_id",
+        custom_columns=[c for c in custom_codes if c not in STUDENT_EXPORT_BASE_COLUMNS],
+    )
 
-        # 3. Pivot custom data from long to wide
-        try:
-            pivoted_df = custom_df.pivot(
-                index='student_profile_id',
-                columns='field_code',
-                values='value'
-            ).reset_index()
-        except Exception as e:
-            log.error(f"Failed to pivot custom data: {e}")
-            return base_df
-
-        # 4. Merge base data with pivoted custom data
-        final_df = pd.merge(
-            base_df,
-            pivoted_df,
-            on='student_profile_id',
-            how='left'
-        )
-        
-        # 5. Get all custom field codes to ensure columns exist even if no data
-        all_custom_fields = conn.execute(sa_text(
-            "SELECT code FROM student_custom_profile_fields ORDER BY code"
-        )).fetchall()
-        all_custom_codes = [f[0] for f in all_custom_fields]
-        
-        for code in all_custom_codes:
-            if code not in final_df.columns:
-                final_df[code] = None
-                
-        # Reorder columns: base, then custom
-        final_columns = base_df.columns.tolist() + all_custom_codes
-        final_columns_ordered = []
-        for col in final_columns:
-            if col not in final_columns_ordered:
-                final_columns_ordered.append(col)
 
-        return final_df[final_columns_ordered]
+def _get_student_data_to_export(engine: Engine, fmt: str = "csv") -> ExportFile:
+    """
+    Streams all student profile, enrollment, and custom field data into a
+    single wide export file (csv / xlsx / parquet) in chunks.
+    """
+    with engine.connect() as conn:
+        spec = _student_data_export_spec(conn)
+    return stream_wide_export(engine, spec, fmt, "student_full_export")
 
 
 def _add_student_data_export_section(engine: Engine):
     """UI for the full student data exporter."""
     st.divider()
     st.subheader("📊 Export Full Student Data")
-    st.info("Download a single CSV file containing all student profile, enrollment, and custom field data.")
+    st.info("Download a single file containing all student profile, enrollment, and custom field data.")
 
+    fmt = st.selectbox("Format", list(EXPORT_FORMATS), key="student_full_export_format")
     if st.button("Generate & Download Student Data"):
         try:
             with st.spinner("Generating full student export..."):
-                df_export = _get_student_data_to_export(engine)
-
-            if df_export.empty:
-                st.warning("No student data to export.")
-                return
+                export = _get_student_data_to_export(engine, fmt)
 
-            csv = df_export.to_csv(index=False)
-
-            st.download_button(
-                "Download Data",
-                data=csv,
-                file_name="student_full_export.csv",
-                mime="text/csv"
-            )
+            try:
+                if export.rows == 0:
+                    st.warning("No student data to export.")
+                    return
+                with open(export.path, "rb") as fh:
+                    st.download_button(
+                        "Download Data",
+                        data=fh,
+                        file_name=export.file_name,
+                        mime=export.mime
+                    )
+            finally:
+                export.cleanup()
 
         except Exception as e:
             st.error(f"❌ Failed to export data: {str(e)}")
@@ -15,6 +15,7 @@ from sqlalchemy import text as sa_text
 from sqlalchemy.engine import Engine
 from datetime import datetime
 import logging
+from core.query_cache import invalidate_tables
 
 log = logging.getLogger(__name__)
 
@@ -388,6 +389,7 @@ def render_status_viewer(engine: Engine):
                     if success:
                         st.success(message)
                         st.cache_data.clear()
+                        invalidate_tables("student_enrollments")
                         
                         # Refresh data
                         df = _get_students_for_status_viewer(
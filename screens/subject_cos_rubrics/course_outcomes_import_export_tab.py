@@ -10,6 +10,7 @@ Features:
 """
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 from sqlalchemy import text as sa_text
 from sqlalchemy.engine import Engine
@@ -21,10 +22,13 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+from core.attainment_engine import mark_stale
+from core.co_matrix import CORRELATION_KINDS, OfferingCOs, load_offering_cos
+
 # Import from course_outcomes_tab
 from .course_outcomes_tab import (
+    CO_LIST_COLUMNS,
     fetch_cos_for_offering, 
-    save_co, 
     fetch_pos_for_degree, 
     fetch_psos_for_program, 
     fetch_peos_for_degree,
@@ -74,6 +78,16 @@ def generate_export_csv(cos_list: List[Dict]) -> bytes:
     return output.getvalue()
 
 
+def generate_matrix_csv(entry: OfferingCOs) -> bytes:
+    """CSV of the dense CO x PO/PSO/PEO correlation matrix (one row per CO)."""
+    frames = [entry.matrices[kind].to_frame() for kind in CORRELATION_KINDS]
+    df = pd.concat(frames, axis=1) if frames else pd.DataFrame()
+    output = BytesIO()
+    df.to_csv(output, index=True, encoding='utf-8')
+    output.seek(0)
+    return output.getvalue()
+
+
 def generate_template_csv() -> bytes:
     """Generate a template CSV with sample data and instructions."""
     template_data = [
@@ -192,89 +206,122 @@ def parse_correlations_from_import(corr_string: str) -> Dict[str, int]:
     return correlations
 
 
-def validate_co_row(row: pd.Series, row_num: int, valid_pos: set, valid_psos: set, 
-                    valid_peos: set, existing_co_codes: set) -> Tuple[List[str], List[str]]:
+BLOOM_LEVELS = ["Remember", "Understand", "Apply", "Analyze", "Evaluate", "Create"]
+CO_STATUSES = ["draft", "published"]
+CO_FIELDS = ["co_code", "title", "description", "bloom_level", "sequence", "weight_in_direct", "status"]
+
+
+def _blank(series: pd.Series) -> pd.Series:
+    return series.isna() | series.astype(str).str.strip().isin(["", "nan", "None"])
+
+
+def parse_correlation_column(series: pd.Series, kind: str) -> pd.DataFrame:
     """
-    Validate a single CO row.
-    Returns (errors, warnings) as lists of strings.
+    Vectorised parse_correlations_from_import for a whole column.
+    Returns one row per pair: row (sheet position), kind, code, value.
+    Pairs whose value is not an integer are skipped, as in the single-row parser.
     """
-    errors = []
-    warnings = []
-    
-    # Required field validation
-    if pd.isna(row.get('co_code')) or str(row.get('co_code', '')).strip() == '':
-        errors.append(f"Row {row_num}: co_code is required")
-    else:
-        co_code = str(row['co_code']).strip()
-        # Check for duplicates in import file
-        if co_code in existing_co_codes:
-            warnings.append(f"Row {row_num}: co_code '{co_code}' already exists (will update)")
-    
-    if pd.isna(row.get('title')) or str(row.get('title', '')).strip() == '':
-        errors.append(f"Row {row_num}: title is required")
-    
-    if pd.isna(row.get('description')) or str(row.get('description', '')).strip() == '':
-        errors.append(f"Row {row_num}: description is required")
-    
-    # Bloom level validation
-    valid_bloom_levels = ["Remember", "Understand", "Apply", "Analyze", "Evaluate", "Create"]
-    bloom_level = row.get('bloom_level', '')
-    if pd.isna(bloom_level) or str(bloom_level).strip() == '':
-        errors.append(f"Row {row_num}: bloom_level is required")
-    elif bloom_level not in valid_bloom_levels:
-        errors.append(f"Row {row_num}: bloom_level must be one of {valid_bloom_levels}, got '{bloom_level}'")
-    
-    # Sequence validation
-    try:
-        sequence = int(row.get('sequence', 0))
-        if sequence < 1:
-            errors.append(f"Row {row_num}: sequence must be >= 1, got {sequence}")
-    except (ValueError, TypeError):
-        errors.append(f"Row {row_num}: sequence must be a valid integer")
-    
-    # Weight validation
-    try:
-        weight = float(row.get('weight_in_direct', 0))
-        if weight < 0 or weight > 1:
-            errors.append(f"Row {row_num}: weight_in_direct must be between 0.0 and 1.0, got {weight}")
-    except (ValueError, TypeError):
-        errors.append(f"Row {row_num}: weight_in_direct must be a valid number")
-    
-    # Status validation
-    valid_statuses = ["draft", "published"]
-    status = row.get('status', 'draft')
-    if pd.isna(status):
-        status = 'draft'
-    if status not in valid_statuses:
-        errors.append(f"Row {row_num}: status must be 'draft' or 'published', got '{status}'")
-    
-    # Correlation validation
-    po_correlations = parse_correlations_from_import(row.get('po_correlations', ''))
-    pso_correlations = parse_correlations_from_import(row.get('pso_correlations', ''))
-    peo_correlations = parse_correlations_from_import(row.get('peo_correlations', ''))
-    
-    # Check for invalid PO codes
-    for po_code, value in po_correlations.items():
-        if po_code not in valid_pos:
-            warnings.append(f"Row {row_num}: PO code '{po_code}' not found in published POs (will skip)")
-        if value < 0 or value > 3:
-            errors.append(f"Row {row_num}: PO correlation value must be 0-3, got {value} for {po_code}")
-    
-    # Check for invalid PSO codes
-    for pso_code, value in pso_correlations.items():
-        if pso_code not in valid_psos:
-            warnings.append(f"Row {row_num}: PSO code '{pso_code}' not found in published PSOs (will skip)")
-        if value < 0 or value > 3:
-            errors.append(f"Row {row_num}: PSO correlation value must be 0-3, got {value} for {pso_code}")
-    
-    # Check for invalid PEO codes
-    for peo_code, value in peo_correlations.items():
-        if peo_code not in valid_peos:
-            warnings.append(f"Row {row_num}: PEO code '{peo_code}' not found in published PEOs (will skip)")
-        if value < 0 or value > 3:
-            errors.append(f"Row {row_num}: PEO correlation value must be 0-3, got {value} for {peo_code}")
-    
-    return errors, warnings
+    series = series.reset_index(drop=True)
+    parts = series.where(~_blank(series), "").astype(str).str.split("|").explode().str.strip()
+    parts = parts[parts.str.contains(":", regex=False)]
+    if parts.empty:
+        return pd.DataFrame(columns=["row", "kind", "code", "value"])
+    pairs = parts.str.split(":", n=1, expand=True)
+    value = pairs[1].str.strip()
+    whole = value.str.fullmatch(r"[+-]?\d+").to_numpy(dtype=bool)
+    return pd.DataFrame({
+        "row": pairs.index.to_numpy()[whole],
+        "kind": kind,
+        "code": pairs[0].str.strip().to_numpy()[whole],
+        "value": value.to_numpy()[whole].astype(int),
+    })
+
+
+def prepare_co_frame(df: pd.DataFrame, valid_codes: Dict[str, set], existing_co_codes: set
+                     ) -> Tuple[pd.DataFrame, pd.DataFrame, List[str], List[str]]:
+    """
+    Parse and validate a whole CO sheet with pandas.
+    valid_codes maps "po"/"pso"/"peo" to the published outcome codes.
+    Returns (cos, correlations, errors, warnings): cos has the cleaned
+    CO_FIELDS plus `row`; correlations has row, kind, code, value for the
+    known codes only. Messages are ordered by sheet row.
+    """
+    df = df.reset_index(drop=True)
+    row_num = pd.Series(df.index + 2, index=df.index)  # row 1 is the header
+    messages: List[Tuple[int, int, str, str]] = []  # (row, order, level, text)
+
+    def flag(mask, level: str, text, order: int):
+        for i in np.flatnonzero(np.asarray(mask)):
+            messages.append((int(row_num[i]), order,
+                             level, f"Row {row_num[i]}: {text(i) if callable(text) else text}"))
+
+    cos = pd.DataFrame({"row": row_num})
+    for column in ("co_code", "title", "description", "bloom_level"):
+        cos[column] = df[column].where(~_blank(df[column]), "").astype(str).str.strip()
+    status = df["status"].where(df["status"].notna(), "draft").astype(str).str.strip()
+    cos["status"] = status
+    cos["sequence"] = pd.to_numeric(df["sequence"], errors="coerce")
+    cos["weight_in_direct"] = pd.to_numeric(df["weight_in_direct"], errors="coerce")
+
+    no_code = cos["co_code"] == ""
+    flag(no_code, "error", "co_code is required", 0)
+    flag(~no_code & cos["co_code"].isin(existing_co_codes), "warning",
+         lambda i: f"co_code '{cos['co_code'][i]}' already exists (will update)", 0)
+    flag(cos["title"] == "", "error", "title is required", 1)
+    flag(cos["description"] == "", "error", "description is required", 2)
+    no_bloom = cos["bloom_level"] == ""
+    flag(no_bloom, "error", "bloom_level is required", 3)
+    flag(~no_bloom & ~cos["bloom_level"].isin(BLOOM_LEVELS), "error",
+         lambda i: f"bloom_level must be one of {BLOOM_LEVELS}, got '{cos['bloom_level'][i]}'", 3)
+    flag(cos["sequence"].isna(), "error", "sequence must be a valid integer", 4)
+    flag(cos["sequence"] < 1, "error", lambda i: f"sequence must be >= 1, got {int(cos['sequence'][i])}", 4)
+    flag(cos["weight_in_direct"].isna(), "error", "weight_in_direct must be a valid number", 5)
+    flag(~cos["weight_in_direct"].between(0, 1) & cos["weight_in_direct"].notna(), "error",
+         lambda i: f"weight_in_direct must be between 0.0 and 1.0, got {cos['weight_in_direct'][i]}", 5)
+    flag(~cos["status"].isin(CO_STATUSES), "error",
+         lambda i: f"status must be 'draft' or 'published', got '{cos['status'][i]}'", 6)
+
+    frames = [parse_correlation_column(df[f"{kind}_correlations"], kind)
+              for kind in CORRELATION_KINDS if f"{kind}_correlations" in df.columns]
+    correlations = (pd.concat(frames, ignore_index=True) if frames
+                    else pd.DataFrame(columns=["row", "kind", "code", "value"]))
+    correlations["row"] = correlations["row"].astype(int) + 2
+    known = np.array([code in valid_codes.get(kind, set())
+                      for kind, code in zip(correlations["kind"], correlations["code"])], dtype=bool)
+    out_of_range = ~correlations["value"].between(0, 3).to_numpy(dtype=bool)
+    for i in np.flatnonzero(~known):
+        r = correlations.iloc[i]
+        label = r["kind"].upper()
+        messages.append((int(r["row"]), 7, "warning",
+                         f"Row {r['row']}: {label} code '{r['code']}' not found in published {label}s (will skip)"))
+    for i in np.flatnonzero(out_of_range):
+        r = correlations.iloc[i]
+        messages.append((int(r["row"]), 8, "error",
+                         f"Row {r['row']}: {r['kind'].upper()} correlation value must be 0-3, got {r['value']} for {r['code']}"))
+
+    messages.sort(key=lambda m: (m[0], m[1]))
+    errors = [m[3] for m in messages if m[2] == "error"]
+    warnings = [m[3] for m in messages if m[2] == "warning"]
+
+    counts = cos.loc[~no_code, "co_code"].value_counts()
+    for co_code, count in counts[counts > 1].items():
+        errors.append(f"Duplicate co_code '{co_code}' appears {count} times in import file")
+
+    total_weight = cos["weight_in_direct"].sum()
+    if abs(total_weight - 1.0) > 0.01:
+        warnings.append(f"Total weight_in_direct is {total_weight:.3f}, should be close to 1.0")
+
+    return cos, correlations[known & ~out_of_range].reset_index(drop=True), errors, warnings
+
+
+def _valid_codes(engine: Engine, offering_info: Dict) -> Dict[str, set]:
+    degree, program = offering_info['degree_code'], offering_info.get('program_code')
+    return {
+        "po": {p['code'] for p in fetch_pos_for_degree(engine, degree, program)},
+        "pso": {p['code'] for p in fetch_psos_for_program(engine, degree, program,
+                                                          offering_info.get('branch_code'))},
+        "peo": {p['code'] for p in fetch_peos_for_degree(engine, degree, program)},
+    }
 
 
 def validate_import_file(df: pd.DataFrame, offering_info: Dict, engine: Engine, 
@@ -283,63 +330,19 @@ def validate_import_file(df: pd.DataFrame, offering_info: Dict, engine: Engine,
     Comprehensive validation of import file.
     Returns (is_valid, errors, warnings, processed_df)
     """
-    errors = []
-    warnings = []
-    
     # Check for required columns
-    required_columns = ['co_code', 'title', 'description', 'bloom_level', 'sequence', 'weight_in_direct', 'status']
-    missing_columns = [col for col in required_columns if col not in df.columns]
-    
+    missing_columns = [col for col in CO_FIELDS if col not in df.columns]
     if missing_columns:
-        errors.append(f"Missing required columns: {', '.join(missing_columns)}")
-        return False, errors, warnings, df
+        return False, [f"Missing required columns: {', '.join(missing_columns)}"], [], df
     
     # Check for empty file
     if df.empty:
-        errors.append("CSV file is empty")
-        return False, errors, warnings, df
-    
-    # Fetch valid outcomes
-    pos = fetch_pos_for_degree(engine, offering_info['degree_code'], offering_info.get('program_code'))
-    psos = fetch_psos_for_program(engine, offering_info['degree_code'], offering_info.get('program_code'), 
-                                   offering_info.get('branch_code'))
-    peos = fetch_peos_for_degree(engine, offering_info['degree_code'], offering_info.get('program_code'))
-    
-    valid_pos = {p['code'] for p in pos}
-    valid_psos = {p['code'] for p in psos}
-    valid_peos = {p['code'] for p in peos}
-    
-    existing_co_codes = {co['co_code'] for co in existing_cos}
-    
-    # Validate each row
-    for idx, row in df.iterrows():
-        row_errors, row_warnings = validate_co_row(
-            row, idx + 2,  # +2 because row 1 is header and we're 0-indexed
-            valid_pos, valid_psos, valid_peos, existing_co_codes
-        )
-        errors.extend(row_errors)
-        warnings.extend(row_warnings)
-    
-    # Check for duplicate co_codes within the import file
-    if 'co_code' in df.columns:
-        co_code_counts = df['co_code'].value_counts()
-        duplicates = co_code_counts[co_code_counts > 1]
-        if not duplicates.empty:
-            for co_code, count in duplicates.items():
-                errors.append(f"Duplicate co_code '{co_code}' appears {count} times in import file")
-    
-    # Validate total weight sums to 1.0 (or close to it)
-    if 'weight_in_direct' in df.columns:
-        try:
-            total_weight = df['weight_in_direct'].sum()
-            if abs(total_weight - 1.0) > 0.01:
-                warnings.append(f"Total weight_in_direct is {total_weight:.3f}, should be close to 1.0")
-        except:
-            pass
+        return False, ["CSV file is empty"], [], df
     
-    is_valid = len(errors) == 0
-    
-    return is_valid, errors, warnings, df
+    _, _, errors, warnings = prepare_co_frame(
+        df, _valid_codes(engine, offering_info), {co['co_code'] for co in existing_cos}
+    )
+    return len(errors) == 0, errors, warnings, df
 
 
 # ===========================================================================
@@ -348,62 +351,96 @@ def validate_import_file(df: pd.DataFrame, offering_info: Dict, engine: Engine,
 
 def execute_import(df: pd.DataFrame, engine: Engine, offering_id: int, offering_info: Dict,
                    existing_cos: List[Dict], valid_pos: set, valid_psos: set, 
-                   valid_peos: set) -> Tuple[int, int, List[str]]:
+                   valid_peos: set) -> Dict[str, object]:
     """
-    Execute the import operation.
-    Returns (success_count, fail_count, error_messages)
+    Import a validated CO sheet for one offering in a single transaction.
+    COs are matched on co_code: new ones are inserted, changed ones updated;
+    the correlations of every CO in the sheet are brought in line with it
+    (pairs with value 0 or an unknown code are dropped). COs missing from
+    the sheet are left alone.
+    Returns {"created", "updated", "unchanged", "correlations_changed", "errors"}.
     """
-    success_count = 0
-    fail_count = 0
-    error_messages = []
-    
-    existing_co_map = {co['co_code']: co for co in existing_cos}
-    
-    for idx, row in df.iterrows():
-        try:
-            # Parse correlations
-            po_correlations = parse_correlations_from_import(row.get('po_correlations', ''))
-            pso_correlations = parse_correlations_from_import(row.get('pso_correlations', ''))
-            peo_correlations = parse_correlations_from_import(row.get('peo_correlations', ''))
-            
-            # Filter out invalid codes
-            po_correlations = {k: v for k, v in po_correlations.items() if k in valid_pos}
-            pso_correlations = {k: v for k, v in pso_correlations.items() if k in valid_psos}
-            peo_correlations = {k: v for k, v in peo_correlations.items() if k in valid_peos}
-            
-            co_data = {
-                'co_code': str(row['co_code']).strip(),
-                'title': str(row['title']).strip(),
-                'description': str(row['description']).strip(),
-                'bloom_level': str(row['bloom_level']).strip(),
-                'sequence': int(row['sequence']),
-                'weight_in_direct': float(row['weight_in_direct']),
-                'status': str(row.get('status', 'draft')).strip(),
-                'po_correlations': po_correlations,
-                'pso_correlations': pso_correlations,
-                'peo_correlations': peo_correlations
-            }
-            
-            # Check if CO exists (update) or new (create)
-            co_id = None
-            if co_data['co_code'] in existing_co_map:
-                co_id = existing_co_map[co_data['co_code']]['id']
-            
-            # Save CO
-            success = save_co(engine, offering_id, co_data, co_id)
-            
-            if success:
-                success_count += 1
-            else:
-                fail_count += 1
-                error_messages.append(f"Failed to save CO '{co_data['co_code']}' at row {idx + 2}")
-        
-        except Exception as e:
-            fail_count += 1
-            error_messages.append(f"Error processing row {idx + 2} ({row.get('co_code', 'unknown')}): {str(e)}")
-            logger.error(f"Import error at row {idx + 2}: {e}", exc_info=True)
-    
-    return success_count, fail_count, error_messages
+    summary = {"created": 0, "updated": 0, "unchanged": 0, "correlations_changed": 0, "errors": []}
+    valid_codes = {"po": valid_pos, "pso": valid_psos, "peo": valid_peos}
+    cos, correlations, errors, _ = prepare_co_frame(df, valid_codes, {co['co_code'] for co in existing_cos})
+    if errors:
+        summary["errors"] = errors
+        return summary
+
+    cos = cos.assign(sequence=cos["sequence"].astype(int), weight_in_direct=cos["weight_in_direct"].astype(float))
+    current = load_offering_cos(engine, [offering_id], columns=["id", *CO_FIELDS])[int(offering_id)].cos
+    by_code = {co['co_code']: co for co in current}
+
+    inserts, updates = [], []
+    for record in cos[CO_FIELDS].to_dict("records"):
+        co = by_code.get(record['co_code'])
+        if co is None:
+            inserts.append({**record, "offering_id": offering_id})
+        elif any(co.get(f) != record[f] for f in CO_FIELDS):
+            updates.append({**record, "co_id": co['id']})
+    summary["created"], summary["updated"] = len(inserts), len(updates)
+    summary["unchanged"] = len(cos) - len(inserts) - len(updates)
+
+    try:
+        with engine.begin() as conn:
+            if updates:
+                conn.execute(sa_text("""
+                    UPDATE subject_cos
+                    SET co_code = :co_code, title = :title, description = :description,
+                        bloom_level = :bloom_level, sequence = :sequence,
+                        weight_in_direct = :weight_in_direct, status = :status,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id = :co_id
+                """), updates)
+            if inserts:
+                conn.execute(sa_text("""
+                    INSERT INTO subject_cos (
+                        offering_id, co_code, title, description, bloom_level,
+                        sequence, weight_in_direct, status, created_at, updated_at
+                    ) VALUES (
+                        :offering_id, :co_code, :title, :description, :bloom_level,
+                        :sequence, :weight_in_direct, :status, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+                    )
+                """), inserts)
+            ids = dict(conn.execute(sa_text(
+                "SELECT co_code, id FROM subject_cos WHERE offering_id = :oid"
+            ), {"oid": offering_id}).fetchall())
+
+            # Desired vs stored correlation pairs of the COs in the sheet
+            desired = correlations[correlations["value"] > 0].merge(cos[["row", "co_code"]], on="row")
+            desired = {(ids[r.co_code], r.kind, r.code): int(r.value) for r in desired.itertuples()}
+            sheet_ids = {ids[c] for c in cos["co_code"]}
+            stored = {(co['id'], kind, code): value
+                      for co in current if co['id'] in sheet_ids
+                      for kind in CORRELATION_KINDS
+                      for code, value in co[f"{kind}_correlations"].items()}
+
+            for kind in CORRELATION_KINDS:
+                removed = [{"co_id": k[0], "code": k[2]} for k in stored
+                           if k[1] == kind and k not in desired]
+                written = [{"co_id": k[0], "code": k[2], "value": v} for k, v in desired.items()
+                           if k[1] == kind and stored.get(k) != v]
+                if removed:
+                    conn.execute(sa_text(
+                        f"DELETE FROM co_{kind}_correlations WHERE co_id = :co_id AND {kind}_code = :code"
+                    ), removed)
+                if written:
+                    conn.execute(sa_text(f"""
+                        INSERT INTO co_{kind}_correlations (co_id, {kind}_code, correlation_value)
+                        VALUES (:co_id, :code, :value)
+                        ON CONFLICT(co_id, {kind}_code) DO UPDATE SET correlation_value = excluded.correlation_value
+                    """), written)
+                summary["correlations_changed"] += len(removed) + len(written)
+
+            if inserts or updates or summary["correlations_changed"]:
+                mark_stale(conn, [offering_id])
+    except Exception as e:
+        logger.error(f"Error importing COs for offering {offering_id}: {e}", exc_info=True)
+        return {"created": 0, "updated": 0, "unchanged": 0, "correlations_changed": 0, "errors": [str(e)]}
+
+    logger.info(f"Imported COs for offering {offering_id}: "
+                f"{ {k: v for k, v in summary.items() if k != 'errors'} }")
+    return summary
 
 
 # ===========================================================================
@@ -420,17 +457,22 @@ def render_export_section(engine: Engine, offering_id: int, offering_info: Dict)
     with col1:
         if st.button("📥 Export Current COs", use_container_width=True):
             with st.spinner("Generating export file..."):
-                cos_list = fetch_cos_for_offering(engine, offering_id)
+                entry = load_offering_cos(engine, [offering_id], columns=CO_LIST_COLUMNS)[int(offering_id)]
+                cos_list = entry.cos
                 
                 if not cos_list:
                     st.warning("This offering has no COs to export.")
                     return
                 
                 csv_data = generate_export_csv(cos_list)
-                filename = f"{offering_info['subject_code']}_Y{offering_info['year']}_T{offering_info['term']}_COs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+                stem = f"{offering_info['subject_code']}_Y{offering_info['year']}_T{offering_info['term']}"
+                stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                filename = f"{stem}_COs_{stamp}.csv"
                 
                 st.session_state.co_export_data = csv_data
                 st.session_state.co_export_filename = filename
+                st.session_state.co_matrix_data = generate_matrix_csv(entry)
+                st.session_state.co_matrix_filename = f"{stem}_CO_matrix_{stamp}.csv"
                 st.success(f"✅ Export file ready! ({len(cos_list)} COs)")
     
     with col2:
@@ -453,6 +495,15 @@ def render_export_section(engine: Engine, offering_id: int, offering_info: Dict)
             use_container_width=True
         )
     
+    if 'co_matrix_data' in st.session_state:
+        st.download_button(
+            label=f"⬇️ Download: {st.session_state.co_matrix_filename}",
+            data=st.session_state.co_matrix_data,
+            file_name=st.session_state.co_matrix_filename,
+            mime='text/csv',
+            use_container_width=True
+        )
+    
     if 'co_template_data' in st.session_state:
         st.download_button(
             label=f"⬇️ Download: {st.session_state.co_template_filename}",
@@ -554,8 +605,8 @@ def render_import_section(engine: Engine, offering_id: int, offering_info: Dict)
                 st.success("✅ File is valid and ready to import!")
                 
                 # Show what will happen
-                update_count = sum(1 for _, row in df.iterrows() 
-                                 if str(row.get('co_code', '')).strip() in {co['co_code'] for co in existing_cos})
+                update_count = int(df['co_code'].astype(str).str.strip()
+                                   .isin({co['co_code'] for co in existing_cos}).sum())
                 create_count = len(df) - update_count
                 
                 st.info(f"📊 Import will:\n- **Create** {create_count} new CO(s)\n- **Update** {update_count} existing CO(s)")
@@ -565,7 +616,7 @@ def render_import_section(engine: Engine, offering_id: int, offering_info: Dict)
                 with col1:
                     if st.button("🚀 Execute Import", type="primary", use_container_width=True):
                         with st.spinner("Importing COs..."):
-                            success_count, fail_count, error_messages = execute_import(
+                            summary = execute_import(
                                 df, engine, offering_id, offering_info, existing_cos,
                                 valid_pos, valid_psos, valid_peos
                             )
@@ -573,21 +624,23 @@ def render_import_section(engine: Engine, offering_id: int, offering_info: Dict)
                         st.markdown("---")
                         st.markdown("#### 📊 Import Results")
                         
-                        col_a, col_b, col_c = st.columns(3)
+                        col_a, col_b, col_c, col_d = st.columns(4)
                         with col_a:
-                            st.metric("✅ Successful", success_count)
+                            st.metric("🆕 Created", summary['created'])
                         with col_b:
-                            st.metric("❌ Failed", fail_count)
+                            st.metric("✏️ Updated", summary['updated'])
                         with col_c:
-                            st.metric("📊 Total", success_count + fail_count)
+                            st.metric("➖ Unchanged", summary['unchanged'])
+                        with col_d:
+                            st.metric("🔗 Correlations changed", summary['correlations_changed'])
                         
-                        if error_messages:
+                        if summary['errors']:
                             with st.expander("❌ Import Errors", expanded=True):
-                                for msg in error_messages:
+                                for msg in summary['errors']:
                                     st.error(msg)
                         
-                        if success_count > 0:
-                            st.success(f"✅ Successfully imported {success_count} CO(s)!")
+                        elif summary['created'] or summary['updated'] or summary['correlations_changed']:
+                            st.success(f"✅ Imported {summary['created'] + summary['updated']} CO change(s)!")
                             st.info("🔄 Page will refresh to show updated COs...")
                             st.balloons()
                             
@@ -595,6 +648,8 @@ def render_import_section(engine: Engine, offering_id: int, offering_info: Dict)
                             if 'co_import_file' in st.session_state:
                                 del st.session_state.co_import_file
                             st.rerun()
+                        else:
+                            st.info("Nothing to change: the file matches the stored COs.")
                 
                 with col2:
                     if st.button("❌ Cancel", use_container_width=True):
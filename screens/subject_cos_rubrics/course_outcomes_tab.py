@@ -12,6 +12,9 @@ from typing import List, Dict, Optional, Tuple
 import json
 import logging
 
+from core.attainment_engine import mark_stale
+from core.co_matrix import load_offering_cos
+
 logger = logging.getLogger(__name__)
 
 # Helper function
@@ -31,50 +34,22 @@ def is_valid(value):
 # DATA FETCHING FUNCTIONS - FIXED
 # ===========================================================================
 
+CO_LIST_COLUMNS = (
+    "id", "co_code", "title", "description", "bloom_level",
+    "sequence", "weight_in_direct", "status", "knowledge_type",
+    "created_at", "updated_at",
+)
+
+
 def fetch_cos_for_offering(engine: Engine, offering_id: int) -> List[Dict]:
     """Fetch all COs for a specific offering."""
-    with engine.begin() as conn:
-        result = conn.execute(sa_text("""
-            SELECT 
-                id, co_code, title, description, bloom_level,
-                sequence, weight_in_direct, status, knowledge_type,
-                created_at, updated_at
-            FROM subject_cos
-            WHERE offering_id = :offering_id
-            ORDER BY sequence, co_code
-        """), {"offering_id": offering_id})
-        
-        cos = [dict(row._mapping) for row in result]
-        
-        for co in cos:
-            # PO correlations
-            po_result = conn.execute(sa_text("""
-                SELECT po_code, correlation_value
-                FROM co_po_correlations
-                WHERE co_id = :co_id
-            """), {"co_id": co['id']})
-            co['po_correlations'] = {row._mapping['po_code']: row._mapping['correlation_value'] 
-                                    for row in po_result}
-            
-            # PSO correlations
-            pso_result = conn.execute(sa_text("""
-                SELECT pso_code, correlation_value
-                FROM co_pso_correlations
-                WHERE co_id = :co_id
-            """), {"co_id": co['id']})
-            co['pso_correlations'] = {row._mapping['pso_code']: row._mapping['correlation_value'] 
-                                     for row in pso_result}
-            
-            # PEO correlations
-            peo_result = conn.execute(sa_text("""
-                SELECT peo_code, correlation_value
-                FROM co_peo_correlations
-                WHERE co_id = :co_id
-            """), {"co_id": co['id']})
-            co['peo_correlations'] = {row._mapping['peo_code']: row._mapping['correlation_value'] 
-                                     for row in peo_result}
-        
-        return cos
+    return fetch_cos_for_offerings(engine, [offering_id])[int(offering_id)]
+
+
+def fetch_cos_for_offerings(engine: Engine, offering_ids: List[int]) -> Dict[int, List[Dict]]:
+    """COs with PO/PSO/PEO correlations for many offerings (four queries in total)."""
+    loaded = load_offering_cos(engine, offering_ids, columns=CO_LIST_COLUMNS)
+    return {oid: entry.cos for oid, entry in loaded.items()}
 
 
 def fetch_pos_for_degree(engine: Engine, degree_code: str, program_code: Optional[str] = None) -> List[Dict]:
@@ -265,6 +240,8 @@ def save_co(engine: Engine, offering_id: int, co_data: Dict, co_id: Optional[int
                             INSERT INTO co_peo_correlations (co_id, peo_code, correlation_value)
                             VALUES (:co_id, :peo_code, :value)
                         """), {"co_id": co_id, "peo_code": peo_code, "value": value})
+
+            mark_stale(conn, [offering_id])
         
         return True
     except Exception as e:
@@ -276,10 +253,14 @@ def delete_co(engine: Engine, co_id: int) -> bool:
     """Delete a CO."""
     try:
         with engine.begin() as conn:
+            offering_id = conn.execute(sa_text(
+                "SELECT offering_id FROM subject_cos WHERE id = :co_id"
+            ), {"co_id": co_id}).scalar()
             conn.execute(sa_text("DELETE FROM co_po_correlations WHERE co_id = :co_id"), {"co_id": co_id})
             conn.execute(sa_text("DELETE FROM co_pso_correlations WHERE co_id = :co_id"), {"co_id": co_id})
             conn.execute(sa_text("DELETE FROM co_peo_correlations WHERE co_id = :co_id"), {"co_id": co_id})
             conn.execute(sa_text("DELETE FROM subject_cos WHERE id = :co_id"), {"co_id": co_id})
+            mark_stale(conn, [offering_id])
         
         return True
     except Exception as e:
@@ -12,8 +12,17 @@ from typing import List, Dict, Optional
 import json
 import logging
 
+from core.attainment_engine import mark_stale, mark_stale_assessments
+from core.query_cache import invalidate_tables
+
 logger = logging.getLogger(__name__)
 
+# Tables behind RubricsService's cached rubric trees
+RUBRIC_TABLES = (
+    "rubric_configs", "rubric_assessments",
+    "rubric_assessment_criteria", "rubric_assessment_levels",
+)
+
 # ===========================================================================
 # DATA FETCHING FUNCTIONS
 # ===========================================================================
@@ -103,6 +112,15 @@ def fetch_cos_codes_for_offering(engine: Engine, offering_id: int) -> List[str]:
 # DATA MODIFICATION FUNCTIONS
 # ===========================================================================
 
+def _mark_config_stale(conn, config_id: int) -> None:
+    """Flag the offering owning a rubric config for attainment refresh."""
+    row = conn.execute(sa_text(
+        "SELECT offering_id FROM rubric_configs WHERE id = :config_id"
+    ), {"config_id": config_id}).fetchone()
+    if row:
+        mark_stale(conn, [row[0]])
+
+
 def create_rubric_config(engine: Engine, offering_id: int, config_data: Dict) -> Optional[int]:
     """Create a new rubric configuration."""
     try:
@@ -130,7 +148,9 @@ def create_rubric_config(engine: Engine, offering_id: int, config_data: Dict) ->
                 "show_before_assessment": config_data.get('show_before_assessment', 1),
                 "status": config_data.get('status', 'draft')
             })
-            return result.lastrowid
+            mark_stale(conn, [offering_id])
+        invalidate_tables(*RUBRIC_TABLES)
+        return result.lastrowid
     except Exception as e:
         logger.error(f"Error creating rubric config: {e}", exc_info=True)
         return None
@@ -156,7 +176,9 @@ def create_assessment(engine: Engine, config_id: int, assessment_data: Dict) ->
                 "mode": assessment_data['mode'],
                 "component_key": assessment_data.get('component_key')
             })
-            return result.lastrowid
+            _mark_config_stale(conn, config_id)
+        invalidate_tables(*RUBRIC_TABLES)
+        return result.lastrowid
     except Exception as e:
         logger.error(f"Error creating assessment: {e}", exc_info=True)
         return None
@@ -180,6 +202,8 @@ def add_criterion(engine: Engine, assessment_id: int, criterion_data: Dict) -> b
                 "weight_pct": criterion_data['weight_pct'],
                 "linked_cos": json.dumps(criterion_data.get('linked_cos', []))
             })
+            mark_stale_assessments(conn, [assessment_id])
+        invalidate_tables(*RUBRIC_TABLES)
         return True
     except Exception as e:
         logger.error(f"Error adding criterion: {e}", exc_info=True)
@@ -210,6 +234,8 @@ def add_level(engine: Engine, assessment_id: int, level_data: Dict) -> bool:
                 "level_sequence": level_data['level_sequence'],
                 "linked_cos": json.dumps(level_data.get('linked_cos', []))
             })
+            mark_stale_assessments(conn, [assessment_id])
+        invalidate_tables(*RUBRIC_TABLES)
         return True
     except Exception as e:
         logger.error(f"Error adding level: {e}", exc_info=True)
@@ -220,9 +246,12 @@ def delete_rubric_config(engine: Engine, config_id: int) -> bool:
     """Delete a rubric configuration (cascades to assessments, criteria, levels)."""
     try:
         with engine.begin() as conn:
+            # Resolve the offering before the row (and its cascade) is gone
+            _mark_config_stale(conn, config_id)
             conn.execute(sa_text("""
                 DELETE FROM rubric_configs WHERE id = :config_id
             """), {"config_id": config_id})
+        invalidate_tables(*RUBRIC_TABLES)
         return True
     except Exception as e:
         logger.error(f"Error deleting rubric config: {e}", exc_info=True)
@@ -238,6 +267,8 @@ def update_config_status(engine: Engine, config_id: int, status: str) -> bool:
                 SET status = :status, updated_at = CURRENT_TIMESTAMP
                 WHERE id = :config_id
             """), {"config_id": config_id, "status": status})
+            _mark_config_stale(conn, config_id)
+        invalidate_tables(*RUBRIC_TABLES)
         return True
     except Exception as e:
         logger.error(f"Error updating config status: {e}", exc_info=True)
@@ -373,7 +373,21 @@ def validate_freeze_rules(conn, offering_id: int, proposed_updates: Dict[str, An
         SELECT COUNT(*) FROM subject_marks WHERE offering_id = :id
     """, {"id": offering_id}).fetchone()[0]
     
-    if marks_count == 0:
+    return check_freeze_rules(result[0], marks_count, proposed_updates)
+
+
+def check_freeze_rules(is_frozen: int, marks_count: int, proposed_updates: Dict[str, Any]) -> Tuple[bool, str]:
+    """
+    Freeze guardrails for an offering whose frozen flag and marks count
+    are already known (bulk paths load these for many rows at once).
+    """
+    if not GUARDRAILS["freeze_on_marks_exist"]["enabled"]:
+        return True, ""
+    
+    if is_frozen != 1:
+        return True, ""  # Not frozen
+    
+    if not marks_count:
         return True, ""  # No marks, can edit
     
     # Check if only minor edits
@@ -4,12 +4,12 @@ FIXED: Proper error handling and None checks
 """
 
 from typing import Optional, List, Dict, Any, Tuple
-import streamlit as st
 from sqlalchemy import text as sa_text
+from core.query_cache import cached_query
 from .helpers import exec_query, rows_to_dicts
 
 
-@st.cache_data(ttl=300)
+@cached_query("degrees")
 def fetch_degrees(_engine):
     """Fetch all active degrees."""
     with _engine.begin() as conn:
@@ -23,7 +23,7 @@ def fetch_degrees(_engine):
     return rows_to_dicts(rows)
 
 
-@st.cache_data(ttl=300)
+@cached_query("programs")
 def fetch_programs(_engine, degree_code: str):
     """Fetch programs for a degree."""
     with _engine.begin() as conn:
@@ -36,7 +36,7 @@ def fetch_programs(_engine, degree_code: str):
     return rows_to_dicts(rows)
 
 
-@st.cache_data(ttl=300)
+@cached_query("branches", "programs")
 def fetch_branches(_engine, degree_code: str, program_code: Optional[str] = None):
     """Fetch branches for degree/program."""
     with _engine.begin() as conn:
@@ -59,7 +59,7 @@ def fetch_branches(_engine, degree_code: str, program_code: Optional[str] = None
     return rows_to_dicts(rows)
 
 
-@st.cache_data(ttl=300)
+@cached_query("curriculum_groups")
 def fetch_curriculum_groups(_engine, degree_code: str):
     """Fetch curriculum groups for a degree."""
     with _engine.begin() as conn:
@@ -72,7 +72,7 @@ def fetch_curriculum_groups(_engine, degree_code: str):
     return rows_to_dicts(rows)
 
 
-@st.cache_data(ttl=300)
+@cached_query("academic_years")
 def fetch_academic_years(_engine):
     """Fetch academic years (planned + open; skip closed)."""
     with _engine.begin() as conn:
@@ -89,7 +89,7 @@ def fetch_academic_years(_engine):
 # NEW/ENHANCED: PROPER SEMESTER STRUCTURE FETCHING
 # ============================================================================
 
-@st.cache_data(ttl=300)
+@cached_query("semester_binding", "degree_semester_struct")
 def fetch_degree_semester_structure(_engine, degree_code: str) -> Optional[Dict[str, Any]]:
     """
     Fetch the actual semester structure for a degree.
@@ -148,7 +148,7 @@ def fetch_degree_semester_structure(_engine, degree_code: str) -> Optional[Dict[
         }
 
 
-@st.cache_data(ttl=300)
+@cached_query("semesters")
 def fetch_semesters_for_degree(_engine, degree_code: str, 
                                program_id: Optional[int] = None,
                                branch_id: Optional[int] = None) -> List[Dict[str, Any]]:
@@ -192,7 +192,7 @@ def fetch_semesters_for_degree(_engine, degree_code: str,
 # NEW: BATCH AND STUDENT STATUS CHECKING
 # ============================================================================
 
-@st.cache_data(ttl=60)
+@cached_query("degree_batches", "batch_year_scaffold", "student_enrollments", ttl=60)
 def check_batch_exists(_engine, degree_code: str, ay_label: str, year: int) -> Dict[str, Any]:
     """
     Check if batch exists for this degree, AY, and year.
@@ -274,7 +274,7 @@ def check_batch_exists(_engine, degree_code: str, ay_label: str, year: int) -> D
         }
 
 
-@st.cache_data(ttl=60)
+@cached_query("elective_topics", "elective_student_selections", ttl=60)
 def check_elective_topics_status(_engine, degree_code: str, subject_code: str, 
                                  ay_label: str, year: int, term: int) -> Dict[str, Any]:
     """
@@ -518,7 +518,7 @@ def fetch_catalog_subjects_with_status(
 # EXISTING FUNCTIONS (kept for compatibility)
 # ============================================================================
 
-@st.cache_data(ttl=300)
+@cached_query("division_master", "degree_batches", "batch_year_scaffold")
 def fetch_divisions(_engine, degree_code: str, ay_label: str, year: int):
     """
     Fetch divisions for a specific degree, AY, and year
@@ -601,7 +601,7 @@ def fetch_offerings(conn, degree_code: str, ay_label: str, year: int, term: int,
     return rows_to_dicts(rows)
 
 
-@st.cache_data(ttl=300)
+@cached_query("subjects_catalog")
 def fetch_catalog_subject_details(
     _engine, subject_code: str, degree_code: str
 ) -> Optional[Dict[str, Any]]:
@@ -10,24 +10,48 @@ Includes:
 
 from typing import Dict, Any, List, Optional, Tuple
 import json
+import uuid
 from datetime import datetime, timedelta
 from sqlalchemy import text as sa_text
+from core.snapshot_store import (
+    OFFERING_SNAPSHOTS,
+    encode_snapshots,
+    load_snapshot,
+    prune_snapshots,
+)
 from .helpers import exec_query, rows_to_dicts
 from .constants import (
     validate_offering, 
     validate_offering_uniqueness,
     validate_freeze_rules,
+    check_freeze_rules,
     validate_elective_publish_requirements,
     validate_catalog_sync,
     format_audit_changed_fields,
     check_approval_required,
     PRETERM_DEFAULTS,
-    VERSIONING_SETTINGS
+    VERSIONING_SETTINGS,
+    STATUS_VALUES
 )
 
 
-def audit_offering(
-    conn,
+_AUDIT_INSERT_SQL = """
+    INSERT INTO subject_offerings_audit
+    (offering_id, subject_code, degree_code, program_code, branch_code,
+     curriculum_group_code, ay_label, year, term, division_code,
+     action, operation, note, reason, changed_fields, 
+     actor, actor_role, 
+     source, correlation_id, step_up_performed,
+     ip_address, user_agent, session_id, snapshot_json)
+    VALUES (:oid, :sc, :dc, :pc, :bc, :cg, :ay, :y, :t, :div,
+            :act, :op, :note, :reason, :fields,
+            :actor, :actor_role,
+            :source, :corr_id, :step_up,
+            :ip, :ua, :sid, :snapshot)
+"""
+
+
+def _audit_params(
     offering_id: int,
     subject_code: str,
     degree_code: str,
@@ -52,25 +76,9 @@ def audit_offering(
     year: int = None,
     term: int = None,
     division_code: str = None
-):
-    """
-    Write comprehensive audit log for offering changes.
-    Enhanced with all YAML-specified fields.
-    """
-    exec_query(conn, """
-        INSERT INTO subject_offerings_audit
-        (offering_id, subject_code, degree_code, program_code, branch_code,
-         curriculum_group_code, ay_label, year, term, division_code,
-         action, operation, note, reason, changed_fields, 
-         actor, actor_role, 
-         source, correlation_id, step_up_performed,
-         ip_address, user_agent, session_id, snapshot_json)
-        VALUES (:oid, :sc, :dc, :pc, :bc, :cg, :ay, :y, :t, :div,
-                :act, :op, :note, :reason, :fields,
-                :actor, :actor_role,
-                :source, :corr_id, :step_up,
-                :ip, :ua, :sid, :snapshot)
-    """, {
+) -> Dict[str, Any]:
+    """Bind parameters for one subject_offerings_audit row."""
+    return {
         "oid": offering_id,
         "sc": subject_code,
         "dc": degree_code,
@@ -95,7 +103,61 @@ def audit_offering(
         "ua": user_agent,
         "sid": session_id,
         "snapshot": snapshot_json
-    })
+    }
+
+
+def audit_offering(
+    conn,
+    offering_id: int,
+    subject_code: str,
+    degree_code: str,
+    ay_label: str,
+    action: str,
+    actor: str,
+    note: str = "",
+    reason: str = "",
+    changed_fields: Dict[str, Any] = None,
+    actor_role: str = None,
+    operation: str = None,
+    source: str = "ui",
+    correlation_id: str = None,
+    step_up_performed: bool = False,
+    ip_address: str = None,
+    user_agent: str = None,
+    session_id: str = None,
+    snapshot_json: str = None,
+    program_code: str = None,
+    branch_code: str = None,
+    curriculum_group_code: str = None,
+    year: int = None,
+    term: int = None,
+    division_code: str = None
+):
+    """
+    Write comprehensive audit log for offering changes.
+    Enhanced with all YAML-specified fields.
+    """
+    exec_query(conn, _AUDIT_INSERT_SQL, _audit_params(
+        offering_id, subject_code, degree_code, ay_label, action, actor,
+        note=note, reason=reason, changed_fields=changed_fields,
+        actor_role=actor_role, operation=operation, source=source,
+        correlation_id=correlation_id, step_up_performed=step_up_performed,
+        ip_address=ip_address, user_agent=user_agent, session_id=session_id,
+        snapshot_json=snapshot_json, program_code=program_code,
+        branch_code=branch_code, curriculum_group_code=curriculum_group_code,
+        year=year, term=term, division_code=division_code,
+    ))
+
+
+def audit_offerings_bulk(conn, entries: List[Dict[str, Any]]) -> int:
+    """
+    Write many audit rows with one executemany.
+    Each entry holds the keyword arguments of audit_offering().
+    """
+    if not entries:
+        return 0
+    conn.execute(sa_text(_AUDIT_INSERT_SQL), [_audit_params(**e) for e in entries])
+    return len(entries)
 
 
 def create_snapshot(
@@ -128,6 +190,9 @@ def create_snapshot(
     
     next_num = result[0]
     
+    # Delta against the offering's latest base snapshot
+    snapshot_data = encode_snapshots(conn, OFFERING_SNAPSHOTS, {offering_id: offering_dict})[offering_id]
+    
     # Mark previous snapshots as inactive
     exec_query(conn, """
         UPDATE subject_offerings_snapshots
@@ -146,7 +211,7 @@ def create_snapshot(
         "sc": offering_dict["subject_code"],
         "ay": offering_dict["ay_label"],
         "num": next_num,
-        "data": json.dumps(offering_dict, default=str),
+        "data": snapshot_data,
         "type": snapshot_type,
         "note": note,
         "actor": actor
@@ -157,6 +222,67 @@ def create_snapshot(
     return snapshot_id
 
 
+def create_snapshots_bulk(
+    conn,
+    offering_ids: List[int],
+    snapshot_type: str,
+    actor: str,
+    note: str = None,
+    notes: Optional[Dict[int, str]] = None
+) -> int:
+    """
+    Snapshot many offerings at once: one read of the rows, one MAX per
+    offering, one read of their base snapshots, one UPDATE to retire prior
+    versions and one executemany insert.
+    notes (offering_id -> note) overrides note per offering.
+    """
+    if not offering_ids:
+        return 0
+    ids = json.dumps([int(i) for i in offering_ids])
+
+    offerings = exec_query(conn, """
+        SELECT * FROM subject_offerings
+        WHERE id IN (SELECT value FROM json_each(:ids))
+    """, {"ids": ids}).fetchall()
+    last_numbers = dict(exec_query(conn, """
+        SELECT offering_id, MAX(snapshot_number)
+        FROM subject_offerings_snapshots
+        WHERE offering_id IN (SELECT value FROM json_each(:ids))
+        GROUP BY offering_id
+    """, {"ids": ids}).fetchall())
+
+    states = {row["id"]: row for row in rows_to_dicts(offerings)}
+    encoded = encode_snapshots(conn, OFFERING_SNAPSHOTS, states)
+
+    exec_query(conn, """
+        UPDATE subject_offerings_snapshots
+        SET is_active_version = 0
+        WHERE offering_id IN (SELECT value FROM json_each(:ids))
+        AND is_active_version = 1
+    """, {"ids": ids})
+
+    rows = []
+    for oid, offering_dict in states.items():
+        rows.append({
+            "oid": oid,
+            "sc": offering_dict["subject_code"],
+            "ay": offering_dict["ay_label"],
+            "num": (last_numbers.get(oid) or 0) + 1,
+            "data": encoded[oid],
+            "type": snapshot_type,
+            "note": (notes or {}).get(oid, note),
+            "actor": actor
+        })
+    if rows:
+        conn.execute(sa_text("""
+            INSERT INTO subject_offerings_snapshots
+            (offering_id, subject_code, ay_label, snapshot_number, snapshot_data,
+             snapshot_type, note, created_by, is_active_version)
+            VALUES (:oid, :sc, :ay, :num, :data, :type, :note, :actor, 1)
+        """), rows)
+    return len(rows)
+
+
 def _normalize_subject_type(subject_type: str) -> str:
     """
     Normalize subject type to proper case.
@@ -830,6 +956,171 @@ def unfreeze_offering(
         )
 
 
+# Columns copied as-is by copy-forward; status/override/created_by are set per copy
+_COPY_FORWARD_COLUMNS = [
+    "degree_code", "program_code", "branch_code", "curriculum_group_code",
+    "year", "term", "division_code", "applies_to_all_divisions",
+    "subject_code", "subject_type", "is_elective_parent",
+    "credits_total", "L", "T", "P", "S",
+    "internal_marks_max", "exam_marks_max", "jury_viva_marks_max", "total_marks_max",
+    "direct_weight_percent", "indirect_weight_percent",
+    "pass_threshold_overall", "pass_threshold_internal", "pass_threshold_external",
+    "instructor_email", "elective_selection_lead_days",
+]
+
+# Same offering slot in two AYs (NULL program/branch/division match each other)
+_SAME_SLOT = """
+    {a}.degree_code = {b}.degree_code AND {a}.year = {b}.year AND {a}.term = {b}.term
+    AND {a}.subject_code = {b}.subject_code
+    AND COALESCE({a}.program_code, '') = COALESCE({b}.program_code, '')
+    AND COALESCE({a}.branch_code, '') = COALESCE({b}.branch_code, '')
+    AND COALESCE({a}.division_code, '') = COALESCE({b}.division_code, '')
+"""
+
+ROLLOVER_COPY = "copy"
+ROLLOVER_EXISTS = "exists"
+ROLLOVER_NOT_IN_CATALOG = "not_in_catalog"
+
+
+def _plan_copy_forward(
+    conn,
+    from_ay: str,
+    to_ay: str,
+    degree_code: Optional[str] = None,
+    year: Optional[int] = None,
+    term: Optional[int] = None,
+    program_code: Optional[str] = None,
+    branch_code: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Classify every source offering in one query: copy, exists (already in
+    the target AY, or a duplicate slot in the source) or not_in_catalog.
+    """
+    where = ["o.ay_label = :from_ay"]
+    params: Dict[str, Any] = {"from_ay": from_ay, "to_ay": to_ay}
+    if degree_code:
+        where.append("o.degree_code = :d")
+        params["d"] = degree_code
+    if year is not None:
+        where.append("o.year = :y")
+        params["y"] = year
+    if term is not None:
+        where.append("o.term = :t")
+        params["t"] = term
+    if program_code:
+        where.append("(o.program_code = :p OR o.program_code IS NULL)")
+        params["p"] = program_code
+    if branch_code:
+        where.append("(o.branch_code = :b OR o.branch_code IS NULL)")
+        params["b"] = branch_code
+
+    rows = exec_query(conn, f"""
+        SELECT o.id, o.degree_code, o.year, o.term, o.subject_code,
+               o.program_code, o.branch_code, o.curriculum_group_code, o.division_code,
+               CASE
+                   WHEN NOT EXISTS (
+                       SELECT 1 FROM subjects_catalog c
+                       WHERE c.subject_code = o.subject_code
+                       AND c.degree_code = o.degree_code AND c.active = 1
+                   ) THEN '{ROLLOVER_NOT_IN_CATALOG}'
+                   WHEN EXISTS (
+                       SELECT 1 FROM subject_offerings n
+                       WHERE n.ay_label = :to_ay AND {_SAME_SLOT.format(a="n", b="o")}
+                   ) THEN '{ROLLOVER_EXISTS}'
+                   WHEN ROW_NUMBER() OVER (
+                       PARTITION BY o.degree_code, o.year, o.term, o.subject_code,
+                                    COALESCE(o.program_code, ''), COALESCE(o.branch_code, ''),
+                                    COALESCE(o.division_code, '')
+                       ORDER BY o.id
+                   ) > 1 THEN '{ROLLOVER_EXISTS}'
+                   ELSE '{ROLLOVER_COPY}'
+               END AS outcome
+        FROM subject_offerings o
+        WHERE {" AND ".join(where)}
+        ORDER BY o.degree_code, o.year, o.term, o.id
+    """, params).fetchall()
+    return rows_to_dicts(rows)
+
+
+def _apply_copy_forward(
+    conn,
+    plan: List[Dict[str, Any]],
+    from_ay: str,
+    to_ay: str,
+    actor: str,
+    actor_role: str = None,
+    correlation_id: str = None,
+    source: str = "ui"
+) -> Dict[int, int]:
+    """
+    Copy the planned rows with one INSERT ... SELECT, then snapshot and
+    audit them in bulk. Returns {source offering id: new offering id}.
+    """
+    source_ids = [r["id"] for r in plan if r["outcome"] == ROLLOVER_COPY]
+    if not source_ids:
+        return {}
+    ids = json.dumps(source_ids)
+
+    last_id = exec_query(conn, "SELECT COALESCE(MAX(id), 0) FROM subject_offerings").scalar()
+
+    cols = ", ".join(_COPY_FORWARD_COLUMNS)
+    src_cols = ", ".join(f"o.{c}" for c in _COPY_FORWARD_COLUMNS)
+    exec_query(conn, f"""
+        INSERT INTO subject_offerings (
+            ay_label, {cols},
+            status, override_inheritance, allow_negative_offset,
+            created_by, updated_by
+        )
+        SELECT :to_ay, {src_cols},
+               'draft', 0, COALESCE(o.allow_negative_offset, 1),
+               :actor, :actor
+        FROM subject_offerings o
+        WHERE o.id IN (SELECT value FROM json_each(:ids))
+        ORDER BY o.id
+    """, {"to_ay": to_ay, "actor": actor, "ids": ids})
+
+    # Rows are inserted in source id order inside this transaction, so the
+    # new ids pair up with the sorted source ids
+    new_ids = [r[0] for r in exec_query(conn, """
+        SELECT id FROM subject_offerings
+        WHERE id > :last_id AND ay_label = :to_ay
+        ORDER BY id
+    """, {"last_id": last_id, "to_ay": to_ay}).fetchall()]
+    id_map = dict(zip(sorted(source_ids), new_ids))
+
+    by_source = {r["id"]: r for r in plan}
+    if "create" in VERSIONING_SETTINGS["snapshot_on"]:
+        create_snapshots_bulk(
+            conn, list(id_map.values()), "create", actor,
+            notes={new_id: f"Copied forward from {from_ay} offering ID {src_id}"
+                   for src_id, new_id in id_map.items()}
+        )
+
+    audit_offerings_bulk(conn, [
+        {
+            "offering_id": new_id,
+            "subject_code": by_source[src_id]["subject_code"],
+            "degree_code": by_source[src_id]["degree_code"],
+            "ay_label": to_ay,
+            "action": "copy_forward",
+            "actor": actor,
+            "note": f"Copied from {from_ay} offering ID {src_id}",
+            "actor_role": actor_role,
+            "operation": "copy_forward",
+            "source": source,
+            "correlation_id": correlation_id,
+            "program_code": by_source[src_id]["program_code"],
+            "branch_code": by_source[src_id]["branch_code"],
+            "curriculum_group_code": by_source[src_id]["curriculum_group_code"],
+            "year": by_source[src_id]["year"],
+            "term": by_source[src_id]["term"],
+            "division_code": by_source[src_id]["division_code"],
+        }
+        for src_id, new_id in id_map.items()
+    ])
+    return id_map
+
+
 def copy_offerings_forward(
     engine,
     from_ay: str,
@@ -847,153 +1138,103 @@ def copy_offerings_forward(
     Copy offerings from prior AY to new AY.
     Returns (count, list_of_messages)
     """
-    messages = []
-    
     with engine.begin() as conn:
-        # Fetch source offerings
-        query = """
-            SELECT * FROM subject_offerings
-            WHERE ay_label = :from_ay AND degree_code = :d AND year = :y AND term = :t
-        """
-        params = {"from_ay": from_ay, "d": degree_code, "y": year, "t": term}
-        
-        if program_code:
-            query += " AND (program_code = :p OR program_code IS NULL)"
-            params["p"] = program_code
-        
-        if branch_code:
-            query += " AND (branch_code = :b OR branch_code IS NULL)"
-            params["b"] = branch_code
-        
-        source_offerings = exec_query(conn, query, params).fetchall()
-        
-        if not source_offerings:
+        plan = _plan_copy_forward(conn, from_ay, to_ay, degree_code, year, term,
+                                  program_code, branch_code)
+        if not plan:
             return 0, ["No offerings found in source AY"]
-        
-        count = 0
-        for offering in source_offerings:
-            offering = dict(offering._mapping)
-            
-            # Check if subject still exists in catalog
-            catalog_exists = exec_query(conn, """
-                SELECT id FROM subjects_catalog
-                WHERE subject_code = :sc AND degree_code = :d AND active = 1
-            """, {"sc": offering["subject_code"], "d": offering["degree_code"]}).fetchone()
-            
-            if not catalog_exists:
-                messages.append(f"Skipped {offering['subject_code']}: No longer in catalog")
-                continue
-            
-            # Check if offering already exists in target AY
-            target_exists = exec_query(conn, """
-                SELECT id FROM subject_offerings
-                WHERE ay_label = :to_ay AND degree_code = :d AND year = :y AND term = :t
-                AND subject_code = :sc
-                AND COALESCE(program_code, '') = COALESCE(:p, '')
-                AND COALESCE(branch_code, '') = COALESCE(:b, '')
-                AND COALESCE(division_code, '') = COALESCE(:div, '')
-            """, {
-                "to_ay": to_ay,
-                "d": offering["degree_code"],
-                "y": offering["year"],
-                "t": offering["term"],
-                "sc": offering["subject_code"],
-                "p": offering.get("program_code"),
-                "b": offering.get("branch_code"),
-                "div": offering.get("division_code"),
-            }).fetchone()
-            
-            if target_exists:
-                messages.append(f"Skipped {offering['subject_code']}: Already exists in target AY")
-                continue
-            
-            # Copy offering to new AY
-            exec_query(conn, """
-                INSERT INTO subject_offerings (
-                    ay_label, degree_code, program_code, branch_code, curriculum_group_code,
-                    year, term, division_code, applies_to_all_divisions,
-                    subject_code, subject_type, is_elective_parent,
-                    credits_total, L, T, P, S,
-                    internal_marks_max, exam_marks_max, jury_viva_marks_max, total_marks_max,
-                    direct_weight_percent, indirect_weight_percent,
-                    pass_threshold_overall, pass_threshold_internal, pass_threshold_external,
-                    instructor_email, status, override_inheritance,
-                    elective_selection_lead_days, allow_negative_offset,
-                    created_by, updated_by
-                ) VALUES (
-                    :ay, :deg, :prog, :branch, :cg,
-                    :year, :term, :div, :all_div,
-                    :sc, :stype, :elec_parent,
-                    :credits, :L, :T, :P, :S,
-                    :int_max, :exam_max, :jury_max, :total_max,
-                    :dir_w, :ind_w,
-                    :pass_ov, :pass_int, :pass_ext,
-                    :instr, :status, :override,
-                    :elec_lead_days, :allow_neg_offset,
-                    :actor, :actor
-                )
-            """, {
-                "ay": to_ay,
-                "deg": offering["degree_code"],
-                "prog": offering.get("program_code"),
-                "branch": offering.get("branch_code"),
-                "cg": offering.get("curriculum_group_code"),
-                "year": offering["year"],
-                "term": offering["term"],
-                "div": offering.get("division_code"),
-                "all_div": offering["applies_to_all_divisions"],
-                "sc": offering["subject_code"],
-                "stype": offering["subject_type"],
-                "elec_parent": offering["is_elective_parent"],
-                "credits": offering["credits_total"],
-                "L": offering["L"],
-                "T": offering["T"],
-                "P": offering["P"],
-                "S": offering["S"],
-                "int_max": offering["internal_marks_max"],
-                "exam_max": offering["exam_marks_max"],
-                "jury_max": offering["jury_viva_marks_max"],
-                "total_max": offering["total_marks_max"],
-                "dir_w": offering["direct_weight_percent"],
-                "ind_w": offering["indirect_weight_percent"],
-                "pass_ov": offering["pass_threshold_overall"],
-                "pass_int": offering["pass_threshold_internal"],
-                "pass_ext": offering["pass_threshold_external"],
-                "instr": offering.get("instructor_email"),
-                "status": "draft",  # Always draft when copying
-                "override": 0,
-                "elec_lead_days": offering.get("elective_selection_lead_days"),
-                "allow_neg_offset": offering.get("allow_negative_offset", 1),
-                "actor": actor
-            })
-            
-            new_id = exec_query(conn, "SELECT last_insert_rowid()").fetchone()[0]
-            
-            # Create snapshot for new offering
-            if "create" in VERSIONING_SETTINGS["snapshot_on"]:
-                create_snapshot(conn, new_id, "create", actor,
-                              f"Copied forward from {from_ay} offering ID {offering['id']}")
-            
-            audit_offering(
-                conn, new_id, offering["subject_code"], offering["degree_code"],
-                to_ay, "copy_forward", actor,
-                f"Copied from {from_ay} offering ID {offering['id']}",
-                actor_role=actor_role,
-                operation="copy_forward",
-                source="ui",
-                correlation_id=correlation_id,
-                program_code=offering.get("program_code"),
-                branch_code=offering.get("branch_code"),
-                curriculum_group_code=offering.get("curriculum_group_code"),
-                year=offering["year"],
-                term=offering["term"],
-                division_code=offering.get("division_code")
-            )
-            
-            count += 1
-            messages.append(f"Copied {offering['subject_code']}")
-        
-        return count, messages
+
+        id_map = _apply_copy_forward(conn, plan, from_ay, to_ay, actor,
+                                     actor_role=actor_role, correlation_id=correlation_id)
+
+    messages = []
+    for row in plan:
+        if row["outcome"] == ROLLOVER_NOT_IN_CATALOG:
+            messages.append(f"Skipped {row['subject_code']}: No longer in catalog")
+        elif row["outcome"] == ROLLOVER_EXISTS:
+            messages.append(f"Skipped {row['subject_code']}: Already exists in target AY")
+        else:
+            messages.append(f"Copied {row['subject_code']}")
+    return len(id_map), messages
+
+
+def rollover_offerings(
+    engine,
+    from_ay: str,
+    to_ay: str,
+    actor: str,
+    actor_role: str = None,
+    degree_code: Optional[str] = None,
+    dry_run: bool = False,
+    correlation_id: str = None
+) -> Dict[str, Any]:
+    """
+    Copy every degree/year/term of one AY into another in a single pass.
+
+    With dry_run=True nothing is written; the result is the same diff the
+    real run would apply. Returns:
+        scopes:  per (degree, year, term) counts of copy / exists / not_in_catalog
+        rows:    every source offering with its outcome (and new_id after a run)
+        copied:  number of offerings created
+    """
+    if from_ay == to_ay:
+        raise ValueError("Source and target AY must differ")
+    correlation_id = correlation_id or f"rollover-{uuid.uuid4().hex[:12]}"
+
+    with engine.begin() as conn:
+        plan = _plan_copy_forward(conn, from_ay, to_ay, degree_code)
+        id_map = {} if dry_run else _apply_copy_forward(
+            conn, plan, from_ay, to_ay, actor,
+            actor_role=actor_role, correlation_id=correlation_id, source="system"
+        )
+
+    scopes: Dict[Tuple[str, int, int], Dict[str, Any]] = {}
+    for row in plan:
+        key = (row["degree_code"], row["year"], row["term"])
+        scope = scopes.setdefault(key, {
+            "degree_code": key[0], "year": key[1], "term": key[2],
+            ROLLOVER_COPY: 0, ROLLOVER_EXISTS: 0, ROLLOVER_NOT_IN_CATALOG: 0,
+        })
+        scope[row["outcome"]] += 1
+        row["new_id"] = id_map.get(row["id"])
+
+    return {
+        "from_ay": from_ay,
+        "to_ay": to_ay,
+        "dry_run": dry_run,
+        "correlation_id": correlation_id,
+        "copied": len(id_map),
+        "scopes": list(scopes.values()),
+        "rows": plan,
+    }
+
+
+def _load_offerings_for_update(conn, offering_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Target rows keyed by id, each with marks_count so freeze rules can be
+    checked in memory. marks_count is only computed for frozen rows.
+    """
+    ids = json.dumps(offering_ids)
+    try:
+        rows = exec_query(conn, """
+            SELECT o.*,
+                   CASE WHEN o.is_frozen = 1 THEN (
+                       SELECT COUNT(*) FROM subject_marks m WHERE m.offering_id = o.id
+                   ) ELSE 0 END AS marks_count
+            FROM subject_offerings o
+            WHERE o.id IN (SELECT value FROM json_each(:ids))
+        """, {"ids": ids}).fetchall()
+    except Exception as e:
+        if "no such table" not in str(e).lower():
+            raise
+        # No marks table yet - nothing can be frozen by marks
+        rows = exec_query(conn, """
+            SELECT o.*, 0 AS marks_count
+            FROM subject_offerings o
+            WHERE o.id IN (SELECT value FROM json_each(:ids))
+        """, {"ids": ids}).fetchall()
+
+    return {row["id"]: row for row in rows_to_dicts(rows)}
 
 
 def bulk_update_offerings(
@@ -1007,7 +1248,8 @@ def bulk_update_offerings(
 ) -> Tuple[int, List[str]]:
     """
     Perform a bulk update on a list of offering IDs.
-    Logs each update individually.
+    Rows and freeze state are loaded in one query; eligible rows are
+    snapshotted, updated and audited in bulk under one correlation id.
     Returns (updated_count, list_of_errors)
     """
     if not offering_ids:
@@ -1023,74 +1265,81 @@ def bulk_update_offerings(
         if k not in allowed_keys:
             return 0, [f"Invalid update key: {k}"]
 
-    updated_count = 0
+    if "status" in updates and updates["status"] not in STATUS_VALUES:
+        return 0, [f"Invalid status: {updates['status']}"]
+
+    correlation_id = correlation_id or f"bulk-update-{uuid.uuid4().hex[:12]}"
+    offering_ids = list(dict.fromkeys(int(i) for i in offering_ids))
+
+    note = f"Bulk update. {reason}"
+    if 'status' in updates:
+        note = f"Bulk status update to '{updates['status']}'. {reason}"
+    elif 'instructor_email' in updates:
+        note = f"Bulk instructor assign to '{updates['instructor_email']}'. {reason}"
+
     errors = []
     
     with engine.begin() as conn:
+        current_rows = _load_offerings_for_update(conn, offering_ids)
+
+        eligible = []
         for offering_id in offering_ids:
-            try:
-                # Fetch current offering for audit
-                current = exec_query(conn, """
-                    SELECT * FROM subject_offerings WHERE id = :id
-                """, {"id": offering_id}).fetchone()
-                
-                if not current:
-                    errors.append(f"Offering ID {offering_id}: Not found")
-                    continue
+            current = current_rows.get(offering_id)
+            if not current:
+                errors.append(f"Offering ID {offering_id}: Not found")
+                continue
 
-                current = dict(current._mapping)
-                
-                # Check freeze rules
-                ok, msg = validate_freeze_rules(conn, offering_id, updates)
-                if not ok:
-                    errors.append(f"Offering ID {offering_id}: {msg}")
-                    continue
-                
-                # Create snapshot before update
-                if "update" in VERSIONING_SETTINGS["snapshot_on"]:
-                    create_snapshot(conn, offering_id, "update", actor,
+            ok, msg = check_freeze_rules(current["is_frozen"], current["marks_count"], updates)
+            if not ok:
+                errors.append(f"Offering ID {offering_id}: {msg}")
+                continue
+
+            eligible.append(current)
+
+        if not eligible:
+            return 0, errors
+
+        eligible_ids = [c["id"] for c in eligible]
+
+        # Snapshot before update
+        if "update" in VERSIONING_SETTINGS["snapshot_on"]:
+            create_snapshots_bulk(conn, eligible_ids, "update", actor,
                                   f"Pre-bulk-update snapshot. Reason: {reason}")
+
+        set_clause = ", ".join([f"{k} = :{k}" for k in updates.keys()])
+        conn.execute(sa_text(f"""
+            UPDATE subject_offerings
+            SET {set_clause}, updated_at = CURRENT_TIMESTAMP, updated_by = :actor
+            WHERE id = :id
+        """), [{**updates, "id": oid, "actor": actor} for oid in eligible_ids])
+
+        entries = []
+        for current in eligible:
+            changed_fields = format_audit_changed_fields(current, updates)
+            entries.append({
+                "offering_id": current["id"],
+                "subject_code": current["subject_code"],
+                "degree_code": current["degree_code"],
+                "ay_label": current["ay_label"],
+                "action": "bulk_update",
+                "actor": actor,
+                "note": note,
+                "reason": reason,
+                "changed_fields": json.loads(changed_fields) if changed_fields else None,
+                "actor_role": actor_role,
+                "operation": "bulk_update",
+                "source": "ui",
+                "correlation_id": correlation_id,
+                "program_code": current.get("program_code"),
+                "branch_code": current.get("branch_code"),
+                "curriculum_group_code": current.get("curriculum_group_code"),
+                "year": current["year"],
+                "term": current["term"],
+                "division_code": current.get("division_code"),
+            })
+        audit_offerings_bulk(conn, entries)
                 
-                # Build UPDATE query dynamically
-                set_clause = ", ".join([f"{k} = :{k}" for k in updates.keys()])
-                params = {**updates, "id": offering_id, "actor": actor}
-                
-                exec_query(conn, f"""
-                    UPDATE subject_offerings
-                    SET {set_clause}, updated_at = CURRENT_TIMESTAMP, updated_by = :actor
-                    WHERE id = :id
-                """, params)
-                
-                note = f"Bulk update. {reason}"
-                if 'status' in updates:
-                    note = f"Bulk status update to '{updates['status']}'. {reason}"
-                elif 'instructor_email' in updates:
-                    note = f"Bulk instructor assign to '{updates['instructor_email']}'. {reason}"
-
-                changed_fields = format_audit_changed_fields(current, updates)
-                audit_offering(
-                    conn, offering_id, current["subject_code"], current["degree_code"],
-                    current["ay_label"], "bulk_update", actor,
-                    note,
-                    reason=reason,
-                    changed_fields=json.loads(changed_fields) if changed_fields else None,
-                    actor_role=actor_role,
-                    operation="bulk_update",
-                    source="ui",
-                    correlation_id=correlation_id,
-                    program_code=current.get("program_code"),
-                    branch_code=current.get("branch_code"),
-                    curriculum_group_code=current.get("curriculum_group_code"),
-                    year=current["year"],
-                    term=current["term"],
-                    division_code=current.get("division_code")
-                )
-                updated_count += 1
-                
-            except Exception as e:
-                errors.append(f"Offering ID {offering_id}: {str(e)}")
-                
-    return updated_count, errors
+    return len(eligible), errors
 
 
 def enable_override(
@@ -1256,6 +1505,166 @@ def disable_override(
         )
 
 
+_CATALOG_SYNC_SQL = """
+    UPDATE subject_offerings
+    SET credits_total = :credits,
+        L = :L, T = :T, P = :P, S = :S,
+        internal_marks_max = :int_max,
+        exam_marks_max = :exam_max,
+        jury_viva_marks_max = :jury_max,
+        total_marks_max = :total_max,
+        direct_weight_percent = :dir_w,
+        indirect_weight_percent = :ind_w,
+        pass_threshold_overall = :pass_ov,
+        pass_threshold_internal = :pass_int,
+        pass_threshold_external = :pass_ext,
+        updated_at = CURRENT_TIMESTAMP,
+        updated_by = :actor
+    WHERE id = :id
+"""
+
+
+# Columns trg_offerings_prevent_frozen_updates guards that a catalog sync
+# writes (offering column -> sync parameter)
+_FROZEN_SYNC_COLUMNS = {
+    "credits_total": "credits",
+    "internal_marks_max": "int_max",
+    "exam_marks_max": "exam_max",
+}
+FROZEN_OFFERING_ERROR = "Cannot modify frozen offering. Unfreeze first or contact admin."
+
+
+def _frozen_sync_conflict(offering: Dict[str, Any], params: Dict[str, Any]) -> bool:
+    """True when the sync would change a column the frozen-offering trigger rejects."""
+    if offering.get("is_frozen") != 1:
+        return False
+    # Mirrors the trigger's `!=`: a NULL on either side is not a change
+    return any(
+        offering.get(column) is not None and params[key] is not None
+        and offering[column] != params[key]
+        for column, key in _FROZEN_SYNC_COLUMNS.items()
+    )
+
+
+def _catalog_sync_params(offering_id: int, catalog: Dict[str, Any], actor: str) -> Dict[str, Any]:
+    """Bind parameters that reset one offering to its catalog values."""
+    total_marks = catalog["internal_marks_max"] + catalog["exam_marks_max"] + catalog["jury_viva_marks_max"]
+    return {
+        "id": offering_id,
+        "credits": catalog["credits_total"],
+        "L": catalog["L"],
+        "T": catalog["T"],
+        "P": catalog["P"],
+        "S": catalog["S"],
+        "int_max": catalog["internal_marks_max"],
+        "exam_max": catalog["exam_marks_max"],
+        "jury_max": catalog["jury_viva_marks_max"],
+        "total_max": total_marks,
+        "dir_w": catalog.get("direct_internal_weight_percent", 40.0),
+        "ind_w": 100.0 - catalog.get("direct_internal_weight_percent", 40.0),
+        "pass_ov": catalog.get("min_overall_percent", 40.0),
+        "pass_int": catalog.get("min_internal_percent", 50.0),
+        "pass_ext": catalog.get("min_external_percent", 40.0),
+        "actor": actor
+    }
+
+
+def _sync_offerings_with_catalog(
+    conn,
+    offering_ids: List[int],
+    actor: str,
+    actor_role: str = None,
+    force: bool = False,
+    correlation_id: str = None
+) -> Tuple[List[int], Dict[int, str]]:
+    """
+    Reset many offerings to their catalog values: one read of the offerings,
+    one read of their catalog rows, then bulk snapshot/update/audit.
+    Returns (synced_ids, {offering_id: error message}).
+    """
+    ids = json.dumps(offering_ids)
+    offerings = {
+        row["id"]: row for row in rows_to_dicts(exec_query(conn, """
+            SELECT * FROM subject_offerings
+            WHERE id IN (SELECT value FROM json_each(:ids))
+        """, {"ids": ids}).fetchall())
+    }
+    # First active catalog row per offering, as the single-offering sync picked it
+    catalogs = {}
+    for row in exec_query(conn, """
+        SELECT o.id AS offering_id, sc.*
+        FROM subject_offerings o
+        JOIN subjects_catalog sc ON sc.id = (
+            SELECT c.id FROM subjects_catalog c
+            WHERE c.subject_code = o.subject_code AND c.degree_code = o.degree_code
+            AND c.active = 1
+            LIMIT 1
+        )
+        WHERE o.id IN (SELECT value FROM json_each(:ids))
+    """, {"ids": ids}).fetchall():
+        catalog = dict(row._mapping)
+        catalogs[catalog.pop("offering_id")] = catalog
+
+    errors: Dict[int, str] = {}
+    params = []
+    synced = []
+    for offering_id in offering_ids:
+        offering = offerings.get(offering_id)
+        if not offering:
+            errors[offering_id] = "Offering not found"
+            continue
+        if offering["override_inheritance"] == 1 and not force:
+            errors[offering_id] = "Cannot sync: Override is enabled. Use force=True to override."
+            continue
+        catalog = catalogs.get(offering_id)
+        if not catalog:
+            errors[offering_id] = "Catalog subject not found"
+            continue
+        try:
+            row_params = _catalog_sync_params(offering_id, catalog, actor)
+        except Exception as e:
+            errors[offering_id] = str(e)
+            continue
+        # One frozen row would abort the whole executemany; report it instead
+        if _frozen_sync_conflict(offering, row_params):
+            errors[offering_id] = FROZEN_OFFERING_ERROR
+            continue
+        params.append(row_params)
+        synced.append(offering_id)
+
+    if not synced:
+        return synced, errors
+
+    # Create snapshot
+    if "update" in VERSIONING_SETTINGS["snapshot_on"]:
+        create_snapshots_bulk(conn, synced, "update", actor, "Pre-catalog-sync snapshot")
+
+    conn.execute(sa_text(_CATALOG_SYNC_SQL), params)
+
+    audit_offerings_bulk(conn, [
+        {
+            "offering_id": offering_id,
+            "subject_code": offerings[offering_id]["subject_code"],
+            "degree_code": offerings[offering_id]["degree_code"],
+            "ay_label": offerings[offering_id]["ay_label"],
+            "action": "update",
+            "actor": actor,
+            "note": f"Synced with catalog. Force: {force}",
+            "actor_role": actor_role,
+            "operation": "catalog_sync",
+            "correlation_id": correlation_id,
+            "program_code": offerings[offering_id].get("program_code"),
+            "branch_code": offerings[offering_id].get("branch_code"),
+            "curriculum_group_code": offerings[offering_id].get("curriculum_group_code"),
+            "year": offerings[offering_id]["year"],
+            "term": offerings[offering_id]["term"],
+            "division_code": offerings[offering_id].get("division_code"),
+        }
+        for offering_id in synced
+    ])
+    return synced, errors
+
+
 def sync_with_catalog(
     engine,
     offering_id: int,
@@ -1268,88 +1677,13 @@ def sync_with_catalog(
     Returns (success, message)
     """
     with engine.begin() as conn:
-        offering = exec_query(conn, """
-            SELECT * FROM subject_offerings WHERE id = :id
-        """, {"id": offering_id}).fetchone()
-        
-        if not offering:
-            return False, "Offering not found"
-        
-        offering = dict(offering._mapping)
-        
-        if offering["override_inheritance"] == 1 and not force:
-            return False, "Cannot sync: Override is enabled. Use force=True to override."
-        
-        # Get catalog
-        catalog = exec_query(conn, """
-            SELECT * FROM subjects_catalog
-            WHERE subject_code = :sc AND degree_code = :dc AND active = 1
-            LIMIT 1
-        """, {"sc": offering["subject_code"], "dc": offering["degree_code"]}).fetchone()
-        
-        if not catalog:
-            return False, "Catalog subject not found"
-        
-        catalog = dict(catalog._mapping)
-        
-        # Create snapshot
-        if "update" in VERSIONING_SETTINGS["snapshot_on"]:
-            create_snapshot(conn, offering_id, "update", actor,
-                          f"Pre-catalog-sync snapshot")
-        
-        # Update to catalog values
-        total_marks = catalog["internal_marks_max"] + catalog["exam_marks_max"] + catalog["jury_viva_marks_max"]
-        
-        exec_query(conn, """
-            UPDATE subject_offerings
-            SET credits_total = :credits,
-                L = :L, T = :T, P = :P, S = :S,
-                internal_marks_max = :int_max,
-                exam_marks_max = :exam_max,
-                jury_viva_marks_max = :jury_max,
-                total_marks_max = :total_max,
-                direct_weight_percent = :dir_w,
-                indirect_weight_percent = :ind_w,
-                pass_threshold_overall = :pass_ov,
-                pass_threshold_internal = :pass_int,
-                pass_threshold_external = :pass_ext,
-                updated_at = CURRENT_TIMESTAMP,
-                updated_by = :actor
-            WHERE id = :id
-        """, {
-            "id": offering_id,
-            "credits": catalog["credits_total"],
-            "L": catalog["L"],
-            "T": catalog["T"],
-            "P": catalog["P"],
-            "S": catalog["S"],
-            "int_max": catalog["internal_marks_max"],
-            "exam_max": catalog["exam_marks_max"],
-            "jury_max": catalog["jury_viva_marks_max"],
-            "total_max": total_marks,
-            "dir_w": catalog.get("direct_internal_weight_percent", 40.0),
-            "ind_w": 100.0 - catalog.get("direct_internal_weight_percent", 40.0),
-            "pass_ov": catalog.get("min_overall_percent", 40.0),
-            "pass_int": catalog.get("min_internal_percent", 50.0),
-            "pass_ext": catalog.get("min_external_percent", 40.0),
-            "actor": actor
-        })
-        
-        audit_offering(
-            conn, offering_id, offering["subject_code"], offering["degree_code"],
-            offering["ay_label"], "update", actor,
-            f"Synced with catalog. Force: {force}",
-            actor_role=actor_role,
-            operation="catalog_sync",
-            program_code=offering.get("program_code"),
-            branch_code=offering.get("branch_code"),
-            curriculum_group_code=offering.get("curriculum_group_code"),
-            year=offering["year"],
-            term=offering["term"],
-            division_code=offering.get("division_code")
+        synced, errors = _sync_offerings_with_catalog(
+            conn, [offering_id], actor, actor_role, force=force
         )
-        
+
+    if synced:
         return True, "Successfully synced with catalog"
+    return False, errors[offering_id]
 
 
 def rollback_to_snapshot(
@@ -1375,7 +1709,7 @@ def rollback_to_snapshot(
             raise ValueError(f"Snapshot {snapshot_id} not found for offering {offering_id}")
         
         snapshot_dict = dict(snapshot._mapping)
-        offering_data = json.loads(snapshot_dict["snapshot_data"])
+        offering_data = load_snapshot(conn, OFFERING_SNAPSHOTS, snapshot_id)
         
         # Check current offering status
         current = exec_query(conn, """
@@ -1574,29 +1908,14 @@ def cleanup_old_snapshots(
     """
     Clean up old snapshots, keeping only the most recent N per offering.
     Uses VERSIONING_SETTINGS['keep_last'] if not specified.
+    Surviving delta snapshots are rebased, so every kept version can still
+    be rolled back to. The background compaction job runs the same pruning.
     Returns count of deleted snapshots.
     """
     if keep_last is None:
         keep_last = VERSIONING_SETTINGS["keep_last"]
     
-    with engine.begin() as conn:
-        deleted = exec_query(conn, """
-            DELETE FROM subject_offerings_snapshots
-            WHERE id IN (
-                SELECT id FROM (
-                    SELECT id, 
-                           ROW_NUMBER() OVER (
-                               PARTITION BY offering_id 
-                               ORDER BY snapshot_number DESC
-                           ) as rn
-                    FROM subject_offerings_snapshots
-                )
-                WHERE rn > :keep_last
-            )
-        """, {"keep_last": keep_last})
-        
-        count = deleted.rowcount
-        return count
+    return prune_snapshots(engine, OFFERING_SNAPSHOTS, keep_last)
 
 
 def get_offerings_needing_sync(
@@ -1646,28 +1965,26 @@ def bulk_sync_with_catalog(
     offering_ids: List[int],
     actor: str,
     actor_role: str = None,
-    correlation_id: str = None
+    correlation_id: str = None,
+    force: bool = False
 ) -> Tuple[int, List[str]]:
     """
-    Bulk sync multiple offerings with catalog.
+    Bulk sync multiple offerings with catalog in one transaction.
     Returns (synced_count, list_of_errors)
     """
-    synced_count = 0
-    errors = []
-    
-    for offering_id in offering_ids:
-        try:
-            success, msg = sync_with_catalog(
-                engine, offering_id, actor, actor_role, force=False
-            )
-            if success:
-                synced_count += 1
-            else:
-                errors.append(f"Offering {offering_id}: {msg}")
-        except Exception as e:
-            errors.append(f"Offering {offering_id}: {str(e)}")
-    
-    return synced_count, errors
+    if not offering_ids:
+        return 0, []
+
+    correlation_id = correlation_id or f"catalog-sync-{uuid.uuid4().hex[:12]}"
+    offering_ids = list(dict.fromkeys(int(i) for i in offering_ids))
+
+    with engine.begin() as conn:
+        synced, errors = _sync_offerings_with_catalog(
+            conn, offering_ids, actor, actor_role,
+            force=force, correlation_id=correlation_id
+        )
+
+    return len(synced), [f"Offering {oid}: {msg}" for oid, msg in errors.items()]
 
 
 def get_elective_offerings_without_topics(
@@ -1893,7 +2210,9 @@ def reject_request(
 # Export all functions
 __all__ = [
     "audit_offering",
+    "audit_offerings_bulk",
     "create_snapshot",
+    "create_snapshots_bulk",
     "create_offering_from_catalog",
     "update_offering",
     "delete_offering",
@@ -1902,6 +2221,7 @@ __all__ = [
     "freeze_offering",
     "unfreeze_offering",
     "copy_offerings_forward",
+    "rollover_offerings",
     "bulk_update_offerings",
     "enable_override",
     "disable_override",
@@ -17,6 +17,7 @@ from ..db_helpers import (
 from ..offerings_crud import bulk_update_offerings
 from ..constants import STATUS_VALUES
 from core.forms import success
+from core.query_cache import invalidate_tables
 
 
 def render(engine, actor: str, CAN_EDIT: bool):
@@ -202,7 +203,7 @@ def render(engine, actor: str, CAN_EDIT: bool):
                             st.warning(f"{len(errors)} error(s) occurred:")
                             for err in errors:
                                 st.error(err)
-                        st.cache_data.clear()
+                        invalidate_tables("subject_offerings")
                         st.rerun()
                     except Exception as e:
                         st.error(f"Error: {e}")
@@ -255,7 +256,7 @@ def render(engine, actor: str, CAN_EDIT: bool):
                             st.warning(f"{len(errors)} error(s) occurred:")
                             for err in errors:
                                 st.error(err)
-                        st.cache_data.clear()
+                        invalidate_tables("subject_offerings")
                         st.rerun()
                     except Exception as e:
                         st.error(f"Error: {e}")
@@ -16,6 +16,7 @@ from ..db_helpers import (
 )
 from ..offerings_crud import update_offering
 from core.forms import success
+from core.query_cache import invalidate_tables
 
 
 def _show_override_row(
@@ -270,7 +271,7 @@ def render(engine, actor: str, CAN_EDIT: bool):
                     update_offering(engine, selected_offering_id, updates, actor)
                     
                     success(f"Successfully updated offering {offering['subject_code']}!")
-                    st.cache_data.clear()
+                    invalidate_tables("subject_offerings")
                     st.rerun()
 
                 except Exception as e:
@@ -8,6 +8,7 @@ import io
 from ..helpers import exec_query, rows_to_dicts
 from ..constants import OFFERINGS_EXPORT_COLUMNS, OFFERINGS_IMPORT_TEMPLATE_COLUMNS
 from core.forms import success
+from core.query_cache import invalidate_tables
 # --- NEW IMPORT ---
 from ..imports_offerings import import_offerings_from_df
 
@@ -167,7 +168,7 @@ def render(engine, actor: str, CAN_EDIT: bool):
                             )
 
                         # Clear caches so new data shows up
-                        st.cache_data.clear()
+                        invalidate_tables("subject_offerings")
                         # --- END MODIFIED BLOCK ---
                         
             except Exception as e:
@@ -14,10 +14,12 @@ from ..db_helpers import (
 )
 from ..offerings_crud import (
     create_offering_from_catalog, update_offering, delete_offering,
-    publish_offering, archive_offering, copy_offerings_forward
+    publish_offering, archive_offering, copy_offerings_forward,
+    rollover_offerings
 )
 from ..constants import SUBJECT_TYPES, STATUS_VALUES
 from core.forms import success
+from core.query_cache import invalidate_tables
 
 
 def render(engine, actor: str, CAN_EDIT: bool):
@@ -194,7 +196,7 @@ def render(engine, actor: str, CAN_EDIT: bool):
                         for oid in selected_ids:
                             publish_offering(engine, oid, actor, reason="Bulk publish")
                         success(f"Published {len(selected_ids)} offering(s)")
-                        st.cache_data.clear()
+                        invalidate_tables("subject_offerings")
                         st.rerun()
                     except Exception as e:
                         st.error(f"Error: {e}")
@@ -215,7 +217,7 @@ def render(engine, actor: str, CAN_EDIT: bool):
                         for oid in archive_ids:
                             archive_offering(engine, oid, actor, reason="Bulk archive")
                         success(f"Archived {len(archive_ids)} offering(s)")
-                        st.cache_data.clear()
+                        invalidate_tables("subject_offerings")
                         st.rerun()
                     except Exception as e:
                         st.error(f"Error: {e}")
@@ -263,11 +265,11 @@ def render(engine, actor: str, CAN_EDIT: bool):
                     try:
                         count, messages = copy_offerings_forward(
                             engine, from_ay, ay_label, degree_code, year, term, actor,
-                            filter_program_code, filter_branch_code
+                            program_code=filter_program_code, branch_code=filter_branch_code
                         )
                         success(f"Copied {count} offering(s) from {from_ay}")
                         st.session_state.show_copy_forward = False
-                        st.cache_data.clear()
+                        invalidate_tables("subject_offerings")
                         st.rerun()
                     except Exception as e:
                         st.error(f"Error: {e}")
@@ -320,7 +322,7 @@ def render(engine, actor: str, CAN_EDIT: bool):
                                     st.error(err)
                             
                             st.session_state.show_mass_publish = False
-                            st.cache_data.clear()
+                            invalidate_tables("subject_offerings")
                             st.rerun()
                         except Exception as e:
                             st.error(f"Error: {e}")
@@ -373,7 +375,7 @@ def render(engine, actor: str, CAN_EDIT: bool):
                                     st.error(err)
                             
                             st.session_state.show_mass_archive = False
-                            st.cache_data.clear()
+                            invalidate_tables("subject_offerings")
                             st.rerun()
                         except Exception as e:
                             st.error(f"Error: {e}")
@@ -433,7 +435,7 @@ def render(engine, actor: str, CAN_EDIT: bool):
                                     st.error(err)
                             
                             st.session_state.show_mass_delete = False
-                            st.cache_data.clear()
+                            invalidate_tables("subject_offerings")
                             st.rerun()
                         except Exception as e:
                             st.error(f"Error: {e}")
@@ -443,6 +445,76 @@ def render(engine, actor: str, CAN_EDIT: bool):
                     st.session_state.show_mass_delete = False
                     st.rerun()
 
+    # --- AY ROLLOVER ---
+    if CAN_EDIT:
+        with st.expander("🔁 AY Rollover (all years & terms)"):
+            st.caption(
+                "Copy every offering of a prior AY into the selected AY in one step. "
+                "Offerings already present or no longer in the catalog are skipped."
+            )
+            prior_ays = [ay["ay_code"] for ay in ays if ay["ay_code"] != ay_label]
+            if not prior_ays:
+                st.info("No other academic years to roll over from.")
+            else:
+                col1, col2 = st.columns(2)
+                with col1:
+                    rollover_from = st.selectbox("From AY", options=prior_ays, key="rollover_from_ay")
+                with col2:
+                    rollover_scope = st.radio(
+                        "Scope",
+                        options=["degree", "all"],
+                        format_func=lambda x: f"{degree_code} only" if x == "degree" else "All degrees",
+                        horizontal=True,
+                        key="rollover_scope"
+                    )
+                rollover_degree = degree_code if rollover_scope == "degree" else None
+                preview_key = (rollover_from, ay_label, rollover_degree)
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    if st.button("👁️ Preview", key="rollover_preview_btn"):
+                        try:
+                            st.session_state.rollover_preview = {
+                                "key": preview_key,
+                                "result": rollover_offerings(
+                                    engine, rollover_from, ay_label, actor,
+                                    degree_code=rollover_degree, dry_run=True
+                                ),
+                            }
+                        except Exception as e:
+                            st.error(f"Error: {e}")
+
+                preview = st.session_state.get("rollover_preview")
+                if preview and preview["key"] == preview_key:
+                    result = preview["result"]
+                    to_copy = sum(s["copy"] for s in result["scopes"])
+                    st.markdown(f"**{to_copy}** offering(s) will be copied from **{rollover_from}** to **{ay_label}**")
+                    if result["scopes"]:
+                        st.dataframe(pd.DataFrame(result["scopes"]), use_container_width=True, hide_index=True)
+                        skipped = [r for r in result["rows"] if r["outcome"] != "copy"]
+                        if skipped:
+                            st.markdown("**Skipped**")
+                            st.dataframe(
+                                pd.DataFrame(skipped)[["degree_code", "year", "term", "subject_code",
+                                                       "division_code", "outcome"]],
+                                use_container_width=True, hide_index=True
+                            )
+
+                    with col2:
+                        if st.button("✅ Run Rollover", key="rollover_run_btn", type="primary",
+                                     disabled=(to_copy == 0)):
+                            try:
+                                done = rollover_offerings(
+                                    engine, rollover_from, ay_label, actor,
+                                    degree_code=rollover_degree
+                                )
+                                st.session_state.pop("rollover_preview", None)
+                                invalidate_tables("subject_offerings")
+                                success(f"Rolled over {done['copied']} offering(s) from {rollover_from}")
+                                st.rerun()
+                            except Exception as e:
+                                st.error(f"Error: {e}")
+
     st.markdown("---")
 
     # --- CREATE NEW OFFERING ---
@@ -495,7 +567,7 @@ def render(engine, actor: str, CAN_EDIT: bool):
                                 instructor_email=instructor or None
                             )
                             success(f"Created offering with ID {offering_id}")
-                            st.cache_data.clear()
+                            invalidate_tables("subject_offerings")
                             st.rerun()
                         except Exception as e:
                             st.error(f"Error: {e}")
@@ -549,7 +621,7 @@ def render(engine, actor: str, CAN_EDIT: bool):
                                 }
                                 update_offering(engine, selected_offering_id, updates, actor)
                                 success(f"Updated offering {offering['subject_code']}")
-                                st.cache_data.clear()
+                                invalidate_tables("subject_offerings")
                                 st.rerun()
                             except Exception as e:
                                 st.error(f"Error: {e}")
@@ -570,7 +642,7 @@ def render(engine, actor: str, CAN_EDIT: bool):
                                 delete_offering(engine, selected_offering_id, actor)
                                 success(f"Deleted offering {offering['subject_code']}")
                                 del st.session_state.confirm_delete_offering
-                                st.cache_data.clear()
+                                invalidate_tables("subject_offerings")
                                 st.rerun()
                             except Exception as e:
                                 st.error(f"Error: {e}")
@@ -11,6 +11,7 @@ from ..templates_crud import (
     get_template_points, clone_template
 )
 from core.forms import success
+from core.query_cache import invalidate_tables
 from sqlalchemy import text as sa_text
 
 
@@ -165,7 +166,7 @@ def render(engine, actor: str, CAN_EDIT: bool):
                         if "template_num_points" in st.session_state:
                             st.session_state.template_num_points = 1
                             
-                        st.cache_data.clear()
+                        invalidate_tables("syllabus_templates", "syllabus_template_points")
                         st.rerun()
 
                     except Exception as e:
@@ -13,6 +13,8 @@ from io import StringIO
 from typing import Dict, List
 from sqlalchemy import text as sa_text
 
+from core.query_cache import cached_query, invalidate_tables
+
 # Import the subject_cos module
 from screens.subject_cos import (
     SubjectsApplication,
@@ -83,7 +85,7 @@ def can_edit() -> bool:
 # DATA LOADING HELPERS (Updated)
 # ===========================================================================
 
-@st.cache_data(ttl=300)
+@cached_query("degrees")
 def fetch_all_degrees() -> List[Dict]:
     """Fetch all degrees for selectbox."""
     engine = st.session_state.get("engine")
@@ -93,7 +95,7 @@ def fetch_all_degrees() -> List[Dict]:
         result = conn.execute(sa_text("SELECT code, title FROM degrees WHERE active = 1 ORDER BY sort_order, code")).fetchall()
         return [dict(row._mapping) for row in result]
 
-@st.cache_data(ttl=300)
+@cached_query("academic_years")
 def fetch_all_academic_years() -> List[Dict]:
     """Fetch all academic years for selectbox."""
     engine = st.session_state.get("engine")
@@ -103,7 +105,7 @@ def fetch_all_academic_years() -> List[Dict]:
         result = conn.execute(sa_text("SELECT ay_code FROM academic_years ORDER BY ay_code DESC")).fetchall()
         return [dict(row._mapping) for row in result]
 
-@st.cache_data(ttl=300)
+@cached_query("programs")
 def fetch_programs_for_degree(degree_code: str) -> List[Dict]:
     """Fetch programs filtered by degree."""
     if not degree_code:
@@ -116,7 +118,7 @@ def fetch_programs_for_degree(degree_code: str) -> List[Dict]:
         ).fetchall()
         return [dict(row._mapping) for row in result]
 
-@st.cache_data(ttl=300)
+@cached_query("branches")
 def fetch_branches_for_degree(degree_code: str) -> List[Dict]:
     """Fetch branches filtered by degree."""
     if not degree_code:
@@ -129,7 +131,7 @@ def fetch_branches_for_degree(degree_code: str) -> List[Dict]:
         ).fetchall()
         return [dict(row._mapping) for row in result]
 
-@st.cache_data(ttl=300)
+@cached_query("curriculum_groups")
 def fetch_cgs_for_degree(degree_code: str) -> List[Dict]:
     """Fetch curriculum groups filtered by degree."""
     if not degree_code:
@@ -142,7 +144,7 @@ def fetch_cgs_for_degree(degree_code: str) -> List[Dict]:
         ).fetchall()
         return [dict(row._mapping) for row in result]
 
-@st.cache_data(ttl=300)
+@cached_query("subjects_catalog")
 def fetch_all_subject_codes(degree_code: str) -> List[Dict]:
     """Fetch all subject codes for a degree."""
     if not degree_code:
@@ -150,7 +152,7 @@ def fetch_all_subject_codes(degree_code: str) -> List[Dict]:
     app = init_subjects_app()
     return app.catalog.get_all_subject_codes(degree_code)
 
-@st.cache_data(ttl=300)
+@cached_query("subject_offerings", "subjects_catalog")
 def fetch_offerings(degree_code: str, ay_label: str, year: int) -> list:
     """Fetch offerings with JOIN on catalog."""
     app = init_subjects_app()
@@ -164,7 +166,7 @@ def fetch_offerings(degree_code: str, ay_label: str, year: int) -> list:
         st.error(f"Error loading offerings: {e}")
         return []
 
-@st.cache_data(ttl=300)
+@cached_query("subject_offerings", "subjects_catalog")
 def fetch_published_offerings_for_rubrics() -> list:
     """Fetch published offerings, joining with catalog for display."""
     engine = st.session_state.get("engine")
@@ -367,7 +369,7 @@ def render_offerings_tab():
                                     audit = get_audit_entry(f"Publishing offering {offering['id']}")
                                     app.offerings.publish_offering(offering['id'], audit)
                                     st.success("Offering published!")
-                                    st.cache_data.clear()
+                                    invalidate_tables("subject_offerings")
                                     st.rerun()
                                 except Exception as e:
                                     st.error(f"Error: {e}")
@@ -486,7 +488,7 @@ def render_offerings_tab():
                 offering_id = app.offerings.create_offering(offering, audit)
                 
                 st.success(f"✅ Offering created successfully! (ID: {offering_id})")
-                st.cache_data.clear() # Clear cache to show new offering
+                invalidate_tables("subject_offerings")
                 st.rerun()
                 
             except ValueError as e:
@@ -739,7 +741,7 @@ def render_rubric_config_tab(app: SubjectsApplication):
                                     audit = get_audit_entry('publish_rubric')
                                     app.rubrics.publish_rubric(rubric['id'], audit)
                                     st.success("Rubric published successfully!")
-                                    st.cache_data.clear()
+                                    invalidate_tables("rubric_configs")
                                     st.rerun()
                                 except Exception as e:
                                     st.error(f"Error: {str(e)}")
@@ -758,7 +760,7 @@ def render_rubric_config_tab(app: SubjectsApplication):
                                 audit = get_audit_entry('version_rubric')
                                 new_version = app.rubrics.create_rubric_version(rubric['id'], audit)
                                 st.success(f"Created version {new_version}")
-                                st.cache_data.clear()
+                                invalidate_tables("rubric_configs")
                                 st.rerun()
                             except Exception as e:
                                 st.error(f"Error: {str(e)}")
@@ -775,7 +777,7 @@ def render_rubric_config_tab(app: SubjectsApplication):
                                     app.rubrics.lock_rubric(rubric['id'], reason, audit)
                                     st.success("Rubric locked")
                                     del st.session_state[f'locking_{rubric["id"]}']
-                                    st.cache_data.clear()
+                                    invalidate_tables("rubric_configs")
                                     st.rerun()
                                 except Exception as e:
                                     st.error(f"Error: {str(e)}")
@@ -797,7 +799,7 @@ def render_rubric_config_tab(app: SubjectsApplication):
                                     app.rubrics.unlock_rubric(rubric['id'], reason, audit)
                                     st.success("Rubric unlocked")
                                     del st.session_state[f'unlocking_{rubric["id"]}']
-                                    st.cache_data.clear()
+                                    invalidate_tables("rubric_configs")
                                     st.rerun()
                                 except Exception as e:
                                     st.error(f"Error: {str(e)}")
@@ -862,7 +864,7 @@ def render_rubric_config_tab(app: SubjectsApplication):
                     
                     config_id = app.rubrics.create_rubric_config(config, audit)
                     st.success(f"Rubric configuration created (ID: {config_id})")
-                    st.cache_data.clear()
+                    invalidate_tables("rubric_configs")
                     st.rerun()
                 
                 except Exception as e:
@@ -982,7 +984,7 @@ def render_assessments_tab(app: SubjectsApplication):
                                     audit = get_audit_entry('delete_assessment')
                                     app.rubrics.delete_assessment(assessment['id'], audit)
                                     st.success("Assessment deleted")
-                                    st.cache_data.clear()
+                                    invalidate_tables("rubric_assessments")
                                     st.rerun()
                                 except Exception as e:
                                     st.error(f"Error: {str(e)}")
@@ -1029,7 +1031,7 @@ def render_assessments_tab(app: SubjectsApplication):
                         
                         assess_id = app.rubrics.add_assessment(assessment, audit)
                         st.success(f"Assessment added (ID: {assess_id})")
-                        st.cache_data.clear()
+                        invalidate_tables("rubric_assessments")
                         st.rerun()
                     
                     except Exception as e:
@@ -1168,7 +1170,7 @@ def render_criteria_editor_tab(app: SubjectsApplication):
                                     assessment_id, criteria_data, audit_entry=audit
                                 )
                                 st.success("Criteria added successfully")
-                                st.cache_data.clear()
+                                invalidate_tables("rubric_assessment_criteria")
                                 st.rerun()
                             except Exception as e:
                                 st.error(f"Error: {str(e)}")
@@ -1251,7 +1253,7 @@ def render_criteria_editor_tab(app: SubjectsApplication):
                                 assessment_id, levels_data, audit
                             )
                             st.success("Levels added successfully")
-                            st.cache_data.clear()
+                            invalidate_tables("rubric_assessment_levels")
                             st.rerun()
                         except Exception as e:
                             st.error(f"Error: {str(e)}")
@@ -1298,7 +1300,7 @@ def render_criteria_catalog_tab(app: SubjectsApplication):
                     try:
                         criterion_id = app.rubrics.add_catalog_criterion(key, label, description)
                         st.success(f"Criterion added (ID: {criterion_id})")
-                        st.cache_data.clear()
+                        invalidate_tables("rubric_criteria_catalog")
                         st.rerun()
                     except Exception as e:
                         st.error(f"Error: {str(e)}")
@@ -1544,7 +1546,7 @@ def render_rubric_import_export_tab(app: SubjectsApplication):
                                 
                                 if result['success']:
                                     st.success(f"Successfully imported {result['assessments_created']} assessments!")
-                                    st.cache_data.clear()
+                                    invalidate_tables("rubric_assessments", "rubric_assessment_criteria")
                                     st.rerun()
                                 else:
                                     st.error("Import failed:")
@@ -1567,7 +1569,7 @@ def render_rubric_import_export_tab(app: SubjectsApplication):
                     
                     if result['success']:
                         st.success(f"Successfully added {result['criteria_added']} criteria.")
-                        st.cache_data.clear()
+                        invalidate_tables("rubric_criteria_catalog")
                         st.rerun()
                     else:
                         st.error("Catalog import failed:")
@@ -3,12 +3,12 @@ Database helper functions - Fetch operations with caching
 """
 
 from typing import Optional, List, Dict, Any
-import streamlit as st
 from sqlalchemy import text as sa_text
+from core.query_cache import cached_query
 from screens.subjects_syllabus.helpers import exec_query, rows_to_dicts
 
 
-@st.cache_data(ttl=300)
+@cached_query("degrees")
 def fetch_degrees(_engine):
     """Fetch all active degrees."""
     with _engine.begin() as conn:
@@ -22,7 +22,7 @@ def fetch_degrees(_engine):
     return rows_to_dicts(rows)
 
 
-@st.cache_data(ttl=300)
+@cached_query("programs")
 def fetch_programs(_engine, degree_code: str):
     """Fetch programs for a degree."""
     with _engine.begin() as conn:
@@ -35,7 +35,7 @@ def fetch_programs(_engine, degree_code: str):
     return rows_to_dicts(rows)
 
 
-@st.cache_data(ttl=300)
+@cached_query("branches", "programs")
 def fetch_branches(_engine, degree_code: str, program_code: Optional[str] = None):
     """Fetch branches for degree/program."""
     with _engine.begin() as conn:
@@ -58,7 +58,7 @@ def fetch_branches(_engine, degree_code: str, program_code: Optional[str] = None
     return rows_to_dicts(rows)
 
 
-@st.cache_data(ttl=300)
+@cached_query("curriculum_groups")
 def fetch_curriculum_groups(
     _engine,
     degree_code: str,
@@ -77,7 +77,7 @@ def fetch_curriculum_groups(
     return rows_to_dicts(rows)
 
 
-@st.cache_data(ttl=300)
+@cached_query("academic_years")
 def fetch_academic_years(_engine):
     """Fetch academic years (planned + open; skip closed)."""
     with _engine.begin() as conn:
@@ -13,6 +13,7 @@ from ..imports import import_subjects_from_df
 from ..templates_import import import_templates_from_df, TEMPLATE_IMPORT_COLUMNS  # NEW
 from ..constants import SUBJECT_IMPORT_TEMPLATE_COLUMNS, SIMPLE_SUBJECT_IMPORT_TEMPLATE_COLUMNS
 from core.forms import success
+from core.query_cache import invalidate_tables
 
 
 def render(engine, actor: str, CAN_EDIT: bool):
@@ -227,7 +228,7 @@ def render(engine, actor: str, CAN_EDIT: bool):
                         )
 
                     # Clear caches so new subjects show up when user navigates
-                    st.cache_data.clear()
+                    invalidate_tables("subjects_catalog")
                     # REMOVED: st.rerun() - let user stay on current tab
 
         except Exception as e:
@@ -394,7 +395,7 @@ def render(engine, actor: str, CAN_EDIT: bool):
                         )
 
                     # Clear caches
-                    st.cache_data.clear()
+                    invalidate_tables("syllabus_templates", "syllabus_template_points")
 
         except Exception as e:
             st.error(f"Failed to process CSV: {e}")
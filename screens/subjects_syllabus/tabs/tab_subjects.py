@@ -15,6 +15,7 @@ from screens.subjects_syllabus.db_helpers import (
 )
 from screens.subjects_syllabus.subjects_crud import create_subject, update_subject, delete_subject
 from core.forms import success
+from core.query_cache import cached_query, invalidate_tables
 from screens.subjects_syllabus.constants import DEFAULT_SUBJECT_TYPES
 from screens.subjects_syllabus.helpers import table_exists, exec_query, rows_to_dicts
 
@@ -52,7 +53,7 @@ def _delete_edit_workload_row(idx: int):
             st.session_state.edit_workload_components.pop(idx)
 
 # --- 3. FETCH ---
-@st.cache_data(ttl=300)
+@cached_query("semesters")
 def fetch_semesters_for_form(
     _engine, degree_code: str
 ) -> List[Dict[str, Any]]:
@@ -426,7 +427,7 @@ def render(engine, actor: str, CAN_EDIT: bool):
                             {"id": 4, "Code": "S", "Name": "Studios", "Hours": 0.0},
                         ]
                         
-                        st.cache_data.clear()
+                        invalidate_tables("subjects_catalog")
                         st.rerun()
                 except Exception as e:
                     st.error(f"Error: {str(e)}")
@@ -718,7 +719,7 @@ def render(engine, actor: str, CAN_EDIT: bool):
                         success(f"Subject {subject['subject_code']} updated!")
                         _clear_edit_state()
                         _reset_subject_selection()
-                        st.cache_data.clear()
+                        invalidate_tables("subjects_catalog")
                         st.rerun()
                     except Exception as e:
                         st.error(f"Error: {str(e)}")
@@ -744,7 +745,7 @@ def render(engine, actor: str, CAN_EDIT: bool):
                             del st.session_state.confirm_delete_id
                             _clear_edit_state()
                             _reset_subject_selection()
-                            st.cache_data.clear()
+                            invalidate_tables("subjects_catalog")
                             st.rerun()
                         except Exception as e:
                             st.error(f"Error: {e}")
@@ -22,6 +22,7 @@ from core.db import get_engine, init_db
 # from core.ui import render_footer_global # Removed if not used
 from core.policy import require_page
 from core.rbac import upsert_user, grant_role, revoke_role, get_user_id
+from core.usernames import allocate_username
 
 #<editor-fold desc="Helper Functions">
 FIXED_ROLES = ["director", "principal", "management_representative"]
@@ -35,16 +36,9 @@ def _username_from_name(full_name: str) -> tuple[str, str, str]:
     digits = "".join(random.choices(string.digits, k=4))
     return base5, last_initial, digits
 
-def _generate_username(conn, full_name: str, table: str, retries: int = 6) -> str:
-    base5, last_initial, digits = _username_from_name(full_name)
-    for _ in range(retries):
-        candidate = f"{base5}{last_initial}{digits}"
-        exists = conn.execute(sa_text(f"SELECT 1 FROM {table} WHERE username=:u"), {"u": candidate}).fetchone()
-        if not exists: return candidate
-        digits = "".join(random.choices(string.digits, k=4))
-    # Fallback for too many conflicts
-    fallback_suffix = f"{random.choice(string.ascii_lowercase)}{''.join(random.choices(string.digits, k=3))}"
-    return f"{base5}{last_initial}{digits}{fallback_suffix}".lower()
+def _generate_username(conn, full_name: str, table: str) -> str:
+    base5, last_initial, _ = _username_from_name(full_name)
+    return allocate_username(conn, table, f"{base5}{last_initial}", style="digits")
 
 def _initial_password_from_name(full_name: str, digits: str) -> str:
     base5, last_initial, _ = _username_from_name(full_name)